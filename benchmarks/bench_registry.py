@@ -0,0 +1,150 @@
+"""Latency of rebuilding the tool registry with mechanic and drift mounted.
+
+Times one rebuild, as the TUI does on a model switch or GUI/browser toggle,
+three ways, after a cold first build that spawns the MCP servers:
+
+- uncached: ``default_registry`` with MCP discovery forced every time (a
+  tools/list round trip per server, every tool rebuilt);
+- default_registry: fresh tools, MCP definitions cached per server process;
+- RegistryBuilder: only groups whose config changed are rebuilt.
+
+By default mechanic and drift are stand-in stdio servers that answer
+tools/list after ``--list-ms`` milliseconds (the real ones are Python
+processes that introspect the machine). ``--real`` uses the installed ones.
+
+    python benchmarks/bench_registry.py [--rounds 20] [--tools 12] [--list-ms 40] [--real]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from oshell.config import Config, MCPServerConfig
+from oshell.providers.base import LLMProvider
+from oshell.tools import RegistryBuilder, ToolRegistry, default_registry
+
+STAND_IN = '''
+import json, sys, time
+
+name, count, delay = sys.argv[1], int(sys.argv[2]), float(sys.argv[3])
+TOOLS = [
+    {"name": f"tool_{i}", "description": f"{name} tool {i}: looks at this machine.",
+     "inputSchema": {"type": "object", "properties": {"since": {"type": "string"}}}}
+    for i in range(count)
+]
+for line in sys.stdin:
+    msg = json.loads(line)
+    if msg.get("id") is None:
+        continue
+    if msg["method"] == "tools/list":
+        time.sleep(delay)
+        result = {"tools": TOOLS}
+    elif msg["method"] == "initialize":
+        result = {"protocolVersion": "2024-11-05", "capabilities": {},
+                  "serverInfo": {"name": name, "version": "0"}}
+    else:
+        result = {}
+    sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": result}) + "\\n")
+    sys.stdout.flush()
+'''
+
+
+class _Provider(LLMProvider):
+    """Answers the GUI capability check the way a vision model would."""
+
+    name = "bench"
+
+    def list_models(self) -> list[str]:
+        return ["a", "b"]
+
+    def chat(self, messages, **kw):
+        return iter(())
+
+    def capabilities(self, model: str) -> set[str]:
+        time.sleep(0.005)  # an /api/show round trip
+        return {"tools", "vision"}
+
+
+def _config(args: argparse.Namespace, workdir: Path) -> Config:
+    cfg = Config()
+    cfg.browser.enabled = True
+    if args.real:
+        return cfg
+    script = workdir / "stand_in.py"
+    script.write_text(STAND_IN)
+    cfg.mcp_servers = {
+        name: MCPServerConfig(
+            command=sys.executable,
+            args=[str(script), name, str(args.tools), str(args.list_ms / 1000)],
+        )
+        for name in ("mechanic", "drift")
+    }
+    return cfg
+
+
+def _forget_definitions() -> None:
+    from oshell import mcp
+
+    with mcp._clients_lock:
+        for client in mcp._clients.values():
+            client._tools = None
+
+
+def measure(build: Callable[[str], ToolRegistry], rounds: int) -> list[float]:
+    """Wall-clock ms per rebuild, switching between two models as a user would."""
+    out = []
+    for i in range(rounds):
+        t0 = time.perf_counter()
+        build("ab"[i % 2])
+        out.append((time.perf_counter() - t0) * 1e3)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rounds", type=int, default=20)
+    ap.add_argument("--tools", type=int, default=12, help="tools per stand-in server")
+    ap.add_argument("--list-ms", type=float, default=40, help="stand-in tools/list latency")
+    ap.add_argument("--real", action="store_true", help="use the installed mechanic/drift")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg = _config(args, Path(tmp))
+        provider = _Provider()
+
+        t0 = time.perf_counter()
+        first = default_registry(provider, cfg, model="a")
+        cold = (time.perf_counter() - t0) * 1e3
+        mounted = sum(t.name.startswith(("mechanic_", "drift_")) for t in first.active())
+        if not mounted:
+            print("no mechanic/drift tools mounted — are they installed? (try without --real)")
+
+        def uncached(model: str) -> ToolRegistry:
+            _forget_definitions()
+            return default_registry(provider, cfg, model=model)
+
+        builder = RegistryBuilder(provider, cfg)
+        builder.build("a")
+        runs = {
+            "uncached (old)": measure(uncached, args.rounds),
+            "default_registry": measure(
+                lambda m: default_registry(provider, cfg, model=m), args.rounds
+            ),
+            "RegistryBuilder": measure(builder.build, args.rounds),
+        }
+
+    print(f"{len(first.active())} tools, {mounted} from mechanic + drift; cold build {cold:.0f} ms")
+    base = statistics.median(runs["uncached (old)"])
+    for label, times in runs.items():
+        med = statistics.median(times)
+        print(f"{label:<18}: {med:8.2f} ms/rebuild (median)  ({base / max(med, 1e-9):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
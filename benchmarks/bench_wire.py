@@ -0,0 +1,82 @@
+"""Per-round CPU cost of encoding a chat request body.
+
+Every tool round re-sends the whole transcript. This compares encoding a
+long, screenshot-bearing history the old way (``to_wire()`` every message,
+then ``json.dumps`` the lot, as ``requests`` does for ``json=``) against
+``encode_chat_payload``, which splices in each message's memoized encoding.
+
+    python benchmarks/bench_wire.py [--messages 200] [--images 20] [--rounds 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import time
+
+from oshell.providers.base import Message, ToolCall, encode_chat_payload
+
+
+def transcript(n: int, images: int, image_kb: int) -> list[Message]:
+    """A system prompt, then user/assistant/tool turns; every k-th tool result
+    carries a screenshot-sized base64 image."""
+    blob = base64.b64encode(os.urandom(image_kb * 1024)).decode("ascii")
+    every = max(n // 3 // max(images, 1), 1)  # spread over the tool results
+    out = [Message(role="system", content="You are a helpful assistant. " * 40)]
+    for i in range(1, n):
+        kind = i % 3
+        if kind == 1:
+            out.append(Message(role="user", content=f"step {i}: " + "please continue " * 12))
+        elif kind == 2:
+            call = ToolCall(name="read_file", arguments={"path": f"src/mod_{i}.py"}, id=f"c{i}")
+            out.append(Message(role="assistant", content="Checking.", tool_calls=[call]))
+        else:
+            shot = [blob] if images and (i // 3) % every == 0 else []
+            out.append(Message(role="tool", content="line\n" * 60, images=shot))
+    return out
+
+
+def _old(messages: list[Message], fields: dict) -> bytes:
+    payload = {**fields, "messages": [m.to_wire() for m in messages]}
+    return json.dumps(payload).encode("utf-8")
+
+
+def _new(messages: list[Message], fields: dict) -> bytes:
+    return encode_chat_payload(messages, fields)
+
+
+def measure(fn, messages: list[Message], rounds: int) -> float:
+    """Mean CPU seconds per round; each round appends a reply, as the loop does."""
+    fields = {"model": "bench", "stream": True, "options": {"temperature": 0.7}}
+    msgs = list(messages)
+    fn(msgs, fields)  # warm-up (fills the memo for the new path)
+    total = 0.0
+    for i in range(rounds):
+        msgs.append(Message(role="assistant", content=f"round {i} reply " * 10))
+        t0 = time.process_time()
+        fn(msgs, fields)
+        total += time.process_time() - t0
+    return total / rounds
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--messages", type=int, default=200)
+    ap.add_argument("--images", type=int, default=20, help="messages carrying a screenshot")
+    ap.add_argument("--image-kb", type=int, default=256, help="raw size of each screenshot")
+    ap.add_argument("--rounds", type=int, default=50)
+    args = ap.parse_args()
+
+    messages = transcript(args.messages, args.images, args.image_kb)
+    body = len(_new(messages, {}))
+    old = measure(_old, messages, args.rounds)
+    new = measure(_new, transcript(args.messages, args.images, args.image_kb), args.rounds)
+    print(f"transcript: {args.messages} messages, {args.images} images, {body / 1e6:.1f} MB body")
+    print(f"to_wire + json.dumps : {old * 1e3:8.2f} ms/round")
+    print(f"encode_chat_payload  : {new * 1e3:8.2f} ms/round  ({old / max(new, 1e-9):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,11 @@ from .events import (
     LimitReached,
     TextDelta,
     ToolFinished,
+    ToolProgress,
     ToolStarted,
+    TurnCancelled,
     TurnComplete,
+    Usage,
 )
 from .loop import DEFAULT_SYSTEM_PROMPT, Agent
 
@@ -20,7 +23,10 @@ __all__ = [
     "Compacted",
     "TextDelta",
     "ToolStarted",
+    "ToolProgress",
     "ToolFinished",
     "TurnComplete",
+    "TurnCancelled",
     "LimitReached",
+    "Usage",
 ]
@@ -0,0 +1,192 @@
+"""Map-reduce summarization of the turns a compaction folds away.
+
+The ``Compactor`` cuts the dropped messages into chunks of about
+``chunk_tokens`` on message boundaries and summarizes each (map), up to
+``parallel`` at a time, then merges the notes, in groups if they are long
+(reduce). Chunk summaries are cached by model and chunk text; chunks are cut
+from the start of the span, so a later pass over the same turns only pays
+for new material. A failed chunk aborts the pass but its siblings stay cached.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from ..cancellation import CancelToken
+from ..providers.base import LLMProvider, Message
+from ..tracing import span
+from .ledger import CHARS_PER_TOKEN
+
+COMPACT_PROMPT = (
+    "Summarize this conversation into compact notes the assistant will continue "
+    "from. Preserve: facts and preferences the user stated, decisions made, file "
+    "paths, commands run and their outcomes, and any open tasks or promises. "
+    "Omit pleasantries and dead ends. 300 words maximum. Output only the notes."
+)
+
+_REDUCE_PROMPT = (
+    "These are notes on consecutive parts of one conversation, oldest first. "
+    "Merge them into a single set of compact notes the assistant will continue "
+    "from. Keep every fact, preference, decision, file path, command outcome and "
+    "open task; where later notes supersede earlier ones, keep the later. "
+    "300 words maximum. Output only the notes."
+)
+
+DEFAULT_CHUNK_TOKENS = 2000  # leaves room for the reply in a 4k fast-model window
+DEFAULT_MAX_ENTRIES = 512
+
+
+def transcript_chunks(messages: list[Message], chunk_chars: int) -> list[str]:
+    """``role: content`` lines grouped into chunks of at most ``chunk_chars``.
+
+    Chunks end on message boundaries. A single message longer than a chunk
+    gets chunks of its own.
+    """
+    chunk_chars = max(chunk_chars, 1)
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for m in messages:
+        line = f"{m.role}: {m.content}"
+        if current and size + len(line) + 1 > chunk_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        while len(line) > chunk_chars:
+            chunks.append(line[:chunk_chars])
+            line = line[chunk_chars:]
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+class Compactor:
+    """Summarizes a span of messages chunk by chunk, caching chunk summaries."""
+
+    def __init__(
+        self,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        parallel: int = 4,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.chunk_chars = int(max(chunk_tokens, 1) * CHARS_PER_TOKEN)
+        self.parallel = max(parallel, 1)
+        self.max_entries = max_entries
+        self._summaries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0  # summarizer requests made (map + reduce), for tests and doctor
+
+    def summarize(
+        self,
+        provider: LLMProvider,
+        messages: list[Message],
+        model: str,
+        cancel: CancelToken | None = None,
+    ) -> str:
+        """One summary of ``messages``; "" when any summarizer call fails or
+        ``cancel`` fires (the request in flight is closed, the rest never sent)."""
+        chunks = transcript_chunks(messages, self.chunk_chars)
+        if not chunks:
+            return ""
+        partials = self._map(provider, chunks, model, cancel)
+        if not all(partials):
+            return ""
+        return self._reduce(provider, partials, model, cancel)
+
+    def _map(
+        self,
+        provider: LLMProvider,
+        chunks: list[str],
+        model: str,
+        cancel: CancelToken | None = None,
+    ) -> list[str]:
+        keys = [_key(model, c) for c in chunks]
+        with self._lock:
+            partials = [self._summaries.get(k, "") for k in keys]
+            for k in keys:
+                if k in self._summaries:
+                    self._summaries.move_to_end(k)
+        missing = [i for i, p in enumerate(partials) if not p]
+        if not missing:
+            return partials
+        workers = min(self.parallel, len(missing))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="oshell-compact") as ex:
+            done = ex.map(lambda i: self._ask(provider, "map", chunks[i], model, cancel), missing)
+            for i, summary in zip(missing, done, strict=True):
+                partials[i] = summary
+        with self._lock:
+            for i in missing:
+                if partials[i]:
+                    self._summaries[keys[i]] = partials[i]
+            while len(self._summaries) > self.max_entries:
+                self._summaries.popitem(last=False)
+        return partials
+
+    def _reduce(
+        self,
+        provider: LLMProvider,
+        partials: list[str],
+        model: str,
+        cancel: CancelToken | None = None,
+    ) -> str:
+        """Merge partial notes, in groups that fit a chunk, until one is left."""
+        while len(partials) > 1:
+            groups = transcript_chunks(
+                [Message(role="notes", content=p) for p in partials], self.chunk_chars
+            )
+            if len(groups) >= len(partials):  # notes too long to group: merge pairwise
+                groups = [
+                    "\n".join(f"notes: {p}" for p in partials[i : i + 2])
+                    for i in range(0, len(partials), 2)
+                ]
+            partials = [self._ask(provider, "reduce", g, model, cancel) for g in groups]
+            if not all(partials):
+                return ""
+        return partials[0]
+
+    def _ask(
+        self,
+        provider: LLMProvider,
+        stage: str,
+        text: str,
+        model: str,
+        cancel: CancelToken | None = None,
+    ) -> str:
+        """One summarizer call; ``stage`` is "map" (a chunk) or "reduce" (notes)."""
+        if cancel is not None and cancel.cancelled:
+            return ""
+        with self._lock:
+            self.calls += 1
+        prompt = COMPACT_PROMPT if stage == "map" else _REDUCE_PROMPT
+        with span(f"compact.{stage}", cat="compact", model=model, chars=len(text)) as sp:
+            try:
+                summary = "".join(
+                    c.content
+                    for c in provider.chat(
+                        [
+                            Message(role="system", content=prompt),
+                            Message(role="user", content=text),
+                        ],
+                        model=model,
+                        stream=False,
+                        temperature=0.2,
+                        cancel=cancel,
+                    )
+                ).strip()
+            except Exception:
+                summary = ""
+            if cancel is not None and cancel.cancelled:
+                summary = ""  # cut off mid-reply: never cache a partial note
+            sp.set(summary_chars=len(summary))
+        return summary
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+
+def _key(model: str, chunk: str) -> str:
+    return hashlib.sha256(f"{model}\0{chunk}".encode()).hexdigest()
@@ -10,6 +10,8 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any
 
+from ..providers.base import TokenUsage
+
 
 @dataclass
 class TextDelta:
@@ -22,12 +24,29 @@ class TextDelta:
 class ToolStarted:
     name: str
     arguments: dict[str, Any] = field(default_factory=dict)
+    index: int = 0  # the call's position among the round's tool calls
+
+
+@dataclass
+class ToolProgress:
+    """Output a still-running tool produced since its last progress event.
+
+    Forwarded at most once per ``tool_progress_interval`` per call, so a
+    chatty command can't flood the front-end; ``text`` holds the newest part
+    of what arrived in that window. ``index`` matches the call's
+    ``ToolStarted``, telling apart two calls of one tool running in parallel.
+    """
+
+    name: str
+    text: str
+    index: int = 0
 
 
 @dataclass
 class ToolFinished:
     name: str
     result: str
+    index: int = 0  # as on the call's ToolStarted
 
 
 @dataclass
@@ -37,6 +56,17 @@ class TurnComplete:
     text: str
 
 
+@dataclass
+class TurnCancelled:
+    """The user cancelled the turn. It ends here, in place of ``TurnComplete``.
+
+    ``text`` is the reply streamed before the cancel, possibly empty. The
+    transcript keeps it, marked as interrupted.
+    """
+
+    text: str
+
+
 @dataclass
 class LimitReached:
     """The tool-iteration safety cap was hit before the model finished."""
@@ -50,6 +80,29 @@ class Compacted:
 
     dropped: int  # messages replaced by the summary
     summary_chars: int
+    background: bool = False  # prepared between turns rather than while the user waited
 
 
-AgentEvent = TextDelta | ToolStarted | ToolFinished | TurnComplete | LimitReached | Compacted
+@dataclass
+class Usage:
+    """Backend-reported tokens and timings for one model round of a turn.
+
+    Emitted after each round whose backend reported usage, so front-ends can
+    show measured prefill/decode rates and load time instead of estimates.
+    """
+
+    model: str
+    stats: TokenUsage
+
+
+AgentEvent = (
+    TextDelta
+    | ToolStarted
+    | ToolProgress
+    | ToolFinished
+    | TurnComplete
+    | TurnCancelled
+    | LimitReached
+    | Compacted
+    | Usage
+)
@@ -0,0 +1,166 @@
+"""Per-message token accounting for the context gauge and compaction trigger.
+
+The ``TokenLedger`` estimates each message once, when it is first seen, and
+keeps a running total of what is in context (images, tool-call arguments and
+tool definitions included), adjusted on pin/exclude rather than recounted.
+Estimates are scaled per model by the ratio of backend-reported prompt tokens
+to our own estimate, smoothed; partial counts that skip a KV-cached prefix
+are ignored.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from ..providers.base import Message
+
+CHARS_PER_TOKEN = 4.0
+MESSAGE_OVERHEAD = 4  # role markers / separators per message
+IMAGE_TOKENS = 768  # a typical vision-encoder patch budget per image
+_SCALE_WEIGHT = 0.5  # EWMA weight of the newest calibration sample
+_SCALE_BOUNDS = (0.25, 4.0)  # a ratio outside this is a bad sample, not a tokenizer
+_PARTIAL = 0.8  # a grown prompt reported below this share of the last full count
+_PARTIAL_SCALE = 0.5  # ...or a sample below this share of the current scale
+
+
+def estimate_message(message: Message) -> int:
+    """Uncalibrated token estimate for one message, everything it sends."""
+    chars = len(message.content)
+    for call in message.tool_calls:
+        chars += len(call.name) + len(json.dumps(call.arguments, default=str))
+    return (
+        int(chars / CHARS_PER_TOKEN) + MESSAGE_OVERHEAD + IMAGE_TOKENS * len(message.images)
+    )
+
+
+def estimate_tools(specs: list[dict[str, Any]] | None) -> int:
+    """Uncalibrated token estimate for the tool definitions sent with a request."""
+    if not specs:
+        return 0
+    return int(len(json.dumps(specs, default=str)) / CHARS_PER_TOKEN)
+
+
+class TokenLedger:
+    """Running token count of a transcript, tracked incrementally.
+
+    ``sync`` is cheap when the transcript only grew (the common case: each
+    round appends a few messages) and falls back to a full recount when the
+    list was replaced or rewritten behind the ledger's back — callers that
+    mutate a message in place say so with ``refresh``.
+    """
+
+    def __init__(self) -> None:
+        self._messages: list[Message] = []
+        self._counts: list[int] = []
+        self._excluded: set[int] = set()
+        self._included = 0  # raw tokens of messages not excluded
+        self._tools = 0  # raw tokens of the last advertised tool specs
+        self._tool_cache: dict[tuple[str, ...], int] = {}
+        self._scale: dict[str, float] = {}  # model -> calibrated tokens per raw token
+        self._full: dict[str, tuple[int, int]] = {}  # model -> last accepted (reported, raw)
+
+    # ── keeping up with the transcript ───────────────────────────────────────
+    def sync(self, messages: list[Message], excluded: set[int]) -> None:
+        """Catch up with ``messages``; only messages not seen before are estimated."""
+        n = len(self._messages)
+        grew = (
+            n
+            and len(messages) >= n
+            and messages[0] is self._messages[0]
+            and messages[n - 1] is self._messages[-1]
+        )
+        if not grew:
+            self._rebuild(messages, excluded)
+            return
+        if excluded != self._excluded:
+            self._set_excluded(excluded)
+        for i in range(n, len(messages)):
+            self._append(messages[i], i in excluded)
+
+    def _rebuild(self, messages: list[Message], excluded: set[int]) -> None:
+        self._messages, self._counts = [], []
+        self._excluded, self._included = set(), 0
+        for i, m in enumerate(messages):
+            self._append(m, i in excluded)
+
+    def _append(self, message: Message, excluded: bool) -> None:
+        count = estimate_message(message)
+        if excluded:
+            self._excluded.add(len(self._messages))
+        else:
+            self._included += count
+        self._messages.append(message)
+        self._counts.append(count)
+
+    def _set_excluded(self, excluded: set[int]) -> None:
+        for i in excluded - self._excluded:
+            self.exclude(i)
+        for i in self._excluded - excluded:
+            self.include(i)
+
+    def exclude(self, index: int) -> None:
+        if index < len(self._counts) and index not in self._excluded:
+            self._excluded.add(index)
+            self._included -= self._counts[index]
+
+    def include(self, index: int) -> None:
+        if index in self._excluded:
+            self._excluded.discard(index)
+            self._included += self._counts[index]
+
+    def refresh(self, index: int) -> None:
+        """Re-estimate a message that was edited in place (the system prompt)."""
+        if index >= len(self._counts):
+            return
+        count = estimate_message(self._messages[index])
+        if index not in self._excluded:
+            self._included += count - self._counts[index]
+        self._counts[index] = count
+
+    def set_tools(self, specs: list[dict[str, Any]] | None) -> None:
+        """Record the tool definitions advertised with the next request."""
+        if not specs:
+            self._tools = 0
+            return
+        key = tuple(_spec_name(s) for s in specs)
+        if key not in self._tool_cache:
+            self._tool_cache[key] = estimate_tools(specs)
+        self._tools = self._tool_cache[key]
+
+    # ── totals and calibration ───────────────────────────────────────────────
+    def raw(self) -> int:
+        """Uncalibrated tokens of what the next request would send."""
+        return self._included + self._tools
+
+    def scale(self, model: str) -> float:
+        return self._scale.get(model, 1.0)
+
+    def tokens(self, model: str) -> int:
+        """Calibrated tokens the in-context transcript (plus tools) occupies."""
+        return round(self.raw() * self.scale(model))
+
+    def calibrate(self, model: str, reported: int, estimated: int) -> None:
+        """Fold one backend-reported prompt size into the model's scale factor.
+
+        ``estimated`` is ``raw()`` as it stood when that request was sent.
+        Counts that look like they left out a cached prefix are ignored.
+        """
+        if reported <= 0 or estimated <= 0:
+            return
+        lo, hi = _SCALE_BOUNDS
+        sample = reported / estimated
+        if not lo <= sample <= hi:
+            return
+        old = self._scale.get(model)
+        if old is not None and sample < old * _PARTIAL_SCALE:
+            return
+        full = self._full.get(model)
+        if full is not None and estimated > full[1] and reported < full[0] * _PARTIAL:
+            return  # the prompt only grew, yet fewer tokens were evaluated
+        self._full[model] = (reported, estimated)
+        self._scale[model] = sample if old is None else old + _SCALE_WEIGHT * (sample - old)
+
+
+def _spec_name(spec: dict[str, Any]) -> str:
+    return str(spec.get("function", {}).get("name", spec.get("name", "")))
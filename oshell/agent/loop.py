@@ -11,21 +11,45 @@ the TUI's context inspector can visualize and edit exactly what the model sees.
 
 from __future__ import annotations
 
-from collections.abc import Iterator
+import threading
+import time
+from collections.abc import Callable, Generator, Iterator
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from typing import Any
 
+from ..cancellation import Cancelled, CancelToken
 from ..config import Config
-from ..providers.base import LLMProvider, Message, ToolCall
+from ..providers.base import LLMProvider, Message, TokenUsage, ToolCall
 from ..tools import ToolRegistry
+from ..tools.base import ToolResult
+from ..tools.paging import split_pages
+from ..tools.selection import Selection
+from ..tracing import span
+from .compaction import Compactor
 from .events import (
     AgentEvent,
     Compacted,
     LimitReached,
     TextDelta,
     ToolFinished,
+    ToolProgress,
     ToolStarted,
+    TurnCancelled,
     TurnComplete,
+    Usage,
 )
+from .ledger import CHARS_PER_TOKEN, TokenLedger
+from .prompt import ComposedPrompt, Section, compose
+
+_MIN_PAGE_TOKENS = 256  # smallest page worth a round trip
+_RECENT_MESSAGES = 40  # how far back "recently called tools" looks
+_PROGRESS_TAIL = 8192  # chars of a tool's output kept between progress forwards
+_CANCEL_POLL = 0.05  # seconds between cancel checks while waiting on a summary
+# What a cancelled turn leaves in the transcript, so the model (and a resumed
+# session) can tell a cut-off reply or an unrun tool from a finished one.
+INTERRUPTED_MARK = "[interrupted by the user]"
+_NOT_RUN = "[cancelled] not run: the user cancelled the turn"
 
 DEFAULT_SYSTEM_PROMPT = (
     "You are Ollama Shell, a local-first assistant that runs on the user's "
@@ -43,12 +67,10 @@ DEFAULT_SYSTEM_PROMPT = (
     "Never force a tool call into a conversational reply."
 )
 
-_COMPACT_PROMPT = (
-    "Summarize this conversation into compact notes the assistant will continue "
-    "from. Preserve: facts and preferences the user stated, decisions made, file "
-    "paths, commands run and their outcomes, and any open tasks or promises. "
-    "Omit pleasantries and dead ends. 300 words maximum. Output only the notes."
-)
+# Header of the late "session context" message (memory facts + project brief)
+# used when the system prompt is kept prefix-stable. Versioned so a changed
+# note is visibly a newer one, not an edit of history.
+CONTEXT_NOTE_TAG = "[Session context"
 
 # Future-intent cues + action verbs. When a turn ends with text that pairs the
 # two but emits NO tool call, the model has *promised* an action without doing
@@ -116,6 +138,8 @@ def build_system_prompt(
     base: str = DEFAULT_SYSTEM_PROMPT,
     memory: Any = None,
     project: str | None = None,
+    context: int = 0,
+    share: float = 0.25,
 ) -> str:
     """Compose a tool-aware system prompt.
 
@@ -123,104 +147,275 @@ def build_system_prompt(
     internet" persona and refuse perfectly-doable requests. We therefore list
     the *actual* available tools and, when any reach the network, state plainly
     that the model is NOT disconnected and must use them. Stored memories are
-    injected so the model remembers the user across sessions.
+    injected so the model remembers the user across sessions. With a
+    ``context`` window the whole prompt is held to ``share`` of it.
     """
+    sections = prompt_sections(registry, base)
+    if registry.active():
+        sections += context_sections(memory, project)
+    return compose(sections, context, share).text
+
+
+def prompt_sections(
+    registry: ToolRegistry, base: str = DEFAULT_SYSTEM_PROMPT, read_only: bool = False
+) -> list[Section]:
+    """The stable part of the prompt, most important first (see ``compose``).
+
+    ``read_only`` must match the approvals mode: the turn's tool selection is
+    decided on the tools that mode offers, and the listing has to agree with it.
+    """
+    sections = [Section("instructions", base, priority=0)]
     tools = registry.active()
     if not tools:
-        return base
-    listing = "\n".join(f"- {t.name}: {t.description}" for t in tools)
-    prompt = f"{base}\n\nTools available to you (call them; do not invent results):\n{listing}"
+        return sections
+    selector = registry.selector
+    offered = (t.name for t in registry.offered(read_only))
+    if selector is not None and selector.active(offered):
+        # Only the core tools are described; the rest are named, and their
+        # schemas arrive when a message matches them or via find_tools.
+        described = [t for t in tools if t.name in selector.core]
+        others = ", ".join(t.name for t in tools if t.name not in selector.core)
+    else:
+        described = [t for t in tools if t.name != "find_tools"]
+        others = ""
+    listing = "\n".join(f"- {t.name}: {t.description}" for t in described)
+    # The schemas are sent with every request anyway, so the listing can shrink.
+    sections.append(
+        Section(
+            "tool listing",
+            f"Tools available to you (call them; do not invent results):\n{listing}",
+            priority=1,
+            cap=0.12,
+            trim="head",
+        )
+    )
+    if others:
+        sections.append(
+            Section(
+                "more tools",
+                "More tools, loaded when your task needs them (call find_tools to "
+                f"load one now): {others}",
+                priority=2,
+                cap=0.05,
+            )
+        )
 
     names = {t.name for t in tools}
     if "browser_open" in names:
-        prompt += (
-            "\n\nWeb strategy: to merely READ a page's text, use fetch_url (cheapest). For "
-            "INTERACTIVE web tasks — logging in, clicking, filling forms, or dynamic apps "
-            "like Gmail/dashboards — use the HIDDEN BROWSER tools (browser_open, "
-            "browser_screenshot, browser_click, browser_type, browser_key): it runs "
-            "off-screen (no display takeover). Open a URL, screenshot to see the rendered "
-            "page, then click/type by the coordinates you see. Prefer the hidden browser "
-            "over the desktop GUI for anything in a browser."
+        sections.append(
+            Section(
+                "browser guidance",
+                "Web strategy: to merely READ a page's text, use fetch_url (cheapest). For "
+                "INTERACTIVE web tasks — logging in, clicking, filling forms, or dynamic apps "
+                "like Gmail/dashboards — use the HIDDEN BROWSER tools (browser_open, "
+                "browser_screenshot, browser_click, browser_type, browser_key): it runs "
+                "off-screen (no display takeover). Open a URL, screenshot to see the rendered "
+                "page, then click/type by the coordinates you see. Prefer the hidden browser "
+                "over the desktop GUI for anything in a browser.",
+                priority=3,
+            )
         )
     if "screenshot" in names:
         import platform
 
         os_name = platform.system()  # Darwin / Linux / Windows
-        prompt += (
-            "\n\nYou can control the desktop GUI (screenshot, gui_click, gui_type, gui_key), "
-            "but PREFER the terminal: use run_command for anything achievable in a shell, and "
-            "only use the GUI tools for genuine graphical tasks. When you do use the GUI, take a "
-            "screenshot first to see the screen, act, then screenshot again to verify. "
-            "If what the user wants isn't visible, OPEN it yourself and proceed — don't just "
-            "report an empty screen. Launch apps with run_command (macOS: "
-            "`open -a 'Google Chrome' <url>`; Windows: `start <url>`; Linux: `xdg-open <url>`), "
-            "then screenshot again. "
-            f"This machine runs {os_name}; use OS-appropriate keys and paths "
-            "(e.g. the super/meta key is Command on macOS, the Windows key on Windows)."
+        sections.append(
+            Section(
+                "GUI guidance",
+                "You can control the desktop GUI (screenshot, gui_click, gui_type, gui_key), "
+                "but PREFER the terminal: use run_command for anything achievable in a shell, "
+                "and only use the GUI tools for genuine graphical tasks. When you do use the "
+                "GUI, take a screenshot first to see the screen, act, then screenshot again to "
+                "verify. If what the user wants isn't visible, OPEN it yourself and proceed — "
+                "don't just report an empty screen. Launch apps with run_command (macOS: "
+                "`open -a 'Google Chrome' <url>`; Windows: `start <url>`; Linux: "
+                "`xdg-open <url>`), then screenshot again. "
+                f"This machine runs {os_name}; use OS-appropriate keys and paths "
+                "(e.g. the super/meta key is Command on macOS, the Windows key on Windows).",
+                priority=3,
+            )
         )
 
     has_mechanic = any(t.name.startswith("mechanic_") for t in tools)
     has_drift = any(t.name.startswith("drift_") for t in tools)
     if has_mechanic or has_drift:
-        prompt += (
-            "\n\nMachine memory: this box has local telemetry you can consult — prefer it "
+        text = (
+            "Machine memory: this box has local telemetry you can consult — prefer it "
             "over one-shot shell commands for questions about what is NORMAL or what CHANGED, "
             "because a fresh command has no baseline and no history."
         )
         if has_mechanic:
-            prompt += (
+            text += (
                 "\n- mechanic_* tools know this machine's runtime baselines (CPU, memory, "
                 "Docker, Ollama models). For 'is this normal?', 'why is it slow?', or any "
                 "resource question, call mechanic_is_this_normal / mechanic_baseline_for "
                 "FIRST, then investigate with run_command."
             )
         if has_drift:
-            prompt += (
+            text += (
                 "\n- drift_* tools know this box's operational state over time (ports, "
                 "services, packages, users, cron). For 'what changed?', 'did something get "
                 "installed?', or 'why did this start happening?', call drift_diff_latest "
                 "(or drift_diff for specific snapshots) FIRST."
             )
         if has_mechanic and has_drift:
-            prompt += (
+            text += (
                 "\n- The diagnosis pattern: mechanic says WHETHER something is off, drift "
                 "says WHAT configuration moved, run_command lets you fix it. Chain them."
             )
+        sections.append(Section("machine guidance", text, priority=3))
 
     networked = [t.name for t in tools if not t.local_only]
     if networked:
-        prompt += (
-            "\n\nIMPORTANT: You are NOT a disconnected model — you have live internet "
-            f"access through these tools: {', '.join(networked)}. Never tell the user you "
-            "cannot access the internet, real-time information, or a specific website. When "
-            "they ask for current facts, external information, documentation, or anything you "
-            "are not certain of from memory, call web_search (then fetch_url to read a result) "
-            "and answer from what you find."
-            "\n\nGround every factual claim in actual tool output. Do NOT invent URLs, links, "
-            "product pages, videos, prices, citations, or sources, and do not claim something "
-            "is 'from your search results' unless it actually appears in a tool result. If a "
-            "search returns nothing useful, say so plainly and offer to refine the query — "
-            "never fabricate an answer to seem helpful."
+        # Kept as long as anything is: without it small models refuse to search.
+        sections.append(
+            Section(
+                "network",
+                "IMPORTANT: You are NOT a disconnected model — you have live internet "
+                f"access through these tools: {', '.join(networked)}. Never tell the user you "
+                "cannot access the internet, real-time information, or a specific website. "
+                "When they ask for current facts, external information, documentation, or "
+                "anything you are not certain of from memory, call web_search (then fetch_url "
+                "to read a result) and answer from what you find.",
+                priority=1,
+            )
+        )
+        sections.append(
+            Section(
+                "grounding",
+                "Ground every factual claim in actual tool output. Do NOT invent URLs, links, "
+                "product pages, videos, prices, citations, or sources, and do not claim "
+                "something is 'from your search results' unless it actually appears in a tool "
+                "result. If a search returns nothing useful, say so plainly and offer to "
+                "refine the query — never fabricate an answer to seem helpful.",
+                priority=2,
+            )
         )
 
     if "remember" in names:
-        prompt += (
-            "\n\nLong-term memory: when the user shares a durable preference or fact about "
-            "themselves worth keeping for future sessions (their name, tools they use, how "
-            "they like answers, ongoing projects), call remember(...) with one concise "
-            "sentence. Don't store secrets/passwords or transient details unless asked."
+        sections.append(
+            Section(
+                "memory guidance",
+                "Long-term memory: when the user shares a durable preference or fact about "
+                "themselves worth keeping for future sessions (their name, tools they use, "
+                "how they like answers, ongoing projects), call remember(...) with one "
+                "concise sentence. Don't store secrets/passwords or transient details unless "
+                "asked.",
+                priority=3,
+            )
         )
+    return sections
+
+
+def context_sections(memory: Any = None, project: str | None = None) -> list[Section]:
+    """The volatile part of the prompt: remembered facts and the project brief.
+
+    These change mid-session (a ``remember`` call, a new commit), unlike the
+    tool listing. Kept separate so the agent can ship them in a late message
+    and leave the system prompt byte-identical — see ``Agent.stable_prefix``.
+    """
+    sections: list[Section] = []
     if memory is not None:
         items = memory.recent(40)
         if items:
             facts = "\n".join(f"- {m['text']}" for m in items)
-            prompt += f"\n\nThings you remember about the user (long-term memory):\n{facts}"
+            sections.append(
+                Section(
+                    "memories",
+                    f"Things you remember about the user (long-term memory):\n{facts}",
+                    priority=2,
+                    cap=0.06,
+                    trim="tail",  # the newest facts
+                    volatile=True,
+                    reserve=0.03,
+                )
+            )
     if project:
-        prompt += (
-            "\n\nThe user launched you inside this project — answer questions about "
-            f"'this project' / 'this repo' from it without being re-told:\n{project}"
+        sections.append(
+            Section(
+                "project brief",
+                "The user launched you inside this project — answer questions about "
+                f"'this project' / 'this repo' from it without being re-told:\n{project}",
+                priority=4,
+                cap=0.1,
+                trim="head",  # git state and AGENTS.md come before the README
+                volatile=True,
+            )
+        )
+    return sections
+
+
+def context_window(provider: LLMProvider, config: Config, model: str) -> int:
+    """The context window (tokens) to run ``model`` with (``Agent.context_for``)."""
+    if config.context_length and config.context_length > 0:
+        return config.context_length
+    from ..config import AUTO_CONTEXT_CAP
+
+    try:
+        trained = provider.max_context(model)
+    except Exception:
+        trained = None
+    return min(trained or 8192, AUTO_CONTEXT_CAP)
+
+
+def is_context_note(message: Message) -> bool:
+    """Whether ``message`` is an injected session-context note (not user text)."""
+    return message.role == "user" and message.content.startswith(CONTEXT_NOTE_TAG)
+
+
+class _ProgressBuffer:
+    """Collects tool output between forwards; keeps only the newest tail.
+
+    Tools report from pool threads as fast as they like; the loop drains the
+    buffer once per interval, so the front-end sees at most one event per
+    call per interval however chatty the command is.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[int, tuple[str, str]] = {}  # call index -> (name, text)
+        self._lock = threading.Lock()
+
+    def sink(self, index: int, name: str) -> Callable[[str], None]:
+        def push(text: str) -> None:
+            with self._lock:
+                _, old = self._pending.get(index, (name, ""))
+                self._pending[index] = (name, (old + text)[-_PROGRESS_TAIL:])
+
+        return push
+
+    def drain(self) -> Iterator[ToolProgress]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for index in sorted(pending):
+            name, text = pending[index]
+            yield ToolProgress(name, text, index)
+
+
+@dataclass
+class _CompactionPlan:
+    """The turns a compaction folds, captured so the summary can be written later.
+
+    ``old`` holds the message objects themselves (``messages[1 : cut + 1]``):
+    a summary is only swapped in while exactly those messages, with the same
+    pins and exclusions, still open the transcript.
+    """
+
+    old: list[Message]
+    pinned: set[int] = field(default_factory=set)
+    excluded: set[int] = field(default_factory=set)
+    drop: list[Message] = field(default_factory=list)  # what the summary must cover
+    summary: str = ""
+    thread: threading.Thread | None = None
+
+    def still_matches(self, agent: Agent) -> bool:
+        cut = len(self.old)
+        current = agent.messages[1 : cut + 1]
+        return (
+            len(current) == cut
+            and all(a is b for a, b in zip(current, self.old, strict=True))
+            and {i for i in agent.pinned if 1 <= i <= cut} == self.pinned
+            and {i for i in agent.excluded if 1 <= i <= cut} == self.excluded
         )
-    return prompt
 
 
 class Agent:
@@ -236,6 +431,8 @@ class Agent:
         system_prompt: str | None = None,
         memory: Any = None,
         approver: Any = None,
+        residency: Any = None,
+        background_compaction: bool = False,
     ):
         self.provider = provider
         self.registry = registry
@@ -244,6 +441,8 @@ class Agent:
         # Callable[[ToolCall], bool] used when config.approvals == "ask": asked
         # before each sensitive tool runs. None (non-interactive) means deny.
         self.approver = approver
+        # ResidencyManager (or None): which models are loaded, LRU bookkeeping.
+        self.residency = residency
         self.model = model or config.default_model
         # Project brief (git repo at launch dir) — computed once; refreshed on
         # rebuild_system_prompt so long sessions see new commits.
@@ -252,18 +451,35 @@ class Agent:
             from ..project import project_context
 
             self._project = project_context()
+        # Prefix-stable layout: the system prompt carries only what changes with
+        # the tool set, and memory/project context rides in a late versioned
+        # note, so the backend's KV cache for the transcript survives a
+        # ``remember`` or a refreshed git status instead of re-prefilling it all.
+        self.stable_prefix = config.stable_prompt_prefix
+        self._note = ""  # current session-context note (full text, with header)
+        self._note_body = ""
+        self._note_version = 0
+        self._ctx_cache: dict[str, int] = {}  # model -> resolved context window
         # Build a tool-aware prompt unless the caller supplies an explicit one.
         self._custom_prompt = system_prompt
-        content = (
-            system_prompt
-            if system_prompt is not None
-            else build_system_prompt(registry, memory=memory, project=self._project)
-        )
+        self.prompt: ComposedPrompt | None = None  # how the built prompt fit the context
+        content = system_prompt if system_prompt is not None else self._compose_prompt()
         self.messages: list[Message] = [Message(role="system", content=content)]
         # Context management: indices into ``self.messages``.
         self.pinned: set[int] = {0}  # system prompt is pinned by default
         self.excluded: set[int] = set()
-        self._ctx_cache: dict[str, int] = {}  # model -> resolved context window
+        # Token accounting for context_fill, calibrated by backend-reported usage.
+        self.ledger = TokenLedger()
+        self.last_usage: TokenUsage | None = None
+        self._background: _CompactionPlan | None = None  # summary being prepared
+        # Only a session that will take another turn can use a summary prepared
+        # between turns; one-shot agents (ask, delegate helpers) leave it off.
+        self.background_compaction = background_compaction
+        self._cancel: CancelToken | None = None  # the running turn's, if cancellable
+        # The last round's tool selection (what was advertised, tokens saved).
+        self.tool_selection: Selection | None = None
+        # Map-reduce summarizer; its chunk cache spans the session's compactions.
+        self.compactor = Compactor(config.compact_chunk_tokens, config.compact_parallel)
 
     def effective_context(self) -> int:
         """The context window (tokens) this agent actually runs the model with.
@@ -276,29 +492,79 @@ class Agent:
         without that, Ollama runs at its own default (often 4k) and silently
         truncates long conversations.
         """
+        return self.context_for(self.model)
+
+    def context_for(self, model: str) -> int:
+        """``effective_context`` for ``model`` (routing switches the agent's model)."""
         if self.config.context_length and self.config.context_length > 0:
             return self.config.context_length
-        if self.model not in self._ctx_cache:
-            from ..config import AUTO_CONTEXT_CAP
+        if model not in self._ctx_cache:
+            self._ctx_cache[model] = context_window(self.provider, self.config, model)
+        return self._ctx_cache[model]
 
-            try:
-                trained = self.provider.max_context(self.model)
-            except Exception:
-                trained = None
-            self._ctx_cache[self.model] = min(trained or 8192, AUTO_CONTEXT_CAP)
-        return self._ctx_cache[self.model]
+    def warm_up(self) -> None:
+        """Preload the active and routing models in the background (interactive UIs).
+
+        Each loads at the context its chats will use, and the policy pass after
+        the loads never unloads the active model.
+        """
+        if self.residency is None or not self.config.residency.warm_up:
+            return
+        rcfg = self.config.routing
+        models = [self.model]
+        if rcfg.enabled:
+            models += [rcfg.fast_model, rcfg.deep_model]
+        self.residency.warm_up_async(models, keep=[self.model], num_ctx=self.context_for)
 
     def rebuild_system_prompt(self) -> None:
         """Refresh the system message after the registry changes (tools toggled,
-        model switched) or memory updates, so the model has the current tools+facts."""
+        model switched) or memory updates, so the model has the current tools+facts.
+
+        With ``stable_prefix`` the system message only changes when the tool
+        listing does; new facts/project state become a fresh context note.
+        """
         if self._custom_prompt is None and self.messages and self.messages[0].role == "system":
             if self.config.project_context:
                 from ..project import project_context
 
                 self._project = project_context()
-            self.messages[0].content = build_system_prompt(
-                self.registry, memory=self.memory, project=self._project
-            )
+            self.messages[0].content = self._compose_prompt()
+            self.ledger.refresh(0)
+
+    def _compose_prompt(self) -> str:
+        """The system prompt, and (stable layout) the up-to-date context note.
+
+        Both are fitted to ``system_prompt_share`` of the model's context
+        window; ``self.prompt`` records what was trimmed or dropped.
+        """
+        sections = prompt_sections(self.registry, read_only=self._read_only())
+        if self.registry.active():  # same rule as build_system_prompt: no tools, no extras
+            sections += context_sections(self.memory, self._project)
+        self.prompt = compose(
+            sections, self.effective_context(), self.config.system_prompt_share
+        )
+        if not self.stable_prefix:
+            return self.prompt.text
+        body = self.prompt.note
+        if body != self._note_body:
+            self._note_body = body
+            self._note_version += 1
+            self._note = f"{CONTEXT_NOTE_TAG} v{self._note_version}]\n{body}" if body else ""
+        return self.prompt.system
+
+    def context_note(self) -> str:
+        """The session-context note the next turn will carry ('' if none)."""
+        return self._note
+
+    def _inject_context_note(self) -> None:
+        """Append the current context note unless the transcript already has it.
+
+        Appending (rather than editing an earlier note in place) keeps every
+        byte the backend has already prefilled valid. A note dropped by
+        compaction or /new is simply re-sent on the next turn.
+        """
+        if self._note and not any(m.content == self._note for m in self.messages):
+            self.messages.append(Message(role="user", content=self._note))
 
     def _authorize(self, call: ToolCall) -> str | None:
         """Approval gate for sensitive tools. Returns denial text, or None to run.
@@ -325,26 +591,166 @@ class Agent:
                 "non-interactive run. Suggest re-running interactively."
             )
         try:
-            approved = bool(self.approver(call))
+            with span("approval", cat="agent", tool=call.name):
+                approved = bool(self.approver(call))
         except Exception:
             approved = False
         if approved:
             return None
         return "[denied] the user declined this action. Ask before trying a different approach."
 
+    # ── tool execution ────────────────────────────────────────────────────────
+    def _tool_batches(self, calls: list[ToolCall]) -> Iterator[list[ToolCall]]:
+        """Split a round's calls into batches that may run together.
+
+        Consecutive concurrency-safe calls (three ``fetch_url``s, a
+        ``read_file`` and a ``web_search``) form one batch; every other call is
+        a batch of its own, so anything with side effects still happens in
+        exactly the order the model asked.
+        """
+        batch: list[ToolCall] = []
+        for call in calls:
+            if self.config.parallel_tools > 1 and self.registry.concurrency_safe(call.name):
+                batch.append(call)
+                continue
+            if batch:
+                yield batch
+                batch = []
+            yield [call]
+        if batch:
+            yield batch
+
+    def _run_batch(
+        self, batch: list[ToolCall], start: int = 0
+    ) -> Iterator[ToolProgress | ToolResult]:
+        """Run one batch, yielding results in call order, with progress between.
+
+        Approvals and checkpoints happen first, one call at a time (an approval
+        prompt is a conversation with the user); only the tool bodies run on
+        the thread pool, so a multi-call batch takes about as long as its
+        slowest call. While they run, output they report is forwarded as
+        ``ToolProgress``, batched per ``tool_progress_interval`` and tagged
+        with the call's index in the round (``start`` is the batch's first).
+        """
+        from ..checkpoints import before_tool
+
+        denials: list[str | None] = []
+        for call in batch:
+            denial = _NOT_RUN if self._cancelled() else self._authorize(call)
+            if denial is None:
+                # Safety net: snapshot any file this tool is about to overwrite,
+                # so /undo can rewind a bad edit (best-effort, never blocks).
+                with span("checkpoint", cat="agent", tool=call.name):
+                    before_tool(call.name, call.arguments)
+            denials.append(denial)
+        progress = _ProgressBuffer()
+        interval = max(self.config.tool_progress_interval, 0.02)
+        workers = max(min(self.config.parallel_tools, len(batch)), 1)
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="oshell-tool")
+        try:
+            futures = [
+                pool.submit(
+                    self.registry.dispatch_full,
+                    call,
+                    progress=progress.sink(start + i, call.name),
+                    cancel=self._cancel,
+                )
+                if denial is None
+                else None
+                for i, (call, denial) in enumerate(zip(batch, denials, strict=True))
+            ]
+            for denial, future in zip(denials, futures, strict=True):
+                if future is None:
+                    yield ToolResult(denial or "")
+                    continue
+                while not wait([future], timeout=interval).done and not self._cancelled():
+                    yield from progress.drain()
+                yield from progress.drain()
+                # Cancelled tools see the token and stop; one that ignores it
+                # is left to finish on its own rather than holding the turn.
+                yield future.result() if future.done() else ToolResult(_NOT_RUN)
+        finally:
+            pool.shutdown(wait=not self._cancelled(), cancel_futures=True)
+
+    def _offer_tools(
+        self,
+        tools: list[dict[str, Any]] | None,
+        query: str,
+        offered: list[dict[str, Any]] | None = None,
+    ) -> list[dict[str, Any]] | None:
+        """This round's share of ``tools``: all of them, or the selector's pick.
+
+        The pick is made on the turn's first round; later rounds pass the last
+        round's ``offered`` and only gain what ``find_tools`` pulled in, at the
+        end, so the tool schemas leading the prompt stay byte-stable for the
+        backend's prefix cache. Sets ``tool_selection`` (None when nothing was
+        left out)."""
+        selector = self.registry.selector
+        if not tools or selector is None:
+            self.tool_selection = None
+            return tools
+        if offered is None:
+            offered = selector.select(tools, query, self._recent_tools())
+        else:
+            offered = selector.extend(offered, tools)
+        self.tool_selection = selector.last
+        return offered or None
+
+    def _recent_tools(self) -> list[str]:
+        """Names of the tools called lately, newest first."""
+        names: list[str] = []
+        for m in reversed(self.messages[-_RECENT_MESSAGES:]):
+            names += reversed([c.name for c in m.tool_calls])
+        return names
+
+    def _fit_output(self, call: ToolCall, text: str) -> str:
+        """Page a result that is bigger than the context can spare.
+
+        The page size is the smaller of ``tool_output.page_tokens`` and
+        ``budget_share`` of the window still free (never below a floor, so a
+        nearly full context still makes progress), converted to characters
+        with the model's calibrated ratio. ``read_more`` pages already fit.
+        With paging off, the rest of the result is cut instead.
+        """
+        pager = self.registry.pager
+        if call.name == "read_more":
+            return text
+        cfg = self.config.tool_output
+        self.ledger.sync(self.messages, self.excluded)
+        spare = max(self.effective_context() - self.ledger.tokens(self.model), 0)
+        tokens = max(min(cfg.page_tokens, int(spare * cfg.budget_share)), _MIN_PAGE_TOKENS)
+        chars = int(tokens * CHARS_PER_TOKEN / self.ledger.scale(self.model))
+        if pager is not None:
+            return pager.page(call.name, text, chars)
+        if len(text) <= chars:
+            return text
+        head = split_pages(text, chars)[0].rstrip("\n")
+        return f"{head}\n…[truncated: {len(text) - len(head)} more chars not shown]"
+
     # ── context health: fill estimate + compaction ────────────────────────────
     def context_fill(self) -> float:
-        """Rough fraction of the context window the in-context messages occupy.
+        """Fraction of the context window the in-context messages occupy.
 
-        A chars/4 token estimate — honest enough for a gauge and a compaction
-        trigger, cheap enough to run every turn. Excluded messages don't count.
+        Read from the token ledger: each message is estimated once (text,
+        tool-call arguments, images), tool definitions count too, and the
+        total is scaled by what the backend reported for recent requests — so
+        this is cheap enough for every turn and every gauge redraw. Excluded
+        messages don't count.
         """
-        chars = sum(
-            len(m.content) + 16  # + a little per-message wire overhead
-            for i, m in enumerate(self.messages)
-            if i not in self.excluded
-        )
-        return min(chars / 4 / max(self.effective_context(), 1), 1.0)
+        self.ledger.sync(self.messages, self.excluded)
+        return min(self.ledger.tokens(self.model) / max(self.effective_context(), 1), 1.0)
+
+    def _sync_ledger(self, tools: list[dict[str, Any]] | None) -> int:
+        """Bring the ledger up to date for a request; returns its raw estimate."""
+        self.ledger.sync(self.messages, self.excluded)
+        self.ledger.set_tools(tools)
+        return self.ledger.raw()
+
+    def _record_usage(self, usage: TokenUsage, estimated: int) -> None:
+        """Keep the latest usage and calibrate the ledger against it."""
+        self.last_usage = usage
+        if usage.prompt_tokens:
+            self.ledger.calibrate(self.model, usage.prompt_tokens, estimated)
 
     def compact(self, keep_recent: int = 6) -> Compacted | None:
         """Fold older turns into a summary, freeing context without amnesia.
@@ -354,7 +760,25 @@ class Agent:
         (compaction shouldn't cost big-model latency). Returns None when there
         is nothing worth compacting or the summarizer fails — the conversation
         is left untouched in that case.
+
+        A background summary still under way is finished and used first; a
+        fresh pass is planned only when there is none or it went stale.
         """
+        adopted = self._adopt_compaction(wait=True)
+        if adopted is not None:
+            return adopted
+        plan = self._plan_compaction(keep_recent)
+        if plan is None:
+            return None
+        model = self._summarizer()
+        with span("compact", cat="compact", model=model, messages=len(plan.drop)):
+            plan.summary = self._summarize(plan, model, self._cancel)
+        if self._cancelled():
+            return None
+        return self._apply_compaction(plan)
+
+    def _plan_compaction(self, keep_recent: int) -> _CompactionPlan | None:
+        """Choose what to fold, or None when the transcript is too young."""
         body = self.messages[1:]
         if len(body) <= keep_recent + 2:  # too young to be worth a summary call
             return None
@@ -365,59 +789,138 @@ class Agent:
             cut -= 1
         if cut <= 0:
             return None
-        old, tail = body[:cut], body[cut:]
-        keep_pinned = [m for i, m in enumerate(old, start=1) if i in self.pinned]
+        old = body[:cut]
+        # Stale context notes aren't conversation; the current one is re-sent.
         drop = [
             m
             for i, m in enumerate(old, start=1)
-            if i not in self.pinned and i not in self.excluded and m.content
+            if i not in self.pinned
+            and i not in self.excluded
+            and m.content
+            and not is_context_note(m)
         ]
         if not drop:
             return None
-        transcript = "\n".join(f"{m.role}: {m.content}" for m in drop)[-24000:]
-        summarizer = self.config.routing.fast_model or self.model
-        try:
-            summary = "".join(
-                c.content
-                for c in self.provider.chat(
-                    [
-                        Message(role="system", content=_COMPACT_PROMPT),
-                        Message(role="user", content=transcript),
-                    ],
-                    model=summarizer,
-                    stream=False,
-                    temperature=0.2,
-                )
-            ).strip()
-        except Exception:
-            return None
-        if not summary:
+        return _CompactionPlan(
+            old=old,
+            pinned={i for i in self.pinned if 1 <= i <= cut},
+            excluded={i for i in self.excluded if 1 <= i <= cut},
+            drop=drop,
+        )
+
+    def _summarize(
+        self, plan: _CompactionPlan, model: str, cancel: CancelToken | None = None
+    ) -> str:
+        """The summary for ``plan`` ("" on failure); safe to call off-thread."""
+        return self.compactor.summarize(self.provider, plan.drop, model, cancel)
+
+    def _apply_compaction(
+        self, plan: _CompactionPlan, background: bool = False
+    ) -> Compacted | None:
+        """Swap the summary in for the planned turns, if they're still there as planned."""
+        cut = len(plan.old)
+        if not plan.summary or not plan.still_matches(self):
             return None
+        keep_pinned = [m for i, m in enumerate(plan.old, start=1) if i in plan.pinned]
         note = Message(
             role="user",
-            content=f"[Earlier conversation, compacted to save context]\n{summary}",
+            content=f"[Earlier conversation, compacted to save context]\n{plan.summary}",
         )
         before = len(self.messages)
+        tail = self.messages[cut + 1 :]
         self.messages = [self.messages[0], *keep_pinned, note, *tail]
-        # Everything up to and including the summary is structural — keep it.
-        self.pinned = set(range(len(keep_pinned) + 2))
-        self.excluded = set()
-        return Compacted(dropped=before - len(self.messages), summary_chars=len(summary))
+        # Everything up to and including the summary is structural — keep it;
+        # marks on the kept tail move with it.
+        head = len(keep_pinned) + 2
+        shift = head - (cut + 1)
+        self.pinned = set(range(head)) | {i + shift for i in self.pinned if i > cut}
+        self.excluded = {i + shift for i in self.excluded if i > cut}
+        return Compacted(
+            dropped=before - len(self.messages),
+            summary_chars=len(plan.summary),
+            background=background,
+        )
+
+    # ── background compaction (low watermark) ────────────────────────────────
+    def _prepare_compaction(self) -> None:
+        """After a turn: past the low watermark, start summarizing in the background.
+
+        The summary call runs on a daemon thread while the user reads and
+        types; ``_adopt_compaction`` swaps it in at the next turn boundary.
+        """
+        low = self.config.compact_low_watermark
+        if not (self.background_compaction and low and self.config.compact_threshold):
+            return
+        if self._background is not None:
+            return
+        if self.context_fill() < low:
+            return
+        plan = self._plan_compaction(keep_recent=6)
+        if plan is None:
+            return
+        model = self._summarizer()
+
+        def work() -> None:
+            with span("compact", cat="compact", model=model, messages=len(plan.drop), bg=True):
+                plan.summary = self._summarize(plan, model)
+
+        plan.thread = threading.Thread(target=work, name="oshell-compact", daemon=True)
+        self._background = plan
+        plan.thread.start()
+
+    def _adopt_compaction(self, wait: bool = False) -> Compacted | None:
+        """Swap in a background summary that has finished (or, with ``wait``, finish it).
+
+        A summary whose turns were since rewritten — /new, a manual /compact,
+        a pin or exclude inside them — no longer describes the transcript and
+        is discarded. A cancelled turn stops waiting and leaves the summary
+        to finish for a later turn.
+        """
+        plan = self._background
+        if plan is None or plan.thread is None:
+            return None
+        while plan.thread.is_alive():
+            if not wait or self._cancelled():
+                return None
+            plan.thread.join(_CANCEL_POLL)
+        self._background = None
+        return self._apply_compaction(plan, background=True)
+
+    def _summarizer(self) -> str:
+        """The model that writes compaction summaries.
+
+        The routing fast model when configured — unless it isn't loaded and
+        the current model is: a summary is within any chat model's reach, and
+        a cold load (possibly evicting the main model) costs more than it saves.
+        """
+        fast = self.config.routing.fast_model
+        if not fast or fast == self.model or self.residency is None:
+            return fast or self.model
+        return self.residency.prefer([fast, self.model]) or fast
+
+    def resident_models(self) -> set[str] | None:
+        """Models the backend has loaded, or None when it can't say."""
+        return self.residency.resident() if self.residency is not None else None
 
     # ── context management ───────────────────────────────────────────────────
     def pin(self, index: int) -> None:
         self.pinned.add(index)
         self.excluded.discard(index)
+        self.ledger.include(index)
 
     def exclude(self, index: int) -> None:
         if index in self.pinned:
             raise ValueError(f"message {index} is pinned; unpin before excluding")
         self.excluded.add(index)
+        self.ledger.exclude(index)
 
     def _context(self) -> list[Message]:
         """The messages actually sent to the model (excluded ones dropped)."""
         return [m for i, m in enumerate(self.messages) if i not in self.excluded]
 
+    def _read_only(self) -> bool:
+        return self.config.approvals == "read-only"
+
     def _model_supports_tools(self) -> bool:
         """Whether the active model accepts tool definitions. Unknown -> assume yes."""
         try:
@@ -427,108 +930,210 @@ class Agent:
         return (not caps) or ("tools" in caps)
 
     # ── the loop ─────────────────────────────────────────────────────────────
-    def send(self, user_text: str, images: list[str] | None = None) -> Iterator[AgentEvent]:
+    def _chat(
+        self, tools: list[dict[str, Any]] | None
+    ) -> Generator[TextDelta, None, tuple[str, list[ToolCall], TokenUsage | None, int]]:
+        """One model request: stream its text, then return (text, tool calls,
+        usage, the ledger's estimate of the prompt) for the caller to record."""
+        text = ""
+        calls: list[ToolCall] = []
+        usage: TokenUsage | None = None
+        estimated = self._sync_ledger(tools)
+        context = self._context()
+        with span(
+            "provider.chat",
+            cat="provider",
+            model=self.model,
+            messages=len(context),
+            tools=len(tools or []),
+        ) as sp:
+            t0 = time.perf_counter()
+            stream = self.provider.chat(
+                context,
+                model=self.model,
+                tools=tools,
+                temperature=self.config.temperature,
+                num_ctx=self.effective_context(),
+                cancel=self._cancel,
+            )
+            try:
+                for chunk in stream:
+                    if self._cancelled():  # a provider that doesn't watch the token
+                        break
+                    if chunk.content:
+                        if not text:
+                            sp.set(first_token_ms=round((time.perf_counter() - t0) * 1000, 1))
+                        text += chunk.content
+                        yield TextDelta(chunk.content)
+                    if chunk.tool_calls:
+                        calls.extend(chunk.tool_calls)
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+            except Cancelled:
+                pass
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()  # closing the stream is what stops the backend
+            if self._cancelled():
+                # Tool calls may be half-formed; only the text is kept.
+                sp.set(cancelled=True, chars=len(text))
+                return text, [], None, estimated
+            sp.set(estimated_tokens=estimated, tool_calls=len(calls))
+            if usage is not None:
+                sp.set(
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    prefill_s=usage.prompt_seconds,
+                    decode_s=usage.completion_seconds,
+                    load_s=usage.load_seconds,
+                )
+        return text, calls, usage, estimated
+
+    def send(
+        self,
+        user_text: str,
+        images: list[str] | None = None,
+        *,
+        cancel: CancelToken | None = None,
+    ) -> Iterator[AgentEvent]:
         """Run one user turn to completion, yielding events as they happen.
 
         ``images`` are base64-encoded image data attached to the user message
         for vision-capable models (passed through to the backend verbatim).
+        When ``cancel`` fires, the backend request and running tools are
+        stopped and the turn ends with ``TurnCancelled`` instead of
+        ``TurnComplete``. The transcript stays well-formed: the partial
+        reply is kept with ``INTERRUPTED_MARK``, and every tool call gets
+        a result.
         """
+        self._cancel = cancel
+        try:
+            with span("turn", cat="agent", model=self.model, chars=len(user_text)) as sp:
+                yield from self._turn(user_text, images)
+                if self._cancelled():
+                    sp.set(cancelled=True)
+        finally:
+            self._cancel = None
+
+    def _cancelled(self) -> bool:
+        return self._cancel is not None and self._cancel.cancelled
+
+    def _interrupted(self, text: str) -> Iterator[AgentEvent]:
+        """End a cancelled turn: keep what was said, marked as cut off."""
+        marked = f"{text}\n\n{INTERRUPTED_MARK}" if text.strip() else INTERRUPTED_MARK
+        self.messages.append(Message(role="assistant", content=marked))
+        yield TurnCancelled(text)
+
+    def _turn(self, user_text: str, images: list[str] | None) -> Iterator[AgentEvent]:
+        # A summary prepared in the background since the last turn is swapped
+        # in here, at the turn boundary, before anything else sees the transcript.
+        compacted = self._adopt_compaction()
+        if compacted:
+            yield compacted
+        if self.stable_prefix and self._custom_prompt is None:
+            self._inject_context_note()
         self.messages.append(Message(role="user", content=user_text, images=images or []))
         # Long sessions must never silently truncate: when the transcript nears
-        # the context window, fold older turns into a summary first.
+        # the context window, fold older turns into a summary first (one
+        # prepared in the background, if any, is the quickest way there).
         if self.config.compact_threshold and self.context_fill() >= self.config.compact_threshold:
             compacted = self.compact()
             if compacted:
                 yield compacted
+            if self._cancelled():
+                yield from self._interrupted("")
+                return
         # Capability-aware: only advertise tools to models that support them.
         # This keeps tools on for image turns with models that do both (e.g.
         # gemma3/4), but suppresses them for vision-only models (e.g. llava) that
         # 400 when tools are present — on any turn.
-        tools = self.registry.specs() or None
+        # Read-only mode doesn't even advertise the tools it forbids.
+        tools = self.registry.specs(read_only=self._read_only()) or None
         if tools and not self._model_supports_tools():
             tools = None
-        if tools and self.config.approvals == "read-only":
-            # Don't even advertise tools the mode forbids — a hidden tool can't
-            # be argued with, and the model won't burn rounds trying.
-            sensitive = {t.name for t in self.registry.active() if t.sensitive}
-            tools = [s for s in tools if s["function"]["name"] not in sensitive] or None
 
+        if self.residency is not None:
+            self.residency.touch(self.model)
         nudges = 0  # how many "you promised — now do it" prods we've issued this turn
-        for _ in range(self.config.max_tool_iterations):
-            assistant_text = ""
-            tool_calls = []
-            for chunk in self.provider.chat(
-                self._context(),
-                model=self.model,
-                tools=tools,
-                temperature=self.config.temperature,
-                num_ctx=self.effective_context(),
-            ):
-                if chunk.content:
-                    assistant_text += chunk.content
-                    yield TextDelta(chunk.content)
-                if chunk.tool_calls:
-                    tool_calls.extend(chunk.tool_calls)
-
-            # Record the assistant turn (text and/or tool requests).
-            self.messages.append(
-                Message(role="assistant", content=assistant_text, tool_calls=tool_calls)
-            )
-
-            if not tool_calls:
-                # The model promised an action but called no tool — prod it to
-                # actually carry it out instead of leaving the user hanging.
-                if (
-                    tools
-                    and nudges < self.config.max_promise_nudges
-                    and _looks_like_unfulfilled_promise(assistant_text)
-                ):
-                    nudges += 1
-                    self.messages.append(
-                        Message(
-                            role="user",
-                            content=(
-                                "You described an action but called no tool — the user sees "
-                                "only your message and nothing happens. If you meant to act, "
-                                "emit the tool call now (e.g. web_search / fetch_url / "
-                                "create_document) instead of narration or 'one moment'. If no "
-                                "tool is actually needed, give your final answer now, with no "
-                                "promises to act later."
-                            ),
-                        )
-                    )
-                    continue
-                yield TurnComplete(assistant_text)
-                return
-
-            # Execute each requested tool and feed results back as tool messages.
-            # A tool may return images (e.g. a screenshot) — attach them so the
-            # vision model can see them on the next round.
-            for call in tool_calls:
-                yield ToolStarted(call.name, call.arguments)
-                denial = self._authorize(call)
-                if denial is not None:
-                    self.messages.append(
-                        Message(role="tool", content=denial, tool_call_id=call.id)
+        offered: list[dict[str, Any]] | None = None
+        for n in range(self.config.max_tool_iterations):
+            with span("round", cat="agent", n=n + 1) as sp:
+                offered = self._offer_tools(tools, user_text, offered if n else None)
+                if self.tool_selection is not None:
+                    sp.set(
+                        tools=len(self.tool_selection.advertised),
+                        tools_saved_tokens=self.tool_selection.saved,
                     )
-                    yield ToolFinished(call.name, denial)
-                    continue
-                # Safety net: snapshot any file this tool is about to overwrite,
-                # so /undo can rewind a bad edit (best-effort, never blocks).
-                from ..checkpoints import before_tool
+                assistant_text, tool_calls, usage, estimated = yield from self._chat(offered)
+                if self._cancelled():
+                    yield from self._interrupted(assistant_text)
+                    return
 
-                before_tool(call.name, call.arguments)
-                result = self.registry.dispatch_full(call)
+                # Record the assistant turn (text and/or tool requests).
                 self.messages.append(
-                    Message(
-                        role="tool",
-                        content=result.text,
-                        tool_call_id=call.id,
-                        images=result.images,
-                    )
+                    Message(role="assistant", content=assistant_text, tool_calls=tool_calls)
                 )
-                yield ToolFinished(call.name, result.text)
-            # ...then loop so the model can use those results.
+                if usage is not None:
+                    self._record_usage(usage, estimated)
+                    yield Usage(self.model, usage)
+
+                if not tool_calls:
+                    # The model promised an action but called no tool — prod it to
+                    # actually carry it out instead of leaving the user hanging.
+                    if (
+                        tools
+                        and nudges < self.config.max_promise_nudges
+                        and _looks_like_unfulfilled_promise(assistant_text)
+                    ):
+                        nudges += 1
+                        self.messages.append(
+                            Message(
+                                role="user",
+                                content=(
+                                    "You described an action but called no tool — the user sees "
+                                    "only your message and nothing happens. If you meant to act, "
+                                    "emit the tool call now (e.g. web_search / fetch_url / "
+                                    "create_document) instead of narration or 'one moment'. If no "
+                                    "tool is actually needed, give your final answer now, with no "
+                                    "promises to act later."
+                                ),
+                            )
+                        )
+                        continue
+                    self._prepare_compaction()
+                    yield TurnComplete(assistant_text)
+                    return
+
+                # Execute the requested tools and feed results back as tool messages,
+                # in the order the model asked for them. A tool may return images
+                # (e.g. a screenshot) — attach them so the vision model can see them
+                # on the next round.
+                start = 0
+                for batch in self._tool_batches(tool_calls):
+                    for i, call in enumerate(batch, start):
+                        yield ToolStarted(call.name, call.arguments, i)
+                    calls = enumerate(batch, start)
+                    for result in self._run_batch(batch, start):
+                        if isinstance(result, ToolProgress):
+                            yield result
+                            continue
+                        index, call = next(calls)
+                        text = self._fit_output(call, result.text)
+                        self.messages.append(
+                            Message(
+                                role="tool",
+                                content=text,
+                                tool_call_id=call.id,
+                                images=result.images,
+                            )
+                        )
+                        yield ToolFinished(call.name, text, index)
+                    start += len(batch)
+                if self._cancelled():
+                    yield from self._interrupted("")
+                    return
+                # ...then loop so the model can use those results.
 
         # Cap reached. Rather than dead-stopping mid-research, give the model one
         # final, tool-free turn to deliver a usable answer from what it gathered.
@@ -543,16 +1148,14 @@ class Agent:
                 ),
             )
         )
-        final_text = ""
-        for chunk in self.provider.chat(
-            self._context(),
-            model=self.model,
-            tools=None,
-            temperature=self.config.temperature,
-            num_ctx=self.effective_context(),
-        ):
-            if chunk.content:
-                final_text += chunk.content
-                yield TextDelta(chunk.content)
+        with span("round", cat="agent", n=self.config.max_tool_iterations + 1, final=True):
+            final_text, _, usage, estimated = yield from self._chat(None)
+        if self._cancelled():
+            yield from self._interrupted(final_text)
+            return
         self.messages.append(Message(role="assistant", content=final_text))
+        if usage is not None:
+            self._record_usage(usage, estimated)
+            yield Usage(self.model, usage)
+        self._prepare_compaction()
         yield TurnComplete(final_text)
@@ -0,0 +1,153 @@
+"""Fit the system prompt to the model's context window.
+
+``compose`` takes the prompt as ``Section``s, each with a priority and a cap
+(a fraction of the window), and a budget for the whole prompt. A section over
+its cap is trimmed, or dropped if it can't be. While the total is over
+budget, the least important section is trimmed, then dropped; priority 0 (the
+base instructions) is never touched. Volatile sections (memory, project
+brief) get what the stable ones leave, less a small ``reserve`` held for them,
+so a new memory never changes the stable system prompt.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from .ledger import CHARS_PER_TOKEN
+
+_MIN_TRIMMED = 24  # tokens: a trimmed section smaller than this is dropped instead
+
+
+def estimate(text: str) -> int:
+    return int(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class Section:
+    """One block of the prompt. Trimmable sections have a header line (always
+    kept) followed by items; ``trim`` says which end of the items survives."""
+
+    name: str
+    text: str
+    priority: int  # 0 = never dropped; higher = given up first
+    cap: float = 1.0  # most this section may take, as a fraction of the context
+    trim: str | None = None  # "head" keeps the first items, "tail" the last; None = all or nothing
+    volatile: bool = False  # memory / project state: goes in the context note
+    reserve: float = 0.0  # (volatile) share of the context held back from stable sections
+
+
+@dataclass
+class SectionFit:
+    """How one section fared: ``tokens`` sent of ``full`` wanted."""
+
+    name: str
+    full: int
+    tokens: int
+    volatile: bool = False
+
+    @property
+    def state(self) -> str:
+        if self.tokens == 0:
+            return "dropped"
+        return "trimmed" if self.tokens < self.full else "kept"
+
+
+@dataclass
+class ComposedPrompt:
+    system: str
+    note: str  # the volatile sections ('' if none)
+    context: int  # window the budget came from (0 = unbounded)
+    budget: int
+    sections: list[SectionFit] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> int:
+        return estimate(self.system) + estimate(self.note)
+
+    @property
+    def text(self) -> str:
+        """System prompt and note together, for the unstable layout."""
+        return f"{self.system}\n\n{self.note}" if self.note else self.system
+
+    def summary(self) -> str:
+        line = f"~{self.tokens:,} tokens"
+        if self.context:
+            line += f" ({self.tokens / self.context:.0%} of a {self.context:,}-token context)"
+        cut = [f"{s.name} {s.state}" for s in self.sections if s.state != "kept"]
+        return line + (f"; {', '.join(cut)}" if cut else "")
+
+
+def _marker(left_out: int) -> str:
+    return f"[... {left_out} more lines left out to fit the context]"
+
+
+def _trim(section: Section, tokens: int) -> str:
+    """``section`` cut down to about ``tokens`` ('' if nothing useful fits)."""
+    if section.trim is None or tokens < _MIN_TRIMMED:
+        return ""
+    header, _, body = section.text.partition("\n")
+    items = body.splitlines()
+    room = tokens * CHARS_PER_TOKEN - len(header) - len(_marker(len(items))) - 2
+    kept: list[str] = []
+    for item in items if section.trim == "head" else reversed(items):
+        if room - len(item) - 1 < 0:
+            break
+        room -= len(item) + 1
+        kept.append(item)
+    if not kept:
+        return ""
+    if section.trim == "tail":
+        kept.reverse()
+    marker = _marker(len(items) - len(kept))
+    parts = [header, *kept, marker] if section.trim == "head" else [header, marker, *kept]
+    return "\n".join(parts)
+
+
+def _total(texts: list[str]) -> int:
+    return estimate("\n\n".join(t for t in texts if t))
+
+
+def _fit(sections: list[Section], context: int, budget: int) -> list[str]:
+    """The text of each section after fitting (''= dropped)."""
+    texts = [s.text for s in sections]
+    if not context:
+        return texts
+    for i, s in enumerate(sections):
+        cap = int(context * s.cap)
+        if s.priority and estimate(texts[i]) > cap:
+            texts[i] = _trim(s, cap)
+    # Least important first; among equals, the later section gives way.
+    order = sorted(
+        (i for i, s in enumerate(sections) if s.priority),
+        key=lambda i: (sections[i].priority, i),
+        reverse=True,
+    )
+    for i in order:
+        over = _total(texts) - budget
+        if over <= 0:
+            break
+        if texts[i]:
+            texts[i] = _trim(sections[i], estimate(texts[i]) - over)
+    return texts
+
+
+def compose(sections: list[Section], context: int = 0, share: float = 0.25) -> ComposedPrompt:
+    """Fit ``sections`` into ``share`` of a ``context``-token window (0 = no limit)."""
+    budget = int(context * share)
+    stable = [s for s in sections if not s.volatile]
+    volatile = [s for s in sections if s.volatile]
+    reserve = min(int(context * sum(s.reserve for s in volatile)), budget // 2)
+    stable_texts = _fit(stable, context, budget - reserve)
+    left = max(budget - _total(stable_texts) - 1, 0)  # -1: the break between the two
+    volatile_texts = _fit(volatile, context, left)
+    fits = [
+        SectionFit(s.name, estimate(s.text), estimate(t), s.volatile)
+        for s, t in zip(stable + volatile, stable_texts + volatile_texts, strict=True)
+    ]
+    return ComposedPrompt(
+        system="\n\n".join(t for t in stable_texts if t),
+        note="\n\n".join(t for t in volatile_texts if t),
+        context=context,
+        budget=budget,
+        sections=fits,
+    )
@@ -0,0 +1,513 @@
+"""Benchmarks for the agent's own overhead, with no model in the loop.
+
+``oshell bench internals`` times the code that runs around every model call:
+a round of ``Agent.send``, ``context_fill``, ``compact``, building the system
+prompt, ``ToolRegistry.dispatch_full``, saving and listing sessions, and
+memory recall. Each runs against transcripts or stores of 10 to 10,000 items,
+so a change that turns something linear into something quadratic shows up
+at the sizes where it starts to hurt.
+
+The model is a ``ScriptedProvider``: it replays canned replies and tool calls
+as a chunk stream, instantly by default (so the numbers are pure overhead)
+or at a set token rate. A run is written as JSON with the commit it was
+taken at. ``--compare`` lines it up against an earlier run, case by case.
+
+``oshell bench e2e`` goes through the real providers instead: concurrent
+sessions against the stand-in server (:mod:`oshell.standin`) or a live
+backend, reporting p50/p95 time to first token and tokens per second.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import platform
+import statistics
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from . import __version__
+from .agent.ledger import CHARS_PER_TOKEN
+from .cancellation import Cancelled, CancelToken
+from .config import Config
+from .providers.base import ChatChunk, LLMProvider, Message, TokenUsage, ToolCall
+from .tools.base import Tool, ToolRegistry
+
+SIZES = (10, 100, 1000, 10000)
+
+
+@dataclass
+class Reply:
+    """One scripted model response: streamed text, then any tool calls."""
+
+    text: str = ""
+    tool_calls: list[ToolCall] = field(default_factory=list)
+
+
+class ScriptedProvider(LLMProvider):
+    """Replays ``script`` one reply per chat request, wrapping around at the end.
+
+    Text streams in chunks of ``chunk_tokens``; with ``tokens_per_s`` set, each
+    chunk waits its share of the rate first (0 = as fast as possible). The
+    final chunk carries the tool calls and a usage report, as Ollama's does.
+    """
+
+    name = "scripted"
+
+    def __init__(
+        self,
+        script: list[Reply] | None = None,
+        *,
+        tokens_per_s: float = 0.0,
+        chunk_tokens: int = 4,
+        models: list[str] | None = None,
+    ):
+        self.script = script or [Reply("Done.")]
+        self.tokens_per_s = tokens_per_s
+        self.chunk_tokens = max(chunk_tokens, 1)
+        self.models = models or ["scripted"]
+        self.calls = 0
+
+    def list_models(self) -> list[str]:
+        return list(self.models)
+
+    def chat(
+        self,
+        messages: list[Message],
+        *,
+        model: str,
+        tools: list[dict[str, Any]] | None = None,
+        temperature: float = 0.7,
+        stream: bool = True,
+        num_ctx: int | None = None,
+        cancel: CancelToken | None = None,
+    ) -> Iterator[ChatChunk]:
+        reply = self.script[self.calls % len(self.script)]
+        self.calls += 1
+        return self._stream(reply, messages, cancel)
+
+    def _stream(
+        self, reply: Reply, messages: list[Message], cancel: CancelToken | None
+    ) -> Iterator[ChatChunk]:
+        t0 = time.perf_counter()
+        step = int(self.chunk_tokens * CHARS_PER_TOKEN)
+        for i in range(0, len(reply.text), step):
+            if cancel is not None and cancel.cancelled:
+                raise Cancelled()
+            if self.tokens_per_s > 0:
+                time.sleep(self.chunk_tokens / self.tokens_per_s)
+            yield ChatChunk(content=reply.text[i : i + step])
+        prompt = int(sum(len(m.content) for m in messages) / CHARS_PER_TOKEN)
+        usage = TokenUsage(
+            prompt_tokens=prompt,
+            completion_tokens=int(len(reply.text) / CHARS_PER_TOKEN),
+            total_seconds=time.perf_counter() - t0,
+        )
+        yield ChatChunk(tool_calls=list(reply.tool_calls), done=True, usage=usage)
+
+
+class _EchoTool(Tool):
+    """A tool that costs nothing, so dispatch timings are the registry's own."""
+
+    description = "Repeats its input back; a stand-in for a cheap read-only tool."
+    parameters = {"type": "object", "properties": {"text": {"type": "string"}}}
+    concurrency_safe = True
+    deadline = 60.0  # like the read-only tools it stands in for
+
+    def __init__(self, name: str = "echo"):
+        self.name = name
+
+    def run(self, text: str = "", **_: Any) -> str:
+        return text
+
+
+def transcript(n: int) -> list[Message]:
+    """``n`` messages after the system prompt: user / tool-calling assistant / tool turns."""
+    out = []
+    for i in range(n):
+        kind = i % 3
+        if kind == 0:
+            out.append(Message(role="user", content=f"step {i}: " + "please continue " * 8))
+        elif kind == 1:
+            call = ToolCall(name="echo", arguments={"text": f"file_{i}.py"}, id=f"c{i}")
+            out.append(Message(role="assistant", content="Checking.", tool_calls=[call]))
+        else:
+            out.append(Message(role="tool", content="line of output\n" * 20, tool_call_id=f"c{i}"))
+    return out
+
+
+def _config(context: int = 1_000_000) -> Config:
+    # Fixed window, no compaction mid-turn, no git probing: the same work on every machine.
+    return Config(context_length=context, compact_threshold=0, project_context=False)
+
+
+def _agent(size: int, script: list[Reply] | None = None, tokens_per_s: float = 0.0) -> Any:
+    from .agent import Agent
+
+    provider = ScriptedProvider(script, tokens_per_s=tokens_per_s)
+    agent = Agent(provider, ToolRegistry([_EchoTool()]), _config(), model="scripted")
+    agent.messages += transcript(size)
+    return agent
+
+
+def _memory(workdir: Path, size: int) -> Any:
+    """A MemoryStore of ``size`` facts, written in one go (``add`` rewrites the file)."""
+    from .memory import MemoryStore
+
+    path = workdir / f"memory-{size}.json"
+    facts = [
+        {"id": f"{i:08x}", "text": f"the user prefers tool {i % 97} for project {i}"}
+        for i in range(size)
+    ]
+    path.write_text(json.dumps({"memories": facts}), encoding="utf-8")
+    return MemoryStore(path)
+
+
+# ── cases ────────────────────────────────────────────────────────────────────
+# Each case prepares state for one size (untimed) and returns the operation to
+# time. A case whose operation changes that state (compact) is prepared afresh
+# for every repetition.
+
+
+@dataclass
+class Case:
+    name: str
+    about: str
+    prepare: Callable[[int, Path, float], Callable[[], Any]]
+    fresh: bool = False
+    per: str = "call"  # "round": the operation returns how many model rounds it ran
+
+
+def _send(size: int, workdir: Path, rate: float) -> Callable[[], Any]:
+    # One tool round, then the answer: two model rounds per send.
+    call = ToolCall(name="echo", arguments={"text": "hi"}, id="b1")
+    agent = _agent(size, [Reply("Let me check.", [call]), Reply("All done. " * 20)], rate)
+
+    def op() -> int:
+        before = agent.provider.calls
+        for _ in agent.send("next step, please"):
+            pass
+        return agent.provider.calls - before
+
+    return op
+
+
+def _context_fill(size: int, workdir: Path, rate: float) -> Callable[[], Any]:
+    agent = _agent(size)
+    agent.context_fill()
+
+    def op() -> float:  # a new reply, then the gauge redraw that follows it
+        agent.messages.append(Message(role="assistant", content="another reply " * 10))
+        return agent.context_fill()
+
+    return op
+
+
+def _compact(size: int, workdir: Path, rate: float) -> Callable[[], Any]:
+    agent = _agent(size, [Reply("Summary: the user asked for steps; files were read.")])
+    return agent.compact
+
+
+def _system_prompt(size: int, workdir: Path, rate: float) -> Callable[[], Any]:
+    from .agent.loop import build_system_prompt
+
+    registry = ToolRegistry([_EchoTool(f"tool_{i}") for i in range(20)])
+    memory = _memory(workdir, size)
+    return lambda: build_system_prompt(registry, memory=memory, context=8192)
+
+
+def _dispatch(size: int, workdir: Path, rate: float) -> Callable[[], Any]:
+    from .tools.guard import ToolGuard
+
+    # Guarded, as in a session: each call runs against its deadline.
+    registry = ToolRegistry([_EchoTool(f"tool_{i}") for i in range(size)], guard=ToolGuard())
+    call = ToolCall(name=f"tool_{size // 2}", arguments={"text": "x" * 200})
+    return lambda: registry.dispatch_full(call)
+
+
+def _sessions_save(size: int, workdir: Path, rate: float) -> Callable[[], Any]:
+    from . import sessions
+
+    messages = transcript(size)
+    folder = workdir / f"save-{size}"
+    return lambda: sessions.save(
+        messages, sid="bench", model="scripted", directory=folder, max_messages=size
+    )
+
+
+def _sessions_list(size: int, workdir: Path, rate: float) -> Callable[[], Any]:
+    from . import sessions
+
+    folder = workdir / f"list-{size}"
+    messages = transcript(6)
+    for i in range(size):
+        sessions.save(messages, sid=f"20260101-{i:06d}", model="scripted", directory=folder)
+    return lambda: sessions.list_sessions(folder)
+
+
+def _memory_search(size: int, workdir: Path, rate: float) -> Callable[[], Any]:
+    memory = _memory(workdir, size)
+    return lambda: memory.search("which tool does the user prefer for this project")
+
+
+CASES = [
+    Case("send", "Agent.send overhead per model round", _send, per="round"),
+    Case("context_fill", "context_fill after a new message", _context_fill),
+    Case("compact", "compact the transcript (instant summarizer)", _compact, fresh=True),
+    Case("system_prompt", "build_system_prompt with N memories", _system_prompt),
+    Case("dispatch", "dispatch_full in a registry of N tools", _dispatch),
+    Case("sessions_save", "sessions.save of N messages", _sessions_save),
+    Case("sessions_list", "sessions.list_sessions over N sessions", _sessions_list),
+    Case("memory_search", "MemoryStore.search over N facts", _memory_search),
+]
+
+
+# ── running and comparing ────────────────────────────────────────────────────
+
+
+@dataclass
+class Timing:
+    case: str
+    size: int
+    runs: list[float]  # ms per call (or per round)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.runs)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "case": self.case,
+            "size": self.size,
+            "median_ms": round(self.median, 4),
+            "min_ms": round(min(self.runs), 4),
+            "max_ms": round(max(self.runs), 4),
+            "runs": len(self.runs),
+        }
+
+
+def _time(case: Case, size: int, repeat: int, workdir: Path, rate: float) -> Timing:
+    op = None if case.fresh else case.prepare(size, workdir, rate)
+    if op is not None:
+        op()  # warm-up: first-call costs (ledger sync, imports) aren't the steady state
+    runs = []
+    for _ in range(max(repeat, 1)):
+        if case.fresh:
+            op = case.prepare(size, workdir, rate)
+        assert op is not None
+        t0 = time.perf_counter()
+        done = op()
+        elapsed = (time.perf_counter() - t0) * 1e3
+        runs.append(elapsed / max(done, 1) if case.per == "round" else elapsed)
+    return Timing(case.name, size, runs)
+
+
+def run(
+    sizes: tuple[int, ...] = SIZES,
+    only: list[str] | None = None,
+    repeat: int = 5,
+    tokens_per_s: float = 0.0,
+    progress: Callable[[str, int], None] | None = None,
+) -> dict[str, Any]:
+    """Run the cases (all, or those named in ``only``); the JSON-ready report."""
+    cases = [c for c in CASES if not only or c.name in only]
+    unknown = set(only or ()) - {c.name for c in CASES}
+    if unknown:
+        raise ValueError(f"unknown case(s): {', '.join(sorted(unknown))}")
+    results = []
+    with tempfile.TemporaryDirectory(prefix="oshell-bench-") as tmp:
+        for case in cases:
+            for size in sizes:
+                if progress is not None:
+                    progress(case.name, size)
+                results.append(_time(case, size, repeat, Path(tmp), tokens_per_s).to_dict())
+    return {
+        "commit": _commit(),
+        "version": __version__,
+        "python": platform.python_version(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "repeat": repeat,
+        "tokens_per_s": tokens_per_s,
+        "cases": {c.name: c.about for c in cases},
+        "results": results,
+    }
+
+
+def _commit() -> str:
+    from .project import _git
+
+    return _git(["rev-parse", "--short", "HEAD"], Path(__file__).parent) or ""
+
+
+@dataclass
+class Change:
+    case: str
+    size: int
+    before_ms: float
+    after_ms: float
+
+    @property
+    def ratio(self) -> float:
+        return self.after_ms / max(self.before_ms, 1e-9)
+
+
+def compare(before: dict[str, Any], after: dict[str, Any]) -> list[Change]:
+    """Case-by-case medians of two reports, for the (case, size) pairs both have."""
+    old = {(r["case"], r["size"]): r["median_ms"] for r in before.get("results", [])}
+    return [
+        Change(r["case"], r["size"], old[(r["case"], r["size"])], r["median_ms"])
+        for r in after.get("results", [])
+        if (r["case"], r["size"]) in old
+    ]
+
+
+# ── end to end, over HTTP ────────────────────────────────────────────────────
+
+
+@dataclass
+class _Request:
+    ttft_ms: float  # until the first chunk: text, or the tool calls of a silent round
+    total_ms: float
+    tokens: int
+    failed: bool
+
+
+class _Timed(LLMProvider):
+    """Times every chat request the wrapped provider makes, from call to last chunk."""
+
+    def __init__(self, inner: LLMProvider):
+        self.inner = inner
+        self.name = inner.name
+        self.requests: list[_Request] = []
+        self._lock = threading.Lock()
+
+    def list_models(self) -> list[str]:
+        return self.inner.list_models()
+
+    def capabilities(self, model: str) -> set[str]:
+        return self.inner.capabilities(model)
+
+    def max_context(self, model: str) -> int | None:
+        return self.inner.max_context(model)
+
+    def chat(self, messages: list[Message], **kw: Any) -> Iterator[ChatChunk]:
+        t0 = time.perf_counter()
+        first = 0.0
+        tokens = 0
+        failed = True
+        stream = self.inner.chat(messages, **kw)
+        try:
+            for chunk in stream:
+                if not first:
+                    first = time.perf_counter()
+                if chunk.usage is not None:
+                    tokens = chunk.usage.completion_tokens or 0
+                yield chunk
+            failed = False
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+            end = time.perf_counter()
+            sample = _Request(((first or end) - t0) * 1e3, (end - t0) * 1e3, tokens, failed)
+            with self._lock:
+                self.requests.append(sample)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ranked = sorted(values)
+    return ranked[min(max(math.ceil(q * len(ranked)) - 1, 0), len(ranked) - 1)]
+
+
+def _spread(values: list[float]) -> dict[str, float]:
+    return {
+        "p50": round(_percentile(values, 0.5), 2),
+        "p95": round(_percentile(values, 0.95), 2),
+        "max": round(max(values, default=0.0), 2),
+    }
+
+
+def e2e(
+    url: str,
+    *,
+    backend: str = "ollama",
+    model: str = "standin:latest",
+    sessions: int = 4,
+    turns: int = 5,
+    progress: Callable[[int], None] | None = None,
+) -> dict[str, Any]:
+    """Drive ``sessions`` concurrent agents for ``turns`` turns each against ``url``.
+
+    The provider is the real one for ``backend`` (ollama, or openai for the
+    /v1 API), so every request crosses HTTP and the streaming parser. Each
+    agent has one cheap tool to call when the server asks for it. A turn that
+    fails (an injected 500) is counted and the session moves on.
+    """
+    from .agent import Agent
+    from .providers import OllamaProvider, OpenAICompatProvider
+
+    pool = max(sessions, 8)
+    if backend == "ollama":
+        inner: LLMProvider = OllamaProvider(url, pool_size=pool)
+    elif backend == "openai":
+        inner = OpenAICompatProvider(url, pool_size=pool)
+    else:
+        raise ValueError(f"unknown backend '{backend}' (expected ollama or openai)")
+    provider = _Timed(inner)
+    turn_ms: list[float] = []
+    failed = [0]
+    lock = threading.Lock()
+
+    def session(i: int) -> None:
+        agent = Agent(provider, ToolRegistry([_EchoTool()]), _config(8192), model=model)
+        for t in range(turns):
+            t0 = time.perf_counter()
+            try:
+                for _ in agent.send(f"session {i}, turn {t}: what changed?"):
+                    pass
+                ok = True
+            except Exception:  # an injected failure ends the turn, not the session
+                ok = False
+            with lock:
+                if ok:
+                    turn_ms.append((time.perf_counter() - t0) * 1e3)
+                else:
+                    failed[0] += 1
+                if progress is not None:
+                    progress(len(turn_ms) + failed[0])
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max(sessions, 1), thread_name_prefix="oshell-bench") as ex:
+        list(ex.map(session, range(sessions)))
+    wall = time.perf_counter() - t0
+    done = [r for r in provider.requests if not r.failed]
+    tokens = sum(r.tokens for r in done)
+    return {
+        "commit": _commit(),
+        "version": __version__,
+        "python": platform.python_version(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "backend": backend,
+        "url": url,
+        "model": model,
+        "sessions": sessions,
+        "turns": turns,
+        "turns_failed": failed[0],
+        "requests": len(provider.requests),
+        "requests_failed": len(provider.requests) - len(done),
+        "ttft_ms": _spread([r.ttft_ms for r in done]),
+        "request_ms": _spread([r.total_ms for r in done]),
+        "turn_ms": _spread(turn_ms),
+        "tokens": tokens,
+        "wall_s": round(wall, 3),
+        "tokens_per_s": round(tokens / wall, 1) if wall else 0.0,
+    }
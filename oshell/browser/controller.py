@@ -5,6 +5,10 @@ fresh worker thread — so we can't create the browser in one thread and use it
 another. This controller owns a single long-lived thread; every operation is a
 closure marshalled to that thread via a queue and awaited. The browser therefore
 persists across turns with no thread-affinity errors.
+
+When the turn is cancelled (``cancellation.current()``), the caller stops
+waiting at once. An operation that hasn't started is skipped; one already
+running finishes on the owner thread, bounded by its own Playwright timeout.
 """
 
 from __future__ import annotations
@@ -14,6 +18,9 @@ import threading
 from collections.abc import Callable
 from typing import Any
 
+from .. import cancellation
+from ..cancellation import Cancelled
+
 
 class BrowserUnavailable(RuntimeError):
     """Playwright isn't installed, or its Chromium browser isn't available."""
@@ -73,6 +80,9 @@ class BrowserController:
                 if item is _STOP:
                     break
                 fn, box, done = item
+                if box.get("cancelled"):
+                    done.set()
+                    continue
                 try:
                     box["result"] = fn(page)
                 except Exception as exc:  # report per-call errors to the caller
@@ -104,7 +114,17 @@ class BrowserController:
             box: dict[str, Any] = {}
             done = threading.Event()
             self._q.put((fn, box, done))
-            if not done.wait(timeout):
+            cancel = cancellation.current()
+            unregister = cancel.on_cancel(done.set) if cancel is not None else None
+            try:
+                finished = done.wait(timeout)
+            finally:
+                if unregister is not None:
+                    unregister()
+            if cancel is not None and cancel.cancelled and not box.keys() & {"result", "error"}:
+                box["cancelled"] = True  # skipped if the owner thread hasn't reached it
+                raise Cancelled("browser operation cancelled by the user")
+            if not finished:
                 raise BrowserUnavailable(f"browser operation timed out after {timeout:g}s")
             if "error" in box:
                 raise box["error"]
@@ -0,0 +1,160 @@
+"""Cooperative cancellation for a turn in flight.
+
+Stopping a turn means more than no longer reading its events. The backend
+keeps decoding, and holding the GPU, until its HTTP stream is closed. A shell
+command runs until it finishes, and an MCP server or the browser keeps
+working on a request nobody wants. A ``CancelToken`` is created per turn
+(Esc in the TUI, Ctrl+C in the CLI) and handed down the stack:
+
+- ``Agent.send(..., cancel=token)`` stops between rounds and tool batches,
+  and records what was said so far, marked as interrupted;
+- ``LLMProvider.chat(..., cancel=token)`` closes the streaming response, which
+  tells Ollama to stop generating;
+- tools reach the token of the call they serve through ``current()``, which
+  the tool registry sets around each run. ``run_command`` tears down the
+  running command, and MCP and browser calls stop waiting.
+
+Work that can't be interrupted mid-call is abandoned with
+``run_cancellable``: the caller moves on at once and the late result is
+cleaned up when it arrives.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class Cancelled(Exception):
+    """The user cancelled the turn this work belonged to."""
+
+
+class CancelToken:
+    """Set once by the user; checked, waited on, or subscribed to by workers."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel, running every registered callback once (from this thread)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception:  # pragma: no cover - a cleanup hook must not block the rest
+                pass
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled("cancelled by the user")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until cancelled (True) or ``timeout`` passes (False)."""
+        return self._event.wait(timeout)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run ``callback`` on cancel (now, if already cancelled).
+
+        Returns a function that unregisters it. Call that when the work ends,
+        so a finished request isn't "cancelled" later.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+_current: ContextVar[CancelToken | None] = ContextVar("oshell_cancel", default=None)
+
+
+def current() -> CancelToken | None:
+    """The token of the turn this code runs for (None outside a cancellable turn)."""
+    return _current.get()
+
+
+@contextmanager
+def use(token: CancelToken | None) -> Iterator[None]:
+    """Make ``token`` what ``current()`` returns inside the block."""
+    reset = _current.set(token)
+    try:
+        yield
+    finally:
+        _current.reset(reset)
+
+
+def run_cancellable(
+    fn: Callable[[], T],
+    cancel: CancelToken | None,
+    discard: Callable[[T], None] | None = None,
+    timeout: float | None = None,
+) -> T:
+    """``fn()``, unless ``cancel`` fires first: then raise ``Cancelled`` at once.
+
+    For blocking calls with no way to interrupt them (an HTTP request still
+    waiting for headers while the backend prefills). ``fn`` keeps running on
+    a helper thread, and ``discard`` receives its result when it does
+    finish. For a response, discarding closes it, which stops the backend.
+    A call still running after ``timeout`` seconds is abandoned the same
+    way, raising ``TimeoutError``. The helper thread is a daemon, so a call
+    that never returns can't hold up the process at exit.
+    """
+    if cancel is None and timeout is None:
+        return fn()
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+    box: dict[str, object] = {}
+    done = threading.Event()
+    lock = threading.Lock()
+
+    def work() -> None:
+        try:
+            result = fn()
+        except BaseException as exc:  # handed to the waiting caller
+            box["error"] = exc
+            done.set()
+            return
+        with lock:
+            abandoned = "abandoned" in box
+            box["result"] = result
+        done.set()
+        if abandoned and discard is not None:
+            discard(result)
+
+    threading.Thread(target=work, name="oshell-cancellable", daemon=True).start()
+    unregister = cancel.on_cancel(done.set) if cancel is not None else None
+    try:
+        done.wait(timeout)
+    finally:
+        if unregister is not None:
+            unregister()
+    with lock:
+        if "result" not in box and "error" not in box:
+            box["abandoned"] = True
+            if cancel is not None and cancel.cancelled:
+                raise Cancelled("cancelled by the user")
+            raise TimeoutError(f"no result after {timeout:g}s")
+    if "error" in box:
+        raise box["error"]  # type: ignore[misc]
+    return box["result"]  # type: ignore[return-value]
@@ -18,7 +18,12 @@ chat logic — that lives in :mod:`oshell.agent`.
 
 from __future__ import annotations
 
+import signal
 import sys
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
 
 import typer
 from rich.console import Console
@@ -31,13 +36,20 @@ from .agent import (
     LimitReached,
     TextDelta,
     ToolFinished,
+    ToolProgress,
     ToolStarted,
+    TurnCancelled,
     TurnComplete,
+    Usage,
 )
+from .cancellation import CancelToken
 from .config import Config
 from .providers import get_provider
 from .tools import default_registry
 
+if TYPE_CHECKING:
+    from .agent.prompt import ComposedPrompt
+
 app = typer.Typer(
     help="Ollama Shell — a local-first, agentic shell for Ollama.",
     add_completion=False,
@@ -70,8 +82,12 @@ def _cli_approver(call) -> bool:
         return False
 
 
-def _build_agent(config: Config, model: str | None, interactive: bool = True) -> Agent:
+def _build_agent(
+    config: Config, model: str | None, interactive: bool = True, session: bool = False
+) -> Agent:
+    """``session``: a multi-turn REPL, worth preparing compaction between turns."""
     from .memory import MemoryStore
+    from .providers import ResidencyManager
 
     provider = get_provider(config)
     m = model or config.default_model
@@ -84,6 +100,35 @@ def _build_agent(config: Config, model: str | None, interactive: bool = True) ->
         model=m,
         memory=memory,
         approver=_cli_approver if interactive else None,
+        residency=ResidencyManager.for_provider(provider, config.residency),
+        background_compaction=session,
+    )
+
+
+def _prompt_fit(config: Config, provider: Any) -> ComposedPrompt:
+    """How the default model's system prompt fits its context window.
+
+    Composed from the prompt sections directly rather than by building an
+    agent: no MCP server is started (their tools aren't counted) and nothing
+    is warmed up or written.
+    """
+    from .agent.loop import context_sections, context_window, prompt_sections
+    from .agent.prompt import compose
+    from .memory import MemoryStore
+
+    model = config.default_model
+    no_mcp = config.model_copy(update={"mcp_servers": {}})
+    registry = default_registry(provider, no_mcp, model=model)
+    sections = prompt_sections(registry, read_only=config.approvals == "read-only")
+    if registry.active():
+        project = None
+        if config.project_context:
+            from .project import project_context
+
+            project = project_context()
+        sections += context_sections(MemoryStore(config.memory.path), project)
+    return compose(
+        sections, context_window(provider, config, model), config.system_prompt_share
     )
 
 
@@ -101,33 +146,69 @@ def _privacy_banner(agent: Agent) -> Panel:
     return Panel(body, title="privacy", border_style="green", expand=False)
 
 
+@contextmanager
+def _ctrl_c_cancels() -> Iterator[CancelToken]:
+    """A token that the first Ctrl+C cancels; a second Ctrl+C interrupts as usual.
+
+    Only the main thread can install signal handlers. Anywhere else, the
+    token is just never cancelled.
+    """
+    cancel = CancelToken()
+    if threading.current_thread() is not threading.main_thread():
+        yield cancel
+        return
+
+    def on_sigint(signum: int, frame: Any) -> None:
+        if cancel.cancelled:
+            raise KeyboardInterrupt
+        cancel.cancel()
+        console.print("\n[dim]stopping… (Ctrl+C again to quit)[/dim]")
+
+    previous = signal.signal(signal.SIGINT, on_sigint)
+    try:
+        yield cancel
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
 def _render_turn(agent: Agent, text: str) -> None:
-    """Stream one turn to the console, rendering tool activity inline."""
+    """Stream one turn to the console, rendering tool activity inline.
+
+    Ctrl+C stops the turn, and the backend's generation, but keeps the session.
+    """
     streaming = False
-    for event in agent.send(text):
-        if isinstance(event, TextDelta):
-            console.print(event.text, end="")
-            streaming = True
-        elif isinstance(event, ToolStarted):
-            if streaming:
+    with _ctrl_c_cancels() as cancel:
+        for event in agent.send(text, cancel=cancel):
+            if isinstance(event, TextDelta):
+                console.print(event.text, end="")
+                streaming = True
+            elif isinstance(event, ToolStarted):
+                if streaming:
+                    console.print()
+                    streaming = False
+                console.print(f"[dim]⚙ {event.name}({event.arguments})[/dim]")
+            elif isinstance(event, ToolProgress):
+                # Live output of a long-running tool (a build, a test run).
+                for line in event.text.splitlines():
+                    console.print(f"  │ {line}", style="dim", markup=False, highlight=False)
+            elif isinstance(event, ToolFinished):
+                preview = event.result.replace("\n", " ")[:120]
+                console.print(f"[dim]  ↳ {preview}[/dim]")
+            elif isinstance(event, Compacted):
+                console.print(
+                    f"[dim]✂ compacted {event.dropped} older messages into a "
+                    f"{event.summary_chars}-char summary to free context"
+                    f"{' (prepared between turns)' if event.background else ''}[/dim]"
+                )
+            elif isinstance(event, TurnComplete):
                 console.print()
-                streaming = False
-            console.print(f"[dim]⚙ {event.name}({event.arguments})[/dim]")
-        elif isinstance(event, ToolFinished):
-            preview = event.result.replace("\n", " ")[:120]
-            console.print(f"[dim]  ↳ {preview}[/dim]")
-        elif isinstance(event, Compacted):
-            console.print(
-                f"[dim]✂ compacted {event.dropped} older messages into a "
-                f"{event.summary_chars}-char summary to free context[/dim]"
-            )
-        elif isinstance(event, TurnComplete):
-            console.print()
-        elif isinstance(event, LimitReached):
-            console.print(
-                f"\n[yellow]Reached the {event.iterations}-round tool limit — "
-                "wrapping up with what I have.[/yellow]"
-            )
+            elif isinstance(event, TurnCancelled):
+                console.print(("\n" if streaming else "") + "[yellow]⏹ stopped[/yellow]")
+            elif isinstance(event, LimitReached):
+                console.print(
+                    f"\n[yellow]Reached the {event.iterations}-round tool limit — "
+                    "wrapping up with what I have.[/yellow]"
+                )
 
 
 SLASH_HELP = """\
@@ -179,9 +260,19 @@ def _handle_slash(agent: Agent, line: str) -> bool:
             except Exception as exc:
                 console.print(f"[red]{exc}[/red]")
     elif cmd == "/tools":
+        guard = agent.registry.guard
+        breakers = guard.states() if guard is not None else {}
         for t in agent.registry.active():
             tag = "" if t.local_only else " [yellow](network)[/yellow]"
+            if t.name in breakers:
+                tag += f" [red]({breakers[t.name]})[/red]"
             console.print(f"  [bold]{t.name}[/bold]{tag} — {t.description}")
+        selector = agent.registry.selector
+        if agent.tool_selection is not None and selector is not None:
+            console.print(
+                f"[dim]Last round: {agent.tool_selection.summary()} "
+                f"({selector.saved_total:,} this session)[/dim]"
+            )
     elif cmd == "/context":
         console.print(f"pinned={sorted(agent.pinned)}  excluded={sorted(agent.excluded)}")
     elif cmd in ("/daydream", "/dream"):
@@ -227,6 +318,7 @@ def _handle_slash(agent: Agent, line: str) -> bool:
         modes = ("auto", "ask", "read-only")
         if len(parts) == 2 and parts[1] in modes:
             agent.config.approvals = parts[1]
+            agent.rebuild_system_prompt()  # read-only offers fewer tools to select from
             from .config import update_local_config
 
             try:
@@ -308,12 +400,28 @@ def _maybe_route(agent: Agent, text: str, has_images: bool = False) -> None:
     """Switch models for this message when routing says so, with a visible note."""
     from .routing import pick_model
 
-    routed = pick_model(text, has_images, agent.config.routing, agent.model)
+    rcfg = agent.config.routing
+    resident = agent.resident_models() if rcfg.enabled else None
+    routed = pick_model(text, has_images, rcfg, agent.model, resident)
     if routed:
         agent.model = routed[0]
         console.print(f"[dim]→ {routed[0]} ({routed[1]})[/dim]")
 
 
+_TRACE_HELP = (
+    "Write a Chrome trace of this run to FILE (open in chrome://tracing or "
+    "Perfetto); a .jsonl FILE gets one span per line"
+)
+
+
+def _start_trace(path: str | None) -> None:
+    """Trace this process when --trace was given; written out at exit."""
+    if path:
+        from . import tracing
+
+        tracing.start(path)
+
+
 @app.command()
 def chat(
     model: str = typer.Option(None, "--model", "-m", help="Override the default model"),
@@ -323,10 +431,12 @@ def chat(
         "-r",
         help="Resume a saved session: an id (or unique prefix), or 'last'",
     ),
+    trace: str | None = typer.Option(None, "--trace", metavar="FILE", help=_TRACE_HELP),
 ) -> None:
     """Interactive agent chat (this is the default command)."""
     from . import sessions as sessions_mod
 
+    _start_trace(trace)
     config = Config.load()
     sid = sessions_mod.new_id()
     resumed = ""
@@ -345,8 +455,9 @@ def chat(
             console.print(f"[red]{exc}[/red]")
             raise typer.Exit(code=1) from None
 
-    agent = _build_agent(config, model)
+    agent = _build_agent(config, model, session=True)
     agent.messages.extend(prior)
+    agent.warm_up()
 
     console.print(
         Panel.fit(
@@ -384,7 +495,7 @@ def resume(
     model: str = typer.Option(None, "--model", "-m"),
 ) -> None:
     """Pick up where you left off — the most recent session, or SESSION_ID."""
-    chat(model=model, resume=session_id or "last")
+    chat(model=model, resume=session_id or "last", trace=None)
 
 
 _PIPE_LIMIT = 12_000  # chars of piped stdin to keep (the tail — errors live there)
@@ -397,8 +508,10 @@ def ask(
     json_out: bool = typer.Option(
         False, "--json", help="Emit {answer, model, tools} as JSON (for scripts/CI)"
     ),
+    trace: str | None = typer.Option(None, "--trace", metavar="FILE", help=_TRACE_HELP),
 ) -> None:
     """One-shot question. Piped stdin becomes context: cat err.log | oshell ask "why?" """
+    _start_trace(trace)
     config = Config.load()
     # JSON mode is for machines: no approver (sensitive tools fail safe under
     # "ask"), no rich rendering, structured output only.
@@ -418,18 +531,28 @@ def ask(
 
         from .routing import pick_model
 
-        routed = pick_model(prompt, False, config.routing, agent.model)
+        resident = agent.resident_models() if config.routing.enabled else None
+        routed = pick_model(prompt, False, config.routing, agent.model, resident)
         if routed:
             agent.model = routed[0]
-        answer, tools_used = "", []
-        for event in agent.send(prompt):
-            if isinstance(event, ToolStarted):
-                tools_used.append({"name": event.name, "arguments": event.arguments})
-            elif isinstance(event, ToolFinished) and tools_used:
-                tools_used[-1]["result_preview"] = event.result[:400]
-            elif isinstance(event, TurnComplete):
-                answer = event.text
-        print(_json.dumps({"answer": answer, "model": agent.model, "tools": tools_used}))
+        tools_used: list[dict[str, Any]] = []
+        usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        out: dict[str, Any] = {"answer": "", "model": agent.model, "tools": tools_used}
+        with _ctrl_c_cancels() as cancel:
+            for event in agent.send(prompt, cancel=cancel):
+                if isinstance(event, Usage):  # summed over the turn's rounds
+                    usage["prompt_tokens"] += event.stats.prompt_tokens or 0
+                    usage["completion_tokens"] += event.stats.completion_tokens or 0
+                elif isinstance(event, ToolStarted):
+                    tools_used.append({"name": event.name, "arguments": event.arguments})
+                elif isinstance(event, ToolFinished) and tools_used:
+                    tools_used[-1]["result_preview"] = event.result[:400]
+                elif isinstance(event, TurnComplete):
+                    out["answer"] = event.text
+                elif isinstance(event, TurnCancelled):
+                    out["answer"], out["cancelled"] = event.text, True  # a partial answer
+        out["usage"] = usage
+        print(_json.dumps(out))
         return
     _maybe_route(agent, prompt)
     _render_turn(agent, prompt)
@@ -561,6 +684,204 @@ def sessions_rm(session_id: str) -> None:
     console.print(f"[green]✓[/green] deleted {session_id}")
 
 
+trace_app = typer.Typer(help="Read traces written with --trace.")
+app.add_typer(trace_app, name="trace")
+
+
+_TRACE_FILES = typer.Argument(..., help="Trace files, or directories of them")
+
+
+@trace_app.command("summarize")
+def trace_summarize(
+    files: list[str] = _TRACE_FILES,
+    top: int = typer.Option(15, "--top", "-n", help="How many spans to list"),
+) -> None:
+    """The top time sinks across traces, by self time (time not in child spans)."""
+    from . import tracing
+
+    try:
+        stats = tracing.summarize(files)
+    except (OSError, ValueError) as exc:
+        console.print(f"[red]could not read trace: {exc}[/red]")
+        raise typer.Exit(code=1) from None
+    if not stats:
+        console.print("[dim]No spans in those traces.[/dim]")
+        return
+    everything = sum(s.self_ms for s in stats) or 1.0
+    table = Table(title=f"Time sinks ({len(tracing.trace_files(files))} traces)")
+    table.add_column("span")
+    for col in ("calls", "self ms", "share", "total ms", "mean ms", "max ms"):
+        table.add_column(col, justify="right")
+    for s in stats[:top]:
+        table.add_row(
+            s.name,
+            str(s.count),
+            f"{s.self_ms:.1f}",
+            f"{100 * s.self_ms / everything:.0f}%",
+            f"{s.total_ms:.1f}",
+            f"{s.mean_ms:.1f}",
+            f"{s.max_ms:.1f}",
+        )
+    console.print(table)
+
+
+bench_app = typer.Typer(help="Benchmark the shell: its own overhead, and end to end.")
+app.add_typer(bench_app, name="bench")
+
+
+_BENCH_ONLY = typer.Option(None, "--only", help="Run just this case (repeatable)")
+
+
+@bench_app.command("internals")
+def bench_internals(
+    sizes: str = typer.Option("10,100,1000,10000", "--sizes", help="Comma-separated N values"),
+    only: list[str] = _BENCH_ONLY,
+    repeat: int = typer.Option(5, "--repeat", "-r", help="Timed runs per case and size"),
+    rate: float = typer.Option(0.0, "--rate", help="Scripted model tokens/s (0 = instant)"),
+    out: str = typer.Option("", "--out", "-o", help="Write the report as JSON here"),
+    against: str = typer.Option("", "--compare", help="An earlier JSON report to compare with"),
+    tolerance: float = typer.Option(0.2, "--tolerance", help="Slowdown flagged as a regression"),
+) -> None:
+    """Time the agent loop, context upkeep, tools, sessions and memory against a scripted model."""
+    import json as _json
+    from pathlib import Path
+
+    from . import bench
+
+    try:
+        ns = tuple(int(s) for s in sizes.split(",") if s.strip())
+        before = _json.loads(Path(against).read_text(encoding="utf-8")) if against else None
+    except (OSError, ValueError) as exc:
+        console.print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1) from None
+    with console.status("benchmarking…") as status:
+        try:
+            report = bench.run(
+                ns, only, repeat, rate, progress=lambda c, n: status.update(f"{c} (N={n:,})…")
+            )
+        except ValueError as exc:
+            console.print(f"[red]{exc}[/red]")
+            raise typer.Exit(code=1) from None
+    changes = {(c.case, c.size): c for c in bench.compare(before, report)} if before else {}
+    table = Table(title=f"Internals at {report['commit'] or 'an unknown commit'}")
+    table.add_column("case")
+    for col in ("N", "median ms", "min ms"):
+        table.add_column(col, justify="right")
+    if before:
+        table.add_column(f"vs {before.get('commit') or against}", justify="right")
+    for r in report["results"]:
+        row = [r["case"], f"{r['size']:,}", f"{r['median_ms']:.3f}", f"{r['min_ms']:.3f}"]
+        if before:
+            change = changes.get((r["case"], r["size"]))
+            if change is None:
+                row.append("[dim]new[/dim]")
+            else:
+                pct = f"{change.ratio - 1:+.0%}"
+                row.append(f"[red]{pct}[/red]" if change.ratio > 1 + tolerance else pct)
+        table.add_row(*row)
+    console.print(table)
+    if out:
+        Path(out).write_text(_json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        console.print(f"[dim]report written to {out}[/dim]")
+
+
+_TTFT = typer.Option(0.05, "--ttft", help="Stand-in: seconds to the first token")
+_RATE = typer.Option(200.0, "--rate", help="Stand-in: tokens/s (0 = unthrottled)")
+_REPLY = typer.Option(64, "--reply-tokens", help="Stand-in: tokens per text reply")
+_TOOL_RATE = typer.Option(0.3, "--tool-rate", help="Stand-in: share of rounds with a tool call")
+_ERROR_RATE = typer.Option(0.0, "--error-rate", help="Stand-in: share of chats failing (500)")
+
+
+@bench_app.command("e2e")
+def bench_e2e(
+    url: str = typer.Option("", "--url", help="A running backend (default: in-process stand-in)"),
+    backend: str = typer.Option("ollama", "--backend", "-b", help="ollama | openai"),
+    model: str = typer.Option("", "--model", "-m", help="Model to ask (with --url)"),
+    sessions: int = typer.Option(4, "--sessions", "-s", help="Concurrent chat sessions"),
+    turns: int = typer.Option(5, "--turns", "-t", help="Turns per session"),
+    ttft: float = _TTFT,
+    rate: float = _RATE,
+    reply_tokens: int = _REPLY,
+    tool_rate: float = _TOOL_RATE,
+    error_rate: float = _ERROR_RATE,
+    out: str = typer.Option("", "--out", "-o", help="Write the report as JSON here"),
+) -> None:
+    """Concurrent sessions over HTTP: p50/p95 time to first token and throughput."""
+    import json as _json
+    from pathlib import Path
+
+    from . import bench
+    from .standin import Behavior, StandInServer
+
+    server = None
+    if not url:
+        behavior = Behavior(ttft, rate, reply_tokens, tool_rate, error_rate)
+        server = StandInServer(behavior).start()
+        url, model = server.url, behavior.models[0]
+    total = sessions * turns
+    try:
+        with console.status(f"0/{total} turns…") as status:
+            report = bench.e2e(
+                url,
+                backend=backend,
+                model=model or Config.load().default_model,
+                sessions=sessions,
+                turns=turns,
+                progress=lambda n: status.update(f"{n}/{total} turns…"),
+            )
+    except ValueError as exc:
+        console.print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1) from None
+    finally:
+        if server is not None:
+            server.stop()
+    table = Table(title=f"{sessions} sessions × {turns} turns, {backend} API")
+    table.add_column("")
+    for col in ("p50 ms", "p95 ms", "max ms"):
+        table.add_column(col, justify="right")
+    for label, key in (("first token", "ttft_ms"), ("request", "request_ms"), ("turn", "turn_ms")):
+        s = report[key]
+        table.add_row(label, f"{s['p50']:.1f}", f"{s['p95']:.1f}", f"{s['max']:.1f}")
+    console.print(table)
+    failed = f", {report['requests_failed']} failed" if report["requests_failed"] else ""
+    console.print(
+        f"{report['requests']} requests{failed}; {report['tokens']:,} tokens in "
+        f"{report['wall_s']:.2f}s = [bold]{report['tokens_per_s']:,.0f} tokens/s[/bold]"
+    )
+    if out:
+        Path(out).write_text(_json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        console.print(f"[dim]report written to {out}[/dim]")
+
+
+@bench_app.command("serve")
+def bench_serve(
+    port: int = typer.Option(11435, "--port", "-p", help="Port to listen on"),
+    ttft: float = _TTFT,
+    rate: float = _RATE,
+    reply_tokens: int = _REPLY,
+    tool_rate: float = _TOOL_RATE,
+    error_rate: float = _ERROR_RATE,
+) -> None:
+    """Run the stand-in Ollama/OpenAI server in the foreground (Ctrl+C stops it)."""
+    from .standin import Behavior, StandInServer
+
+    behavior = Behavior(ttft, rate, reply_tokens, tool_rate, error_rate)
+    try:
+        server = StandInServer(behavior, port=port)
+    except OSError as exc:
+        console.print(f"[red]could not listen on port {port}: {exc}[/red]")
+        raise typer.Exit(code=1) from None
+    console.print(f"stand-in serving [bold]{behavior.models[0]}[/bold] at {server.url}")
+    console.print(
+        f"[dim]try: OSHELL_PROVIDER__HOST={server.url} "
+        f"OSHELL_DEFAULT_MODEL={behavior.models[0]} oshell tui[/dim]"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
 _DO_SYSTEM = (
     "You translate a user's task into EXACTLY ONE shell command for {os} ({shell}). "
     "Output ONLY the command — no backticks, no prose, no explanations. Prefer safe, "
@@ -738,6 +1059,14 @@ def doctor() -> None:
 
     if provider.health():
         table.add_row(f"{ok} backend", f"{cfg.provider.name} at {cfg.provider.host}")
+        from .providers import PoolProvider
+
+        backend = getattr(provider, "inner", provider)  # under a response cache
+        if isinstance(backend, PoolProvider):
+            for host in backend.stats():
+                mark = ok if host["healthy"] else warn
+                state = f"{host['models']} models" if host["healthy"] else "unreachable"
+                table.add_row(f"{mark} pool host", f"{host['host']} · {state}")
         names = provider.list_models()
         if names:
             table.add_row(f"{ok} models", f"{len(names)} installed")
@@ -751,6 +1080,19 @@ def doctor() -> None:
                 f"{cfg.default_model} is not installed"
                 + (f" — closest: {names[0]}" if names else ""),
             )
+        from .providers import ResidencyManager
+
+        residency = ResidencyManager.for_provider(provider, cfg.residency)
+        if residency is not None:
+            loaded = sorted(residency.resident())
+            table.add_row(
+                f"{ok} loaded",
+                (", ".join(loaded) if loaded else "nothing (first turn cold-loads)")
+                + f" · unload policy: {cfg.residency.policy}",
+            )
+        fit = _prompt_fit(cfg, provider)
+        dropped = any(sec.state == "dropped" for sec in fit.sections)
+        table.add_row(f"{warn if dropped else ok} system prompt", fit.summary())
     else:
         healthy = False
         table.add_row(f"{bad} backend", f"{cfg.provider.host} unreachable — is Ollama running?")
@@ -771,6 +1113,19 @@ def doctor() -> None:
     else:
         table.add_row(f"{ok} routing", "off (enable with /route on)")
 
+    rc = cfg.provider.response_cache
+    if rc.enabled:
+        from .providers.response_cache import ResponseCache
+
+        st = ResponseCache(rc.dir, rc.max_mb * 1024 * 1024).stats()
+        table.add_row(
+            f"{ok} response cache",
+            f"{st.hits} hits · {st.misses} misses · {st.bytes_served / 1e6:.1f} MB replayed · "
+            f"{st.entries} entries, {st.size_bytes / 1e6:.1f}/{rc.max_mb} MB",
+        )
+    else:
+        table.add_row(f"{ok} response cache", "off (provider.response_cache.enabled)")
+
     n_sessions = len(sessions_mod.list_sessions(cfg.session.dir))
     table.add_row(f"{ok} sessions", f"{n_sessions} saved in {cfg.session.dir}")
     n_cmds = len(custom.list_commands())
@@ -832,13 +1187,17 @@ def config() -> None:
 
 
 @app.command()
-def tui(model: str = typer.Option(None, "--model", "-m")) -> None:
+def tui(
+    model: str = typer.Option(None, "--model", "-m"),
+    trace: str | None = typer.Option(None, "--trace", metavar="FILE", help=_TRACE_HELP),
+) -> None:
     """Launch the Textual workspace (requires: pip install 'ollama-shell[tui]')."""
     try:
         from .tui.app import run_tui
     except ImportError:
         console.print("[red]TUI needs the 'tui' extra:[/red] pip install 'ollama-shell[tui]'")
         raise typer.Exit(code=1) from None
+    _start_trace(trace)
     run_tui(model=model)
 
 
@@ -846,7 +1205,7 @@ def tui(model: str = typer.Option(None, "--model", "-m")) -> None:
 def _default(ctx: typer.Context) -> None:
     """Run ``chat`` when no subcommand is given."""
     if ctx.invoked_subcommand is None:
-        chat(model=None, resume=None)
+        chat(model=None, resume=None, trace=None)
 
 
 def main() -> None:  # console-script friendly
@@ -36,13 +36,66 @@ _ENV_PREFIX = "OSHELL_"
 AUTO_CONTEXT_CAP = 32768
 
 
+class ResponseCacheConfig(BaseModel):
+    """Opt-in replay of deterministic model calls (oshell.providers.response_cache)."""
+
+    enabled: bool = False
+    # Only calls at or below this temperature are cached — 0 is truly
+    # repeatable; compaction summaries run at 0.2.
+    max_temperature: float = 0.0
+    max_mb: int = 256  # least-recently-used entries are evicted beyond this
+    dir: str = "~/.oshell/cache/responses"
+
+
 class ProviderConfig(BaseModel):
     """Which LLM backend to talk to and how to reach it."""
 
-    name: str = "ollama"  # one of: ollama | openai | mlx (see oshell.providers)
+    name: str = "ollama"  # one of: ollama | openai | mlx | pool (see oshell.providers)
     host: str = "http://localhost:11434"
+    # name="pool": spread requests over several hosts of one backend type —
+    # least-loaded healthy host with the model wins, dead hosts fail over.
+    hosts: list[str] = Field(default_factory=list)
+    pool_backend: str = "ollama"  # ollama | openai | mlx
+    health_interval: float = 15.0  # seconds between background host checks (0 = off)
     api_key: str | None = None  # only used by openai-compatible backends
     timeout: float = 120.0
+    # Keep-alive connection pool per backend host (oshell.providers.transport):
+    # max pooled connections, and retries with exponential backoff on connect
+    # errors only (a request the server already saw is never replayed).
+    pool_size: int = 8
+    retries: int = 2
+    retry_backoff: float = 0.25
+    # Stream text and tool calls together on tool rounds (False = one blocking
+    # response per round). stop_after_tool_call ends the stream at the first
+    # complete call — saves decode time, but drops any parallel calls after it.
+    stream_tools: bool = True
+    stop_after_tool_call: bool = False
+    # How long Ollama keeps the model (and its prompt cache) loaded after a
+    # request: a duration like "30m", seconds, or -1 for forever. None leaves
+    # the server default (5m) — short enough to evict between slow turns.
+    keep_alive: str | int | None = None
+    # On-disk cache of /api/tags + /api/show (Ollama), so short-lived CLI runs
+    # don't re-ask for capabilities and context length. The listing is trusted
+    # for metadata_ttl seconds (0 disables the cache); show data is keyed by
+    # model digest and refreshed whenever the digest changes.
+    metadata_ttl: float = 300.0
+    cache_dir: str = "~/.oshell/cache"
+    response_cache: ResponseCacheConfig = Field(default_factory=ResponseCacheConfig)
+
+
+class ResidencyConfig(BaseModel):
+    """Which models stay loaded on the backend (oshell.providers.residency)."""
+
+    enabled: bool = True  # no-op on backends without /api/ps
+    # Preload the default + routing models in the background at startup.
+    warm_up: bool = True
+    poll_interval: float = 10.0  # seconds a /api/ps reading is trusted
+    # Unload policy: "none" leaves it to the backend; "lru" keeps at most
+    # max_models loaded; "budget" keeps their total size under memory_budget_gb.
+    # Least-recently-used models are evicted first; the active one never is.
+    policy: str = "none"  # none | lru | budget
+    max_models: int = 2
+    memory_budget_gb: float = 0.0
 
 
 class ShellConfig(BaseModel):
@@ -50,7 +103,9 @@ class ShellConfig(BaseModel):
 
     enabled: bool = True  # commands run with full autonomy by default
     timeout: float = 60.0  # per-command wall-clock limit (seconds)
-    max_output: int = 10000  # truncate combined stdout/stderr to this many chars
+    # Hard cap on combined stdout/stderr (chars); anything over the context
+    # budget below this is paged (read_more), or cut there with paging off.
+    max_output: int = 100_000
     # Which shell to use on Windows: auto -> pwsh, else powershell; or force "cmd".
     windows_shell: str = "auto"  # auto | powershell | pwsh | cmd
     # Keep one long-lived shell so cd / env / activated venvs persist across
@@ -143,6 +198,10 @@ class MCPServerConfig(BaseModel):
     env: dict[str, str] = Field(default_factory=dict)
     enabled: bool = True
     network: bool = False  # True flags this server's tools "net" in the privacy UI
+    # Results of read-only tools (``readOnlyHint`` or listed in cache_tools)
+    # are reused for this many seconds within a session; 0 = never cached.
+    cache_ttl: float = 60.0
+    cache_tools: list[str] = Field(default_factory=list)
 
 
 def _default_mcp_servers() -> dict[str, MCPServerConfig]:
@@ -158,6 +217,7 @@ def _default_mcp_servers() -> dict[str, MCPServerConfig]:
             command="~/.local/share/mechanic/.venv/bin/mechanic",
             args=["server"],
             env={"MECHANIC_DATA_DIR": "~/.local/share/mechanic-data"},
+            cache_tools=["baseline_for"],  # baselines are computed over days
         ),
         "drift": MCPServerConfig(
             command="~/.local/share/drift/.venv/bin/drift",
@@ -167,6 +227,55 @@ def _default_mcp_servers() -> dict[str, MCPServerConfig]:
     }
 
 
+class ToolCacheConfig(BaseModel):
+    """Session cache of tool results (tools opt in; see oshell/tools/cache.py)."""
+
+    enabled: bool = True
+    max_entries: int = 256
+    max_mb: int = 64
+
+
+class ToolOutputConfig(BaseModel):
+    """Paging of tool results too large for the context (see oshell/tools/paging.py)."""
+
+    paging: bool = True  # off: results past the page size are cut, not stored
+    page_tokens: int = 4000  # largest page handed to the model
+    # ...and never more than this share of the context still free, so one big
+    # result can't force a compaction on its own.
+    budget_share: float = 0.5
+
+
+class ToolGuardConfig(BaseModel):
+    """Deadlines and circuit breakers for tool calls (see oshell/tools/guard.py)."""
+
+    # Per-tool deadline overrides in seconds (0 = none), e.g. {"web_search": 10}.
+    # Tools declare their own default; those with built-in timeouts have none.
+    deadlines: dict[str, float] = Field(default_factory=dict)
+    failures: int = 3  # consecutive failures or timeouts that trip a tool's breaker
+    cooldown: float = 60.0  # seconds a tripped tool fails fast before a trial call
+
+
+class ToolSelectionConfig(BaseModel):
+    """Advertise only the tools a turn needs (see oshell/tools/selection.py)."""
+
+    enabled: bool = True
+    min_tools: int = 14  # below this many tools, every schema is sent as before
+    top_k: int = 6  # best-matching tools added to the core set each round
+    recent: int = 4  # tools called most recently stay advertised
+    # Always advertised; find_tools is added whenever selection is active.
+    core: list[str] = Field(
+        default_factory=lambda: [
+            "run_command",
+            "read_file",
+            "write_file",
+            "list_dir",
+            "web_search",
+            "fetch_url",
+            "read_more",
+        ]
+    )
+
+
 class FunConfig(BaseModel):
     """Quirky, non-essential delights (daydreams + ambient effects)."""
 
@@ -223,9 +332,22 @@ class Config(BaseModel):
     # Automatic model routing (fast/deep/vision per message)
     routing: RoutingConfig = Field(default_factory=RoutingConfig)
 
+    # Loaded-model tracking, background warm-up, and unload policy
+    residency: ResidencyConfig = Field(default_factory=ResidencyConfig)
+
     # Inject a brief about the git repo oshell was launched in
     project_context: bool = True
 
+    # Keep the system prompt byte-identical across turns so the backend can
+    # reuse its KV cache: memory facts and the project brief go into a late,
+    # versioned context message instead. False = fold them into the prompt.
+    stable_prompt_prefix: bool = True
+
+    # Most of the context window the system prompt (with memory facts and the
+    # project brief) may take. Lower-priority guidance is trimmed, then
+    # dropped, to fit — so a 4k model isn't half full before the first message.
+    system_prompt_share: float = 0.25
+
     # Tool approvals: "auto" runs everything (current behavior); "ask" confirms
     # each sensitive tool call (shell execution, GUI control) with the user
     # before it runs; "read-only" hides sensitive tools from the model entirely.
@@ -235,6 +357,17 @@ class Config(BaseModel):
     # context window, older turns are summarized (with the routing fast model
     # when configured) so long sessions never silently truncate. 0 disables.
     compact_threshold: float = 0.85
+    # Low watermark: once a finished turn leaves the context this full, the
+    # summary is prepared in a background thread during idle time and swapped
+    # in at the next turn boundary, so compact_threshold's blocking summary
+    # call is only a fallback (interactive sessions only: a one-shot ask or
+    # delegate helper never takes the next turn). 0 disables it.
+    compact_low_watermark: float = 0.6
+    # The folded turns are summarized in chunks of about this many tokens (so
+    # nothing is cut, and each call fits a small fast-model window), up to
+    # compact_parallel at once, then the chunk notes are merged.
+    compact_chunk_tokens: int = 2000
+    compact_parallel: int = 4
 
     # Local vector knowledge base
     knowledge: KnowledgeConfig = Field(default_factory=KnowledgeConfig)
@@ -264,7 +397,20 @@ class Config(BaseModel):
     # Agent loop
     max_tool_iterations: int = 16  # safety cap on tool-call rounds per turn (research + write)
     max_promise_nudges: int = 2  # times to prod a model that announces an action but calls no tool
+    # Concurrency-safe tool calls (reads, fetches) requested in the same round
+    # run on up to this many threads; 1 = strictly one after another.
+    parallel_tools: int = 4
+    # Helper agents delegate_many runs side by side (each is a model request
+    # in flight, so keep it within what the backend serves in parallel).
+    delegate_parallel: int = 3
+    # Output a running tool streams (a build log) reaches the UI at most this
+    # often (seconds), batched, so a chatty command can't flood it.
+    tool_progress_interval: float = 0.25
     enabled_tools: list[str] = Field(default_factory=lambda: ["*"])  # "*" = all registered
+    tool_cache: ToolCacheConfig = Field(default_factory=ToolCacheConfig)
+    tool_output: ToolOutputConfig = Field(default_factory=ToolOutputConfig)
+    tool_selection: ToolSelectionConfig = Field(default_factory=ToolSelectionConfig)
+    tool_guard: ToolGuardConfig = Field(default_factory=ToolGuardConfig)
 
     # ── loading / saving ────────────────────────────────────────────────────
     @classmethod
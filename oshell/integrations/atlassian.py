@@ -24,9 +24,8 @@ import os
 from dataclasses import dataclass
 from typing import Any
 
-import requests
-
 from ..config import AtlassianConfig
+from ..providers.transport import transport_for
 
 
 class AtlassianConfigError(RuntimeError):
@@ -60,7 +59,7 @@ def _auth_header(method: str, user: str | None, token: str) -> dict[str, str]:
 
 @dataclass
 class _Endpoint:
-    """Shared HTTP plumbing for a Server REST base + auth."""
+    """Shared HTTP plumbing for a Server REST base + auth (keep-alive pooled)."""
 
     base_url: str
     token: str
@@ -78,7 +77,7 @@ class _Endpoint:
             "Accept": "application/json",
             **_auth_header(self.auth_method, self.user, self.token),
         }
-        resp = requests.get(
+        resp = transport_for(self.base_url).get(
             f"{self.base_url}{path}", headers=headers, params=params, timeout=self.timeout
         )
         resp.raise_for_status()
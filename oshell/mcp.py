@@ -21,7 +21,10 @@ Design notes:
   serialized under a lock and matched by JSON-RPC id, with timeouts so a hung
   server can never hang a turn.
 * All failures degrade to ``ToolError`` — the model sees "[error] …" and can
-  route around it; the session never crashes.
+  route around it; the session never crashes. A dead or silent server raises
+  ``ToolUnavailable``, which counts against the tool's circuit breaker.
+* A call whose turn is cancelled stops waiting at once and tells the server
+  with ``notifications/cancelled``, so it can drop the work too.
 """
 
 from __future__ import annotations
@@ -36,7 +39,11 @@ import threading
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-from .tools.base import Tool, ToolError
+from . import cancellation
+from .cancellation import Cancelled, CancelToken
+from .tools.base import Tool, ToolError, ToolUnavailable
+from .tools.cache import CachePolicy
+from .tracing import span
 
 if TYPE_CHECKING:
     from .config import Config, MCPServerConfig
@@ -50,6 +57,10 @@ class MCPError(Exception):
     """Transport or protocol failure talking to an MCP server."""
 
 
+class MCPToolError(MCPError):
+    """The server answered, but the call failed (bad arguments, a tool-reported error)."""
+
+
 def _expand(value: str) -> str:
     return os.path.expandvars(os.path.expanduser(value))
 
@@ -72,6 +83,9 @@ class MCPClient:
         self._lock = threading.Lock()  # serializes request/response cycles
         self._responses: queue.Queue[dict[str, Any]] = queue.Queue()
         self._next_id = 0
+        # tools/list result, kept for the life of the server process: registry
+        # rebuilds (model switch, GUI toggle) reuse it instead of a round trip.
+        self._tools: list[dict[str, Any]] | None = None
 
     # ── lifecycle ─────────────────────────────────────────────────────────────
     def available(self) -> bool:
@@ -101,6 +115,7 @@ class MCPClient:
         except OSError as exc:
             raise MCPError(f"could not spawn MCP server '{self.name}': {exc}") from exc
         self._responses = queue.Queue()
+        self._tools = None  # a new process may be a new version: rediscover
         threading.Thread(target=self._reader, args=(self._proc,), daemon=True).start()
         self._handshake()
 
@@ -117,7 +132,9 @@ class MCPClient:
                 continue  # stray non-JSON output — ignore
             if isinstance(msg, dict) and "id" in msg:
                 self._responses.put(msg)
-            # Notifications (no id) are ignored — we subscribe to nothing.
+            elif isinstance(msg, dict) and msg.get("method") == "notifications/tools/list_changed":
+                self._tools = None
+            # Other notifications (no id) are ignored — we subscribe to nothing.
 
     def _handshake(self) -> None:
         result = self._request(
@@ -151,45 +168,83 @@ class MCPClient:
         except (BrokenPipeError, OSError) as exc:
             raise MCPError(f"MCP server '{self.name}' pipe closed: {exc}") from exc
 
-    def _notify(self, method: str) -> None:
-        self._send({"jsonrpc": "2.0", "method": method})
+    def _notify(self, method: str, params: dict[str, Any] | None = None) -> None:
+        payload: dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            payload["params"] = params
+        self._send(payload)
 
-    def _request(self, method: str, params: dict[str, Any], timeout: float) -> Any:
+    def _request(
+        self,
+        method: str,
+        params: dict[str, Any],
+        timeout: float,
+        cancel: CancelToken | None = None,
+    ) -> Any:
         self._next_id += 1
         req_id = self._next_id
         self._send({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params})
-        while True:
-            try:
-                msg = self._responses.get(timeout=timeout)
-            except queue.Empty:
-                raise MCPError(
-                    f"MCP server '{self.name}': no response to {method} in {timeout:.0f}s"
-                ) from None
-            if msg.get("id") != req_id:
-                continue  # stale response from an interrupted earlier call
-            if "error" in msg:
-                err = msg["error"]
-                raise MCPError(f"MCP server '{self.name}': {err.get('message', err)}")
-            return msg.get("result")
+        responses = self._responses
+        # An id-less message wakes the wait below; it's skipped like a stale one.
+        unregister = cancel.on_cancel(lambda: responses.put({})) if cancel else None
+        try:
+            while True:
+                try:
+                    msg = responses.get(timeout=timeout)
+                except queue.Empty:
+                    raise MCPError(
+                        f"MCP server '{self.name}': no response to {method} in {timeout:.0f}s"
+                    ) from None
+                if cancel is not None and cancel.cancelled:
+                    self._notify(
+                        "notifications/cancelled",
+                        {"requestId": req_id, "reason": "cancelled by the user"},
+                    )
+                    raise Cancelled(f"{method} cancelled by the user")
+                if msg.get("id") != req_id:
+                    continue  # stale response from an interrupted earlier call
+                if "error" in msg:
+                    err = msg["error"]
+                    raise MCPToolError(f"MCP server '{self.name}': {err.get('message', err)}")
+                return msg.get("result")
+        finally:
+            if unregister is not None:
+                unregister()
 
     # ── the two calls that matter ─────────────────────────────────────────────
     def list_tools(self) -> list[dict[str, Any]]:
-        """Discover the server's tools (name, description, inputSchema)."""
-        with self._lock:
-            self._ensure_started()
-            result = self._request("tools/list", {}, timeout=_START_TIMEOUT)
-        return list((result or {}).get("tools", []))
+        """Discover the server's tools (name, description, inputSchema).
 
-    def call_tool(self, name: str, arguments: dict[str, Any]) -> str:
-        """Invoke a tool and return its text content (errors raise MCPError)."""
+        Asked once per server process; later calls return the same list
+        unless the server announced ``notifications/tools/list_changed``.
+        """
         with self._lock:
             self._ensure_started()
-            result = self._request(
-                "tools/call", {"name": name, "arguments": arguments}, timeout=_CALL_TIMEOUT
-            )
-        text = _content_text(result)
+            if self._tools is None:
+                result = self._request("tools/list", {}, timeout=_START_TIMEOUT)
+                self._tools = list((result or {}).get("tools", []))
+            return list(self._tools)
+
+    def call_tool(
+        self, name: str, arguments: dict[str, Any], cancel: CancelToken | None = None
+    ) -> str:
+        """Invoke a tool and return its text content (errors raise MCPError).
+
+        When ``cancel`` fires the call raises ``Cancelled`` without waiting.
+        """
+        with span("mcp.call_tool", cat="mcp", server=self.name, tool=name) as sp:
+            with self._lock:
+                self._ensure_started()
+                result = self._request(
+                    "tools/call",
+                    {"name": name, "arguments": arguments},
+                    timeout=_CALL_TIMEOUT,
+                    cancel=cancel,
+                )
+            text = _content_text(result)
+            sp.set(bytes=len(text))
         if isinstance(result, dict) and result.get("isError"):
-            raise MCPError(text or f"tool '{name}' reported an error")
+            raise MCPToolError(text or f"tool '{name}' reported an error")
         return text
 
 
@@ -215,7 +270,15 @@ class MCPTool(Tool):
     box of capabilities it came from.
     """
 
-    def __init__(self, client: MCPClient, tool_def: dict[str, Any], network: bool = False):
+    deadline = None  # the client times out each call (_CALL_TIMEOUT) itself
+
+    def __init__(
+        self,
+        client: MCPClient,
+        tool_def: dict[str, Any],
+        network: bool = False,
+        cache_ttl: float = 0.0,
+    ):
         self._client = client
         self._remote_name = tool_def["name"]
         self.name = f"{client.name}_{self._remote_name}"
@@ -224,12 +287,16 @@ class MCPTool(Tool):
         self.parameters = tool_def.get("inputSchema") or {"type": "object", "properties": {}}
         self.local_only = not network
         self.sensitive = False
+        if cache_ttl > 0:
+            self.cache = CachePolicy(ttl=cache_ttl)
 
     def run(self, **kwargs: Any) -> str:
         try:
-            return self._client.call_tool(self._remote_name, kwargs)
-        except MCPError as exc:
+            return self._client.call_tool(self._remote_name, kwargs, cancellation.current())
+        except MCPToolError as exc:
             raise ToolError(str(exc)) from exc
+        except MCPError as exc:  # the server is gone or not answering
+            raise ToolUnavailable(str(exc)) from exc
 
 
 # ── shared clients: registry rebuilds must not respawn daemons ────────────────
@@ -272,7 +339,11 @@ def mcp_tools(config: Config) -> list[Tool]:
         except MCPError:
             continue  # unreachable/broken server — skip, never block startup
         for d in defs:
-            tool = MCPTool(client, d, network=server.network)
+            # Only tools the server marks read-only (or the user lists) are
+            # cached — an MCP call may well change something.
+            read_only = (d.get("annotations") or {}).get("readOnlyHint") is True
+            ttl = server.cache_ttl if read_only or d["name"] in server.cache_tools else 0.0
+            tool = MCPTool(client, d, network=server.network, cache_ttl=ttl)
             if tool.name in seen:  # a server advertising duplicates must not crash startup
                 continue
             seen.add(tool.name)
@@ -0,0 +1,15 @@
+"""Model-name matching shared by routing, residency and the provider pool.
+
+Dependency-free on purpose: ``oshell.routing`` is imported by ``oshell.config``,
+which ``oshell.providers`` imports, so the helper can't live in the providers
+package without a cycle.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Collection
+
+
+def model_matches(model: str, names: Collection[str]) -> bool:
+    """Ollama reports ``llama3:latest`` for a model configured as ``llama3``."""
+    return model in names or (":" not in model and f"{model}:latest" in names)
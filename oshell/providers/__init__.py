@@ -2,19 +2,32 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 from ..config import Config, ProviderConfig
-from .base import ChatChunk, LLMProvider, Message, ToolCall
+from .base import ChatChunk, LLMProvider, Message, TokenUsage, ToolCall
+from .metadata import ModelMetadataCache
 from .ollama import OllamaProvider
 from .openai_compat import OpenAICompatProvider
+from .pool import PoolProvider
+from .residency import ResidencyManager
+from .response_cache import CachingProvider, ResponseCache
+from .transport import HTTPTransport, transport_for
 
 __all__ = [
+    "CachingProvider",
     "ChatChunk",
     "LLMProvider",
     "Message",
+    "TokenUsage",
     "ToolCall",
     "OllamaProvider",
     "OpenAICompatProvider",
+    "PoolProvider",
+    "HTTPTransport",
+    "ResidencyManager",
     "get_provider",
+    "transport_for",
 ]
 
 
@@ -22,11 +35,48 @@ def get_provider(config: Config | ProviderConfig) -> LLMProvider:
     """Construct the provider named in config. Accepts either a full ``Config``
     or a bare ``ProviderConfig``."""
     pc = config.provider if isinstance(config, Config) else config
+    provider = _backend(pc)
+    rc = pc.response_cache
+    if rc.enabled:
+        cache = ResponseCache(rc.dir, rc.max_mb * 1024 * 1024)
+        namespace = f"{pc.name}:{pc.host}:{','.join(pc.hosts)}"
+        provider = CachingProvider(
+            provider, cache, max_temperature=rc.max_temperature, namespace=namespace
+        )
+    return provider
+
+
+def _backend(pc: ProviderConfig) -> LLMProvider:
+    """The bare backend (or pool of them) for ``pc``, before any caching layer."""
+    opts: dict[str, Any] = {
+        "pool_size": pc.pool_size,
+        "retries": pc.retries,
+        "backoff": pc.retry_backoff,
+        "stream_tools": pc.stream_tools,
+        "stop_after_tool_call": pc.stop_after_tool_call,
+    }
     if pc.name == "ollama":
-        return OllamaProvider(host=pc.host, timeout=pc.timeout)
-    if pc.name == "openai":
-        return OpenAICompatProvider(host=pc.host, api_key=pc.api_key, timeout=pc.timeout)
-    if pc.name == "mlx":
+        metadata = (
+            ModelMetadataCache.for_origin(pc.host.rstrip("/"), pc.cache_dir, pc.metadata_ttl)
+            if pc.metadata_ttl > 0
+            else None
+        )
+        return OllamaProvider(
+            host=pc.host, timeout=pc.timeout, keep_alive=pc.keep_alive, metadata=metadata, **opts
+        )
+    if pc.name in ("openai", "mlx"):
         # MLX servers (mlx_lm.server) speak the OpenAI schema.
-        return OpenAICompatProvider(host=pc.host, api_key=pc.api_key, timeout=pc.timeout)
-    raise ValueError(f"Unknown provider '{pc.name}'. Expected one of: ollama, openai, mlx.")
+        return OpenAICompatProvider(
+            host=pc.host, api_key=pc.api_key, timeout=pc.timeout, **opts
+        )
+    if pc.name == "pool":
+        if pc.pool_backend == "pool":
+            raise ValueError("provider.pool_backend cannot itself be 'pool'.")
+        members = [
+            (host, _backend(pc.model_copy(update={"name": pc.pool_backend, "host": host})))
+            for host in pc.hosts or [pc.host]
+        ]
+        return PoolProvider(members, health_interval=pc.health_interval)
+    raise ValueError(
+        f"Unknown provider '{pc.name}'. Expected one of: ollama, openai, mlx, pool."
+    )
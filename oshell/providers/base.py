@@ -8,21 +8,36 @@ setup described in the workspace notes.
 
 from __future__ import annotations
 
+import json
 from abc import ABC, abstractmethod
 from collections.abc import Iterator
 from dataclasses import dataclass, field
 from typing import Any
 
+from ..cancellation import CancelToken
 
-@dataclass
+
+@dataclass(slots=True)
 class Message:
-    """A single chat message. ``tool_calls`` / ``tool_call_id`` carry tool-use."""
+    """A single chat message. ``tool_calls`` / ``tool_call_id`` carry tool-use.
+
+    ``wire_json`` memoizes the encoded message: every round re-sends the
+    whole transcript, and re-encoding base64 screenshots each time costs more
+    CPU than anything else in the request. The memo is keyed on the fields
+    it was built from, so assigning ``content`` (the system prompt does) or
+    appending an image re-encodes; mutating a tool call's arguments in place
+    after the message was sent would not, and nothing does.
+    """
 
     role: str  # "system" | "user" | "assistant" | "tool"
     content: str = ""
     tool_calls: list[ToolCall] = field(default_factory=list)
     tool_call_id: str | None = None
     images: list[str] = field(default_factory=list)  # base64 for vision models
+    _wire: bytes | None = field(default=None, init=False, repr=False, compare=False)
+    _wire_key: tuple[Any, ...] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def to_wire(self) -> dict[str, Any]:
         """Serialize to the dict shape Ollama/OpenAI chat APIs expect."""
@@ -33,8 +48,18 @@ class Message:
             msg["images"] = self.images
         return msg
 
+    def wire_json(self) -> bytes:
+        """``to_wire()`` encoded as UTF-8 JSON, computed once per version."""
+        # Tuple equality checks identity first, so an unchanged (same object)
+        # content string costs nothing to compare however long it is.
+        key = (self.role, self.content, len(self.tool_calls), len(self.images))
+        if self._wire is None or key != self._wire_key:
+            self._wire = json.dumps(self.to_wire(), ensure_ascii=False).encode("utf-8")
+            self._wire_key = key
+        return self._wire
 
-@dataclass
+
+@dataclass(slots=True)
 class ToolCall:
     """A model's request to invoke a tool."""
 
@@ -50,6 +75,21 @@ class ToolCall:
         }
 
 
+def encode_chat_payload(messages: list[Message], fields: dict[str, Any]) -> bytes:
+    """The JSON body of a chat request: ``fields`` plus ``"messages"``.
+
+    Messages are spliced in from their memoized encodings, so a round only
+    encodes what is new since the last one (usually a reply and a tool result).
+    """
+    rest = json.dumps(fields, ensure_ascii=False).encode("utf-8")
+    parts = [b'{"messages":[']
+    for m in messages:
+        parts += (m.wire_json(), b",")
+    parts[-1:] = [b"]"] if messages else [parts[-1], b"]"]
+    parts.append(b"}" if rest == b"{}" else b"," + rest[1:])
+    return b"".join(parts)  # one copy of the (possibly many-MB) body
+
+
 @dataclass
 class PullProgress:
     """One streamed step of a model download.
@@ -70,17 +110,50 @@ class PullProgress:
         return None
 
 
+@dataclass
+class TokenUsage:
+    """What the backend reports about one response: tokens and where time went.
+
+    Ollama gives all of it (``prompt_eval_count``/``eval_count`` and the
+    ``*_duration`` nanoseconds); OpenAI-compatible servers give token counts
+    only. Anything the backend didn't report stays None.
+    """
+
+    prompt_tokens: int | None = None  # prefill: tokens evaluated from the prompt
+    completion_tokens: int | None = None  # decode: tokens generated
+    prompt_seconds: float | None = None
+    completion_seconds: float | None = None
+    load_seconds: float | None = None  # model load (cold start) before prefill
+    total_seconds: float | None = None
+
+    @property
+    def prefill_rate(self) -> float | None:
+        """Prompt tokens per second, when both halves are known."""
+        if self.prompt_tokens and self.prompt_seconds:
+            return self.prompt_tokens / self.prompt_seconds
+        return None
+
+    @property
+    def decode_rate(self) -> float | None:
+        """Generated tokens per second, when both halves are known."""
+        if self.completion_tokens and self.completion_seconds:
+            return self.completion_tokens / self.completion_seconds
+        return None
+
+
 @dataclass
 class ChatChunk:
     """One streamed piece of a response.
 
     A stream yields many ``ChatChunk``s with ``content`` deltas, then a final
-    chunk with ``done=True`` that may also carry ``tool_calls``.
+    chunk with ``done=True`` that may also carry ``tool_calls`` and, when the
+    backend reports it, ``usage``.
     """
 
     content: str = ""
     tool_calls: list[ToolCall] = field(default_factory=list)
     done: bool = False
+    usage: TokenUsage | None = None
 
 
 class LLMProvider(ABC):
@@ -98,12 +171,17 @@ class LLMProvider(ABC):
         temperature: float = 0.7,
         stream: bool = True,
         num_ctx: int | None = None,
+        cancel: CancelToken | None = None,
     ) -> Iterator[ChatChunk]:
         """Stream a model response, optionally with tool definitions in scope.
 
         ``num_ctx`` requests a context-window size (tokens) from backends that
         honor it per-request (Ollama). Backends that manage context server-side
         ignore it.
+
+        When ``cancel`` fires, the backend request must stop (close the HTTP
+        stream, so the server stops generating) and ``chat`` raises
+        ``Cancelled``. Chunks already yielded stand.
         """
 
     @abstractmethod
@@ -153,6 +231,30 @@ class LLMProvider(ABC):
         """Remove a model from the backend."""
         raise NotImplementedError(f"the {self.name} backend cannot delete models")
 
+    def supports_residency(self) -> bool:
+        """Whether this backend reports and controls which models are loaded.
+
+        When True, ``running_models`` / ``load_model`` / ``unload_model`` work
+        and a ``ResidencyManager`` can steer around cold loads.
+        """
+        return False
+
+    def running_models(self) -> list[dict[str, Any]]:
+        """Models currently loaded in memory (name plus ``size`` in bytes)."""
+        return []
+
+    def load_model(self, name: str, num_ctx: int | None = None) -> None:
+        """Load a model into memory without generating anything.
+
+        ``num_ctx`` should match what the chats will send: a backend that sizes
+        its KV cache per load (Ollama) reloads the model when it changes.
+        """
+        raise NotImplementedError(f"the {self.name} backend cannot preload models")
+
+    def unload_model(self, name: str) -> None:
+        """Evict a model from memory (it stays on disk)."""
+        raise NotImplementedError(f"the {self.name} backend cannot unload models")
+
     def health(self) -> bool:
         """Cheap reachability check; defaults to 'can we list models'."""
         try:
@@ -0,0 +1,115 @@
+"""On-disk cache of model metadata (``/api/tags`` and ``/api/show``).
+
+One JSON file per backend origin under ``provider.cache_dir`` holds the tags
+listing, trusted for ``ttl`` seconds, and ``/api/show`` responses keyed by
+model digest, which never go stale (models without a known digest fall back
+to a name key under the TTL). Pulls and deletes drop the listing. Writes are
+atomic, and a corrupt or unreadable file reads as empty: a cache must never
+be the reason a command fails.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+DEFAULT_TTL = 300.0  # seconds a tags listing is trusted
+
+
+class ModelMetadataCache:
+    """Persistent tags/show cache for one backend origin."""
+
+    def __init__(self, path: str | Path, ttl: float = DEFAULT_TTL):
+        self.path = Path(path).expanduser()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: dict[str, Any] | None = None  # loaded lazily
+
+    @classmethod
+    def for_origin(
+        cls, origin: str, directory: str | Path, ttl: float = DEFAULT_TTL
+    ) -> ModelMetadataCache:
+        digest = hashlib.sha1(origin.encode("utf-8")).hexdigest()[:12]
+        return cls(Path(directory).expanduser() / f"models-{digest}.json", ttl)
+
+    # ── storage ──────────────────────────────────────────────────────────────
+    def _load(self) -> dict[str, Any]:
+        if self._data is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if not isinstance(data, dict):
+                data = {}
+            data.setdefault("tags", None)
+            data.setdefault("show", {})
+            self._data = data
+        return self._data
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".models-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._data, f)
+            os.replace(tmp, self.path)
+        except OSError:  # pragma: no cover - read-only home, disk full
+            pass
+
+    def _fresh(self, fetched: float) -> bool:
+        return self.ttl > 0 and time.time() - fetched < self.ttl
+
+    # ── /api/tags ────────────────────────────────────────────────────────────
+    def tags(self) -> list[dict[str, Any]] | None:
+        """The cached tags listing, or None when missing or older than the TTL."""
+        with self._lock:
+            entry = self._load()["tags"]
+            if entry and self._fresh(entry.get("fetched", 0)):
+                return list(entry.get("models", []))
+            return None
+
+    def put_tags(self, models: list[dict[str, Any]]) -> None:
+        """Store a fresh listing and forget show entries for vanished digests."""
+        with self._lock:
+            data = self._load()
+            data["tags"] = {"fetched": time.time(), "models": models}
+            live = {f"sha:{m['digest']}" for m in models if m.get("digest")}
+            data["show"] = {
+                k: v for k, v in data["show"].items() if k in live or k.startswith("name:")
+            }
+            self._save()
+
+    # ── /api/show ────────────────────────────────────────────────────────────
+    @staticmethod
+    def _key(model: str, digest: str | None) -> str:
+        return f"sha:{digest}" if digest else f"name:{model}"
+
+    def show(self, model: str, digest: str | None) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._load()["show"].get(self._key(model, digest))
+            if entry is None or (not digest and not self._fresh(entry.get("fetched", 0))):
+                return None
+            return entry.get("data") or {}
+
+    def put_show(self, model: str, digest: str | None, data: dict[str, Any]) -> None:
+        with self._lock:
+            self._load()["show"][self._key(model, digest)] = {
+                "fetched": time.time(),
+                "data": data,
+            }
+            self._save()
+
+    # ── invalidation ─────────────────────────────────────────────────────────
+    def invalidate(self, model: str) -> None:
+        """A model was pulled or deleted: the listing (and its name entry) is stale."""
+        with self._lock:
+            data = self._load()
+            data["tags"] = None
+            data["show"].pop(self._key(model, None), None)
+            self._save()
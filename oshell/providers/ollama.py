@@ -1,10 +1,14 @@
 """Ollama backend implemented directly against its REST API.
 
 We talk to ``/api/chat`` and ``/api/tags`` with ``requests`` (a light core
-dependency) rather than pulling in the full ``ollama`` client. The chat
-endpoint streams newline-delimited JSON; we translate each line into a
-``ChatChunk``. Tool definitions are passed through verbatim — Ollama returns
-``message.tool_calls`` for models that support function calling.
+dependency) rather than pulling in the full ``ollama`` client, through the
+shared keep-alive pool in :mod:`.transport` so tool rounds reuse a
+connection. The chat endpoint streams newline-delimited JSON; we translate
+each line into a ``ChatChunk``. Tool definitions are passed through
+verbatim — Ollama returns ``message.tool_calls`` for models that support
+function calling, and streams them too: text arrives token by token and the
+calls are collected into the final chunk, so a tool round still has a
+time-to-first-token.
 """
 
 from __future__ import annotations
@@ -15,28 +19,92 @@ from typing import Any
 
 import requests
 
-from .base import ChatChunk, LLMProvider, Message, PullProgress, ToolCall
+from ..cancellation import CancelToken
+from ..model_names import model_matches
+from .base import (
+    ChatChunk,
+    LLMProvider,
+    Message,
+    PullProgress,
+    TokenUsage,
+    ToolCall,
+    encode_chat_payload,
+)
+from .metadata import ModelMetadataCache
+from .transport import (
+    DEFAULT_BACKOFF,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_RETRIES,
+    HTTPTransport,
+    cancellable_lines,
+    post_cancellable,
+    transport_for,
+)
+
+_JSON = {"Content-Type": "application/json"}
 
 
 class OllamaProvider(LLMProvider):
     name = "ollama"
 
-    def __init__(self, host: str = "http://localhost:11434", timeout: float = 120.0):
+    def __init__(
+        self,
+        host: str = "http://localhost:11434",
+        timeout: float = 120.0,
+        *,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        stream_tools: bool = True,
+        stop_after_tool_call: bool = False,
+        keep_alive: str | int | None = None,
+        metadata: ModelMetadataCache | None = None,
+    ):
         self.host = host.rstrip("/")
         self.timeout = timeout
+        # stream_tools=False restores one blocking response per tool round (for
+        # servers that mangle streamed calls); stop_after_tool_call closes the
+        # stream at the first complete call instead of letting the model ramble.
+        self.stream_tools = stream_tools
+        self.stop_after_tool_call = stop_after_tool_call
+        # Sent with every chat so the model — and the KV cache holding our
+        # stable prompt prefix — stays resident between turns (None = server default).
+        self.keep_alive = keep_alive
+        self._http: HTTPTransport = transport_for(
+            self.host, pool_size=pool_size, retries=retries, backoff=backoff
+        )
         self._show_cache: dict[str, dict[str, Any]] = {}  # /api/show responses
+        # Persistent tags/show cache shared across processes (None = memory only).
+        self._metadata = metadata
 
-    def list_models(self) -> list[str]:
-        resp = requests.get(f"{self.host}/api/tags", timeout=self.timeout)
+    def _tags(self, *, fresh: bool = False) -> list[dict[str, Any]]:
+        """The /api/tags model entries — from the disk cache while it's fresh."""
+        if self._metadata is not None and not fresh:
+            cached = self._metadata.tags()
+            if cached is not None:
+                return cached
+        resp = self._http.get(f"{self.host}/api/tags", timeout=self.timeout)
         resp.raise_for_status()
-        return [m["name"] for m in resp.json().get("models", [])]
+        models = resp.json().get("models", []) or []
+        if self._metadata is not None:
+            self._metadata.put_tags(models)
+        return models
+
+    def health(self) -> bool:
+        # Always a real round-trip — a cached listing says nothing about liveness.
+        try:
+            self._tags(fresh=True)
+            return True
+        except Exception:
+            return False
+
+    def list_models(self) -> list[str]:
+        return [m["name"] for m in self._tags()]
 
     def list_models_info(self) -> list[dict[str, str]]:
         """Names + display metadata from /api/tags (no extra round-trips)."""
-        resp = requests.get(f"{self.host}/api/tags", timeout=self.timeout)
-        resp.raise_for_status()
         out: list[dict[str, str]] = []
-        for m in resp.json().get("models", []):
+        for m in self._tags():
             details = m.get("details") or {}
             info: dict[str, str] = {"name": m["name"]}
             if details.get("parameter_size"):
@@ -54,7 +122,7 @@ class OllamaProvider(LLMProvider):
     def pull_model(self, name: str) -> Iterator[PullProgress]:
         """Stream /api/pull progress. Raises RuntimeError with Ollama's message
         on failure (unknown model, no manifest, registry unreachable)."""
-        resp = requests.post(
+        resp = self._http.post(
             f"{self.host}/api/pull",
             json={"model": name, "stream": True},
             stream=True,
@@ -62,42 +130,100 @@ class OllamaProvider(LLMProvider):
         )
         if resp.status_code >= 400:
             raise RuntimeError(f"pull failed: {_error_detail(resp)}")
-        for line in resp.iter_lines():
-            if not line:
-                continue
-            data = json.loads(line)
-            # Errors can also arrive mid-stream as their own NDJSON line.
-            if data.get("error"):
-                raise RuntimeError(f"pull failed: {data['error']}")
-            yield PullProgress(
-                status=data.get("status", ""),
-                total=data.get("total"),
-                completed=data.get("completed"),
-            )
+        try:
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                # Errors can also arrive mid-stream as their own NDJSON line.
+                if data.get("error"):
+                    raise RuntimeError(f"pull failed: {data['error']}")
+                yield PullProgress(
+                    status=data.get("status", ""),
+                    total=data.get("total"),
+                    completed=data.get("completed"),
+                )
+        finally:
+            resp.close()
         # A re-pull can change the model (new weights/capabilities) — forget
         # anything we learned about it via /api/show.
-        self._show_cache.pop(name, None)
+        self._forget(name)
 
     def delete_model(self, name: str) -> None:
-        resp = requests.delete(
+        resp = self._http.delete(
             f"{self.host}/api/delete", json={"model": name}, timeout=self.timeout
         )
         if resp.status_code >= 400:
             raise RuntimeError(f"delete failed: {_error_detail(resp)}")
+        self._forget(name)
+
+    def _forget(self, name: str) -> None:
         self._show_cache.pop(name, None)
+        if self._metadata is not None:
+            self._metadata.invalidate(name)
+
+    def supports_residency(self) -> bool:
+        return True
+
+    def running_models(self) -> list[dict[str, Any]]:
+        """``/api/ps``: what Ollama has loaded right now, with memory sizes."""
+        resp = self._http.get(f"{self.host}/api/ps", timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json().get("models", []) or []
+
+    def load_model(self, name: str, num_ctx: int | None = None) -> None:
+        # An empty prompt makes /api/generate load the model and return at once.
+        payload: dict[str, Any] = {"model": name, "prompt": "", "stream": False}
+        if num_ctx:
+            payload["options"] = {"num_ctx": num_ctx}  # else the first chat reloads it
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        resp = self._http.post(f"{self.host}/api/generate", json=payload, timeout=self.timeout)
+        if resp.status_code >= 400:
+            raise RuntimeError(f"load failed: {_error_detail(resp)}")
+
+    def unload_model(self, name: str) -> None:
+        resp = self._http.post(
+            f"{self.host}/api/generate",
+            json={"model": name, "keep_alive": 0, "stream": False},
+            timeout=self.timeout,
+        )
+        if resp.status_code >= 400:
+            raise RuntimeError(f"unload failed: {_error_detail(resp)}")
 
     def _show(self, model: str) -> dict[str, Any]:
-        """The /api/show response for a model, cached (capabilities + model_info)."""
-        if model not in self._show_cache:
+        """The /api/show response for a model, cached (capabilities + model_info).
+
+        With a metadata cache the response is also kept on disk under the
+        model's digest, so later processes skip the request entirely.
+        """
+        if model in self._show_cache:
+            return self._show_cache[model]
+        digest = self._digest(model) if self._metadata is not None else None
+        data = self._metadata.show(model, digest) if self._metadata is not None else None
+        if data is None:
             try:
-                resp = requests.post(
+                resp = self._http.post(
                     f"{self.host}/api/show", json={"model": model}, timeout=self.timeout
                 )
                 resp.raise_for_status()
-                self._show_cache[model] = resp.json() or {}
+                data = resp.json() or {}
+                if self._metadata is not None:
+                    self._metadata.put_show(model, digest, data)
             except Exception:  # unknown -> empty (callers assume capable)
-                self._show_cache[model] = {}
-        return self._show_cache[model]
+                data = {}  # ...and not persisted: the next process may do better
+        self._show_cache[model] = data
+        return data
+
+    def _digest(self, model: str) -> str | None:
+        """The model's digest from the (cached) tags listing, if it's installed."""
+        try:
+            models = self._tags()
+        except Exception:
+            return None
+        return next(
+            (m.get("digest") for m in models if model_matches(model, {m.get("name")})), None
+        )
 
     def capabilities(self, model: str) -> set[str]:
         """Capability tags from /api/show (e.g. completion, vision, tools), cached."""
@@ -124,41 +250,58 @@ class OllamaProvider(LLMProvider):
         temperature: float = 0.7,
         stream: bool = True,
         num_ctx: int | None = None,
+        cancel: CancelToken | None = None,
     ) -> Iterator[ChatChunk]:
         options: dict[str, Any] = {"temperature": temperature}
         if num_ctx:
             # Without this Ollama runs the model at ITS default context (often
             # 4k) and silently truncates long conversations.
             options["num_ctx"] = num_ctx
-        payload: dict[str, Any] = {
-            "model": model,
-            "messages": [m.to_wire() for m in messages],
-            "stream": stream,
-            "options": options,
-        }
+        payload: dict[str, Any] = {"model": model, "stream": stream, "options": options}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
         if tools:
             payload["tools"] = tools
-            # Ollama does not stream partial tool calls; force a single response
-            # so we get a complete tool_calls array in one shot.
-            payload["stream"] = False
+            if not self.stream_tools:
+                payload["stream"] = False
 
-        resp = requests.post(
+        resp = post_cancellable(
+            self._http,
             f"{self.host}/api/chat",
-            json=payload,
+            cancel,
+            data=encode_chat_payload(messages, payload),
+            headers=_JSON,
             stream=payload["stream"],
             timeout=self.timeout,
         )
-        resp.raise_for_status()
+        try:
+            resp.raise_for_status()
 
-        if not payload["stream"]:
-            yield _chunk_from_message(resp.json(), done=True)
-            return
+            if not payload["stream"]:
+                yield _chunk_from_message(resp.json(), done=True)
+                return
 
-        for line in resp.iter_lines():
-            if not line:
-                continue
-            data = json.loads(line)
-            yield _chunk_from_message(data, done=data.get("done", False))
+            # Ollama sends each tool call whole (never as partial fragments), in
+            # whichever line the model finished it; hold them for the final chunk.
+            calls: list[ToolCall] = []
+            for line in cancellable_lines(resp, cancel):
+                if not line:
+                    continue
+                data = json.loads(line)
+                chunk = _chunk_from_message(data, done=data.get("done", False))
+                calls.extend(chunk.tool_calls)
+                if chunk.done or (calls and self.stop_after_tool_call):
+                    yield ChatChunk(
+                        content=chunk.content, tool_calls=calls, done=True, usage=chunk.usage
+                    )
+                    return
+                yield ChatChunk(content=chunk.content)
+            if calls:  # stream ended without a done line — don't drop the calls
+                yield ChatChunk(tool_calls=calls, done=True)
+        finally:
+            # An error reply, or a consumer that stops early, must not strand
+            # its connection in the pool (and closing tells Ollama to stop).
+            resp.close()
 
 
 def _human_bytes(n: int) -> str:
@@ -188,7 +331,31 @@ def _chunk_from_message(data: dict[str, Any], *, done: bool) -> ChatChunk:
         )
         for tc in msg.get("tool_calls", []) or []
     ]
-    return ChatChunk(content=msg.get("content", ""), tool_calls=tool_calls, done=done)
+    return ChatChunk(
+        content=msg.get("content", ""),
+        tool_calls=tool_calls,
+        done=done,
+        usage=_usage(data) if done else None,
+    )
+
+
+def _usage(data: dict[str, Any]) -> TokenUsage | None:
+    """Counts and timings from Ollama's final response object (durations in ns)."""
+    if "eval_count" not in data and "prompt_eval_count" not in data:
+        return None
+
+    def secs(key: str) -> float | None:
+        ns = data.get(key)
+        return ns / 1e9 if isinstance(ns, (int, float)) else None
+
+    return TokenUsage(
+        prompt_tokens=data.get("prompt_eval_count"),
+        completion_tokens=data.get("eval_count"),
+        prompt_seconds=secs("prompt_eval_duration"),
+        completion_seconds=secs("eval_duration"),
+        load_seconds=secs("load_duration"),
+        total_seconds=secs("total_duration"),
+    )
 
 
 def _parse_args(args: Any) -> dict[str, Any]:
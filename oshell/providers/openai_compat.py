@@ -2,7 +2,13 @@
 
 Many local runtimes expose the OpenAI ``/v1/chat/completions`` schema. This
 provider lets the same shell drive any of them by pointing ``provider.host`` at
-the server and (optionally) setting ``provider.api_key``.
+the server and (optionally) setting ``provider.api_key``. Requests go through
+the shared keep-alive pool in :mod:`.transport`.
+
+Tool calls stream as SSE ``delta.tool_calls`` fragments: the first fragment of
+a call carries its ``index``, ``id`` and name, and later ones append pieces of
+the JSON ``arguments`` string under the same ``index``. We concatenate them per
+index and emit the finished calls in the final chunk.
 """
 
 from __future__ import annotations
@@ -11,9 +17,17 @@ import json
 from collections.abc import Iterator
 from typing import Any
 
-import requests
-
-from .base import ChatChunk, LLMProvider, Message, ToolCall
+from ..cancellation import CancelToken
+from .base import ChatChunk, LLMProvider, Message, TokenUsage, ToolCall, encode_chat_payload
+from .transport import (
+    DEFAULT_BACKOFF,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_RETRIES,
+    HTTPTransport,
+    cancellable_lines,
+    post_cancellable,
+    transport_for,
+)
 
 
 class OpenAICompatProvider(LLMProvider):
@@ -24,6 +38,12 @@ class OpenAICompatProvider(LLMProvider):
         host: str = "http://localhost:1234",
         api_key: str | None = None,
         timeout: float = 120.0,
+        *,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        stream_tools: bool = True,
+        stop_after_tool_call: bool = False,
     ):
         self.base = host.rstrip("/")
         # Allow either a bare host or a full ".../v1" base.
@@ -31,6 +51,11 @@ class OpenAICompatProvider(LLMProvider):
             self.base += "/v1"
         self.api_key = api_key
         self.timeout = timeout
+        self.stream_tools = stream_tools  # False: one blocking response per tool round
+        self.stop_after_tool_call = stop_after_tool_call
+        self._http: HTTPTransport = transport_for(
+            self.base, pool_size=pool_size, retries=retries, backoff=backoff
+        )
 
     def _headers(self) -> dict[str, str]:
         h = {"Content-Type": "application/json"}
@@ -39,7 +64,7 @@ class OpenAICompatProvider(LLMProvider):
         return h
 
     def list_models(self) -> list[str]:
-        resp = requests.get(f"{self.base}/models", headers=self._headers(), timeout=self.timeout)
+        resp = self._http.get(f"{self.base}/models", headers=self._headers(), timeout=self.timeout)
         resp.raise_for_status()
         return [m["id"] for m in resp.json().get("data", [])]
 
@@ -52,44 +77,125 @@ class OpenAICompatProvider(LLMProvider):
         temperature: float = 0.7,
         stream: bool = True,
         num_ctx: int | None = None,  # context is server-managed on this API; ignored
+        cancel: CancelToken | None = None,
     ) -> Iterator[ChatChunk]:
-        payload: dict[str, Any] = {
-            "model": model,
-            "messages": [m.to_wire() for m in messages],
-            "temperature": temperature,
-            "stream": stream,
-        }
+        payload: dict[str, Any] = {"model": model, "temperature": temperature, "stream": stream}
         if tools:
             payload["tools"] = tools
-            payload["stream"] = stream = False  # collect tool calls in one response
-
-        resp = requests.post(
+            if not self.stream_tools:
+                payload["stream"] = stream = False  # collect tool calls in one response
+        if stream:
+            # Ask for the trailing usage event (token counts) on streamed replies.
+            payload["stream_options"] = {"include_usage": True}
+
+        resp = post_cancellable(
+            self._http,
             f"{self.base}/chat/completions",
+            cancel,
             headers=self._headers(),
-            json=payload,
+            data=encode_chat_payload(messages, payload),
             stream=stream,
             timeout=self.timeout,
         )
-        resp.raise_for_status()
+        try:
+            resp.raise_for_status()
+
+            if not stream:
+                data = resp.json()
+                choice = data["choices"][0]["message"]
+                yield ChatChunk(
+                    content=choice.get("content") or "",
+                    tool_calls=_parse_tool_calls(choice.get("tool_calls")),
+                    done=True,
+                    usage=_usage(data.get("usage")),
+                )
+                return
 
-        if not stream:
-            choice = resp.json()["choices"][0]["message"]
-            yield ChatChunk(
-                content=choice.get("content") or "",
-                tool_calls=_parse_tool_calls(choice.get("tool_calls")),
-                done=True,
+            calls = _ToolCallFragments()
+            usage: TokenUsage | None = None
+            for line in cancellable_lines(resp, cancel):
+                if not line or not line.startswith(b"data: "):
+                    continue
+                body = line[len(b"data: "):]
+                if body.strip() == b"[DONE]":
+                    break
+                event = json.loads(body)
+                usage = _usage(event.get("usage")) or usage
+                choices = event.get("choices") or []
+                if not choices:  # e.g. the trailing usage-only event
+                    continue
+                delta = choices[0].get("delta") or {}
+                calls.add(delta.get("tool_calls"))
+                content = delta.get("content") or ""
+                if self.stop_after_tool_call and calls.first_complete():
+                    if content:  # text riding in the completing event is still the reply's
+                        yield ChatChunk(content=content)
+                    break
+                yield ChatChunk(content=content)
+            yield ChatChunk(tool_calls=calls.finish(), done=True, usage=usage)
+        finally:
+            resp.close()  # don't strand an error or half-read reply's connection in the pool
+
+
+class _ToolCallFragments:
+    """Reassembles streamed ``delta.tool_calls`` fragments, keyed by ``index``."""
+
+    def __init__(self) -> None:
+        self._calls: dict[int, dict[str, str]] = {}
+
+    def add(self, fragments: list[dict[str, Any]] | None) -> None:
+        for frag in fragments or []:
+            # Some servers omit index when they only ever send one call.
+            slot = self._calls.setdefault(
+                frag.get("index", 0), {"id": "", "name": "", "arguments": ""}
             )
-            return
-
-        for line in resp.iter_lines():
-            if not line or not line.startswith(b"data: "):
-                continue
-            body = line[len(b"data: "):]
-            if body.strip() == b"[DONE]":
-                yield ChatChunk(done=True)
-                return
-            delta = json.loads(body)["choices"][0]["delta"]
-            yield ChatChunk(content=delta.get("content") or "")
+            if frag.get("id"):
+                slot["id"] = frag["id"]
+            fn = frag.get("function") or {}
+            if fn.get("name"):
+                slot["name"] = fn["name"]
+            args = fn.get("arguments")
+            if isinstance(args, dict):  # a few servers send the object whole
+                slot["arguments"] = json.dumps(args)
+            elif args:
+                slot["arguments"] += args
+
+    def first_complete(self) -> bool:
+        """Whether the first call has a name and arguments that parse.
+
+        A complete JSON object can't be the prefix of a longer valid one, so
+        once the concatenation parses, no later fragment can extend that call.
+        No arguments yet is not "{}": servers send the name with an empty
+        arguments string and the arguments after it.
+        """
+        if not self._calls:
+            return False
+        first = self._calls[min(self._calls)]
+        if not first["name"] or not first["arguments"].strip():
+            return False
+        try:
+            return isinstance(json.loads(first["arguments"]), dict)
+        except json.JSONDecodeError:
+            return False
+
+    def finish(self) -> list[ToolCall]:
+        return _parse_tool_calls(
+            {
+                "id": c["id"] or None,
+                "function": {"name": c["name"], "arguments": c["arguments"] or "{}"},
+            }
+            for _, c in sorted(self._calls.items())
+        )
+
+
+def _usage(raw: dict[str, Any] | None) -> TokenUsage | None:
+    """The OpenAI ``usage`` object: token counts only, no timings."""
+    if not raw:
+        return None
+    return TokenUsage(
+        prompt_tokens=raw.get("prompt_tokens"),
+        completion_tokens=raw.get("completion_tokens"),
+    )
 
 
 def _parse_tool_calls(raw: Any) -> list[ToolCall]:
@@ -0,0 +1,361 @@
+"""A pool of backend hosts behind one ``LLMProvider``.
+
+With several Ollama boxes, pinning everything to one ``provider.host`` means a
+delegate, a compaction summary, or a second window queues behind the
+interactive turn on one GPU while the others idle. ``PoolProvider`` wraps one
+provider per host and, for every ``chat`` call, picks the least-loaded healthy
+host that has the model: fewest requests in flight, ties broken by recent
+time-to-first-token. Since delegates and compaction go through the same
+provider object, concurrent work spreads across the pool on its own.
+
+Hosts are health-checked on a background thread (``list_models``, which also
+refreshes which models each host has). A host that fails to connect is marked
+down and the call moves to the next candidate, so a box dying mid-session
+costs one retry, not the session. A stream that dies *after* producing output
+is not replayed elsewhere — the caller has already shown that text.
+
+Model management and residency fan out: a pull or delete goes to every host,
+a load warms the model on every host that has it, and ``running_models``
+merges what each host has loaded, so ``/pull`` and the residency manager work
+the same against a pool as against one box.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+import requests
+
+from ..cancellation import CancelToken
+from ..model_names import model_matches
+from .base import ChatChunk, LLMProvider, Message, PullProgress
+
+DEFAULT_HEALTH_INTERVAL = 15.0  # seconds between background health checks
+_TTFT_WEIGHT = 0.3  # EWMA weight of the newest time-to-first-token sample
+
+
+@dataclass
+class PoolMember:
+    """One host in the pool and what we know about its load."""
+
+    host: str
+    provider: LLMProvider
+    healthy: bool = True  # optimistic until the first check says otherwise
+    in_flight: int = 0
+    ttft: float | None = None  # smoothed seconds to first chunk
+    models: set[str] = field(default_factory=set)
+    requests: int = 0
+    failures: int = 0
+
+    def has(self, model: str) -> bool:
+        # Unknown model list (not checked yet) -> assume yes and let it answer.
+        if not self.models:
+            return True
+        return model_matches(model, self.models)
+
+
+class PoolProvider(LLMProvider):
+    """Least-loaded scheduling and failover across several backend hosts."""
+
+    name = "pool"
+
+    def __init__(
+        self,
+        members: list[tuple[str, LLMProvider]],
+        *,
+        health_interval: float = DEFAULT_HEALTH_INTERVAL,
+    ):
+        if not members:
+            raise ValueError("a provider pool needs at least one host (provider.hosts)")
+        self.members = [PoolMember(host=h, provider=p) for h, p in members]
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._monitor: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    # ── health ───────────────────────────────────────────────────────────────
+    def check_health(self) -> None:
+        """Probe every host once (also refreshes each host's model list)."""
+        for m in self.members:
+            try:
+                if not m.provider.health():  # a real probe, not a cached listing
+                    raise ConnectionError(m.host)
+                models = set(m.provider.list_models())
+            except Exception:
+                with self._lock:
+                    m.healthy = False
+                continue
+            with self._lock:
+                m.healthy = True
+                m.models = models
+
+    def _ensure_monitor(self) -> None:
+        """Start the background health checker on first use (interval 0 = never)."""
+        with self._lock:
+            if self._monitor is not None or self.health_interval <= 0:
+                return
+            self._monitor = threading.Thread(
+                target=self._monitor_loop, name="oshell-pool-health", daemon=True
+            )
+        self._monitor.start()
+
+    def _monitor_loop(self) -> None:
+        while not self._stop.is_set():
+            self.check_health()
+            self._stop.wait(self.health_interval)
+
+    def close(self) -> None:
+        self._stop.set()
+
+    # ── scheduling ───────────────────────────────────────────────────────────
+    def _candidates(self, model: str) -> list[PoolMember]:
+        """Hosts to try, best first: healthy hosts with the model, least loaded.
+
+        Hosts believed down come last rather than never — a stale health
+        reading shouldn't make the whole pool refuse a request.
+        """
+        with self._lock:
+            ranked = sorted(
+                (m for m in self.members if m.has(model)),
+                key=lambda m: (not m.healthy, m.in_flight, m.ttft or 0.0),
+            )
+        return ranked or list(self.members)
+
+    def chat(
+        self,
+        messages: list[Message],
+        *,
+        model: str,
+        tools: list[dict[str, Any]] | None = None,
+        temperature: float = 0.7,
+        stream: bool = True,
+        num_ctx: int | None = None,
+        cancel: CancelToken | None = None,
+    ) -> Iterator[ChatChunk]:
+        self._ensure_monitor()
+        last_error: Exception | None = None
+        for member in self._candidates(model):
+            with self._lock:
+                member.in_flight += 1
+                member.requests += 1
+            started = time.monotonic()
+            produced = False
+            try:
+                for chunk in member.provider.chat(
+                    messages,
+                    model=model,
+                    tools=tools,
+                    temperature=temperature,
+                    stream=stream,
+                    num_ctx=num_ctx,
+                    cancel=cancel,
+                ):
+                    if not produced:
+                        produced = True
+                        self._record_ttft(member, time.monotonic() - started)
+                    yield chunk
+                return
+            except requests.RequestException as exc:
+                with self._lock:
+                    member.failures += 1
+                    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+                        member.healthy = False
+                if produced:
+                    raise  # output already reached the caller; don't replay it
+                last_error = exc
+            finally:
+                with self._lock:
+                    member.in_flight -= 1
+        assert last_error is not None
+        raise last_error
+
+    def _record_ttft(self, member: PoolMember, seconds: float) -> None:
+        with self._lock:
+            if member.ttft is None:
+                member.ttft = seconds
+            else:
+                member.ttft += _TTFT_WEIGHT * (seconds - member.ttft)
+
+    def _first_with(self, model: str) -> LLMProvider:
+        return self._candidates(model)[0].provider
+
+    # ── the rest of the provider surface ─────────────────────────────────────
+    def list_models(self) -> list[str]:
+        """Every model any reachable host has (deduplicated, first-seen order)."""
+        names: dict[str, None] = {}
+        for m in self.members:
+            try:
+                found = m.provider.list_models()
+            except Exception:
+                with self._lock:
+                    m.healthy = False
+                continue
+            with self._lock:
+                m.healthy, m.models = True, set(found)
+            names.update(dict.fromkeys(found))
+        return list(names)
+
+    def list_models_info(self) -> list[dict[str, str]]:
+        seen: dict[str, dict[str, str]] = {}
+        for m in self.members:
+            if not m.healthy:
+                continue
+            try:
+                for info in m.provider.list_models_info():
+                    seen.setdefault(info["name"], info)
+            except Exception:
+                continue
+        return list(seen.values())
+
+    def capabilities(self, model: str) -> set[str]:
+        try:
+            return self._first_with(model).capabilities(model)
+        except Exception:
+            return set()
+
+    def max_context(self, model: str) -> int | None:
+        try:
+            return self._first_with(model).max_context(model)
+        except Exception:
+            return None
+
+    # ── model management and residency, fanned out to the hosts ─────────────
+    def _managing(self) -> list[PoolMember]:
+        return [m for m in self.members if m.provider.supports_model_management()]
+
+    def _resident_capable(self) -> list[PoolMember]:
+        return [m for m in self.members if m.provider.supports_residency()]
+
+    @staticmethod
+    def _fan_out(members: list[PoolMember], fn: Callable[[PoolMember], None]) -> None:
+        """Run ``fn`` for each member; raises (the last error) only if all of them failed."""
+        errors: list[Exception] = []
+        for m in members:
+            try:
+                fn(m)
+            except Exception as exc:
+                errors.append(exc)
+        if members and len(errors) == len(members):
+            raise errors[-1]
+
+    def supports_model_management(self) -> bool:
+        return bool(self._managing())
+
+    def pull_model(self, name: str) -> Iterator[PullProgress]:
+        """Pull onto every reachable host that can, labelling steps by host.
+
+        Raises only when every host failed, with the last host's error.
+        """
+        managing = self._managing()
+        if not managing:
+            yield from super().pull_model(name)
+            return
+        targets = [m for m in managing if m.healthy] or managing
+        errors: list[Exception] = []
+        for m in targets:
+            try:
+                for step in m.provider.pull_model(name):
+                    if len(targets) > 1:
+                        step = replace(step, status=f"{m.host}: {step.status}")
+                    yield step
+            except Exception as exc:
+                errors.append(exc)
+                continue
+            with self._lock:
+                if m.models:
+                    m.models.add(name)
+        if len(errors) == len(targets):
+            raise errors[-1]
+
+    def delete_model(self, name: str) -> None:
+        """Delete from every host that has the model."""
+        managing = self._managing()
+        if not managing:
+            super().delete_model(name)
+            return
+        targets = [m for m in managing if m.has(name)]
+        if not targets:
+            raise RuntimeError(f"delete failed: no host in the pool has {name}")
+        self._fan_out(targets, lambda m: m.provider.delete_model(name))
+        with self._lock:
+            for m in targets:
+                m.models.discard(name)
+
+    def supports_residency(self) -> bool:
+        return bool(self._resident_capable())
+
+    def running_models(self) -> list[dict[str, Any]]:
+        """Loaded models across the pool, one entry per name.
+
+        Each entry lists the ``hosts`` holding it; ``size`` is the largest
+        single host's footprint, since each host spends its own memory.
+        """
+        merged: dict[str, dict[str, Any]] = {}
+        members = self._resident_capable()
+        errors: list[Exception] = []
+        for m in members:
+            try:
+                running = m.provider.running_models()
+            except Exception as exc:
+                errors.append(exc)
+                continue
+            for info in running:
+                name = info.get("name") or info.get("model", "")
+                entry = merged.setdefault(name, {**info, "hosts": []})
+                entry["hosts"].append(m.host)
+                entry["size"] = max(int(entry.get("size") or 0), int(info.get("size") or 0))
+        if members and len(errors) == len(members):
+            raise errors[-1]  # the residency manager keeps its last reading
+        return list(merged.values())
+
+    def load_model(self, name: str, num_ctx: int | None = None) -> None:
+        """Load on every host that has the model, so whichever one a chat
+        lands on is warm."""
+        capable = self._resident_capable()
+        if not capable:
+            super().load_model(name, num_ctx)
+            return
+        targets = [m for m in capable if m.has(name)]
+        if not targets:
+            raise RuntimeError(f"load failed: no host in the pool has {name}")
+        self._fan_out(targets, lambda m: m.provider.load_model(name, num_ctx))
+
+    def unload_model(self, name: str) -> None:
+        """Unload from every host that has the model loaded."""
+        capable = self._resident_capable()
+        if not capable:
+            super().unload_model(name)
+            return
+        targets = []
+        for m in capable:
+            try:
+                running = m.provider.running_models()
+            except Exception:
+                continue
+            if any(model_matches(name, {r.get("name"), r.get("model")}) for r in running):
+                targets.append(m)
+        self._fan_out(targets, lambda m: m.provider.unload_model(name))
+
+    def health(self) -> bool:
+        self.check_health()
+        return any(m.healthy for m in self.members)
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Per-host load snapshot (for doctor / debugging)."""
+        with self._lock:
+            return [
+                {
+                    "host": m.host,
+                    "healthy": m.healthy,
+                    "in_flight": m.in_flight,
+                    "ttft": m.ttft,
+                    "requests": m.requests,
+                    "failures": m.failures,
+                    "models": len(m.models),
+                }
+                for m in self.members
+            ]
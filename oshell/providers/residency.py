@@ -0,0 +1,226 @@
+"""Model residency: which models the backend has loaded, and keeping it sane.
+
+Routing and compaction switch models freely, and on Ollama every switch to a
+model that isn't loaded is a multi-second cold load that may evict the main
+model on the way. The ``ResidencyManager`` reads Ollama's ``/api/ps`` (cached
+for ``poll_interval`` seconds) so callers can ask what is resident and prefer
+it when quality allows, warms the configured models in the background at
+startup (an empty-prompt generate loads a model without generating), and
+applies an unload policy: ``lru`` caps how many models stay loaded, ``budget``
+caps their combined memory; least-recently-used models go first.
+
+Backends without residency information (OpenAI-compatible servers manage
+their own) simply get no manager — see ``ResidencyManager.for_provider``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from ..model_names import model_matches
+from .base import LLMProvider
+
+if TYPE_CHECKING:
+    from ..config import ResidencyConfig
+
+
+@dataclass
+class ResidentModel:
+    """One entry of ``/api/ps``: a model currently loaded by the backend."""
+
+    name: str
+    size: int = 0  # bytes in memory (RAM + VRAM)
+    size_vram: int = 0
+
+
+class ResidencyManager:
+    """Tracks loaded models for one provider and enforces the unload policy."""
+
+    def __init__(self, provider: LLMProvider, config: ResidencyConfig):
+        self.provider = provider
+        self.config = config
+        self._resident: list[ResidentModel] = []
+        self._polled_at = 0.0  # monotonic time of the last /api/ps read; 0 = never
+        self._last_used: dict[str, float] = {}  # model -> monotonic time of last use
+        self._lock = threading.Lock()
+        self._warm_thread: threading.Thread | None = None
+        # One unload pass at a time: two overlapping passes would read the same
+        # /api/ps and pick the same victims.
+        self._enforce_lock = threading.Lock()
+        self._enforce_pending = False  # a background pass from touch() is queued or running
+
+    @classmethod
+    def for_provider(
+        cls, provider: LLMProvider, config: ResidencyConfig
+    ) -> ResidencyManager | None:
+        """A manager when enabled and the backend reports residency, else None."""
+        if not config.enabled or not provider.supports_residency():
+            return None
+        return cls(provider, config)
+
+    # ── what's loaded ────────────────────────────────────────────────────────
+    def refresh(self, *, force: bool = False) -> list[ResidentModel]:
+        """Loaded models per ``/api/ps``, re-read at most every ``poll_interval``.
+
+        A failed poll keeps the last known list — residency is a hint, never a
+        reason to fail a turn.
+        """
+        with self._lock:
+            fresh = time.monotonic() - self._polled_at < self.config.poll_interval
+            if self._polled_at and fresh and not force:
+                return list(self._resident)
+        try:
+            running = [
+                ResidentModel(
+                    name=m.get("name") or m.get("model", ""),
+                    size=int(m.get("size") or 0),
+                    size_vram=int(m.get("size_vram") or 0),
+                )
+                for m in self.provider.running_models()
+            ]
+        except Exception:
+            with self._lock:
+                return list(self._resident)
+        with self._lock:
+            self._resident = running
+            self._polled_at = time.monotonic()
+            return list(running)
+
+    def resident(self) -> set[str]:
+        """Names of the models the backend currently has loaded."""
+        return {m.name for m in self.refresh()}
+
+    def is_resident(self, model: str) -> bool:
+        return model_matches(model, self.resident())
+
+    def prefer(self, candidates: Iterable[str]) -> str | None:
+        """The first candidate that is already loaded, if any."""
+        loaded = self.resident()
+        return next((c for c in candidates if c and model_matches(c, loaded)), None)
+
+    # ── warm-up ──────────────────────────────────────────────────────────────
+    def warm_up(
+        self,
+        models: Iterable[str],
+        keep: Iterable[str] = (),
+        num_ctx: Callable[[str], int | None] | None = None,
+    ) -> None:
+        """Load each model that isn't resident (blocking), then apply the policy.
+
+        ``keep`` is never unloaded by that final pass (the active model, which
+        may not be the last one warmed). ``num_ctx`` gives each model the
+        context window its chats will ask for, so the first chat doesn't reload it.
+        """
+        keep = list(keep)
+        for model in dict.fromkeys(m for m in models if m):  # dedupe, keep order
+            if self.is_resident(model):
+                self.touch(model, enforce=False)
+                continue
+            try:
+                self.provider.load_model(model, num_ctx(model) if num_ctx else None)
+            except Exception:
+                continue  # not pulled / backend busy — the first real turn loads it
+            self.touch(model, enforce=False)
+            with self._lock:
+                self._polled_at = 0.0  # it just changed; re-read next time
+        self.enforce(keep)
+
+    def warm_up_async(
+        self,
+        models: Iterable[str],
+        keep: Iterable[str] = (),
+        num_ctx: Callable[[str], int | None] | None = None,
+    ) -> threading.Thread:
+        """``warm_up`` on a daemon thread, so startup never waits on a load."""
+        targets = list(models)
+        self._warm_thread = threading.Thread(
+            target=self.warm_up,
+            args=(targets, list(keep), num_ctx),
+            name="oshell-warmup",
+            daemon=True,
+        )
+        self._warm_thread.start()
+        return self._warm_thread
+
+    # ── unload policy ────────────────────────────────────────────────────────
+    def touch(self, model: str, *, enforce: bool = True) -> None:
+        """Record that ``model`` was just used (the LRU clock).
+
+        A background unload pass starts unless one is already pending; that
+        one re-reads ``/api/ps`` and the clock, so nothing is missed.
+        """
+        with self._lock:
+            self._last_used[model] = time.monotonic()
+            start = enforce and self.config.policy != "none" and not self._enforce_pending
+            if start:
+                self._enforce_pending = True
+        if start:
+            # The unload round-trips must not delay the turn that just started.
+            threading.Thread(target=self._enforce_pass, name="oshell-unload", daemon=True).start()
+
+    def _enforce_pass(self) -> None:
+        try:
+            self.enforce()
+        finally:
+            with self._lock:
+                self._enforce_pending = False
+
+    def enforce(self, keep: Iterable[str] = ()) -> list[str]:
+        """Unload least-recently-used models until the policy is satisfied.
+
+        The most recently used model is always kept, as is anything in
+        ``keep``. Returns the names that were unloaded.
+        """
+        policy = self.config.policy
+        if policy == "none":
+            return []
+        with self._enforce_lock:
+            return self._enforce(policy, keep)
+
+    def _enforce(self, policy: str, keep: Iterable[str]) -> list[str]:
+        loaded = self.refresh(force=True)
+        with self._lock:
+            last_used = dict(self._last_used)
+
+        def used(m: ResidentModel) -> float:
+            return last_used.get(m.name) or last_used.get(m.name.removesuffix(":latest"), 0.0)
+
+        # Oldest first; models we never used (loaded by someone else) oldest of all.
+        order = sorted(loaded, key=used)
+        protected = {m.name for m in loaded if _matches_any(m.name, keep)}
+        if order and used(order[-1]):
+            protected.add(order[-1].name)
+        budget = int(self.config.memory_budget_gb * 1024**3)
+
+        def over(models: list[ResidentModel]) -> bool:
+            if policy == "lru":
+                return 0 < self.config.max_models < len(models)
+            if policy == "budget":
+                return 0 < budget < sum(m.size for m in models)
+            return False
+
+        unloaded: list[str] = []
+        remaining = list(order)
+        for victim in order:
+            if not over(remaining):
+                break
+            if victim.name in protected:
+                continue
+            try:
+                self.provider.unload_model(victim.name)
+            except Exception:
+                continue
+            remaining.remove(victim)
+            unloaded.append(victim.name)
+        if unloaded:
+            with self._lock:
+                self._resident = remaining
+        return unloaded
+
+
+def _matches_any(loaded_name: str, models: Iterable[str]) -> bool:
+    return any(model_matches(m, {loaded_name}) for m in models)
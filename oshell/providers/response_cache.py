@@ -0,0 +1,323 @@
+"""Opt-in cache of whole model responses for deterministic calls.
+
+``oshell ask --json`` in CI, ``oshell do``, and compaction summaries often
+make exact repeat calls: same messages, model, tools, and a temperature low
+enough that the answer is (near) deterministic. ``CachingProvider`` sits
+between the agent and the real provider. It hashes everything that shapes
+the reply and, on a hit, replays the stored chunks as a stream without
+touching the backend. A CI job re-run against an unchanged repo then skips
+inference entirely.
+
+Storage is a directory of JSON entries bounded by ``max_mb``. Every hit
+bumps an entry's mtime and the oldest entries are evicted first, so it
+behaves as an LRU shared by every oshell process. Calls above
+``max_temperature`` bypass the cache, as do streams the caller abandons
+midway: only complete responses are stored. A hit replays the token counts
+the backend reported, so the ledger keeps calibrating, but not its timings:
+no prefill or decode happened. Hit/miss/byte counters persist in
+``stats.json`` for ``oshell doctor``; updates hold an OS file lock on
+``stats.lock`` so parallel processes never lose each other's counts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ..cancellation import CancelToken
+from .base import ChatChunk, LLMProvider, Message, PullProgress, TokenUsage, ToolCall
+
+_STATS_FILE = "stats.json"
+_STATS_LOCK = "stats.lock"
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    bytes_served: int = 0  # cached response bytes replayed instead of generated
+    entries: int = 0
+    size_bytes: int = 0
+
+
+class ResponseCache:
+    """Size-bounded, mtime-LRU directory of serialized responses."""
+
+    def __init__(self, directory: str | Path, max_bytes: int):
+        self.dir = Path(directory).expanduser()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(
+        namespace: str,
+        messages: list[Message],
+        *,
+        model: str,
+        tools: list[dict[str, Any]] | None,
+        temperature: float,
+        num_ctx: int | None,
+    ) -> str:
+        """A stable hash of everything that determines the response."""
+        blob = json.dumps(
+            {
+                "ns": namespace,
+                "model": model,
+                "tools": tools or [],
+                "temperature": temperature,
+                "num_ctx": num_ctx,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(blob.encode("utf-8"))
+        for m in messages:  # the memoized encodings — no re-serializing the history
+            digest.update(b"\0" + m.wire_json())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{key}.json"
+
+    def get(self, key: str) -> list[ChatChunk] | None:
+        path = self._path(key)
+        try:
+            raw = path.read_text(encoding="utf-8")
+            chunks = [_chunk_from_dict(d) for d in json.loads(raw)]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._bump(misses=1)
+            return None
+        try:
+            os.utime(path)  # LRU: a hit makes the entry young again
+        except OSError:  # pragma: no cover - evicted by another process just now
+            pass
+        self._bump(hits=1, bytes_served=len(raw.encode("utf-8")))
+        return chunks
+
+    def put(self, key: str, chunks: list[ChatChunk]) -> None:
+        data = json.dumps([_chunk_to_dict(c) for c in chunks])
+        try:
+            self._write(self._path(key), data)
+        except OSError:  # pragma: no cover - read-only home, disk full
+            return
+        self._evict()
+
+    def _write(self, path: Path, data: str) -> None:
+        """Replace ``path`` atomically: other processes see the old file or the new."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        out = []
+        for p in self.dir.glob("*.json"):
+            if p.name == _STATS_FILE:
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, p))
+        return out
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the directory fits the bound."""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda e: e[0])
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+
+    # ── stats (persisted so `oshell doctor` can report them) ──────────────────
+    def _bump(self, **deltas: int) -> None:
+        # The thread lock covers this process; the file lock covers every other
+        # oshell sharing the directory, whose read-modify-write would otherwise
+        # interleave with ours and drop counts.
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            with self._lock, _file_lock(self.dir / _STATS_LOCK):
+                stats = self._read_stats()
+                for k, v in deltas.items():
+                    stats[k] = stats.get(k, 0) + v
+                self._write(self.dir / _STATS_FILE, json.dumps(stats))
+        except OSError:  # pragma: no cover - read-only home, disk full
+            pass
+
+    def _read_stats(self) -> dict[str, int]:
+        try:
+            data = json.loads((self.dir / _STATS_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def stats(self) -> CacheStats:
+        counters = self._read_stats()
+        entries = self._entries() if self.dir.is_dir() else []
+        return CacheStats(
+            hits=int(counters.get("hits", 0)),
+            misses=int(counters.get("misses", 0)),
+            bytes_served=int(counters.get("bytes_served", 0)),
+            entries=len(entries),
+            size_bytes=sum(size for _, size, _ in entries),
+        )
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive OS lock on ``path`` (created if missing) across processes."""
+    with open(path, "a+b") as f:
+        if sys.platform == "win32":
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class CachingProvider(LLMProvider):
+    """Wraps a provider; deterministic ``chat`` calls are answered from cache."""
+
+    def __init__(
+        self,
+        inner: LLMProvider,
+        cache: ResponseCache,
+        *,
+        max_temperature: float = 0.0,
+        namespace: str = "",
+    ):
+        self.inner = inner
+        self.cache = cache
+        self.max_temperature = max_temperature
+        # Same model name on two backends can be two different models.
+        self.namespace = namespace or inner.name
+        self.name = inner.name
+
+    def chat(
+        self,
+        messages: list[Message],
+        *,
+        model: str,
+        tools: list[dict[str, Any]] | None = None,
+        temperature: float = 0.7,
+        stream: bool = True,
+        num_ctx: int | None = None,
+        cancel: CancelToken | None = None,
+    ) -> Iterator[ChatChunk]:
+        kwargs: dict[str, Any] = {
+            "model": model,
+            "tools": tools,
+            "temperature": temperature,
+            "num_ctx": num_ctx,
+        }
+        if temperature > self.max_temperature:
+            yield from self.inner.chat(messages, stream=stream, cancel=cancel, **kwargs)
+            return
+        key = ResponseCache.key(self.namespace, messages, **kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield from cached
+            return
+        chunks: list[ChatChunk] = []
+        for chunk in self.inner.chat(messages, stream=stream, cancel=cancel, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        # Reached only when the stream ran to completion — a consumer that
+        # stopped early (or an error) must not plant a truncated answer.
+        self.cache.put(key, chunks)
+
+    # ── everything else passes straight through ──────────────────────────────
+    def list_models(self) -> list[str]:
+        return self.inner.list_models()
+
+    def list_models_info(self) -> list[dict[str, str]]:
+        return self.inner.list_models_info()
+
+    def capabilities(self, model: str) -> set[str]:
+        return self.inner.capabilities(model)
+
+    def max_context(self, model: str) -> int | None:
+        return self.inner.max_context(model)
+
+    def supports_model_management(self) -> bool:
+        return self.inner.supports_model_management()
+
+    def pull_model(self, name: str) -> Iterator[PullProgress]:
+        return self.inner.pull_model(name)
+
+    def delete_model(self, name: str) -> None:
+        self.inner.delete_model(name)
+
+    def supports_residency(self) -> bool:
+        return self.inner.supports_residency()
+
+    def running_models(self) -> list[dict[str, Any]]:
+        return self.inner.running_models()
+
+    def load_model(self, name: str, num_ctx: int | None = None) -> None:
+        self.inner.load_model(name, num_ctx)
+
+    def unload_model(self, name: str) -> None:
+        self.inner.unload_model(name)
+
+    def health(self) -> bool:
+        return self.inner.health()
+
+
+def _chunk_to_dict(c: ChatChunk) -> dict[str, Any]:
+    return {
+        "content": c.content,
+        "tool_calls": [
+            {"name": t.name, "arguments": t.arguments, "id": t.id} for t in c.tool_calls
+        ],
+        "done": c.done,
+        # Token counts only: the timings describe work a hit doesn't repeat.
+        "usage": (
+            {"prompt_tokens": c.usage.prompt_tokens, "completion_tokens": c.usage.completion_tokens}
+            if c.usage is not None
+            else None
+        ),
+    }
+
+
+def _chunk_from_dict(d: dict[str, Any]) -> ChatChunk:
+    return ChatChunk(
+        content=d.get("content", ""),
+        tool_calls=[
+            ToolCall(name=t["name"], arguments=t.get("arguments", {}), id=t.get("id"))
+            for t in d.get("tool_calls", [])
+        ],
+        done=bool(d.get("done", False)),
+        usage=TokenUsage(**d["usage"]) if d.get("usage") else None,
+    )
@@ -0,0 +1,228 @@
+"""Pooled, keep-alive HTTP transport shared by every backend client.
+
+Module-level ``requests.get/post`` open a fresh TCP connection per call, and
+the agent makes a lot of calls: up to 16 tool rounds per turn, each a
+``/api/chat`` round-trip, plus ``/api/show`` probes and delegates on top. Here
+every backend *origin* (scheme + host + port) gets exactly one
+``requests.Session`` with a sized connection pool, so rounds reuse a warm
+keep-alive connection instead of paying connection setup every time.
+
+Connect failures (backend restarting, a laptop waking from sleep) are retried
+with exponential backoff. Only *connect* errors — a request that never reached
+the server is always safe to resend, even a POST; anything after that is the
+caller's business. Each request is timed per endpoint path so slow backends
+are visible (``HTTPTransport.stats``).
+
+``post_cancellable`` and ``cancellable_lines`` let a chat request be dropped
+mid-flight: the response is closed, which is how a server learns to stop
+generating.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..cancellation import Cancelled, CancelToken, run_cancellable
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.25  # seconds; doubles per retry (0.25, 0.5, 1.0, …)
+
+
+@dataclass
+class EndpointStats:
+    """Timing for one endpoint path. ``seconds`` is time-to-response-headers:
+    for a streamed chat that's roughly time-to-first-token, not the whole reply."""
+
+    requests: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    last_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.requests if self.requests else 0.0
+
+    def merge(self, other: EndpointStats) -> None:
+        """Fold ``other``'s counts into these (``last_seconds`` takes ``other``'s)."""
+        self.requests += other.requests
+        self.errors += other.errors
+        self.total_seconds += other.total_seconds
+        self.last_seconds = other.last_seconds or self.last_seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+
+
+def origin_of(url: str) -> str:
+    """``http://host:port/api/chat`` -> ``http://host:port`` (the pool key)."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class HTTPTransport:
+    """One keep-alive ``requests.Session`` for one backend origin."""
+
+    def __init__(
+        self,
+        origin: str,
+        *,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        self.origin = origin
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,  # a request the server saw is never silently replayed
+            status=0,
+            other=0,
+            backoff_factor=backoff,
+            allowed_methods=None,  # connect errors are safe for every verb
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,  # one origin per transport
+            pool_maxsize=max(pool_size, 1),
+            max_retries=retry,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._stats: dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    # ── requests ──────────────────────────────────────────────────────────────
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send through the pool, timing it under the URL's path.
+
+        A streamed response holds its connection until the body is fully read
+        or the response is closed — callers that may stop early should
+        ``close()`` it so the connection isn't stranded.
+        """
+        path = urlsplit(url).path or "/"
+        t0 = time.monotonic()
+        try:
+            resp = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._record(path, time.monotonic() - t0, error=True)
+            raise
+        self._record(path, time.monotonic() - t0, error=resp.status_code >= 400)
+        return resp
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    # ── stats ─────────────────────────────────────────────────────────────────
+    def _record(self, path: str, seconds: float, *, error: bool) -> None:
+        with self._lock:
+            s = self._stats.setdefault(path, EndpointStats())
+            s.requests += 1
+            s.errors += int(error)
+            s.total_seconds += seconds
+            s.last_seconds = seconds
+            s.max_seconds = max(s.max_seconds, seconds)
+
+    def stats(self) -> dict[str, EndpointStats]:
+        """A snapshot of per-path timing (copies; safe to read while in use)."""
+        with self._lock:
+            return {p: EndpointStats(**vars(s)) for p, s in self._stats.items()}
+
+    def close(self) -> None:
+        self.session.close()
+
+
+# ── shared transports: one pool per origin, for the life of the process ──────
+_transports: dict[tuple[str, int, int, float], HTTPTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def transport_for(
+    url: str,
+    *,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+) -> HTTPTransport:
+    """The shared transport for ``url``'s origin (created on first use).
+
+    Providers rebuilt on a model switch, delegates, and the Atlassian clients
+    all land on the same pool when they point at the same origin.
+    """
+    origin = origin_of(url)
+    key = (origin, pool_size, retries, backoff)
+    with _transports_lock:
+        if key not in _transports:
+            _transports[key] = HTTPTransport(
+                origin, pool_size=pool_size, retries=retries, backoff=backoff
+            )
+        return _transports[key]
+
+
+def transport_stats() -> dict[str, dict[str, EndpointStats]]:
+    """Per-origin, per-path timing for every transport created so far."""
+    with _transports_lock:
+        transports = list(_transports.values())
+    out: dict[str, dict[str, EndpointStats]] = {}
+    for t in transports:
+        merged = out.setdefault(t.origin, {})
+        for path, s in t.stats().items():
+            if path in merged:  # same origin, different pool/retry settings
+                merged[path].merge(s)
+            else:
+                merged[path] = s
+    return out
+
+
+# ── cancellable requests ─────────────────────────────────────────────────────
+def post_cancellable(
+    http: Any, url: str, cancel: CancelToken | None, **kwargs: Any
+) -> requests.Response:
+    """``http.post(url, ...)``, abandoned at once if ``cancel`` fires first.
+
+    Headers of a chat response arrive only after prefill, which can take a
+    while on a long prompt. The abandoned response is closed when it arrives.
+    """
+    return run_cancellable(
+        lambda: http.post(url, **kwargs), cancel, discard=lambda resp: resp.close()
+    )
+
+
+def cancellable_lines(resp: requests.Response, cancel: CancelToken | None) -> Iterator[bytes]:
+    """``resp.iter_lines()``, raising ``Cancelled`` when ``cancel`` fires.
+
+    Cancelling closes the response from the cancelling thread, which ends the
+    read. Any error the read raises after the cancel becomes ``Cancelled``.
+    """
+    if cancel is None:
+        yield from resp.iter_lines()
+        return
+    unregister = cancel.on_cancel(resp.close)
+    try:
+        for line in resp.iter_lines():
+            cancel.raise_if_cancelled()
+            yield line
+    except Cancelled:
+        raise
+    except Exception:
+        if cancel.cancelled:
+            raise Cancelled("cancelled by the user") from None
+        raise
+    finally:
+        unregister()
+    cancel.raise_if_cancelled()  # a closed stream can also just end
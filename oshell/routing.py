@@ -12,6 +12,8 @@ import re
 
 from pydantic import BaseModel
 
+from .model_names import model_matches
+
 # Signals that a message deserves the deep model. Kept coarse — the cost of a
 # wrong "deep" pick is latency, the cost of a wrong "fast" pick is a bad answer,
 # so ties break toward deep.
@@ -33,6 +35,9 @@ class RoutingConfig(BaseModel):
     fast_model: str = ""  # quick chat, small questions
     deep_model: str = ""  # reasoning, code, long context
     vision_model: str = ""  # any turn with images attached
+    # A quick question doesn't need the fast model badly enough to cold-load
+    # it: if the current model is already loaded and the fast one isn't, stay.
+    prefer_resident: bool = True
 
 
 def classify(text: str, has_images: bool = False) -> str:
@@ -49,8 +54,14 @@ def pick_model(
     has_images: bool,
     cfg: RoutingConfig,
     current: str,
+    resident: set[str] | None = None,
 ) -> tuple[str, str] | None:
-    """The (model, reason) to switch to for this message, or None to stay put."""
+    """The (model, reason) to switch to for this message, or None to stay put.
+
+    ``resident`` is the set of models the backend has loaded (None = unknown).
+    Only the fast bucket bends to it — the current model can answer a quick
+    question just as well, but a deep or vision turn needs its model.
+    """
     if not cfg.enabled:
         return None
     bucket = classify(text, has_images)
@@ -61,6 +72,14 @@ def pick_model(
     }[bucket]
     if not target or target == current:
         return None
+    if (
+        bucket == "fast"
+        and cfg.prefer_resident
+        and resident is not None
+        and model_matches(current, resident)
+        and not model_matches(target, resident)
+    ):
+        return None
     reasons = {
         "vision": "image attached",
         "deep": "this one deserves the big model",
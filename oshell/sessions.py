@@ -31,8 +31,10 @@ def new_id() -> str:
 
 def _title(messages: list[Message]) -> str:
     """First line of the first user message — good enough to recognize later."""
+    from .agent.loop import is_context_note
+
     for m in messages:
-        if m.role == "user" and m.content.strip():
+        if m.role == "user" and m.content.strip() and not is_context_note(m):
             line = m.content.strip().splitlines()[0]
             return line[:_TITLE_LEN] + ("…" if len(line) > _TITLE_LEN else "")
     return "(empty)"
@@ -0,0 +1,373 @@
+"""A stand-in Ollama / OpenAI-compatible server: the real HTTP paths, no GPU.
+
+The scripted provider in :mod:`oshell.bench` skips the network entirely. To
+measure what a request really costs on the client side (the keep-alive pool,
+NDJSON and SSE parsing, tool-call reassembly, rendering) something has to
+answer over HTTP the way Ollama does. This is that something: stdlib only,
+started in-process by tests and ``oshell bench e2e``, or on its own with
+``oshell bench serve`` so the TUI can be pointed at it.
+
+It serves ``/api/chat`` (NDJSON), ``/api/tags``, ``/api/show``, ``/api/ps``,
+``/v1/chat/completions`` (SSE) and ``/v1/models``. Replies are filler words,
+one token each, paced by ``Behavior``: the time to the first token, the
+decode rate, how often a request that offers tools gets a tool call back,
+and how often a chat fails with HTTP 500. A request that follows a tool
+result is always answered with text, so an agent turn ends.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+_WORDS = "the quick local model streams another plain token to keep this benchmark honest".split()
+_FAMILY = "standin"
+
+
+@dataclass
+class Behavior:
+    """How the stand-in answers; read on every request, so tests may change it live."""
+
+    ttft: float = 0.05  # seconds before the first token
+    tokens_per_s: float = 200.0  # decode rate (0 = as fast as the socket takes it)
+    reply_tokens: int = 64
+    tool_rate: float = 0.0  # share of requests offering tools that get a tool call
+    error_rate: float = 0.0  # share of chat requests that fail with HTTP 500
+    models: list[str] = field(default_factory=lambda: ["standin:latest"])
+    context: int = 8192  # reported as the model's trained window
+    seed: int | None = None
+
+
+@dataclass
+class Stats:
+    requests: int = 0  # chat requests
+    errors: int = 0  # ...answered with an injected 500
+    tool_calls: int = 0
+    tokens: int = 0  # reply tokens written
+
+
+class StandInServer:
+    """The server on a background thread: ``with StandInServer() as s: s.url``."""
+
+    def __init__(self, behavior: Behavior | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.behavior = behavior or Behavior()
+        self.stats = Stats()
+        self.loaded: set[str] = set()  # models that served a chat, for /api/ps
+        self._rng = random.Random(self.behavior.seed)
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.standin = self  # type: ignore[attr-defined]
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        if isinstance(host, bytes):  # allowed by the typing, never an AF_INET address
+            host = host.decode()
+        return f"http://{host}:{port}"
+
+    def start(self) -> StandInServer:
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="oshell-standin", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted (``oshell bench serve``)."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> StandInServer:
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def roll(self, rate: float) -> bool:
+        with self._lock:
+            return self._rng.random() < rate
+
+    def count(self, **fields: int) -> None:
+        with self._lock:
+            for key, n in fields.items():
+                setattr(self.stats, key, getattr(self.stats, key) + n)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients drop idle keep-alive connections all the time; that's not news.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _tool_call(tools: list[dict[str, Any]]) -> dict[str, Any]:
+    """A call to the first offered tool, with its required arguments filled in."""
+    fn = tools[0].get("function", {})
+    props = (fn.get("parameters") or {}).get("properties", {})
+    defaults = {"string": "stand-in", "integer": 1, "number": 1, "boolean": True}
+    args = {
+        name: defaults.get(props.get(name, {}).get("type"), None)
+        for name in (fn.get("parameters") or {}).get("required", [])
+    }
+    return {"name": fn.get("name", ""), "arguments": args}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so the client's pool is exercised
+
+    @property
+    def standin(self) -> StandInServer:
+        return self.server.standin  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # a benchmark's worth of requests would bury the terminal
+
+    # ── plumbing ─────────────────────────────────────────────────────────────
+    def _body(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        self._prompt_tokens = len(raw) // 4
+        return json.loads(raw) if raw else {}
+
+    def _json(self, data: dict[str, Any], status: int = 200) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _tokens(self) -> Any:
+        """Reply tokens, each yielded when the configured pace says it's due."""
+        b = self.standin.behavior
+        start = time.perf_counter() + b.ttft
+        for i in range(b.reply_tokens):
+            due = start + (i / b.tokens_per_s if b.tokens_per_s > 0 else 0)
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            yield _WORDS[i % len(_WORDS)] + " "
+
+    def _plan(self, req: dict[str, Any]) -> tuple[bool, dict[str, Any] | None]:
+        """(fail?, tool call or None) for one chat request."""
+        s = self.standin
+        s.count(requests=1)
+        if s.roll(s.behavior.error_rate):
+            s.count(errors=1)
+            return True, None
+        s.loaded.add(req.get("model", ""))
+        messages = req.get("messages") or []
+        after_tool = bool(messages) and messages[-1].get("role") == "tool"
+        tools = req.get("tools") or []
+        if tools and not after_tool and s.roll(s.behavior.tool_rate):
+            s.count(tool_calls=1)
+            time.sleep(s.behavior.ttft)  # the prompt is prefilled all the same
+            return False, _tool_call(tools)
+        return False, None
+
+    # ── routes ───────────────────────────────────────────────────────────────
+    def do_GET(self) -> None:
+        routes = {"/api/tags": self._tags, "/api/ps": self._ps, "/v1/models": self._models}
+        route = routes.get(self.path)
+        if route is None:
+            self._json({"error": f"no route {self.path}"}, 404)
+        else:
+            route()
+
+    def do_POST(self) -> None:
+        routes = {
+            "/api/chat": self._ollama_chat,
+            "/api/show": self._show,
+            "/v1/chat/completions": self._openai_chat,
+        }
+        route = routes.get(self.path)
+        try:
+            req = self._body()
+        except json.JSONDecodeError:
+            self._json({"error": "invalid JSON body"}, 400)
+            return
+        if route is None:
+            self._json({"error": f"no route {self.path}"}, 404)
+            return
+        try:
+            route(req)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # the client stopped reading (cancelled turn)
+
+    def _tags(self) -> None:
+        models = [
+            {
+                "name": name,
+                "model": name,
+                "size": 4_700_000_000,
+                "digest": hashlib.sha256(name.encode()).hexdigest(),
+                "details": {
+                    "family": _FAMILY,
+                    "parameter_size": "7B",
+                    "quantization_level": "Q4_K_M",
+                },
+            }
+            for name in self.standin.behavior.models
+        ]
+        self._json({"models": models})
+
+    def _ps(self) -> None:
+        loaded = [m for m in self.standin.behavior.models if m in self.standin.loaded]
+        self._json(
+            {"models": [{"name": m, "model": m, "size": 5_000_000_000} for m in loaded]}
+        )
+
+    def _models(self) -> None:
+        data = [{"id": m, "object": "model"} for m in self.standin.behavior.models]
+        self._json({"object": "list", "data": data})
+
+    def _show(self, req: dict[str, Any]) -> None:
+        b = self.standin.behavior
+        name = req.get("model") or req.get("name", "")
+        if name not in b.models and f"{name}:latest" not in b.models:
+            self._json({"error": f"model '{name}' not found"}, 404)
+            return
+        self._json(
+            {
+                "capabilities": ["completion", "tools"],
+                "model_info": {f"{_FAMILY}.context_length": b.context},
+                "details": {"family": _FAMILY, "parameter_size": "7B"},
+            }
+        )
+
+    def _ollama_chat(self, req: dict[str, Any]) -> None:
+        fail, call = self._plan(req)
+        if fail:
+            self._json({"error": "stand-in: injected failure"}, 500)
+            return
+        model = req.get("model", "")
+        t0 = time.perf_counter()
+        tokens = [] if call else self._tokens()
+        final: dict[str, Any] = {"role": "assistant", "content": ""}
+        if call:
+            final["tool_calls"] = [{"function": call}]
+        if req.get("stream", True):
+            self._start_stream("application/x-ndjson")
+            n = 0
+            for token in tokens:
+                line = {"model": model, "message": {"role": "assistant", "content": token}}
+                self._chunk(json.dumps({**line, "done": False}).encode() + b"\n")
+                n += 1
+        else:
+            text = "".join(tokens)
+            final["content"] = text
+            n = len(text.split())
+        self.standin.count(tokens=n)
+        elapsed = int((time.perf_counter() - t0) * 1e9)
+        done = {
+            "model": model,
+            "message": final,
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": elapsed,
+            "load_duration": 0,
+            "prompt_eval_count": self._prompt_tokens,
+            "prompt_eval_duration": 1,
+            "eval_count": n,
+            "eval_duration": max(elapsed, 1),
+        }
+        if req.get("stream", True):
+            self._chunk(json.dumps(done).encode() + b"\n")
+            self._end_stream()
+        else:
+            self._json(done)
+
+    def _openai_chat(self, req: dict[str, Any]) -> None:
+        fail, call = self._plan(req)
+        if fail:
+            self._json({"error": {"message": "stand-in: injected failure"}}, 500)
+            return
+        model = req.get("model", "")
+        tokens = [] if call else self._tokens()
+        finish = "tool_calls" if call else "stop"
+        wire_call: dict[str, Any] | None = (
+            {
+                "id": f"call_{self.standin.stats.requests}",
+                "type": "function",
+                "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])},
+            }
+            if call
+            else None
+        )
+        if not req.get("stream"):
+            text = "".join(tokens)
+            n = len(text.split())
+            self.standin.count(tokens=n)
+            message: dict[str, Any] = {"role": "assistant", "content": text}
+            if wire_call:
+                message["tool_calls"] = [wire_call]
+            usage = {"prompt_tokens": self._prompt_tokens, "completion_tokens": n}
+            self._json(
+                {
+                    "object": "chat.completion",
+                    "model": model,
+                    "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+                    "usage": usage,
+                }
+            )
+            return
+
+        def event(delta: dict[str, Any], reason: str | None = None) -> None:
+            data = {
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": reason}],
+            }
+            self._chunk(b"data: " + json.dumps(data).encode() + b"\n\n")
+
+        self._start_stream("text/event-stream")
+        n = 0
+        for token in tokens:
+            event({"content": token})
+            n += 1
+        if wire_call:
+            # Name first, then the arguments in two pieces, as real servers split them.
+            name, args = wire_call["function"]["name"], wire_call["function"]["arguments"]
+            head = {**wire_call, "index": 0, "function": {"name": name, "arguments": ""}}
+            event({"tool_calls": [head]})
+            for piece in (args[: len(args) // 2], args[len(args) // 2 :]):
+                event({"tool_calls": [{"index": 0, "function": {"arguments": piece}}]})
+        event({}, finish)
+        self.standin.count(tokens=n)
+        if (req.get("stream_options") or {}).get("include_usage"):
+            usage = {"prompt_tokens": self._prompt_tokens, "completion_tokens": n}
+            self._chunk(b"data: " + json.dumps({"choices": [], "usage": usage}).encode() + b"\n\n")
+        self._chunk(b"data: [DONE]\n\n")
+        self._end_stream()
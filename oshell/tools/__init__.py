@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import threading
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
@@ -14,7 +16,7 @@ from .atlassian import (
     JiraGetIssueTool,
     JiraSearchTool,
 )
-from .base import Tool, ToolError, ToolRegistry
+from .base import Tool, ToolError, ToolRegistry, ToolUnavailable, report_progress
 from .browser import _SharedBrowser, browser_tools
 from .builtins import (
     CurrentTimeTool,
@@ -23,13 +25,30 @@ from .builtins import (
     ReadFileTool,
     WriteFileTool,
 )
+from .cache import CachePolicy, ToolResultCache
 from .documents import CreateDocumentTool
+from .guard import ToolGuard
 from .gui import gui_tools
 from .knowledge import AddKnowledgeTool, SearchKnowledgeTool, _SharedKB
+from .paging import OutputPager, ReadMoreTool
+from .selection import FindToolsTool, ToolSelector
 from .system import RunCommandTool, SystemInfoTool
 from .web import FetchUrlTool, WebSearchTool
 
-__all__ = ["Tool", "ToolError", "ToolRegistry", "default_registry"]
+__all__ = [
+    "CachePolicy",
+    "OutputPager",
+    "RegistryBuilder",
+    "Tool",
+    "ToolError",
+    "ToolGuard",
+    "ToolRegistry",
+    "ToolResultCache",
+    "ToolSelector",
+    "ToolUnavailable",
+    "default_registry",
+    "report_progress",
+]
 
 
 def default_registry(
@@ -39,61 +58,212 @@ def default_registry(
     model: str | None = None,
     memory: Any = None,
     delegate: bool = True,
+    cache: ToolResultCache | None = None,
+    pager: OutputPager | None = None,
+    selector: ToolSelector | None = None,
+    guard: ToolGuard | None = None,
 ) -> ToolRegistry:
     """Assemble the standard toolset. ``config.enabled_tools`` gates which are
     advertised to the model (``["*"]`` = all). GUI computer-use tools are added
     only when opted in *and* the active model is vision-capable. ``memory`` (a
     MemoryStore) is shared with the agent so injected facts and the remember tool
-    use the same store."""
-    kb = _SharedKB(config)  # one lazy knowledge base shared by both KB tools
-    tools: list[Tool] = [
-        CurrentTimeTool(),
-        ListModelsTool(provider),
-        SystemInfoTool(),
-        RunCommandTool(workspace, config.shell),
-        ReadFileTool(workspace),
-        WriteFileTool(workspace),
-        ListDirTool(workspace),
-        CreateDocumentTool(workspace),
-        WebSearchTool(),
-        FetchUrlTool(),
-        AddKnowledgeTool(kb),
-        SearchKnowledgeTool(kb),
-    ]
-    if config.memory.enabled:
-        from ..memory import MemoryStore
-        from .memory import memory_tools
-
-        store = memory if memory is not None else MemoryStore(config.memory.path)
-        tools += memory_tools(store)
-    # Atlassian tools appear only when their server is configured (env or
-    # config.local.json), so we don't advertise unusable tools to the model.
-    atl = config.atlassian
-    if jira_configured(atl):
-        tools += [JiraSearchTool(atl), JiraGetIssueTool(atl)]
-    if confluence_configured(atl):
-        tools += [ConfluenceSearchTool(atl), ConfluenceGetPageTool(atl)]
-
-    # Computer-use (opt-in, vision+tools models only — they must see screenshots).
-    if model and _gui_capable(provider, model):
-        if config.browser.enabled:  # hidden browser — preferred for web tasks
-            tools += browser_tools(_SharedBrowser(config.browser))
-        if config.gui.enabled:  # desktop GUI control
-            tools += gui_tools()
-
-    # MCP servers mounted as native tools (mechanic + drift by default — the
-    # shell's memory of the machine). Missing servers contribute nothing.
-    from ..mcp import mcp_tools
-
-    tools += mcp_tools(config)
-
-    # A helper agent the model can hand side quests to (its own clean context,
-    # fast model when routing is configured). Helpers don't get helpers.
-    if delegate:
-        from .delegate import DelegateTool
-
-        tools.append(DelegateTool(provider, config))
-    return ToolRegistry(tools, enabled=config.enabled_tools)
+    use the same store. Pass the previous registry's ``cache``, ``pager``,
+    ``selector`` and ``guard`` when rebuilding so cached results, paged-output
+    handles, tools found with find_tools and tripped breakers survive a model
+    switch — or, better, keep a ``RegistryBuilder`` and call its ``build`` again."""
+    builder = RegistryBuilder(provider, config, workspace, memory, delegate)
+    return builder.build(model, cache=cache, pager=pager, selector=selector, guard=guard)
+
+
+class RegistryBuilder:
+    """Builds registries for one provider/config/workspace, reusing tools across builds.
+
+    Tool instances are kept in groups, each keyed by the config it reads, and
+    only a group whose key changed is rebuilt, so a model switch or a
+    GUI/browser toggle keeps the shell session and browser holder. GUI gating
+    is cached per model. MCP clients cache their own tool definitions for the
+    life of the server process, so a server that failed discovery is still
+    retried on the next build.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        config: Config,
+        workspace: Path | str = ".",
+        memory: Any = None,
+        delegate: bool = True,
+    ):
+        self.provider = provider
+        self.config = config
+        self.workspace = workspace
+        self.memory = memory
+        self.delegate = delegate
+        self.cache: ToolResultCache | None = None
+        self.pager: OutputPager | None = None
+        self.selector: ToolSelector | None = None
+        self.guard: ToolGuard | None = None
+        self._groups: dict[str, tuple[Any, list[Tool]]] = {}  # name -> (key, tools)
+        self._gui_capable: dict[str, bool] = {}  # model -> vision+tools
+        self._lock = threading.Lock()  # delegate helpers may build concurrently
+
+    def build(
+        self,
+        model: str | None = None,
+        *,
+        cache: ToolResultCache | None = None,
+        pager: OutputPager | None = None,
+        selector: ToolSelector | None = None,
+        guard: ToolGuard | None = None,
+        isolated: bool = False,
+    ) -> ToolRegistry:
+        """A registry for ``model`` under the current config. ``cache``, ``pager``,
+        ``selector`` and ``guard`` replace the ones kept from earlier builds.
+
+        ``isolated`` is for one of several registries in use at once (a
+        delegate helper's): it gets its own ``run_command`` (so its own shell
+        session, cwd and env) and its own tool selector, and shares only the
+        stateless or thread-safe tools, the result cache and the breakers."""
+        with self._lock:
+            if guard is not None:
+                self.guard = guard
+            return self._build(model, cache, pager, selector, isolated)
+
+    def _group(self, name: str, key: Any, make: Callable[[], list[Tool]]) -> list[Tool]:
+        cached = self._groups.get(name)
+        if cached is None or cached[0] != key:
+            cached = self._groups[name] = (key, make())
+        return cached[1]
+
+    def _build(
+        self,
+        model: str | None,
+        cache: ToolResultCache | None,
+        pager: OutputPager | None,
+        selector: ToolSelector | None,
+        isolated: bool = False,
+    ) -> ToolRegistry:
+        config, provider, workspace = self.config, self.provider, self.workspace
+
+        def core() -> list[Tool]:
+            kb = _SharedKB(config)  # one lazy knowledge base shared by both KB tools
+            return [
+                CurrentTimeTool(),
+                ListModelsTool(provider),
+                SystemInfoTool(),
+                RunCommandTool(workspace, config.shell),
+                ReadFileTool(workspace),
+                WriteFileTool(workspace),
+                ListDirTool(workspace),
+                CreateDocumentTool(workspace),
+                WebSearchTool(),
+                FetchUrlTool(),
+                AddKnowledgeTool(kb),
+                SearchKnowledgeTool(kb),
+            ]
+
+        tools = list(
+            self._group(
+                "core",
+                (config.shell.model_dump_json(), config.knowledge.model_dump_json()),
+                core,
+            )
+        )
+        if isolated:  # a shell session is state: cwd, env, and a lock its runs queue on
+            tools = [
+                RunCommandTool(workspace, config.shell) if isinstance(t, RunCommandTool) else t
+                for t in tools
+            ]
+
+        def memory() -> list[Tool]:
+            from ..memory import MemoryStore
+            from .memory import memory_tools
+
+            store = self.memory if self.memory is not None else MemoryStore(config.memory.path)
+            return memory_tools(store)
+
+        if config.memory.enabled:
+            tools += self._group("memory", config.memory.path, memory)
+
+        # Atlassian tools appear only when their server is configured (env or
+        # config.local.json), so we don't advertise unusable tools to the model.
+        def atlassian() -> list[Tool]:
+            atl = config.atlassian
+            group: list[Tool] = []
+            if jira_configured(atl):
+                group += [JiraSearchTool(atl), JiraGetIssueTool(atl)]
+            if confluence_configured(atl):
+                group += [ConfluenceSearchTool(atl), ConfluenceGetPageTool(atl)]
+            return group
+
+        tools += self._group("atlassian", config.atlassian.model_dump_json(), atlassian)
+
+        # Computer-use (opt-in, vision+tools models only — they must see screenshots).
+        if model and (config.browser.enabled or config.gui.enabled):
+            if model not in self._gui_capable:
+                self._gui_capable[model] = _gui_capable(provider, model)
+            if self._gui_capable[model]:
+                if config.browser.enabled:  # hidden browser — preferred for web tasks
+                    tools += self._group(
+                        "browser",
+                        config.browser.model_dump_json(),
+                        lambda: browser_tools(_SharedBrowser(config.browser)),
+                    )
+                if config.gui.enabled:  # desktop GUI control
+                    tools += self._group("gui", None, gui_tools)
+
+        # MCP servers mounted as native tools (mechanic + drift by default — the
+        # shell's memory of the machine). Missing servers contribute nothing.
+        from ..mcp import mcp_tools
+
+        tools += mcp_tools(config)
+
+        # Helper agents the model can hand side quests to (their own clean context,
+        # fast model when routing is configured), one or several at once, sharing
+        # one helper registry. Helpers don't get helpers.
+        if self.delegate:
+
+            def delegates() -> list[Tool]:
+                from .delegate import DelegateManyTool, DelegateTool, _SharedHelpers
+
+                helpers = _SharedHelpers(provider, config)
+                return [
+                    DelegateTool(provider, config, helpers),
+                    DelegateManyTool(provider, config, helpers),
+                ]
+
+            tools += self._group("delegate", None, delegates)
+
+        if cache is not None:
+            self.cache = cache
+        elif self.cache is None and config.tool_cache.enabled:
+            tc = config.tool_cache
+            self.cache = ToolResultCache(tc.max_entries, tc.max_mb * 1024 * 1024)
+        if config.tool_output.paging:
+            self.pager = pager or self.pager or OutputPager()
+            tools.append(ReadMoreTool(self.pager))
+        sel = config.tool_selection
+        chosen: ToolSelector | None = None
+        if sel.enabled:
+            if isolated:
+                chosen = ToolSelector(sel.core, sel.top_k, sel.recent, sel.min_tools)
+            else:
+                self.selector = selector or self.selector
+                if self.selector is None:
+                    self.selector = ToolSelector(sel.core, sel.top_k, sel.recent, sel.min_tools)
+                chosen = self.selector
+            tools.append(FindToolsTool(chosen))
+        if self.guard is None:
+            self.guard = ToolGuard(config.tool_guard)
+        self.guard.config = config.tool_guard
+        return ToolRegistry(
+            tools,
+            enabled=config.enabled_tools,
+            cache=self.cache if config.tool_cache.enabled or cache is not None else None,
+            pager=self.pager if config.tool_output.paging else None,
+            selector=chosen,
+            guard=self.guard,
+        )
 
 
 def _gui_capable(provider: LLMProvider, model: str) -> bool:
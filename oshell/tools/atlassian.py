@@ -17,27 +17,34 @@ from ..integrations.atlassian import (
     ConfluenceClient,
     JiraClient,
 )
-from .base import Tool, ToolError
+from .base import Tool, ToolError, ToolUnavailable
+from .cache import CachePolicy
 
 _BODY_LIMIT = 4000
 
 
 def _guard(fn):
-    """Wrap a client call, mapping known failures to ToolError."""
+    """Wrap a client call, mapping known failures to ToolError (ToolUnavailable
+    when the server is down or unreachable)."""
     try:
         return fn()
     except AtlassianConfigError as exc:
         raise ToolError(f"Atlassian not configured: {exc}") from exc
     except requests.HTTPError as exc:
-        code = exc.response.status_code if exc.response is not None else "?"
-        raise ToolError(f"Atlassian API returned HTTP {code}") from exc
+        code = exc.response.status_code if exc.response is not None else 0
+        error = ToolUnavailable if code >= 500 else ToolError  # 4xx: a bad key or query
+        raise error(f"Atlassian API returned HTTP {code or '?'}") from exc
     except requests.RequestException as exc:
-        raise ToolError(f"could not reach Atlassian: {exc}") from exc
+        raise ToolUnavailable(f"could not reach Atlassian: {exc}") from exc
 
 
 class _AtlassianTool(Tool):
     """Base: holds the AtlassianConfig so clients resolve env-then-config."""
 
+    concurrency_safe = True  # all read-only REST lookups
+    deadline = 60.0
+    cache = CachePolicy(ttl=120)  # tickets and pages move, but not within a turn
+
     def __init__(self, cfg: AtlassianConfig | None = None):
         self._cfg = cfg
 
@@ -12,12 +12,26 @@ servers can be adapted into ``Tool`` instances without the agent loop caring.
 
 from __future__ import annotations
 
+import contextvars
+import inspect
 import json
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from contextvars import ContextVar
 from dataclasses import dataclass, field
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+from .. import cancellation
+from ..cancellation import Cancelled, CancelToken, run_cancellable
+from ..cancellation import use as use_cancel
 from ..providers.base import ToolCall
+from ..tracing import Span, span
+from .cache import FRESH_ARG, FRESH_SCHEMA, CachePolicy, ToolResultCache
+
+if TYPE_CHECKING:
+    from .guard import ToolGuard
+    from .paging import OutputPager
+    from .selection import ToolSelector
 
 
 @dataclass
@@ -33,6 +47,32 @@ class ToolResult:
     images: list[str] = field(default_factory=list)
 
 
+ProgressCallback = Callable[[str], None]
+
+# Where report_progress sends output; set by the registry around each run. A
+# context variable, so calls running side by side on the pool stay separate.
+_progress: ContextVar[ProgressCallback | None] = ContextVar("oshell_tool_progress", default=None)
+
+
+def report_progress(text: str) -> None:
+    """Push incremental output from inside ``Tool.run`` (e.g. a build log line).
+
+    A no-op when nobody is listening, so tools call it unconditionally.
+    """
+    sink = _progress.get()
+    if sink is not None and text:
+        sink(text)
+
+
+def _bad_arguments(tool: Tool, arguments: dict[str, Any]) -> bool:
+    """Whether ``arguments`` don't fit ``tool.run``'s signature (a model mistake)."""
+    try:
+        inspect.signature(tool.run).bind(**arguments)
+    except TypeError:
+        return True
+    return False
+
+
 class Tool(ABC):
     """A single capability the model may invoke."""
 
@@ -49,10 +89,31 @@ class Tool(ABC):
     # (e.g. shell execution), so the UI can flag them distinctly.
     sensitive: bool = False
 
+    # Set True for read-only tools with no shared mutable state (file reads,
+    # web fetches), so several calls in one round may run at the same time.
+    # Sensitive tools never do, whatever this says.
+    concurrency_safe: bool = False
+
+    # Opt in to the session result cache (see tools/cache.py). Ignored for
+    # sensitive tools.
+    cache: CachePolicy | None = None
+
+    # Seconds a call may run before the registry abandons it and tells the
+    # model it timed out (see tools/guard.py). Only for idempotent reads, which
+    # are safe to abandon and retry: an abandoned call keeps running, and a
+    # write the model retries while the first one may still land is worse
+    # than a slow turn. None = no deadline.
+    deadline: float | None = None
+
     @abstractmethod
     def run(self, **kwargs: Any) -> str:
         """Execute the tool and return a string result for the model to read."""
 
+    def cache_stamp(self, **kwargs: Any) -> Any:
+        """A value that changes when a cached result for these arguments goes
+        stale (e.g. a file's mtime). None = only the policy's TTL applies."""
+        return None
+
     def spec(self) -> dict[str, Any]:
         """The function-calling schema entry for this tool."""
         return {
@@ -69,12 +130,32 @@ class ToolError(Exception):
     """Raised inside a tool to signal a recoverable failure to the model."""
 
 
+class ToolUnavailable(ToolError):
+    """The tool's service is unreachable or failing, not the call's arguments.
+
+    Unlike a plain ``ToolError`` (a 404, a path that doesn't exist) this
+    counts against the tool's circuit breaker.
+    """
+
+
 class ToolRegistry:
     """Holds tools, advertises their specs, and dispatches calls."""
 
-    def __init__(self, tools: list[Tool] | None = None, enabled: list[str] | None = None):
+    def __init__(
+        self,
+        tools: list[Tool] | None = None,
+        enabled: list[str] | None = None,
+        cache: ToolResultCache | None = None,
+        pager: OutputPager | None = None,
+        selector: ToolSelector | None = None,
+        guard: ToolGuard | None = None,
+    ):
         self._tools: dict[str, Tool] = {}
         self._enabled = enabled or ["*"]
+        self.cache = cache  # session result cache; None = every call runs
+        self.pager = pager  # oversized-output store behind read_more; None = no paging
+        self.selector = selector  # per-round tool subset behind find_tools; None = all
+        self.guard = guard  # circuit breakers + deadline overrides; None = no breakers
         for t in tools or []:
             self.register(t)
 
@@ -89,30 +170,153 @@ class ToolRegistry:
     def active(self) -> list[Tool]:
         return [t for n, t in self._tools.items() if self._is_enabled(n)]
 
-    def specs(self) -> list[dict[str, Any]]:
-        """The ``tools`` array to hand the provider (empty if none active)."""
-        return [t.spec() for t in self.active()]
+    def offered(self, read_only: bool = False) -> list[Tool]:
+        """The active tools a turn may advertise: read-only mode hides sensitive ones.
+
+        A hidden tool can't be argued with, and the model won't burn rounds trying.
+        """
+        return [t for t in self.active() if not (read_only and t.sensitive)]
+
+    def specs(self, read_only: bool = False) -> list[dict[str, Any]]:
+        """The ``tools`` array to hand the provider (empty if none offered)."""
+        return [self._spec(t) for t in self.offered(read_only)]
+
+    def _cached(self, tool: Tool) -> bool:
+        return self.cache is not None and tool.cache is not None and not tool.sensitive
+
+    def _spec(self, tool: Tool) -> dict[str, Any]:
+        """``tool.spec()``, plus the reserved ``fresh`` flag when its results are cached."""
+        spec = tool.spec()
+        params = spec["function"]["parameters"]
+        props = params.get("properties") or {}
+        if not self._cached(tool) or FRESH_ARG in props:  # the tool's own argument wins
+            return spec
+        props = {**props, FRESH_ARG: FRESH_SCHEMA}
+        spec["function"]["parameters"] = {**params, "properties": props}
+        return spec
 
-    def dispatch_full(self, call: ToolCall) -> ToolResult:
+    def concurrency_safe(self, name: str) -> bool:
+        """Whether calls to ``name`` may run alongside other safe calls."""
+        tool = self._tools.get(name)
+        return (
+            tool is not None
+            and self._is_enabled(name)
+            and tool.concurrency_safe
+            and not tool.sensitive
+        )
+
+    def dispatch_full(
+        self,
+        call: ToolCall,
+        *,
+        fresh: bool = False,
+        progress: ProgressCallback | None = None,
+        cancel: CancelToken | None = None,
+    ) -> ToolResult:
         """Run a tool call and return its full result (text + any images).
 
         Failures are caught and returned as text so the model can recover rather
-        than the whole turn crashing.
+        than the whole turn crashing. Cacheable tools are answered from the
+        session cache when a valid entry exists; ``fresh`` (or the model
+        passing ``fresh: true``) skips the lookup (the new result still
+        replaces the cached one). ``progress`` receives
+        whatever the tool passes to ``report_progress`` while it runs.
+        ``cancel`` is the turn's token, which the tool reads with
+        ``cancellation.current()``. A tool that stops for it returns a
+        ``[cancelled]`` result. A call that outlives its deadline is
+        abandoned with an ``[error]``, and a tool whose breaker is open
+        fails fast without running (see tools/guard.py).
         """
+        with span(f"tool:{call.name}", cat="tool") as sp, use_cancel(cancel):
+            result = self._dispatch(call, fresh, progress, sp)
+            sp.set(bytes=len(result.text), images=len(result.images))
+            return result
+
+    def _dispatch(
+        self, call: ToolCall, fresh: bool, progress: ProgressCallback | None, sp: Span
+    ) -> ToolResult:
         tool = self._tools.get(call.name)
         if tool is None or not self._is_enabled(call.name):
             return ToolResult(f"[error] unknown or disabled tool: {call.name}")
+        if self.cache is None or tool.cache is None or tool.sensitive:
+            return self._run(tool, call, progress)
+        if FRESH_ARG in call.arguments and FRESH_ARG not in tool.parameters.get("properties", {}):
+            arguments = dict(call.arguments)
+            fresh = arguments.pop(FRESH_ARG) in (True, "true", 1) or fresh
+            call = ToolCall(name=call.name, arguments=arguments, id=call.id)
+        try:
+            stamp = tool.cache_stamp(**call.arguments)
+        except Exception:  # arguments the tool will reject anyway — don't cache
+            return self._run(tool, call, progress)
+        key = self.cache.key(call.name, call.arguments)
+        if not fresh:
+            hit = self.cache.get(call.name, key, tool.cache, stamp)
+            if hit is not None:
+                sp.set(cached=True)
+                return hit
+        result = self._run(tool, call, progress)
+        if not result.text.startswith(("[error]", "[cancelled]")):  # worth retrying
+            self.cache.put(key, result, stamp)
+        return result
+
+    def _run(
+        self, tool: Tool, call: ToolCall, progress: ProgressCallback | None = None
+    ) -> ToolResult:
+        """Run ``call`` against its deadline and through its circuit breaker."""
+        guard = self.guard
+        refusal = guard.refuse(call.name) if guard is not None else None
+        if refusal is not None:
+            return ToolResult(refusal)
+        deadline = guard.deadline(call.name, tool.deadline) if guard is not None else tool.deadline
+        if deadline is None:
+            result, fault = self._call(tool, call, progress)
+        else:
+            # On a helper thread, in a copy of this context (cancel token,
+            # trace span), abandoned if it outlives the deadline.
+            ctx = contextvars.copy_context()
+            try:
+                result, fault = run_cancellable(
+                    lambda: ctx.run(self._call, tool, call, progress),
+                    cancellation.current(),
+                    timeout=deadline,
+                )
+            except TimeoutError:
+                fault = f"timed out after {deadline:g}s"
+                result = ToolResult(f"[error] {call.name} {fault} and was abandoned")
+            except Cancelled:
+                result, fault = ToolResult(f"[cancelled] {call.name} was stopped by the user"), None
+        if guard is not None:
+            if result.text.startswith("[cancelled]"):
+                guard.release(call.name)  # says nothing about the tool's health
+            else:
+                guard.record(call.name, fault)
+        return result
+
+    @staticmethod
+    def _call(
+        tool: Tool, call: ToolCall, progress: ProgressCallback | None
+    ) -> tuple[ToolResult, str | None]:
+        """The result, and what went wrong if it counts against the tool's breaker."""
+        token = _progress.set(progress)
         try:
             result = tool.run(**call.arguments)
+        except ToolUnavailable as exc:
+            return ToolResult(f"[error] {exc}"), str(exc)
         except ToolError as exc:
-            return ToolResult(f"[error] {exc}")
+            # Bad arguments or a missing resource: the model's mistake, not the tool's.
+            return ToolResult(f"[error] {exc}"), None
+        except Cancelled:
+            return ToolResult(f"[cancelled] {call.name} was stopped by the user"), None
         except Exception as exc:  # defensive: never let a tool kill the loop
-            return ToolResult(f"[error] tool '{call.name}' failed: {exc}")
+            fault = None if _bad_arguments(tool, call.arguments) else f"crashed: {exc}"
+            return ToolResult(f"[error] tool '{call.name}' failed: {exc}"), fault
+        finally:
+            _progress.reset(token)
         if isinstance(result, ToolResult):
-            return result
+            return result, None
         if isinstance(result, str):
-            return ToolResult(result)
-        return ToolResult(json.dumps(result, default=str))
+            return ToolResult(result), None
+        return ToolResult(json.dumps(result, default=str)), None
 
     def dispatch(self, call: ToolCall) -> str:
         """Run a tool call, returning just its text (back-compat convenience)."""
@@ -13,7 +13,7 @@ from typing import Any
 
 from ..browser import BrowserController, BrowserUnavailable
 from ..config import BrowserConfig
-from .base import Tool, ToolError, ToolResult
+from .base import Tool, ToolError, ToolResult, ToolUnavailable
 
 
 def _int(v: Any, default: int = 0) -> int:
@@ -45,6 +45,7 @@ class _SharedBrowser:
 
 
 class _BrowserTool(Tool):
+    deadline = None  # every browser call carries browser.timeout already
     local_only = False  # drives a browser over the network
 
     def __init__(self, shared: _SharedBrowser):
@@ -57,7 +58,7 @@ class _BrowserTool(Tool):
         try:
             return fn()
         except BrowserUnavailable as exc:
-            raise ToolError(str(exc)) from exc
+            raise ToolUnavailable(str(exc)) from exc
 
 
 class BrowserOpenTool(_BrowserTool):
@@ -12,6 +12,7 @@ from typing import Any
 
 from ..providers.base import LLMProvider
 from .base import Tool, ToolError
+from .cache import CachePolicy
 
 _MAX_READ_BYTES = 200_000
 
@@ -19,6 +20,7 @@ _MAX_READ_BYTES = 200_000
 class CurrentTimeTool(Tool):
     name = "current_time"
     description = "Return the current local date and time (ISO 8601)."
+    concurrency_safe = True
     parameters = {"type": "object", "properties": {}}
 
     def run(self, **_: Any) -> str:
@@ -28,6 +30,7 @@ class CurrentTimeTool(Tool):
 class ListModelsTool(Tool):
     name = "list_models"
     description = "List the language models available on the configured backend."
+    deadline = 60.0
     parameters = {"type": "object", "properties": {}}
 
     def __init__(self, provider: LLMProvider):
@@ -55,6 +58,14 @@ class _PathTool(Tool):
             p = self.root / p
         return p.resolve()
 
+    def cache_stamp(self, path: str = ".", **_: Any) -> Any:
+        """The target's mtime and size: any edit, by any means, is a cache miss."""
+        try:
+            st = self._resolve(path).stat()
+        except (OSError, ValueError):
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
     def _display(self, target: Path) -> str:
         """Show a path relative to the working dir when it's under it, else absolute."""
         try:
@@ -65,25 +76,122 @@ class _PathTool(Tool):
 
 class ReadFileTool(_PathTool):
     name = "read_file"
-    description = "Read a UTF-8 text file and return its contents."
+    deadline = 60.0
+    description = (
+        "Read a UTF-8 text file and return its contents. For big files read a "
+        "part: start_line/end_line (1-based, inclusive) or offset/limit in bytes."
+    )
     local_only = True
+    concurrency_safe = True
+    cache = CachePolicy()  # validated by cache_stamp
     parameters = {
         "type": "object",
         "properties": {
             "path": {
                 "type": "string",
                 "description": "File path — absolute, ~, or relative to the working dir",
-            }
+            },
+            "start_line": {"type": "integer", "description": "First line to return (1-based)"},
+            "end_line": {"type": "integer", "description": "Last line to return (inclusive)"},
+            "offset": {"type": "integer", "description": "Byte offset to start reading at"},
+            "limit": {"type": "integer", "description": "Maximum bytes to read"},
         },
         "required": ["path"],
     }
 
-    def run(self, path: str = "", **_: Any) -> str:
+    def run(
+        self,
+        path: str = "",
+        start_line: Any = None,
+        end_line: Any = None,
+        offset: Any = None,
+        limit: Any = None,
+        **_: Any,
+    ) -> str:
         target = self._resolve(path)
         if not target.is_file():
             raise ToolError(f"no such file: {path}")
-        data = target.read_bytes()[:_MAX_READ_BYTES]
-        return data.decode("utf-8", errors="replace")
+        # Only the requested range is read — a line range or a byte window
+        # never pulls the whole file into memory.
+        if start_line is not None or end_line is not None:
+            return _read_lines(target, _int(start_line, 1), _int(end_line, 0))
+        start = max(_int(offset, 0), 0)
+        want = min(_int(limit, _MAX_READ_BYTES) or _MAX_READ_BYTES, _MAX_READ_BYTES)
+        with target.open("rb") as f:
+            f.seek(start)
+            data = f.read(want)
+        text = data.decode("utf-8", errors="replace")
+        size = target.stat().st_size
+        end = start + len(data)
+        if end < size:
+            text += _note(text, f"bytes {start}-{end} of {size}; pass offset={end} to read on")
+        return text
+
+
+def _int(value: Any, default: int) -> int:
+    """Models often send numbers as strings ("40"); coerce, else the default."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _read_lines(target: Path, first: int, last: int) -> str:
+    """Lines ``first``..``last`` (1-based, inclusive; ``last`` 0 = to the byte cap)."""
+    first = max(first, 1)
+    out: list[bytes] = []
+    used = 0
+    more = too_long = False
+    with target.open("rb") as f:
+        for _ in range(1, first):
+            if not _skip_line(f):
+                raise ToolError(f"{target.name} has fewer than {first} lines")
+        start = f.tell()
+        n = first
+        while not (last and n > last):
+            line = f.readline(_MAX_READ_BYTES - used + 1)
+            if not line:
+                break
+            if used + len(line) > _MAX_READ_BYTES:
+                more = True
+                too_long = not out
+                break
+            out.append(line)
+            used += len(line)
+            n += 1
+        else:
+            more = f.read(1) != b""
+    if too_long:
+        # Line ``first`` alone is over the cap: hand back its head and switch
+        # the model to byte windows, or it would re-ask for the same line.
+        text = line[:_MAX_READ_BYTES].decode("utf-8", errors="replace")
+        end = start + _MAX_READ_BYTES
+        return text + _note(
+            text,
+            f"line {first} is longer than {_MAX_READ_BYTES} bytes; "
+            f"pass offset={end} limit={_MAX_READ_BYTES} to read on",
+        )
+    if not out and not more and first > 1:
+        raise ToolError(f"{target.name} has fewer than {first} lines")
+    text = b"".join(out).decode("utf-8", errors="replace")
+    if more:
+        shown = first + len(out) - 1
+        text += _note(text, f"lines {first}-{shown}; pass start_line={shown + 1} to read on")
+    return text
+
+
+def _skip_line(f: Any) -> bool:
+    """Read past one line in cap-sized chunks; False when already at EOF."""
+    seen = False
+    while chunk := f.readline(_MAX_READ_BYTES):
+        seen = True
+        if chunk.endswith(b"\n"):
+            break
+    return seen
+
+
+def _note(text: str, note: str) -> str:
+    return ("" if text.endswith("\n") else "\n") + f"…[{note}]"
 
 
 class WriteFileTool(_PathTool):
@@ -112,7 +220,10 @@ class WriteFileTool(_PathTool):
 class ListDirTool(_PathTool):
     name = "list_dir"
     description = "List files and directories at a path (absolute, ~, or relative)."
+    deadline = 60.0
     local_only = True
+    concurrency_safe = True
+    cache = CachePolicy()  # a directory's mtime changes when entries come or go
     parameters = {
         "type": "object",
         "properties": {
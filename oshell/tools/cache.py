@@ -0,0 +1,128 @@
+"""Session-scoped cache of tool results.
+
+Models repeat themselves: the same ``read_file`` three rounds apart, the same
+``web_search`` after a compaction, ``system_info`` at the start of every task.
+Each repeat re-reads the disk, re-queries the network or re-asks an MCP
+server for an answer we already have. ``ToolRegistry.dispatch_full``
+consults this cache for tools that opt in with a ``CachePolicy``:
+
+- entries are keyed by tool name and arguments;
+- a ``ttl`` bounds how long network/MCP answers are trusted;
+- tools over files supply a validation stamp (``Tool.cache_stamp`` — the
+  file's mtime and size), so an edit made by any means is a miss, not a
+  stale read;
+- sensitive tools are never cached, whatever they declare;
+- errors are never stored, so a transient failure is retried;
+- a call may pass ``fresh: true`` (advertised on every cached tool's schema,
+  stripped before the tool runs) to skip the lookup when the model knows the
+  answer has changed, e.g. a page it just edited elsewhere.
+
+Memory is bounded by entry count and total result size, evicting the least
+recently used entry first. Per-tool hit/miss counters feed the Tools panel.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .base import ToolResult
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+FRESH_ARG = "fresh"  # reserved argument on cached tools: skip the cache for this call
+FRESH_SCHEMA = {
+    "type": "boolean",
+    "description": "Ignore any earlier result for these arguments and run again.",
+}
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How a tool's results may be reused within a session."""
+
+    ttl: float | None = None  # seconds a result stays valid; None = until its stamp changes
+
+
+@dataclass
+class CacheCounts:
+    hits: int = 0
+    misses: int = 0
+
+
+@dataclass
+class _Entry:
+    result: ToolResult
+    stamp: Any
+    stored: float
+    size: int
+
+
+class ToolResultCache:
+    """LRU of tool results, bounded by entries and bytes; safe across threads."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._counts: dict[str, CacheCounts] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str, arguments: dict[str, Any]) -> str:
+        return name + "\0" + json.dumps(arguments, sort_keys=True, default=str)
+
+    def get(self, name: str, key: str, policy: CachePolicy, stamp: Any) -> ToolResult | None:
+        """The cached result if still valid under ``policy`` and ``stamp``; counts it."""
+        with self._lock:
+            counts = self._counts.setdefault(name, CacheCounts())
+            entry = self._entries.get(key)
+            fresh = entry is not None and entry.stamp == stamp
+            if entry is not None and fresh and policy.ttl is not None:
+                fresh = time.monotonic() - entry.stored < policy.ttl
+            if entry is None or not fresh:
+                if entry is not None:
+                    self._drop(key)
+                counts.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            counts.hits += 1
+            return entry.result
+
+    def put(self, key: str, result: ToolResult, stamp: Any) -> None:
+        size = len(result.text) + sum(len(i) for i in result.images)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(result, stamp, time.monotonic(), size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def counts(self) -> dict[str, CacheCounts]:
+        """Per-tool hit/miss counters for this session (a snapshot)."""
+        with self._lock:
+            return {n: CacheCounts(c.hits, c.misses) for n, c in self._counts.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
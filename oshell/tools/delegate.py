@@ -6,21 +6,78 @@ output the main conversation never needs to see; the helper spends them in its
 own window and reports back one answer. Pairs with routing: the helper runs on
 the fast model when one is configured.
 
+``delegate_many`` fans a list of independent tasks out to helpers running side
+by side (``delegate_parallel`` at a time), so "check these five changelogs"
+takes about as long as the slowest one. Every helper shares the provider, and
+with it the HTTP transport, plus one ``RegistryBuilder``: tool setup and MCP
+discovery happen once, not per task, and the helpers share the result cache.
+Each task still gets its own shell session and tool selector (an isolated
+build), so one helper's ``cd`` or exported env never reaches another, and
+their commands don't queue on one shell.
+
 Safety: the helper gets no approver, so under ``approvals: ask`` its sensitive
 tools are denied — delegation never becomes a side door around a confirmation
-the user would otherwise have seen. It also has no delegate tool of its own
+the user would otherwise have seen. It also has no delegate tools of its own
 (no recursive fan-out).
 """
 
 from __future__ import annotations
 
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
+from .. import cancellation
 from ..config import Config
 from ..providers.base import LLMProvider
-from .base import Tool
+from .base import Tool, ToolRegistry, report_progress
 
 _MAX_REPLY = 8000
+_MAX_TASKS = 10
+
+
+class _SharedHelpers:
+    """The provider, config and lazily built registry every helper runs with."""
+
+    def __init__(self, provider: LLMProvider, config: Config):
+        from . import RegistryBuilder
+
+        self.provider = provider
+        self.config = config
+        self._builder = RegistryBuilder(provider, config, delegate=False)
+
+    def model(self) -> str:
+        return self.config.routing.fast_model or self.config.default_model
+
+    def registry(self, model: str) -> ToolRegistry:
+        """A registry for one helper task: shared tools are built once, the
+        stateful ones (shell, tool selector) afresh."""
+        return self._builder.build(model, isolated=True)
+
+    def ask(self, task: str) -> str:
+        """Run one helper on ``task`` to completion; its final answer or an error."""
+        from ..agent import Agent, TurnCancelled, TurnComplete
+        from .system import RunCommandTool
+
+        model = self.model()
+        registry = self.registry(model)
+        helper = Agent(self.provider, registry, self.config, model=model)
+        final = ""
+        try:
+            for event in helper.send(task, cancel=cancellation.current()):
+                if isinstance(event, TurnComplete):
+                    final = event.text
+                elif isinstance(event, TurnCancelled):
+                    return "[cancelled] the helper was stopped by the user"
+        finally:
+            for tool in registry.active():  # the task's own shell ends with it
+                if isinstance(tool, RunCommandTool):
+                    tool.close()
+        final = final.strip()
+        if not final:
+            return "[error] the helper returned nothing"
+        return final[:_MAX_REPLY]
 
 
 class DelegateTool(Tool):
@@ -33,6 +90,7 @@ class DelegateTool(Tool):
         "needs in the task."
     )
     local_only = True  # delegation itself; the helper's own tools are gated as usual
+    deadline = None  # a helper's turn runs as long as its tools do
     parameters = {
         "type": "object",
         "properties": {
@@ -44,26 +102,72 @@ class DelegateTool(Tool):
         "required": ["task"],
     }
 
-    def __init__(self, provider: LLMProvider, config: Config):
-        self._provider = provider
-        self._config = config
+    def __init__(
+        self, provider: LLMProvider, config: Config, shared: _SharedHelpers | None = None
+    ):
+        self._helpers = shared or _SharedHelpers(provider, config)
 
     def run(self, task: str = "", **_: Any) -> str:
         if not task.strip():
             return "[error] delegate needs a task"
-        from ..agent import Agent, TurnComplete
-        from . import default_registry
+        return self._helpers.ask(task)
+
 
-        model = self._config.routing.fast_model or self._config.default_model
-        registry = default_registry(
-            self._provider, self._config, model=model, delegate=False
+class DelegateManyTool(Tool):
+    name = "delegate_many"
+    description = (
+        "Run several independent, self-contained subtasks at once, each in its own "
+        "helper agent, and get every answer back keyed by task number. Use for "
+        "fan-out work like checking several libraries, sites or files. Each helper "
+        "sees only its own task — include everything it needs."
+    )
+    local_only = True
+    deadline = None
+    parameters = {
+        "type": "object",
+        "properties": {
+            "tasks": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": f"Up to {_MAX_TASKS} complete, self-contained instructions",
+            }
+        },
+        "required": ["tasks"],
+    }
+
+    def __init__(
+        self, provider: LLMProvider, config: Config, shared: _SharedHelpers | None = None
+    ):
+        self._helpers = shared or _SharedHelpers(provider, config)
+
+    def run(self, tasks: Any = None, **_: Any) -> str:
+        if isinstance(tasks, str):  # a lone task some models send unwrapped
+            tasks = [tasks]
+        tasks = [t for t in tasks or [] if isinstance(t, str) and t.strip()]
+        if not tasks:
+            return "[error] delegate_many needs a list of tasks"
+        if len(tasks) > _MAX_TASKS:
+            return f"[error] at most {_MAX_TASKS} tasks at once; got {len(tasks)}"
+        workers = max(1, min(self._helpers.config.delegate_parallel, len(tasks)))
+        done = [0]
+        lock = threading.Lock()
+
+        def one(task: str) -> str:
+            try:
+                answer = self._helpers.ask(task)
+            except Exception as exc:  # one failed helper mustn't sink the others
+                answer = f"[error] {exc}"
+            with lock:
+                done[0] += 1
+                report_progress(f"[{done[0]}/{len(tasks)} done] {task[:60]}\n")
+            return answer
+
+        # Each helper runs in a copy of this call's context, so it sees the
+        # turn's cancel token and reports progress into this tool call.
+        with ThreadPoolExecutor(workers, thread_name_prefix="oshell-delegate") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, one, t) for t in tasks]
+            answers = [f.result() for f in futures]
+        return "\n\n".join(
+            f"[{i}] {task.strip().splitlines()[0][:120]}\n{answer}"
+            for i, (task, answer) in enumerate(zip(tasks, answers, strict=True), 1)
         )
-        helper = Agent(self._provider, registry, self._config, model=model)
-        final = ""
-        for event in helper.send(task):
-            if isinstance(event, TurnComplete):
-                final = event.text
-        final = final.strip()
-        if not final:
-            return "[error] the helper returned nothing"
-        return final[:_MAX_REPLY]
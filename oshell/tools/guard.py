@@ -0,0 +1,99 @@
+"""Circuit breakers for tool calls, and per-tool deadline overrides.
+
+The registry runs each read-only call against ``Tool.deadline`` (overridable
+per tool in config); writes have none. The ``ToolGuard`` counts a tool's
+consecutive outages: missed deadlines, crashes and ``ToolUnavailable``. A
+plain ``ToolError`` is the model's mistake and doesn't count. After
+``failures`` in a row the breaker opens and calls fail fast until
+``cooldown`` passes; then one trial call is let through, and its outcome
+closes or re-opens the breaker.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from ..config import ToolGuardConfig
+
+
+@dataclass
+class Breaker:
+    """One tool's failure streak; ``opened`` is when it last tripped (0 = closed)."""
+
+    failures: int = 0
+    opened: float = 0.0
+    last_error: str = ""
+    trial: bool = False  # half-open, and the one trial call is running
+
+
+class ToolGuard:
+    """Breakers for a session's tools, keyed by name; shared across registry rebuilds."""
+
+    def __init__(
+        self,
+        config: ToolGuardConfig | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or ToolGuardConfig()  # read live: the TUI edits it in place
+        self._clock = clock
+        self._breakers: dict[str, Breaker] = {}
+        self._lock = threading.Lock()
+
+    def deadline(self, name: str, default: float | None) -> float | None:
+        """Seconds a call to ``name`` may run (None = no deadline)."""
+        seconds = self.config.deadlines.get(name, default)
+        return seconds if seconds else None
+
+    def refuse(self, name: str) -> str | None:
+        """Why a call to ``name`` must fail fast now, or None to let it run."""
+        with self._lock:
+            b = self._breakers.get(name)
+            if b is None or not b.opened:
+                return None
+            left = b.opened + self.config.cooldown - self._clock()
+            if left <= 0 and not b.trial:
+                b.trial = True  # half-open: this call is the trial
+                return None
+            wait = "until a trial call finishes" if left <= 0 else f"for another {left:.0f}s"
+            return (
+                f"[error] {name} is skipped {wait} after "
+                f"{b.failures} failures in a row (last: {b.last_error}). "
+                "Use another tool or tell the user it is unavailable."
+            )
+
+    def record(self, name: str, error: str | None) -> None:
+        """Count a finished call: ``error`` describes a failure, None a success."""
+        with self._lock:
+            if error is None:
+                self._breakers.pop(name, None)
+                return
+            b = self._breakers.setdefault(name, Breaker())
+            b.failures += 1
+            b.last_error = error[:80]
+            b.trial = False
+            if b.failures >= max(self.config.failures, 1):
+                b.opened = self._clock()  # (re)trip; a failed trial starts a new cool-down
+
+    def release(self, name: str) -> None:
+        """A call ended without a verdict (cancelled): a trial slot opens again."""
+        with self._lock:
+            b = self._breakers.get(name)
+            if b is not None:
+                b.trial = False
+
+    def states(self) -> dict[str, str]:
+        """A short state per tool with failures on record, for the Tools panel."""
+        now = self._clock()
+        out = {}
+        with self._lock:
+            for name, b in self._breakers.items():
+                if not b.opened:
+                    out[name] = f"{b.failures} failing"
+                elif (left := b.opened + self.config.cooldown - now) > 0:
+                    out[name] = f"open, {left:.0f}s"
+                else:
+                    out[name] = "trial running" if b.trial else "half-open"
+        return out
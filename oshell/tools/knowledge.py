@@ -34,6 +34,7 @@ class AddKnowledgeTool(Tool):
         "recall. Use to remember facts, notes, or snippets across the session."
     )
     local_only = True
+    deadline = None  # a write: abandoning it could store the text twice on retry
     parameters = {
         "type": "object",
         "properties": {
@@ -63,6 +64,7 @@ class SearchKnowledgeTool(Tool):
         "query. Returns the closest stored snippets. Use before answering from memory."
     )
     local_only = True
+    deadline = 300.0  # the first call loads the embedding model
     parameters = {
         "type": "object",
         "properties": {
@@ -43,6 +43,8 @@ class RecallTool(Tool):
     name = "recall"
     description = "Search your long-term memory for facts about the user matching a query."
     local_only = True
+    deadline = 60.0
+    concurrency_safe = True
     parameters = {
         "type": "object",
         "properties": {
@@ -0,0 +1,105 @@
+"""Paging for tool output that won't fit the context budget.
+
+The agent hands any result bigger than the context can spare to the
+``OutputPager``, which keeps the full text in memory, out of the transcript.
+The model gets the first page plus a handle, and ``read_more`` fetches later
+pages on demand. Pages break on line boundaries where possible. Only the most
+recent outputs are kept (LRU); an expired handle says so rather than guessing.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from .base import Tool, ToolError
+
+DEFAULT_MAX_OUTPUTS = 32  # stored outputs before the oldest is forgotten
+
+
+def split_pages(text: str, page_chars: int) -> list[str]:
+    """Cut ``text`` into pages of at most ``page_chars``, preferring line breaks."""
+    page_chars = max(page_chars, 1)
+    pages: list[str] = []
+    start = 0
+    while start < len(text):
+        end = min(start + page_chars, len(text))
+        if end < len(text):
+            newline = text.rfind("\n", start, end)
+            if newline > start + page_chars // 2:  # don't make a tiny page for it
+                end = newline + 1
+        pages.append(text[start:end])
+        start = end
+    return pages or [""]
+
+
+class OutputPager:
+    """Holds oversized tool outputs and serves them a page at a time."""
+
+    def __init__(self, max_outputs: int = DEFAULT_MAX_OUTPUTS):
+        self.max_outputs = max_outputs
+        self._outputs: OrderedDict[str, list[str]] = OrderedDict()
+        self._next = 1
+        self._lock = threading.Lock()
+
+    def page(self, tool: str, text: str, page_chars: int) -> str:
+        """``text`` if it fits in one page, else page 1 plus how to read on."""
+        pages = split_pages(text, page_chars)
+        if len(pages) == 1:
+            return text
+        with self._lock:
+            handle = f"{tool}-{self._next}"
+            self._next += 1
+            self._outputs[handle] = pages
+            while len(self._outputs) > self.max_outputs:
+                self._outputs.popitem(last=False)
+        return _framed(handle, 1, pages)
+
+    def get(self, handle: str, page: int) -> str:
+        with self._lock:
+            pages = self._outputs.get(handle)
+            if pages is not None:
+                self._outputs.move_to_end(handle)
+        if pages is None:
+            raise ToolError(f"no stored output '{handle}' (expired or never existed)")
+        if not 1 <= page <= len(pages):
+            raise ToolError(f"'{handle}' has pages 1-{len(pages)}")
+        return _framed(handle, page, pages)
+
+
+def _framed(handle: str, page: int, pages: list[str]) -> str:
+    body = pages[page - 1].rstrip("\n")
+    if page < len(pages):
+        more = f'call read_more(handle="{handle}", page={page + 1}) for the next page'
+    else:
+        more = "end of output"
+    return f"{body}\n…[page {page}/{len(pages)} of {handle}; {more}]"
+
+
+class ReadMoreTool(Tool):
+    name = "read_more"
+    description = (
+        "Read another page of a tool output that was too large to show at once. "
+        "Use the handle and page number given at the end of the truncated output."
+    )
+    local_only = True
+    concurrency_safe = True
+    parameters = {
+        "type": "object",
+        "properties": {
+            "handle": {"type": "string", "description": "The output handle, e.g. read_file-3"},
+            "page": {"type": "integer", "description": "Page number (2 is the first unseen)"},
+        },
+        "required": ["handle", "page"],
+    }
+
+    def __init__(self, pager: OutputPager):
+        self.pager = pager
+
+    def run(self, handle: str = "", page: Any = 2, **_: Any) -> str:
+        try:
+            page = int(page)
+        except (TypeError, ValueError):
+            raise ToolError("page must be a number") from None
+        return self.pager.get(handle.strip(), page)
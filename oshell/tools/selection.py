@@ -0,0 +1,265 @@
+"""Per-turn tool selection: advertise the tools a turn needs, not all of them.
+
+The ``ToolSelector`` ranks tools against the user's message with a BM25 index
+over their names, descriptions and parameters. Each turn offers the ``core``
+set, the tools called most recently, the ``top_k`` best matches, and whatever
+the model pulled in with ``find_tools``, the meta-tool that searches the same
+index. The choice is made once per turn and only grows by appending, so the
+tool schemas leading the prompt stay stable for the backend's KV cache.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from .base import Tool, ToolError
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from get how i in is it me my of on or "
+    "please show that the this to use what when with you your".split()
+)
+_NAME_WEIGHT = 3  # a word in the tool's name counts as much as three in its description
+_K1, _B = 1.2, 0.75  # the usual BM25 constants
+
+
+def terms(text: str) -> list[str]:
+    """Lower-cased index terms: words split on ``_`` and punctuation, crudely
+    stemmed so "files"/"file" and "searching"/"search" meet."""
+    out = []
+    for word in _WORD.findall(text.lower()):
+        if word in _STOPWORDS or len(word) < 2:
+            continue
+        if word.endswith("ing") and len(word) >= 6:
+            word = word[:-3]
+        elif word.endswith(("ches", "shes", "sses", "xes")):
+            word = word[:-2]
+        elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+            word = word[:-1]
+        out.append(word)
+    return out
+
+
+def _spec_name(spec: dict[str, Any]) -> str:
+    return spec.get("function", {}).get("name", "")
+
+
+def _spec_text(spec: dict[str, Any]) -> list[str]:
+    fn = spec.get("function", {})
+    words = terms(fn.get("name", "")) * _NAME_WEIGHT + terms(fn.get("description", ""))
+    for pname, prop in (fn.get("parameters", {}).get("properties") or {}).items():
+        words += terms(pname)
+        if isinstance(prop, dict):
+            words += terms(str(prop.get("description", "")))
+    return words
+
+
+class ToolIndex:
+    """BM25 over tool specs."""
+
+    def __init__(self, specs: list[dict[str, Any]]):
+        self.names = [_spec_name(s) for s in specs]
+        self._docs = [Counter(_spec_text(s)) for s in specs]
+        self._lengths = [sum(d.values()) for d in self._docs]
+        self._avg = sum(self._lengths) / max(len(self._docs), 1) or 1.0
+        df: Counter[str] = Counter()
+        for d in self._docs:
+            df.update(d.keys())
+        n = len(self._docs)
+        self._idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def search(self, query: str, k: int | None = None) -> list[tuple[str, float]]:
+        """(name, score) of tools matching ``query``, best first; zero scores dropped."""
+        q = set(terms(query))
+        scored = []
+        for name, doc, length in zip(self.names, self._docs, self._lengths, strict=True):
+            score = 0.0
+            for t in q & doc.keys():
+                tf = doc[t]
+                score += self._idf[t] * tf * (_K1 + 1) / (
+                    tf + _K1 * (1 - _B + _B * length / self._avg)
+                )
+            if score > 0:
+                scored.append((name, score))
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored[:k] if k is not None else scored
+
+
+@dataclass
+class Selection:
+    """What one round advertised, and what leaving the rest out saved."""
+
+    advertised: list[str]
+    available: int  # tools the turn could have advertised
+    tokens: int  # estimated prompt tokens of the advertised schemas
+    tokens_all: int  # ...and of every available schema
+
+    @property
+    def saved(self) -> int:
+        return max(self.tokens_all - self.tokens, 0)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.advertised)} of {self.available} tool schemas sent, "
+            f"~{self.saved:,} prompt tokens saved"
+        )
+
+
+class ToolSelector:
+    """Chooses each turn's tools; shared by the agent loop and ``find_tools``."""
+
+    def __init__(
+        self,
+        core: Iterable[str] = (),
+        top_k: int = 6,
+        recent: int = 4,
+        min_tools: int = 14,
+        max_pulled: int = 8,
+    ):
+        self.core = set(core) | {FindToolsTool.name}
+        self.top_k = top_k
+        self.recent = recent
+        self.min_tools = min_tools
+        self.max_pulled = max_pulled
+        self.last: Selection | None = None
+        self.saved_total = 0  # estimated prompt tokens not sent, over the session
+        self._pulled: OrderedDict[str, None] = OrderedDict()  # find_tools results, LRU
+        self._index: ToolIndex | None = None
+        self._index_key: tuple[str, ...] = ()
+        self._specs: dict[str, dict[str, Any]] = {}
+        self._tokens_all: int | None = None  # of every spec in the index
+        self._lock = threading.Lock()
+
+    def active(self, names: Iterable[str]) -> bool:
+        """Whether a turn offering the tools ``names`` is worth trimming.
+
+        ``select`` and the system prompt both ask this of the same set, so the
+        prompt says "use find_tools" exactly when schemas are left out.
+        ``find_tools`` itself doesn't count: it is only offered to serve trimming.
+        """
+        return sum(n != FindToolsTool.name for n in names) >= self.min_tools
+
+    def select(
+        self, specs: list[dict[str, Any]], query: str, recent: Iterable[str] = ()
+    ) -> list[dict[str, Any]]:
+        """The subset of ``specs`` to advertise this turn, in their given order."""
+        from ..agent.ledger import estimate_tools  # agent imports tools; not at load
+
+        index = self._index_for(specs)
+        if not self.active(_spec_name(s) for s in specs):
+            self.last = None
+            return [s for s in specs if _spec_name(s) != FindToolsTool.name]
+        keep = set(self.core)
+        keep.update(list(dict.fromkeys(recent))[: self.recent])
+        with self._lock:
+            keep.update(self._pulled)
+        keep.update(name for name, _ in index.search(query, self.top_k))
+        chosen = [s for s in specs if _spec_name(s) in keep]
+        with self._lock:
+            if self._tokens_all is None:
+                self._tokens_all = estimate_tools(specs)
+            tokens_all = self._tokens_all
+        self.last = Selection(
+            advertised=[_spec_name(s) for s in chosen],
+            available=len(specs),
+            tokens=estimate_tools(chosen),
+            tokens_all=tokens_all,
+        )
+        self.saved_total += self.last.saved
+        return chosen
+
+    def extend(
+        self, chosen: list[dict[str, Any]], specs: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """The tools for a later round of the turn ``select`` chose ``chosen`` for.
+
+        That is ``chosen`` plus the tools pulled in since, appended in the order
+        found: what was already offered keeps its place, so a round's tools
+        differ from the last round's only by what ``find_tools`` added at the end.
+        """
+        if self.last is None:  # nothing was left out
+            return chosen
+        with self._lock:
+            pulled = list(self._pulled)
+        have = {_spec_name(s) for s in chosen}
+        by_name = {_spec_name(s): s for s in specs}
+        extra = [by_name[n] for n in pulled if n not in have and n in by_name]
+        if extra:
+            from ..agent.ledger import estimate_tools
+
+            chosen = chosen + extra
+            self.last = Selection(
+                advertised=[_spec_name(s) for s in chosen],
+                available=self.last.available,
+                tokens=estimate_tools(chosen),
+                tokens_all=self.last.tokens_all,
+            )
+        self.saved_total += self.last.saved  # every round leaves the rest out again
+        return chosen
+
+    def find(self, query: str, k: int = 5) -> list[str]:
+        """Search the current tool set, and advertise the hits from the next round on
+        (see ``extend``)."""
+        with self._lock:
+            index = self._index
+        if index is None:
+            return []
+        hits = [name for name, _ in index.search(query, k) if name != FindToolsTool.name]
+        with self._lock:
+            for name in hits:
+                self._pulled[name] = None
+                self._pulled.move_to_end(name)
+            while len(self._pulled) > self.max_pulled:
+                self._pulled.popitem(last=False)
+        return hits
+
+    def _index_for(self, specs: list[dict[str, Any]]) -> ToolIndex:
+        key = tuple(_spec_name(s) for s in specs)
+        with self._lock:
+            if self._index is None or key != self._index_key:
+                self._index, self._index_key = ToolIndex(specs), key
+                self._specs = {_spec_name(s): s for s in specs}
+                self._tokens_all = None
+            return self._index
+
+    def describe(self, name: str) -> str:
+        """The description of a tool in the current set ('' if unknown)."""
+        with self._lock:
+            spec = self._specs.get(name)
+        return spec.get("function", {}).get("description", "") if spec else ""
+
+
+class FindToolsTool(Tool):
+    name = "find_tools"
+    description = (
+        "Find more tools. Only some of your tools are loaded; describe what you need "
+        "to do (e.g. 'jira issue', 'click in the browser', 'machine baseline') and the "
+        "matching tools become callable from your next step."
+    )
+    local_only = True
+    concurrency_safe = True
+    parameters = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "What you need a tool for"},
+        },
+        "required": ["query"],
+    }
+
+    def __init__(self, selector: ToolSelector):
+        self.selector = selector
+
+    def run(self, query: str = "", **_: Any) -> str:
+        if not query.strip():
+            raise ToolError("query must not be empty")
+        hits = self.selector.find(query)
+        if not hits:
+            return f"no tools match '{query}'"
+        lines = [f"- {name}: {self.selector.describe(name)}" for name in hits]
+        return "Now available (call them directly):\n" + "\n".join(lines)
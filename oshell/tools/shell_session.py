@@ -20,8 +20,11 @@ import shutil
 import subprocess
 import threading
 import uuid
+from collections.abc import Callable
 from pathlib import Path
 
+from ..cancellation import Cancelled, CancelToken
+
 
 class ShellSession:
     """One persistent shell. ``run`` is serialized by an internal lock.
@@ -105,9 +108,19 @@ class ShellSession:
             return False
 
     # ── running commands ──────────────────────────────────────────────────────
-    def run(self, command: str, timeout: float) -> tuple[str, int | None]:
+    def run(
+        self,
+        command: str,
+        timeout: float,
+        on_output: Callable[[str], None] | None = None,
+        cancel: CancelToken | None = None,
+    ) -> tuple[str, int | None]:
         """Run ``command``; return (output, exit_code). On timeout the session is
-        torn down (a hung command can't be isolated) and TimeoutError is raised."""
+        torn down (a hung command can't be isolated) and TimeoutError is raised.
+
+        ``on_output`` sees each line (newline included) as it arrives. When
+        ``cancel`` fires the session is torn down the same way, stopping the
+        command, and ``Cancelled`` is raised."""
         import time
 
         with self._lock:
@@ -124,23 +137,34 @@ class ShellSession:
             out: list[str] = []
             exit_code: int | None = None
             deadline = time.monotonic() + timeout
-            while True:
-                remaining = deadline - time.monotonic()
-                if remaining <= 0:
-                    self._terminate()  # hold the lock — don't call close()
-                    raise TimeoutError(f"command timed out after {timeout:g}s")
-                try:
-                    line = self._queue.get(timeout=min(remaining, 0.5))
-                except queue.Empty:
-                    continue
-                if line is None:  # shell died
-                    self._proc = None
-                    break
-                if sentinel in line:
-                    exit_code = _parse_exit(line, sentinel)
-                    break
-                if line.strip():  # skip blank prompt lines (PowerShell)
-                    out.append(line)
+            # A blank line wakes the read below (blank lines are skipped anyway).
+            unregister = cancel.on_cancel(lambda: self._queue.put("")) if cancel else None
+            try:
+                while True:
+                    if cancel is not None and cancel.cancelled:
+                        self._terminate()  # the only sure way to stop the command
+                        raise Cancelled("command cancelled by the user")
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._terminate()  # hold the lock — don't call close()
+                        raise TimeoutError(f"command timed out after {timeout:g}s")
+                    try:
+                        line = self._queue.get(timeout=min(remaining, 0.5))
+                    except queue.Empty:
+                        continue
+                    if line is None:  # shell died
+                        self._proc = None
+                        break
+                    if sentinel in line:
+                        exit_code = _parse_exit(line, sentinel)
+                        break
+                    if line.strip():  # skip blank prompt lines (PowerShell)
+                        out.append(line)
+                        if on_output is not None:
+                            on_output(line + "\n")
+            finally:
+                if unregister is not None:
+                    unregister()
             return "\n".join(out), exit_code
 
 
@@ -13,15 +13,24 @@ only the standard library — handy for "what hardware am I on?" without a shell
 
 from __future__ import annotations
 
+import contextvars
+import functools
 import os
 import platform
 import shutil
+import signal
 import subprocess
+import sys
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
+from .. import cancellation
+from ..cancellation import Cancelled
 from ..config import ShellConfig
-from .base import Tool, ToolError
+from .base import Tool, ToolError, report_progress
+from .cache import CachePolicy
 
 
 def shell_invocation(
@@ -49,6 +58,7 @@ def shell_invocation(
 
 class RunCommandTool(Tool):
     name = "run_command"
+    deadline = None  # enforces shell.timeout itself, killing the command
     description = (
         "Run a shell command on the local machine and return its combined "
         "stdout/stderr and exit code. Use for system inspection (e.g. sysctl, "
@@ -85,7 +95,9 @@ class RunCommandTool(Tool):
         session = self._get_session()
         if session is not None:
             try:
-                out, code = session.run(command, secs)
+                out, code = session.run(
+                    command, secs, on_output=report_progress, cancel=cancellation.current()
+                )
             except TimeoutError:
                 raise ToolError(f"command timed out after {secs:g}s: {command}") from None
         else:
@@ -98,6 +110,12 @@ class RunCommandTool(Tool):
         code_str = "?" if code is None else code
         return f"$ {command}\n[exit {code_str}]\n{body}"
 
+    def close(self) -> None:
+        """End the persistent shell, if one was started."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
     def _get_session(self):
         """Return a healthy persistent ShellSession, or None to use one-shot.
 
@@ -121,19 +139,74 @@ class RunCommandTool(Tool):
     def _run_oneshot(self, command: str, secs: float) -> tuple[str, int | None]:
         args, use_shell = shell_invocation(command, windows_shell=self.config.windows_shell)
         try:
-            proc = subprocess.run(
+            proc = subprocess.Popen(
                 args,
                 shell=use_shell,  # PowerShell argv on Windows; sh on macOS/Linux
                 cwd=self.workspace,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
-                timeout=secs,
+                # Own process group, so a kill reaches everything the shell spawned.
+                **_new_group(),
             )
-        except subprocess.TimeoutExpired:
-            raise ToolError(f"command timed out after {secs:g}s: {command}") from None
         except Exception as exc:  # pragma: no cover - spawn failures are rare
             raise ToolError(f"could not run command: {exc}") from exc
-        return (proc.stdout or "") + (proc.stderr or ""), proc.returncode
+        # Stream lines as they come (progress for long builds) on a reader
+        # thread, so the deadline below holds even while output is silent.
+        out: list[str] = []
+
+        def drain() -> None:
+            assert proc.stdout is not None
+            for line in proc.stdout:
+                out.append(line)
+                report_progress(line)
+
+        # copy_context: the reader reports to the same listener as this call.
+        ctx = contextvars.copy_context()
+        reader = threading.Thread(target=ctx.run, args=(drain,), daemon=True)
+        reader.start()
+        cancel = cancellation.current()
+        kill = functools.partial(_kill_group, proc)
+        unregister = cancel.on_cancel(kill) if cancel is not None else None
+        start = time.monotonic()
+        try:
+            try:
+                code = proc.wait(timeout=secs)
+            except subprocess.TimeoutExpired:
+                kill()
+                proc.wait()
+                raise ToolError(f"command timed out after {secs:g}s: {command}") from None
+            # The command has exited; wait for the pipe to drain so the tail of
+            # its output isn't lost — but only for what's left of the deadline:
+            # a backgrounded child (``server &``) can hold the pipe open forever.
+            reader.join(max(0.0, secs - (time.monotonic() - start)))
+            if reader.is_alive():
+                kill()
+                raise ToolError(f"command timed out after {secs:g}s: {command}")
+        finally:
+            if unregister is not None:
+                unregister()
+        if cancel is not None and cancel.cancelled:
+            raise Cancelled("command cancelled by the user")
+        return "".join(out), code
+
+
+def _new_group() -> dict[str, Any]:
+    """``Popen`` kwargs that start the command in its own process group."""
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _kill_group(proc: subprocess.Popen) -> None:
+    """Kill ``proc`` and, on POSIX, every process in its group (its children)."""
+    if sys.platform != "win32":
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+            return
+        except (ProcessLookupError, PermissionError):
+            pass  # already gone, or the group was reaped; fall back below
+    proc.kill()
 
 
 class SystemInfoTool(Tool):
@@ -143,6 +216,9 @@ class SystemInfoTool(Tool):
         "RAM, and Python version. Read-only; no shell needed."
     )
     local_only = True
+    deadline = 60.0
+    concurrency_safe = True
+    cache = CachePolicy()  # the machine doesn't change mid-session
     parameters = {"type": "object", "properties": {}}
 
     def run(self, **_: Any) -> str:
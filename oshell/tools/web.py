@@ -22,23 +22,29 @@ from typing import Any
 
 import requests
 
-from .base import Tool, ToolError
+from .base import Tool, ToolError, ToolUnavailable
+from .cache import CachePolicy
 
 # A browser-ish UA; some sites 403 the default python-requests agent.
 _UA = "Mozilla/5.0 (compatible; OllamaShell/0.2; +local-first-agent)"
-_DEFAULT_MAX_CHARS = 6000
+# A hard cap, not a page size: text past the context budget is paged by the
+# agent (read_more), or cut to that budget when paging is off.
+_DEFAULT_MAX_CHARS = 40_000
 # Tags whose text is noise for an LLM reader.
 _STRIP_TAGS = ("script", "style", "noscript", "header", "footer", "nav", "aside", "form")
 
 
 class WebSearchTool(Tool):
     name = "web_search"
+    deadline = 30.0  # the search backend has no timeout of its own
     description = (
         "Search the public web (DuckDuckGo) and return the top result titles, "
         "URLs, and snippets. Use for current events or facts not in the model. "
         "Follow up with fetch_url to read a result in full."
     )
     local_only = False  # reaches the network — surfaced in the privacy banner
+    concurrency_safe = True
+    cache = CachePolicy(ttl=600)
     parameters = {
         "type": "object",
         "properties": {
@@ -68,7 +74,7 @@ class WebSearchTool(Tool):
             with DDGS() as ddgs:
                 results = list(ddgs.text(query, max_results=int(max_results)))
         except Exception as exc:  # network hiccup, rate limit, backend change
-            raise ToolError(f"web search failed: {exc}") from exc
+            raise ToolUnavailable(f"web search failed: {exc}") from exc
         if not results:
             return "(no results)"
         return "\n\n".join(
@@ -83,6 +89,9 @@ class FetchUrlTool(Tool):
         "(scripts, nav, and styling stripped). Use after web_search to read a page."
     )
     local_only = False
+    concurrency_safe = True
+    cache = CachePolicy(ttl=300)
+    deadline = 60.0
     parameters = {
         "type": "object",
         "properties": {
@@ -119,6 +128,8 @@ class FetchUrlTool(Tool):
             resp = requests.get(url, headers={"User-Agent": _UA}, timeout=self.timeout)
             resp.raise_for_status()
         except requests.RequestException as exc:
+            # A dead link or a down host says nothing about other URLs, so
+            # per-URL failures never count against fetch_url's breaker.
             raise ToolError(f"could not fetch {url}: {exc}") from exc
 
         return extract_readable(resp.text, url, max_chars, BeautifulSoup)
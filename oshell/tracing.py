@@ -0,0 +1,250 @@
+"""Per-turn tracing: where did a slow turn spend its time?
+
+A turn is prefill and decode on the backend, tool bodies, approval waits,
+checkpoint snapshots, compaction and MCP round trips — and the spinner looks
+the same for all of them. ``span()`` marks those regions; the agent loop,
+the tool registry, the compactor and the MCP client wrap their work in
+spans carrying attributes (model, token counts, bytes).
+
+Tracing is off unless a ``Tracer`` is started (``--trace FILE`` on
+``chat``/``ask``/``tui``); until then ``span()`` hands back a shared no-op,
+so the instrumented paths cost an attribute lookup. The trace is written as
+Chrome trace-event JSON — open it in ``chrome://tracing`` or Perfetto — or
+as one JSON event per line when FILE ends in ``.jsonl``.
+``summarize()`` (``oshell trace summarize``) folds any number of traces into
+the top time sinks, by self time, so nested spans aren't counted twice.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+class Span:
+    """An open span; ``set`` adds attributes learned while it runs."""
+
+    __slots__ = ("attrs",)
+
+    def __init__(self, attrs: dict[str, Any]):
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class _NullSpan(Span):
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        super().__init__({})
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+class _NoopContext:
+    __slots__ = ()
+
+    def __enter__(self) -> Span:
+        return _NULL_SPAN
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+_NOOP = _NoopContext()
+
+
+class _SpanContext:
+    __slots__ = ("_tracer", "_name", "_cat", "_span", "_start")
+
+    def __init__(self, tracer: Tracer, name: str, cat: str, attrs: dict[str, Any]):
+        self._tracer = tracer
+        self._name = name
+        self._cat = cat
+        self._span = Span(attrs)
+
+    def __enter__(self) -> Span:
+        self._start = time.perf_counter_ns()
+        return self._span
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is not None and exc_type is not GeneratorExit:
+            self._span.attrs["error"] = exc_type.__name__
+        self._tracer.record(
+            self._name, self._cat, self._start, time.perf_counter_ns(), self._span.attrs
+        )
+
+
+class Tracer:
+    """Collects finished spans from any thread and writes them out."""
+
+    def __init__(self) -> None:
+        self._t0 = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._events: list[dict[str, Any]] = []
+        self._threads: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, name: str, cat: str, start_ns: int, end_ns: int, attrs: dict[str, Any]
+    ) -> None:
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start_ns - self._t0) / 1000,  # trace-event times are microseconds
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": self._pid,
+            "tid": thread.ident,
+            "args": attrs,
+        }
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(thread.ident or 0, thread.name)
+
+    def events(self) -> list[dict[str, Any]]:
+        """The spans, plus thread-name metadata so viewers label the rows."""
+        with self._lock:
+            spans = sorted(self._events, key=lambda e: e["ts"])
+            threads = list(self._threads.items())
+        names = [
+            {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": n}}
+            for tid, n in threads
+        ]
+        return names + spans
+
+    def write(self, path: str | Path) -> Path:
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        events = self.events()
+        if path.suffix == ".jsonl":
+            text = "".join(json.dumps(e, default=str) + "\n" for e in events)
+        else:
+            text = json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
+        path.write_text(text, encoding="utf-8")
+        return path
+
+
+_active: Tracer | None = None
+_path: Path | None = None
+
+
+def span(name: str, cat: str = "oshell", **attrs: Any) -> _SpanContext | _NoopContext:
+    """``with span("tool:read_file", bytes=n) as s: ...`` — free when tracing is off."""
+    tracer = _active
+    if tracer is None:
+        return _NOOP
+    return _SpanContext(tracer, name, cat, attrs)
+
+
+def start(path: str | Path | None = None) -> Tracer:
+    """Begin tracing this process; with ``path``, the trace is written at exit."""
+    global _active, _path
+    _active = Tracer()
+    _path = Path(path).expanduser() if path else None
+    if _path is not None:
+        atexit.register(stop)
+    return _active
+
+
+def stop() -> Tracer | None:
+    """Stop tracing, writing the trace if ``start`` was given a path."""
+    global _active, _path
+    tracer, path = _active, _path
+    _active, _path = None, None
+    if tracer is not None and path is not None:
+        try:
+            tracer.write(path)
+        except OSError:  # pragma: no cover - unwritable path; tracing is best-effort
+            pass
+    return tracer
+
+
+def active() -> Tracer | None:
+    return _active
+
+
+# ── summarizing traces ───────────────────────────────────────────────────────
+@dataclass
+class SpanStat:
+    name: str
+    count: int = 0
+    total_ms: float = 0.0
+    self_ms: float = 0.0  # total minus time in child spans on the same thread
+    max_ms: float = 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+def load_events(path: str | Path) -> list[dict[str, Any]]:
+    """The complete ("X") events of a trace written as JSON or JSONL."""
+    text = Path(path).expanduser().read_text(encoding="utf-8")
+    if str(path).endswith(".jsonl"):
+        events = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        data = json.loads(text)
+        events = data.get("traceEvents", []) if isinstance(data, dict) else data
+    return [e for e in events if isinstance(e, dict) and e.get("ph") == "X"]
+
+
+def trace_files(paths: Iterable[str | Path]) -> list[Path]:
+    """Expand directories to the traces inside them."""
+    out: list[Path] = []
+    for raw in paths:
+        p = Path(raw).expanduser()
+        if p.is_dir():
+            out += sorted(f for f in p.iterdir() if f.suffix in (".json", ".jsonl"))
+        else:
+            out.append(p)
+    return out
+
+
+def summarize(paths: Iterable[str | Path]) -> list[SpanStat]:
+    """Per-span-name totals across every trace, biggest self time first."""
+    stats: dict[str, SpanStat] = {}
+    for path in trace_files(paths):
+        by_thread: dict[tuple[Any, Any], list[dict[str, Any]]] = {}
+        for e in load_events(path):
+            by_thread.setdefault((e.get("pid"), e.get("tid")), []).append(e)
+        for events in by_thread.values():
+            _fold_thread(events, stats)
+    return sorted(stats.values(), key=lambda s: s.self_ms, reverse=True)
+
+
+def _fold_thread(events: list[dict[str, Any]], stats: dict[str, SpanStat]) -> None:
+    # Spans on one thread nest; a span's children are those that start
+    # inside it. Walk in start order with a stack of open spans.
+    events.sort(key=lambda e: (e["ts"], -e["dur"]))
+    stack: list[tuple[float, SpanStat, list[float]]] = []  # (end, stat, [child time])
+    for e in events:
+        ts, dur = float(e["ts"]), float(e["dur"])
+        while stack and ts >= stack[-1][0]:
+            _close(stack.pop())
+        if stack:
+            stack[-1][2][0] += dur
+        stat = stats.setdefault(e["name"], SpanStat(e["name"]))
+        stat.count += 1
+        stat.total_ms += dur / 1000
+        stat.max_ms = max(stat.max_ms, dur / 1000)
+        stack.append((ts + dur, stat, [0.0]))
+        stat.self_ms += dur / 1000
+    while stack:
+        _close(stack.pop())
+
+
+def _close(entry: tuple[float, SpanStat, list[float]]) -> None:
+    _, stat, children = entry
+    stat.self_ms -= children[0] / 1000
@@ -44,14 +44,19 @@ from ..agent import (
     LimitReached,
     TextDelta,
     ToolFinished,
+    ToolProgress,
     ToolStarted,
+    TurnCancelled,
     TurnComplete,
+    Usage,
 )
+from ..agent.loop import is_context_note
+from ..cancellation import CancelToken
 from ..capabilities import optional_features
 from ..config import Config
 from ..linkify import linkify_urls
-from ..providers import get_provider
-from ..tools import default_registry
+from ..providers import ResidencyManager, TokenUsage, get_provider
+from ..tools import RegistryBuilder
 from .menu import (
     INSTALLABLE_FEATURES,
     AttachImageScreen,
@@ -68,6 +73,10 @@ from .menu import (
 # Matches fenced code blocks in the model's reply (for "copy last code block").
 _CODE_FENCE_RE = re.compile(r"```[^\n]*\n(.*?)```", re.S)
 
+# Lines of a running tool's output written to the Activity tab per progress
+# event; the full output still arrives with the result.
+_PROGRESS_LINES = 20
+
 
 class ChatInput(Input):
     """A single-line Input that diverts *multi-line* pastes to the app.
@@ -196,6 +205,13 @@ def _context_fill(agent: Agent) -> float:
     return agent.context_fill()
 
 
+def _rate(usage: list[TokenUsage], tokens: str, seconds: str) -> float | None:
+    """Tokens per second summed over a turn's rounds, or None if unreported."""
+    n = sum(getattr(u, tokens) or 0 for u in usage if getattr(u, seconds))
+    secs = sum(getattr(u, seconds) or 0.0 for u in usage if getattr(u, tokens))
+    return n / secs if n and secs > 0 else None
+
+
 def _fmt_tokens(n: int) -> str:
     """32768 -> '32k'; keeps small numbers literal."""
     return f"{n // 1024}k" if n >= 4096 and n % 1024 == 0 else str(n)
@@ -224,6 +240,8 @@ class ToolsPanel(Static):
 
     Tools the model has actually reached for this session glow — bold name plus
     a dim ×N count — so the panel reads as an instrument, not a static list.
+    Cacheable tools also show ``↺hits/lookups`` against the session cache,
+    and failing tools their circuit-breaker state (``open, 42s``).
     The rendered text is also kept on ``self.text`` so it can be inspected
     without reaching into Textual's lazily-realized render internals.
     """
@@ -232,6 +250,10 @@ class ToolsPanel(Static):
 
     def render_for(self, agent: Agent, counts: dict[str, int] | None = None) -> None:
         counts = counts or {}
+        cache = agent.registry.cache
+        cached = cache.counts() if cache is not None else {}
+        guard = agent.registry.guard
+        breakers = guard.states() if guard is not None else {}
         body = Text()
         plain: list[str] = ["Active tools"]
         body.append("Active tools", style="bold")
@@ -252,7 +274,24 @@ class ToolsPanel(Static):
             if n:
                 body.append(f" ×{n}", style="dim")
                 line += f" ×{n}"
+            c = cached.get(t.name)
+            if c is not None and c.hits:
+                hits = f" ↺{c.hits}/{c.hits + c.misses}"
+                body.append(hits, style="green")
+                line += hits
+            if t.name in breakers:  # failing, or tripped and failing fast
+                state = f" ({breakers[t.name]})"
+                body.append(state, style="red")
+                line += state
             plain.append(line)
+        selector = agent.registry.selector
+        if agent.tool_selection is not None and selector is not None:
+            # Tool selection at work: what the last round sent, what it saved.
+            note = f"Last round: {agent.tool_selection.summary()}"
+            if selector.saved_total:
+                note += f" ({selector.saved_total:,} this session)"
+            body.append(f"\n  {note}", style="dim")
+            plain.append(f"  {note}")
         body.append("\n\n")
         body.append("Optional features", style="bold")
         plain += ["", "Optional features"]
@@ -316,8 +355,9 @@ class OllamaShellTUI(App):
     """
     # Esc is the primary menu key — F-keys are unreliable on macOS (the OS grabs
     # them). F2 / Ctrl+O are kept as hidden alternates for other platforms.
+    # While a turn runs, Esc stops it instead.
     BINDINGS = [
-        Binding("escape", "open_menu", "Menu"),
+        Binding("escape", "escape", "Menu"),
         Binding("ctrl+t", "show_tools", "Tools"),
         Binding("ctrl+y", "copy_reply", "Copy reply"),
         Binding("ctrl+b", "copy_code", "Copy code"),
@@ -326,9 +366,20 @@ class OllamaShellTUI(App):
         Binding("ctrl+o", "open_menu", "Menu", show=False),
     ]
 
-    def __init__(self, agent: Agent, show_clock: bool = True, show_menu_on_start: bool = True):
+    def __init__(
+        self,
+        agent: Agent,
+        show_clock: bool = True,
+        show_menu_on_start: bool = True,
+        registry_builder: RegistryBuilder | None = None,
+    ):
         super().__init__()
         self.agent = agent
+        # Rebuilds the registry on a model switch or a GUI/browser toggle,
+        # reusing every tool the change didn't touch.
+        self._registry_builder = registry_builder or RegistryBuilder(
+            agent.provider, agent.config, memory=agent.memory
+        )
         # The header clock is live (changes every second); tests/snapshots turn
         # it off so renders are deterministic.
         self._show_clock = show_clock
@@ -337,6 +388,7 @@ class OllamaShellTUI(App):
         # Live-region state (read by the spinner timer on the UI thread, written
         # by the turn worker thread — plain attribute assignments are atomic).
         self._busy = False
+        self._cancel: CancelToken | None = None  # the running agent turn's
         self._status = "Thinking"  # what the model is doing right now
         self._stream = ""  # assistant text as it streams in this round
         self._spin = 0
@@ -508,6 +560,8 @@ class OllamaShellTUI(App):
         convo = self._conversation()
         convo.write(f"[dim]— resumed {len(prior)} earlier messages —[/dim]")
         for m in prior:
+            if is_context_note(m):
+                continue
             if m.role == "user":
                 convo.write(f"[bold green]›[/] {escape(m.content)}")
             elif m.role == "assistant" and m.content:
@@ -612,11 +666,31 @@ class OllamaShellTUI(App):
             pass  # widget gone (app is shutting down) — the spinner timer can race teardown
 
     # ── turn vitals ───────────────────────────────────────────────────────────
-    def _turn_stats(self, t0: float, first_delta: float | None, n_deltas: int) -> str:
-        """A dim one-liner under each reply: elapsed · ~tok/s · context fill."""
+    def _turn_stats(
+        self,
+        t0: float,
+        first_delta: float | None,
+        n_deltas: int,
+        usage: list[TokenUsage] | None = None,
+    ) -> str:
+        """A dim one-liner under each reply: elapsed · tok/s · context fill.
+
+        Rates come from the backend's own counters when it reported them
+        (decode and prefill separately, plus model load time when a cold
+        load cost something); otherwise ~tok/s is estimated from deltas.
+        """
         now = time.monotonic()
         parts = [f"⏱ {now - t0:.1f}s"]
-        if first_delta is not None and n_deltas >= 5 and now - first_delta > 0.2:
+        decode = _rate(usage or [], "completion_tokens", "completion_seconds")
+        if decode is not None:
+            parts.append(f"{decode:.0f} tok/s")
+            prefill = _rate(usage or [], "prompt_tokens", "prompt_seconds")
+            if prefill is not None:
+                parts.append(f"prefill {prefill:.0f} tok/s")
+            load = sum(u.load_seconds or 0.0 for u in usage or [])
+            if load >= 0.5:
+                parts.append(f"load {load:.1f}s")
+        elif first_delta is not None and n_deltas >= 5 and now - first_delta > 0.2:
             parts.append(f"~{n_deltas / (now - first_delta):.0f} tok/s")
         parts.append(f"ctx {_context_fill(self.agent):.0%}")
         return " · ".join(parts)
@@ -646,7 +720,7 @@ class OllamaShellTUI(App):
     def _transcript(self) -> str:
         lines = []
         for m in self.agent.messages:
-            if m.role == "user":
+            if m.role == "user" and not is_context_note(m):
                 lines.append(f"> {m.content}")
             elif m.role == "assistant" and m.content:
                 lines.append(m.content)
@@ -716,6 +790,16 @@ class OllamaShellTUI(App):
         )
 
     # ── menu ─────────────────────────────────────────────────────────────────
+    def action_escape(self) -> None:
+        """Stop the running turn; when nothing is running, open the menu."""
+        cancel = self._cancel
+        if cancel is None:
+            self.action_open_menu()
+        elif not cancel.cancelled:
+            cancel.cancel()
+            self._status = "Stopping"
+            self._stream = ""
+
     def action_open_menu(self) -> None:
         self.push_screen(
             MenuScreen(effects=self.agent.config.fun.effects), self._on_menu_choice
@@ -954,8 +1038,12 @@ class OllamaShellTUI(App):
 
     def _rebuild_registry(self) -> None:
         """Rebuild tools for the current model/config and tell the model about them."""
-        self.agent.registry = default_registry(
-            self.agent.provider, self.agent.config, model=self.agent.model, memory=self.agent.memory
+        self.agent.registry = self._registry_builder.build(
+            self.agent.model,
+            cache=self.agent.registry.cache,
+            pager=self.agent.registry.pager,
+            selector=self.agent.registry.selector,
+            guard=self.agent.registry.guard,
         )
         self.agent.rebuild_system_prompt()
         self.query_one(ToolsPanel).render_for(self.agent, self._tool_counts)
@@ -1259,6 +1347,7 @@ class OllamaShellTUI(App):
             modes = ("auto", "ask", "read-only")
             if arg in modes:
                 self.agent.config.approvals = arg
+                self.agent.rebuild_system_prompt()  # read-only offers fewer tools to select from
                 from ..config import update_local_config
 
                 try:
@@ -1455,7 +1544,9 @@ class OllamaShellTUI(App):
         """Switch models for this message when routing says so (visible note)."""
         from ..routing import pick_model
 
-        routed = pick_model(text, has_images, self.agent.config.routing, self.agent.model)
+        rcfg = self.agent.config.routing
+        resident = self.agent.resident_models() if rcfg.enabled else None
+        routed = pick_model(text, has_images, rcfg, self.agent.model, resident)
         if routed:
             self.agent.model = routed[0]
             self._rebuild_registry()  # vision/GUI tools are capability-gated per model
@@ -1473,24 +1564,33 @@ class OllamaShellTUI(App):
         self._stream = ""
         self._status = "Thinking"
         self._busy = True
-        self.run_worker(lambda: self._worker(text, images or []), thread=True, exclusive=True)
+        cancel = self._cancel = CancelToken()
+        self.run_worker(
+            lambda: self._worker(text, images or [], cancel), thread=True, exclusive=True
+        )
 
-    def _worker(self, text: str, images: list[str] | None = None) -> None:
+    def _worker(
+        self, text: str, images: list[str] | None = None, cancel: CancelToken | None = None
+    ) -> None:
         convo, activity = self._conversation(), self._activity()
         used_gui = False  # did this turn drive the desktop GUI?
         used_memory = False  # did this turn change long-term memory?
         # Turn vitals: elapsed time and a streaming-rate estimate. Ollama sends
         # roughly one token per streamed chunk, so the delta count ≈ tokens.
+        # Backends that report usage (Usage events) replace the estimate.
         t0 = time.monotonic()
         first_delta: float | None = None
         n_deltas = 0
+        usage: list[TokenUsage] = []
         try:
-            for event in self.agent.send(text, images=images):
+            for event in self.agent.send(text, images=images, cancel=cancel):
                 if isinstance(event, TextDelta):
                     if first_delta is None:
                         first_delta = time.monotonic()
                     n_deltas += 1
                     self._stream += event.text  # the spinner timer renders this live
+                elif isinstance(event, Usage):
+                    usage.append(event.stats)
                 elif isinstance(event, Compacted):
                     self.call_from_thread(
                         self.notify,
@@ -1500,7 +1600,8 @@ class OllamaShellTUI(App):
                     self.call_from_thread(
                         activity.write,
                         f"[dim]✂ auto-compact: {event.dropped} messages → "
-                        f"{event.summary_chars}-char summary[/dim]",
+                        f"{event.summary_chars}-char summary"
+                        f"{' (prepared between turns)' if event.background else ''}[/dim]",
                     )
                 elif isinstance(event, ToolStarted):
                     if event.name == "screenshot" or event.name.startswith("gui_"):
@@ -1521,6 +1622,14 @@ class OllamaShellTUI(App):
                         )
                     act = f"[dim]⚙ {event.name}({event.arguments})[/dim]"
                     self.call_from_thread(activity.write, act)
+                elif isinstance(event, ToolProgress):
+                    # A long tool is alive: its newest line rides the live bar,
+                    # the output itself streams into the Activity tab.
+                    lines = [ln for ln in event.text.splitlines() if ln.strip()]
+                    if lines:
+                        self._status = f"{event.name}: {lines[-1].strip()[:70]}"
+                        tail = "\n".join(f"  │ {ln}" for ln in lines[-_PROGRESS_LINES:])
+                        self.call_from_thread(activity.write, f"[dim]{escape(tail)}[/dim]")
                 elif isinstance(event, ToolFinished):
                     self._status = "Thinking"
                     self._tool_counts[event.name] += 1  # heat for the Tools panel
@@ -1542,8 +1651,16 @@ class OllamaShellTUI(App):
                         self.call_from_thread(self._write_reply, event.text)
                     else:
                         self.call_from_thread(convo.write, "[dim](no text)[/dim]")
-                    stats = self._turn_stats(t0, first_delta, n_deltas)
+                    stats = self._turn_stats(t0, first_delta, n_deltas, usage)
                     self.call_from_thread(convo.write, f"[dim]   {stats}[/dim]")
+                elif isinstance(event, TurnCancelled):
+                    if event.text:  # keep what was said before the stop
+                        self._last_reply = event.text
+                        self.call_from_thread(self._write_reply, event.text)
+                    stats = self._turn_stats(t0, first_delta, n_deltas, usage)
+                    self.call_from_thread(
+                        convo.write, f"[yellow]⏹ stopped[/yellow] [dim]· {stats}[/dim]"
+                    )
                 elif isinstance(event, LimitReached):
                     if self.agent.config.fun.effects:  # sparks scatter in the strip
                         self._burst = time.monotonic()
@@ -1557,6 +1674,7 @@ class OllamaShellTUI(App):
         finally:
             # Stop the indicator and refresh the context view (guard teardown race).
             self._busy = False
+            self._cancel = None
             self._stream = ""
             self._idle_since = time.monotonic()  # fireflies count from the turn's end
             if used_memory:
@@ -1715,6 +1833,17 @@ def run_tui(model: str | None = None) -> None:
     provider = get_provider(config)
     m = model or config.default_model
     memory = MemoryStore(config.memory.path)
-    registry = default_registry(provider, config, model=m, memory=memory)
-    agent = Agent(provider, registry, config, model=m, memory=memory)
-    OllamaShellTUI(agent).run()
+    builder = RegistryBuilder(provider, config, memory=memory)
+    registry = builder.build(m)
+    residency = ResidencyManager.for_provider(provider, config.residency)
+    agent = Agent(
+        provider,
+        registry,
+        config,
+        model=m,
+        memory=memory,
+        residency=residency,
+        background_compaction=True,
+    )
+    agent.warm_up()
+    OllamaShellTUI(agent, registry_builder=builder).run()
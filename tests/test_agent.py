@@ -2,13 +2,26 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from collections.abc import Iterator
 from typing import Any
 
-from oshell.agent import Agent, TextDelta, ToolFinished, ToolStarted, TurnComplete
+import pytest
+
+from oshell.agent import (
+    Agent,
+    TextDelta,
+    ToolFinished,
+    ToolProgress,
+    ToolStarted,
+    TurnComplete,
+    Usage,
+)
 from oshell.config import Config
-from oshell.providers.base import ChatChunk, LLMProvider, Message, ToolCall
+from oshell.providers.base import ChatChunk, LLMProvider, Message, TokenUsage, ToolCall
 from oshell.tools import ToolRegistry
+from oshell.tools.base import Tool, report_progress
 from oshell.tools.builtins import CurrentTimeTool
 
 
@@ -61,6 +74,155 @@ def test_tool_call_round_trip():
     assert any(m.role == "tool" for m in agent.messages)
 
 
+class _MeteredProvider(ScriptedProvider):
+    """Reports a prompt size of twice the ledger's raw estimate — a tokenizer
+    that splits finer than chars/4 — like Ollama's prompt_eval_count."""
+
+    def chat(self, messages: list[Message], **kwargs: Any) -> Iterator[ChatChunk]:
+        from oshell.agent.ledger import estimate_message, estimate_tools
+
+        raw = sum(estimate_message(m) for m in messages) + estimate_tools(kwargs.get("tools"))
+        self.usage = TokenUsage(prompt_tokens=2 * raw, completion_tokens=5)
+        yield ChatChunk(content="Hi there", done=True, usage=self.usage)
+
+
+def test_backend_usage_becomes_event_and_calibrates_context_fill():
+    provider = _MeteredProvider([])
+    agent = Agent(provider, ToolRegistry([CurrentTimeTool()]), Config(context_length=8192))
+    guessed = agent.context_fill()
+    events = list(agent.send("hi"))
+    reported = [e for e in events if isinstance(e, Usage)]
+    assert [(e.model, e.stats) for e in reported] == [(agent.model, provider.usage)]
+    assert agent.last_usage is provider.usage
+    assert agent.ledger.scale(agent.model) == pytest.approx(2.0)
+    # Calibrated: the gauge now reads about twice the uncalibrated guess.
+    assert agent.context_fill() >= 1.9 * guessed
+
+
+class _SlowRead(Tool):
+    """A concurrency-safe tool that takes a while and records overlap."""
+
+    name = "slow_read"
+    description = "read slowly"
+    concurrency_safe = True
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def run(self, key: str = "", **_: Any) -> str:
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.2 if key != "a" else 0.3)  # the first call finishes last
+        with self.lock:
+            self.active -= 1
+        return f"read {key}"
+
+
+class _Mutate(_SlowRead):
+    name = "mutate"
+    sensitive = True  # never batched, whatever concurrency_safe says
+
+
+def _fan_out_agent(calls, **config):
+    script = [[ChatChunk(tool_calls=calls, done=True)], [ChatChunk(content="ok", done=True)]]
+    slow, mutate = _SlowRead(), _Mutate()
+    agent = Agent(ScriptedProvider(script), ToolRegistry([slow, mutate]), Config(**config))
+    return agent, slow, mutate
+
+
+def test_safe_tool_calls_in_one_round_run_concurrently():
+    calls = [ToolCall(name="slow_read", arguments={"key": k}, id=k) for k in "abc"]
+    agent, slow, _ = _fan_out_agent(calls)
+    t0 = time.monotonic()
+    events = list(agent.send("read three things"))
+    assert time.monotonic() - t0 < 0.55  # ~ the slowest call, not the sum (0.7s)
+    assert slow.peak == 3
+    # Events per call and tool messages stay in the order the model asked.
+    assert [e.result for e in events if isinstance(e, ToolFinished)] == [
+        "read a",
+        "read b",
+        "read c",
+    ]
+    assert [m.tool_call_id for m in agent.messages if m.role == "tool"] == ["a", "b", "c"]
+    assert len([e for e in events if isinstance(e, ToolStarted)]) == 3
+
+
+def test_unsafe_calls_split_batches_and_serial_mode_is_respected():
+    calls = [
+        ToolCall(name="slow_read", arguments={"key": "a"}),
+        ToolCall(name="mutate", arguments={}),
+        ToolCall(name="slow_read", arguments={"key": "b"}),
+    ]
+    agent, _, _ = _fan_out_agent(calls)
+    assert [len(b) for b in agent._tool_batches(calls)] == [1, 1, 1]
+    agent, slow, _ = _fan_out_agent(calls[:1] + calls[2:], parallel_tools=1)
+    list(agent.send("go"))
+    assert slow.peak == 1
+
+
+class _Build(Tool):
+    """Reports output while it runs: a burst of chatty lines, then a pause."""
+
+    name = "build"
+    description = "build the project"
+
+    def run(self, **_: Any) -> str:
+        for step in range(3):
+            for i in range(200):
+                report_progress(f"[{step}] compiling unit {i}\n")
+            time.sleep(0.06)
+        return "built"
+
+
+def test_tool_progress_streams_between_start_and_finish_rate_limited():
+    script = [
+        [ChatChunk(tool_calls=[ToolCall(name="build", arguments={})], done=True)],
+        [ChatChunk(content="done", done=True)],
+    ]
+    reg = ToolRegistry([_Build()])
+    agent = Agent(ScriptedProvider(script), reg, Config(tool_progress_interval=0.02))
+    events = list(agent.send("build it"))
+    kinds = [type(e).__name__ for e in events]
+    progress = [e for e in events if isinstance(e, ToolProgress)]
+    assert kinds.index("ToolStarted") < kinds.index("ToolProgress") < kinds.index("ToolFinished")
+    assert 2 <= len(progress) <= 10  # 600 reports, batched into a few events
+    assert progress[-1].name == "build" and "[2] compiling unit 199" in progress[-1].text
+
+
+class _TaggedBuild(Tool):
+    """A parallel-safe build that reports its own ``tag`` while it runs."""
+
+    name = "tagged_build"
+    description = "build one target"
+    concurrency_safe = True
+    parameters = {"type": "object", "properties": {"tag": {"type": "string"}}}
+
+    def run(self, tag: str = "", **_: Any) -> str:
+        for _ in range(3):
+            report_progress(f"{tag}\n")
+            time.sleep(0.05)
+        return tag
+
+
+def test_parallel_progress_carries_the_calls_index():
+    calls = [ToolCall(name="tagged_build", arguments={"tag": t}) for t in ("first", "second")]
+    script = [[ChatChunk(tool_calls=calls, done=True)], [ChatChunk(content="done", done=True)]]
+    reg = ToolRegistry([_TaggedBuild()])
+    agent = Agent(ScriptedProvider(script), reg, Config(tool_progress_interval=0.02))
+    events = list(agent.send("build both"))
+    started = {e.index: e.arguments["tag"] for e in events if isinstance(e, ToolStarted)}
+    assert started == {0: "first", 1: "second"}
+    progress = [e for e in events if isinstance(e, ToolProgress)]
+    assert {e.index for e in progress} == {0, 1}
+    for e in progress:
+        assert set(e.text.split()) == {started[e.index]}
+    finished = {e.index: e.result for e in events if isinstance(e, ToolFinished)}
+    assert finished == started
+
+
 def test_iteration_cap():
     from oshell.agent import LimitReached
 
@@ -291,3 +453,52 @@ def test_send_passes_num_ctx_to_provider():
     agent = Agent(provider, ToolRegistry([]), Config())
     list(agent.send("hello"))
     assert provider.seen_num_ctx == [16384]
+
+
+class _RecordingProvider(ScriptedProvider):
+    """Scripted provider that also keeps each request's wire messages."""
+
+    def __init__(self, script):
+        super().__init__(script)
+        self.requests: list[list[dict]] = []
+
+    def chat(self, messages, **kwargs):
+        self.requests.append([m.to_wire() for m in messages])
+        yield from super().chat(messages, **kwargs)
+
+
+def test_prompt_prefix_stable_across_turns(tmp_path):
+    from oshell.memory import MemoryStore
+
+    memory = MemoryStore(tmp_path / "memory.json")
+    memory.add("prefers tabs")
+    provider = _RecordingProvider([[ChatChunk(content=f"reply {i}", done=True)] for i in range(3)])
+    agent = Agent(provider, ToolRegistry([CurrentTimeTool()]), Config(), memory=memory)
+
+    list(agent.send("first"))
+    memory.add("uses fish shell")  # a mid-session memory change...
+    agent.rebuild_system_prompt()
+    list(agent.send("second"))
+    list(agent.send("third"))
+
+    # ...never rewrites anything already sent: each request extends the last.
+    for earlier, later in zip(provider.requests, provider.requests[1:], strict=False):
+        assert later[: len(earlier)] == earlier
+    notes = [m["content"] for m in provider.requests[-1] if m["content"].startswith("[Session")]
+    assert len(notes) == 2
+    assert notes[0].startswith("[Session context v1]") and "fish" not in notes[0]
+    assert notes[1].startswith("[Session context v2]") and "fish" in notes[1]
+    assert "prefers tabs" not in provider.requests[0][0]["content"]
+
+
+def test_unchanged_context_note_is_sent_once(tmp_path):
+    from oshell.memory import MemoryStore
+
+    memory = MemoryStore(tmp_path / "memory.json")
+    memory.add("prefers tabs")
+    provider = ScriptedProvider([[ChatChunk(content="ok", done=True)]] * 2)
+    agent = Agent(provider, ToolRegistry([CurrentTimeTool()]), Config(), memory=memory)
+    list(agent.send("one"))
+    agent.rebuild_system_prompt()  # nothing changed -> same version, no new note
+    list(agent.send("two"))
+    assert sum(m.content.startswith("[Session context") for m in agent.messages) == 1
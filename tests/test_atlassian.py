@@ -32,13 +32,18 @@ class _FakeResp:
         return self._payload
 
 
-def _patch_get(monkeypatch, resp):
-    """Stub the single requests.get used by the Atlassian endpoint."""
+def _patch_http_get(monkeypatch, fake):
+    """Stub the pooled transport's GET (the only verb the endpoint uses)."""
     monkeypatch.setattr(
-        "oshell.integrations.atlassian.requests.get", lambda *a, **k: resp
+        "oshell.providers.transport.HTTPTransport.get", lambda self, *a, **k: fake(*a, **k)
     )
 
 
+def _patch_get(monkeypatch, resp):
+    """Every Atlassian GET returns ``resp``."""
+    _patch_http_get(monkeypatch, lambda *a, **k: resp)
+
+
 def test_auth_header_pat_is_bearer():
     h = _auth_header("pat", None, "tok123")
     assert h["Authorization"] == "Bearer tok123"
@@ -102,7 +107,7 @@ def test_from_env_accepts_token_alias(monkeypatch):
         captured["auth"] = headers["Authorization"]
         return _FakeResp({"issues": []})
 
-    monkeypatch.setattr("oshell.integrations.atlassian.requests.get", _capture)
+    _patch_http_get(monkeypatch, _capture)
     JiraClient.from_env().search("ORDER BY created DESC", 1)
     assert captured["auth"] == "Bearer alias-tok"
 
@@ -121,7 +126,7 @@ def test_resolve_falls_back_to_config(monkeypatch):
         captured["auth"] = headers["Authorization"]
         return _FakeResp({"issues": []})
 
-    monkeypatch.setattr("oshell.integrations.atlassian.requests.get", _capture)
+    _patch_http_get(monkeypatch, _capture)
     JiraClient.resolve(cfg).search("ORDER BY created DESC", 1)
     assert captured["url"].startswith("https://jira.cfg")
     assert captured["auth"] == "Bearer cfgtok"
@@ -139,7 +144,7 @@ def test_env_wins_over_config(monkeypatch):
         captured["url"] = url
         return _FakeResp({"issues": []})
 
-    monkeypatch.setattr("oshell.integrations.atlassian.requests.get", _capture)
+    _patch_http_get(monkeypatch, _capture)
     JiraClient.resolve(cfg).search("x", 1)
     assert captured["url"].startswith("https://jira.env")  # env beats config
 
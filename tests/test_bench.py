@@ -0,0 +1,48 @@
+"""The internals benchmark: scripted provider, cases, JSON report and comparison."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from oshell import bench
+from oshell.agent import Agent, ToolFinished, TurnComplete
+from oshell.providers.base import ToolCall
+from oshell.tools import ToolRegistry
+
+
+def test_scripted_provider_replays_replies_and_tool_calls():
+    call = ToolCall(name="echo", arguments={"text": "hi"}, id="t1")
+    provider = bench.ScriptedProvider([bench.Reply("Checking.", [call]), bench.Reply("Done.")])
+    registry = ToolRegistry([bench._EchoTool()])
+    agent = Agent(provider, registry, bench._config(), model="scripted")
+    events = list(agent.send("go"))
+    assert [e.result for e in events if isinstance(e, ToolFinished)] == ["hi"]
+    assert isinstance(events[-1], TurnComplete) and events[-1].text == "Done."
+    assert provider.calls == 2
+    chunks = list(provider.chat([], model="scripted"))  # wraps around to the first reply
+    assert "".join(c.content for c in chunks) == "Checking."
+    assert chunks[-1].done and chunks[-1].tool_calls == [call]
+
+
+def test_run_reports_every_case_and_size_as_json():
+    report = bench.run(sizes=(10, 30), repeat=1)
+    json.dumps(report)
+    got = {(r["case"], r["size"]) for r in report["results"]}
+    assert got == {(c.name, n) for c in bench.CASES for n in (10, 30)}
+    assert all(r["median_ms"] > 0 for r in report["results"])
+    with pytest.raises(ValueError, match="nope"):
+        bench.run(sizes=(10,), only=["nope"])
+
+
+def test_compare_matches_cases_across_reports():
+    before = {"results": [{"case": "send", "size": 10, "median_ms": 2.0}]}
+    after = {
+        "results": [
+            {"case": "send", "size": 10, "median_ms": 3.0},
+            {"case": "compact", "size": 10, "median_ms": 1.0},
+        ]
+    }
+    [change] = bench.compare(before, after)
+    assert (change.case, change.size, change.ratio) == ("send", 10, 1.5)
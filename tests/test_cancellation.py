@@ -0,0 +1,230 @@
+"""Cancellation: the token itself, and a turn stopped mid-stream and mid-tool."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+
+from oshell.agent import Agent, TextDelta, ToolStarted, TurnCancelled, TurnComplete
+from oshell.agent.loop import INTERRUPTED_MARK
+from oshell.cancellation import Cancelled, CancelToken, current, run_cancellable, use
+from oshell.config import Config, ShellConfig
+from oshell.providers.base import ChatChunk, LLMProvider, Message, ToolCall
+from oshell.providers.transport import cancellable_lines
+from oshell.tools import ToolRegistry
+from oshell.tools.system import RunCommandTool
+
+posix_only = pytest.mark.skipif(sys.platform == "win32", reason="uses the POSIX sleep command")
+
+
+def test_token_runs_callbacks_once_and_late_ones_immediately():
+    token, seen = CancelToken(), []
+    token.on_cancel(lambda: seen.append("a"))
+    unregister = token.on_cancel(lambda: seen.append("gone"))
+    unregister()
+    assert not token.cancelled
+    token.cancel()
+    token.cancel()
+    assert token.cancelled and seen == ["a"]
+    token.on_cancel(lambda: seen.append("late"))  # already cancelled: runs now
+    assert seen == ["a", "late"]
+    with pytest.raises(Cancelled):
+        token.raise_if_cancelled()
+
+
+def test_current_follows_use():
+    token = CancelToken()
+    assert current() is None
+    with use(token):
+        assert current() is token
+    assert current() is None
+
+
+def test_run_cancellable_abandons_a_blocked_call_and_discards_its_result():
+    token, release, discarded = CancelToken(), threading.Event(), []
+
+    def blocked() -> str:
+        release.wait(5)
+        return "late"
+
+    threading.Timer(0.05, token.cancel).start()
+    t0 = time.monotonic()
+    with pytest.raises(Cancelled):
+        run_cancellable(blocked, token, discard=discarded.append)
+    assert time.monotonic() - t0 < 2
+    release.set()
+    deadline = time.monotonic() + 2
+    while not discarded and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert discarded == ["late"]
+    assert run_cancellable(lambda: 42, CancelToken()) == 42
+    assert run_cancellable(lambda: 7, None) == 7
+
+
+class _Stream:
+    """A streamed response whose read blocks until the next line or close()."""
+
+    def __init__(self, lines: list[bytes]):
+        self._lines = lines
+        self.closed = threading.Event()
+
+    def iter_lines(self) -> Iterator[bytes]:
+        yield from self._lines
+        self.closed.wait(5)
+        raise OSError("connection closed")
+
+    def close(self) -> None:
+        self.closed.set()
+
+
+def test_cancellable_lines_closes_the_response_and_raises_cancelled():
+    token, resp = CancelToken(), _Stream([b"one", b"two"])
+    lines = cancellable_lines(resp, token)
+    assert [next(lines), next(lines)] == [b"one", b"two"]
+    threading.Timer(0.05, token.cancel).start()
+    with pytest.raises(Cancelled):
+        next(lines)
+    assert resp.closed.is_set()
+
+
+class _Talker(LLMProvider):
+    """Streams a few words, then blocks until cancelled, like a long decode."""
+
+    name = "talker"
+
+    def __init__(self, then: list[list[ChatChunk]] | None = None):
+        self.then = then or []
+        self.stopped = False
+
+    def list_models(self) -> list[str]:
+        return ["m"]
+
+    def chat(
+        self, messages: list[Message], cancel: CancelToken | None = None, **kw: Any
+    ) -> Iterator[ChatChunk]:
+        if self.then:
+            yield from self.then.pop(0)
+            return
+        yield ChatChunk(content="Hel")
+        yield ChatChunk(content="lo", tool_calls=[ToolCall(name="half", arguments={})])
+        assert cancel is not None and cancel.wait(5)
+        self.stopped = True
+        raise Cancelled("closed")
+
+
+def test_cancel_mid_stream_keeps_partial_text_marked():
+    provider = _Talker()
+    agent = Agent(provider, ToolRegistry([]), Config())
+    token, events = CancelToken(), []
+    for event in agent.send("hi", cancel=token):
+        events.append(event)
+        if isinstance(event, TextDelta) and event.text == "lo":
+            token.cancel()
+    assert provider.stopped
+    assert events[-1] == TurnCancelled("Hello")
+    last = agent.messages[-1]
+    assert last.role == "assistant" and last.content == f"Hello\n\n{INTERRUPTED_MARK}"
+    assert not last.tool_calls  # a call cut off mid-stream is dropped
+    # The transcript is still well-formed: the next turn just carries on.
+    provider.then = [[ChatChunk(content="Hi again", done=True)]]
+    assert list(agent.send("hello?"))[-1] == TurnComplete("Hi again")
+
+
+@posix_only
+def test_cancel_stops_a_running_command_and_answers_every_call(tmp_path):
+    script = [
+        [
+            ChatChunk(
+                tool_calls=[
+                    ToolCall(name="run_command", arguments={"command": "sleep 30"}, id="a"),
+                    ToolCall(name="run_command", arguments={"command": "echo no"}, id="b"),
+                ],
+                done=True,
+            )
+        ],
+    ]
+    provider = _Talker(then=script)
+    tool = RunCommandTool(tmp_path, ShellConfig(persistent=False))
+    agent = Agent(provider, ToolRegistry([tool]), Config(parallel_tools=1))
+    token = CancelToken()
+    t0 = time.monotonic()
+    events = []
+    for event in agent.send("sleep", cancel=token):
+        events.append(event)
+        if isinstance(event, ToolStarted) and event.arguments["command"] == "sleep 30":
+            threading.Timer(0.2, token.cancel).start()
+    assert time.monotonic() - t0 < 10
+    assert events[-1] == TurnCancelled("")
+    results = [m for m in agent.messages if m.role == "tool"]
+    assert [m.tool_call_id for m in results] == ["a", "b"]
+    assert all(m.content.startswith("[cancelled]") for m in results)
+    assert agent.messages[-1].content == INTERRUPTED_MARK
+
+
+class _SlowSummary(LLMProvider):
+    """A summary takes ``seconds`` (cut short by the call's cancel, if it's honoured)."""
+
+    name = "slow-summary"
+
+    def __init__(self, seconds: float, honour_cancel: bool = True) -> None:
+        self.seconds = seconds
+        self.honour_cancel = honour_cancel
+        self.summaries = 0
+
+    def list_models(self) -> list[str]:
+        return ["m"]
+
+    def chat(self, messages: list[Message], *, cancel=None, **kw: Any) -> Iterator[ChatChunk]:
+        if "Summarize" not in messages[0].content:
+            yield ChatChunk(content="answer", done=True)
+            return
+        self.summaries += 1
+        if self.honour_cancel and cancel is not None:
+            cancel.wait(self.seconds)
+        else:
+            time.sleep(self.seconds)
+        yield ChatChunk(content="notes", done=True)
+
+
+def _full_agent(provider: LLMProvider, **kw: Any) -> Agent:
+    config = Config(context_length=2048, compact_threshold=0.5, compact_low_watermark=0.4)
+    agent = Agent(provider, ToolRegistry([]), config, model="m", **kw)
+    for i in range(10):
+        agent.messages.append(Message(role="user", content=f"question {i} " + "x" * 200))
+        agent.messages.append(Message(role="assistant", content=f"answer {i} " + "y" * 200))
+    return agent
+
+
+def test_cancel_stops_a_blocking_compaction():
+    agent = _full_agent(_SlowSummary(2.0))
+    before = list(agent.messages)
+    token = CancelToken()
+    threading.Timer(0.2, token.cancel).start()
+    started = time.monotonic()
+    events = list(agent.send("go on", cancel=token))
+    assert time.monotonic() - started < 1.0
+    assert events[-1] == TurnCancelled("")
+    assert agent.messages[: len(before)] == before  # nothing was folded away
+    assert len(agent.compactor) == 0  # and no cut-off note was cached
+
+
+def test_cancel_stops_waiting_on_a_background_summary():
+    provider = _SlowSummary(1.0, honour_cancel=False)
+    agent = _full_agent(provider, background_compaction=True)
+    agent.config.compact_threshold = 0.95  # the first turn only prepares a summary
+    list(agent.send("first"))
+    assert agent._background is not None
+    agent.config.compact_threshold = 0.5
+    token = CancelToken()
+    threading.Timer(0.2, token.cancel).start()
+    started = time.monotonic()
+    events = list(agent.send("second", cancel=token))
+    assert time.monotonic() - started < 0.8
+    assert events[-1] == TurnCancelled("")
+    assert agent._background is not None  # kept for a later turn to adopt
+    assert provider.summaries == 1
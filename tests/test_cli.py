@@ -127,3 +127,33 @@ def test_rm_slash_command_respects_declined_confirm(monkeypatch):
     monkeypatch.setattr("typer.confirm", lambda *a, **k: False)
     assert _handle_slash(agent, "/rm old:7b") is True
     assert provider.deleted == []
+
+
+def test_prompt_fit_starts_no_mcp_server(monkeypatch, tmp_path):
+    """`oshell doctor` sizes the system prompt without building an agent."""
+    from collections.abc import Iterator
+    from typing import Any
+
+    from oshell import mcp
+    from oshell.cli import _prompt_fit
+    from oshell.config import Config
+    from oshell.providers.base import ChatChunk, LLMProvider, Message
+
+    class _Quiet(LLMProvider):
+        name = "quiet"
+
+        def list_models(self) -> list[str]:
+            return ["m"]
+
+        def chat(self, messages: list[Message], **kwargs: Any) -> Iterator[ChatChunk]:
+            yield ChatChunk(done=True)
+
+    def no_servers(name, server):
+        raise AssertionError(f"started MCP server {name}")
+
+    monkeypatch.setattr(mcp, "_shared_client", no_servers)
+    cfg = Config(project_context=False, context_length=8192)
+    cfg.memory.path = str(tmp_path / "memory.json")
+    fit = _prompt_fit(cfg, _Quiet())
+    assert "run_command" in fit.text
+    assert not (tmp_path / "memory.json").exists()
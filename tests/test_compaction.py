@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from collections.abc import Iterator
 from typing import Any
 
 from oshell.agent import Agent, Compacted
+from oshell.agent.compaction import Compactor, transcript_chunks
 from oshell.config import Config
 from oshell.providers.base import ChatChunk, LLMProvider, Message
 from oshell.tools import ToolRegistry
@@ -28,9 +31,17 @@ class _Summarizer(LLMProvider):
         yield ChatChunk(content=self.reply, done=True)
 
 
-def _stuffed_agent(n_pairs=10, **config_kwargs) -> tuple[Agent, _Summarizer]:
+def _stuffed_agent(
+    n_pairs=10, background=False, **config_kwargs
+) -> tuple[Agent, _Summarizer]:
     provider = _Summarizer()
-    agent = Agent(provider, ToolRegistry([]), Config(**config_kwargs), model="m")
+    agent = Agent(
+        provider,
+        ToolRegistry([]),
+        Config(**config_kwargs),
+        model="m",
+        background_compaction=background,
+    )
     for i in range(n_pairs):
         agent.messages.append(Message(role="user", content=f"question {i} " + "x" * 200))
         agent.messages.append(Message(role="assistant", content=f"answer {i} " + "y" * 200))
@@ -106,8 +117,134 @@ def test_auto_compact_disabled_by_zero_threshold():
     assert not any(isinstance(e, Compacted) for e in events)
 
 
+def _join_background(agent: Agent) -> None:
+    assert agent._background is not None and agent._background.thread is not None
+    agent._background.thread.join(5)
+
+
+def test_low_watermark_prepares_summary_between_turns():
+    agent, provider = _stuffed_agent(
+        background=True, context_length=2048, compact_threshold=0.95, compact_low_watermark=0.5
+    )
+    agent.config.routing.fast_model = "fast:4b"
+    events = list(agent.send("first"))
+    assert not any(isinstance(e, Compacted) for e in events)  # the user didn't wait on it
+    _join_background(agent)
+    assert provider.models_used == ["m", "fast:4b"]  # summarized on the fast model
+    before = agent.context_fill()
+    events = list(agent.send("second"))
+    assert isinstance(events[0], Compacted) and events[0].background
+    assert "compacted to save context" in agent.messages[1].content
+    assert [m.content for m in agent.messages[-4:-2]] == ["first", provider.reply]
+    assert agent.context_fill() < before
+
+
+def test_one_shot_agents_prepare_no_background_summary():
+    # ask/do and delegate helpers never take the next turn that would adopt it.
+    agent, provider = _stuffed_agent(
+        context_length=2048, compact_threshold=0.95, compact_low_watermark=0.5
+    )
+    list(agent.send("first"))
+    assert agent._background is None
+    assert provider.models_used == ["m"]
+
+
+def test_background_summary_is_dropped_when_history_changed():
+    agent, provider = _stuffed_agent(
+        background=True, context_length=2048, compact_threshold=0.95, compact_low_watermark=0.5
+    )
+    list(agent.send("first"))
+    _join_background(agent)
+    agent.messages = agent.messages[:1]  # /new while it was being prepared
+    events = list(agent.send("second"))
+    assert not any(isinstance(e, Compacted) for e in events)
+    assert [m.content for m in agent.messages[1:]] == ["second", provider.reply]
+
+
+class _Slow(_Summarizer):
+    def chat(self, messages: list[Message], *, model="", **kw: Any) -> Iterator[ChatChunk]:
+        if messages[0].role == "system" and "Summarize" in messages[0].content:
+            time.sleep(0.2)
+        yield from super().chat(messages, model=model, **kw)
+
+
+def test_manual_compact_finishes_the_background_summary_instead_of_racing_it():
+    provider = _Slow()
+    config = Config(context_length=2048, compact_threshold=0.95, compact_low_watermark=0.5)
+    agent = Agent(provider, ToolRegistry([]), config, model="m", background_compaction=True)
+    for i in range(10):
+        agent.messages.append(Message(role="user", content=f"question {i} " + "x" * 200))
+        agent.messages.append(Message(role="assistant", content=f"answer {i} " + "y" * 200))
+    list(agent.send("first"))
+    assert agent._background is not None  # still summarizing
+    info = agent.compact()
+    assert isinstance(info, Compacted) and info.background
+    assert agent.compactor.calls == 1  # no second summarization alongside it
+    assert agent._background is None
+
+
 def test_context_fill_shrinks_after_compaction():
     agent, _ = _stuffed_agent(context_length=1024)
     before = agent.context_fill()
     agent.compact(keep_recent=4)
     assert agent.context_fill() < before
+
+
+class _Recording(_Summarizer):
+    """Summarizes each chunk as its first line; tracks peak concurrency."""
+
+    def __init__(self):
+        super().__init__()
+        self.texts: list[str] = []
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+
+    def chat(self, messages: list[Message], *, model="", **kw: Any) -> Iterator[ChatChunk]:
+        with self._lock:
+            self.texts.append(messages[-1].content)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        yield ChatChunk(content="note: " + messages[-1].content.splitlines()[0][:40], done=True)
+
+
+def test_chunks_cover_the_whole_span_on_message_boundaries():
+    messages = [Message(role="user", content=f"m{i} " + "z" * 90) for i in range(10)]
+    chunks = transcript_chunks(messages, 250)
+    assert len(chunks) == 5 and all(len(c) <= 250 for c in chunks)
+    assert "\n".join(chunks) == "\n".join(f"user: {m.content}" for m in messages)
+    long = transcript_chunks([Message(role="user", content="x" * 600)], 250)
+    assert [len(c) for c in long] == [250, 250, 106]
+
+
+def test_map_reduce_summarizes_everything_in_parallel_and_caches_chunks():
+    provider = _Recording()
+    compactor = Compactor(chunk_tokens=60, parallel=3)  # 240-char chunks
+    messages = [Message(role="user", content=f"turn {i} " + "w" * 100) for i in range(12)]
+    summary = compactor.summarize(provider, messages, "fast")
+    mapped = [t for t in provider.texts if t.startswith("user:")]
+    assert len(mapped) == 6 and "turn 0 " in mapped[0]  # the oldest turns are covered
+    assert 1 < provider.peak <= 3
+    assert summary.startswith("note: ")
+    # A later pass over the same turns plus new ones summarizes only the new chunk.
+    provider.texts.clear()
+    more = [*messages, Message(role="user", content="turn 12 " + "w" * 100)]
+    compactor.summarize(provider, more, "fast")
+    assert [t for t in provider.texts if t.startswith("user:")] == ["user: turn 12 " + "w" * 100]
+
+
+def test_failed_chunk_leaves_conversation_untouched():
+    class _Flaky(_Summarizer):
+        def chat(self, messages, *, model="", **kw):
+            if "question 3" in messages[-1].content:
+                raise RuntimeError("backend hiccup")
+            yield ChatChunk(content="notes", done=True)
+
+    agent = Agent(_Flaky(), ToolRegistry([]), Config(compact_chunk_tokens=100), model="m")
+    for i in range(10):
+        agent.messages.append(Message(role="user", content=f"question {i} " + "x" * 200))
+    before = list(agent.messages)
+    assert agent.compact(keep_recent=2) is None
+    assert agent.messages == before
@@ -2,15 +2,18 @@
 
 from __future__ import annotations
 
+import os
+import threading
+import time
 from collections.abc import Iterator
 from typing import Any
 
 import oshell.tools as tools_pkg
 from oshell.config import Config
-from oshell.providers.base import ChatChunk, LLMProvider, Message
+from oshell.providers.base import ChatChunk, LLMProvider, Message, ToolCall
 from oshell.tools import ToolRegistry
 from oshell.tools.builtins import CurrentTimeTool
-from oshell.tools.delegate import DelegateTool
+from oshell.tools.delegate import DelegateManyTool, DelegateTool, _SharedHelpers
 
 
 class _Helper(LLMProvider):
@@ -33,12 +36,16 @@ def _tool(monkeypatch, config) -> tuple[DelegateTool, _Helper, dict]:
     provider = _Helper()
     seen: dict = {}
 
-    def fake_registry(prov, cfg, workspace=".", model=None, memory=None, delegate=True):
-        seen["delegate"] = delegate
-        seen["model"] = model
-        return ToolRegistry([CurrentTimeTool()])
+    class FakeBuilder:
+        def __init__(self, prov, cfg, workspace=".", memory=None, delegate=True):
+            seen["delegate"] = delegate
+            seen["builders"] = seen.get("builders", 0) + 1
 
-    monkeypatch.setattr(tools_pkg, "default_registry", fake_registry)
+        def build(self, model=None, **kw):
+            seen["model"] = model
+            return ToolRegistry([CurrentTimeTool()])
+
+    monkeypatch.setattr(tools_pkg, "RegistryBuilder", FakeBuilder)
     return DelegateTool(provider, config), provider, seen
 
 
@@ -65,6 +72,95 @@ def test_delegate_rejects_empty_task(monkeypatch):
     assert provider.models_used == []  # never spun up a helper
 
 
+class _Slow(LLMProvider):
+    """Answers each task after a delay; tracks how many helpers run at once."""
+
+    name = "slow"
+
+    def __init__(self):
+        self.running = self.peak = 0
+        self._lock = threading.Lock()
+
+    def list_models(self):
+        return ["m"]
+
+    def chat(self, messages: list[Message], **kw: Any) -> Iterator[ChatChunk]:
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.3)
+        with self._lock:
+            self.running -= 1
+        task = messages[-1].content
+        if "boom" in task:
+            raise RuntimeError("backend fell over")
+        yield ChatChunk(content=f"answer to {task}", done=True)
+
+
+def test_delegate_many_runs_helpers_concurrently_on_one_registry(monkeypatch):
+    cfg = Config(default_model="m", delegate_parallel=4)
+    _, _, seen = _tool(monkeypatch, cfg)
+    provider = _Slow()
+    shared = _SharedHelpers(provider, cfg)
+    builders = seen["builders"]
+    tool = DelegateManyTool(provider, cfg, shared)
+    tasks = ["check lib a", "check lib b", "boom", "check lib d"]
+    t0 = time.monotonic()
+    out = tool.run(tasks=tasks)
+    assert time.monotonic() - t0 < 1.0  # ~ the slowest helper, not the sum (1.2s)
+    assert provider.peak == 4
+    assert seen["builders"] == builders  # one helper registry builder for all four
+    blocks = out.split("\n\n")
+    assert blocks[0] == "[1] check lib a\nanswer to check lib a"
+    assert blocks[2] == "[3] boom\n[error] backend fell over"
+    assert blocks[3].startswith("[4] check lib d")
+    DelegateTool(provider, cfg, shared).run(task="one more")
+    assert seen["builders"] == builders  # delegate reuses it too
+
+
+class _Cd(LLMProvider):
+    """"go DIR": cd there, wait, then report pwd; anything else: report pwd at once."""
+
+    name = "cd"
+
+    def list_models(self):
+        return ["m"]
+
+    def chat(self, messages: list[Message], **kw: Any) -> Iterator[ChatChunk]:
+        task = next(m.content for m in messages if m.role == "user")
+        ran = [m.content for m in messages if m.role == "tool"]
+        steps = [f"cd {task[3:]}", "sleep 0.3; pwd"] if task.startswith("go ") else ["pwd"]
+        if len(ran) < len(steps):
+            call = ToolCall(name="run_command", arguments={"command": steps[len(ran)]})
+            yield ChatChunk(tool_calls=[call], done=True)
+        else:
+            yield ChatChunk(content=ran[-1].splitlines()[-1], done=True)
+
+
+def test_parallel_helpers_each_get_their_own_shell(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    cfg = Config(default_model="m", delegate_parallel=2, project_context=False)
+    cfg.mcp_servers = {}
+    tool = DelegateManyTool(_Cd(), cfg)
+    out = tool.run(tasks=[f"go {a}", f"go {b}"])
+    assert out == f"[1] go {a}\n{a}\n\n[2] go {b}\n{b}"  # no cd leaked across
+    later = DelegateTool(_Cd(), cfg, tool._helpers).run(task="where am I?")
+    assert os.path.realpath(later) == os.path.realpath(os.getcwd())  # a fresh shell
+
+
+def test_delegate_many_respects_the_concurrency_limit(monkeypatch):
+    cfg = Config(default_model="m", delegate_parallel=2)
+    _tool(monkeypatch, cfg)
+    provider = _Slow()
+    tool = DelegateManyTool(provider, cfg)
+    assert tool.run(tasks=["a", "b", "c"]).count("answer to") == 3
+    assert provider.peak == 2
+    assert "[error]" in tool.run(tasks=[])
+    assert "at most" in tool.run(tasks=[f"t{i}" for i in range(11)])
+
+
 def test_default_registry_includes_delegate_once():
     """Top-level registries carry delegate; the flag removes it for helpers."""
     from oshell.tools import default_registry
@@ -81,6 +177,6 @@ def test_default_registry_includes_delegate_once():
     cfg = Config()
     cfg.mcp_servers = {}  # keep the test hermetic — no server spawns
     names = {t.name for t in default_registry(_P(), cfg).active()}
-    assert "delegate" in names
+    assert {"delegate", "delegate_many"} <= names
     helper_names = {t.name for t in default_registry(_P(), cfg, delegate=False).active()}
-    assert "delegate" not in helper_names
+    assert not {"delegate", "delegate_many"} & helper_names
@@ -0,0 +1,148 @@
+"""Tool deadlines and circuit breakers in the registry."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from oshell.cancellation import CancelToken, run_cancellable
+from oshell.config import ToolGuardConfig
+from oshell.providers.base import ToolCall
+from oshell.tools import ToolError, ToolGuard, ToolRegistry, ToolUnavailable
+from oshell.tools.base import Tool
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Flaky(Tool):
+    """Fails (or hangs) while ``broken``; counts the runs that got through."""
+
+    name = "flaky"
+    description = "Talks to a service that may be down."
+    local_only = False
+    deadline = 0.2
+
+    def __init__(self, mode: str = "error"):
+        self.mode = mode
+        self.broken = True
+        self.runs = 0
+        self.release = threading.Event()
+
+    def run(self, **_: Any) -> str:
+        self.runs += 1
+        if not self.broken:
+            return "ok"
+        if self.mode == "hang":
+            self.release.wait(5)
+            return "too late"
+        if self.mode == "404":
+            raise ToolError("HTTP 404")
+        raise ToolUnavailable("connection refused")
+
+
+def _call(reg: ToolRegistry, name: str = "flaky") -> str:
+    return reg.dispatch(ToolCall(name=name, arguments={}))
+
+
+def test_a_call_past_its_deadline_is_abandoned():
+    tool = _Flaky("hang")
+    reg = ToolRegistry([tool])
+    t0 = time.monotonic()
+    assert _call(reg) == "[error] flaky timed out after 0.2s and was abandoned"
+    assert time.monotonic() - t0 < 2
+    tool.release.set()
+    slow = _Flaky("hang")
+    guard = ToolGuard(ToolGuardConfig(deadlines={"flaky": 0}))  # config lifts it
+    threading.Timer(0.4, slow.release.set).start()
+    assert _call(ToolRegistry([slow], guard=guard)) == "too late"
+
+
+def test_breaker_opens_after_repeated_failures_and_recovers_after_a_trial():
+    clock, tool = _Clock(), _Flaky()
+    guard = ToolGuard(ToolGuardConfig(failures=3, cooldown=30), clock=clock)
+    reg = ToolRegistry([tool], guard=guard)
+    for _ in range(3):
+        assert _call(reg) == "[error] connection refused"
+    assert guard.states() == {"flaky": "open, 30s"}
+    out = _call(reg)
+    assert out.startswith("[error] flaky is skipped for another 30s") and tool.runs == 3
+    assert "last: connection refused" in out
+    clock.now += 31  # cool-down over: one trial call goes through...
+    assert guard.states() == {"flaky": "half-open"}
+    assert _call(reg) == "[error] connection refused" and tool.runs == 4
+    assert "skipped" in _call(reg)  # ...and a failed trial re-trips at once
+    clock.now += 31
+    tool.broken = False
+    assert _call(reg) == "ok"
+    assert guard.states() == {}
+
+
+class _Strict(Tool):
+    name = "strict"
+    description = "Needs a path."
+    local_only = False
+
+    def run(self, path: str) -> str:
+        return path
+
+
+def test_half_open_lets_exactly_one_trial_through():
+    clock = _Clock()
+    guard = ToolGuard(ToolGuardConfig(failures=1, cooldown=30), clock=clock)
+    guard.record("flaky", "connection refused")
+    clock.now += 31
+    assert guard.refuse("flaky") is None  # the trial
+    assert "until a trial call finishes" in guard.refuse("flaky")
+    assert guard.states() == {"flaky": "trial running"}
+    guard.release("flaky")  # the trial was cancelled: the next call may try
+    assert guard.refuse("flaky") is None
+    guard.record("flaky", None)
+    assert guard.refuse("flaky") is None and guard.states() == {}
+
+
+def test_timeouts_trip_the_breaker_but_the_models_mistakes_do_not():
+    hang = _Flaky("hang")
+    guard = ToolGuard(ToolGuardConfig(failures=2))
+    reg = ToolRegistry([hang], guard=guard)
+    _call(reg)
+    _call(reg)
+    assert "skipped" in _call(reg) and hang.runs == 2
+    hang.release.set()
+
+    missing = _Flaky("404")  # a network tool asked for a page that doesn't exist
+    reg = ToolRegistry([missing, _Strict()], guard=ToolGuard(ToolGuardConfig(failures=2)))
+    for _ in range(4):
+        assert _call(reg) == "[error] HTTP 404"
+        assert _call(reg, "strict").startswith("[error] tool 'strict' failed")  # no path
+    assert reg.guard.states() == {}
+
+
+def test_only_reads_get_a_deadline(tmp_path):
+    from oshell.tools.builtins import ReadFileTool, WriteFileTool
+    from oshell.tools.documents import CreateDocumentTool
+
+    assert ReadFileTool(tmp_path).deadline == 60
+    # An abandoned write keeps running; the model's retry could land twice.
+    assert WriteFileTool(tmp_path).deadline is None
+    assert CreateDocumentTool(tmp_path).deadline is None
+    assert _Strict().deadline is None  # the default
+
+
+def test_run_cancellable_times_out():
+    release = threading.Event()
+    try:
+        run_cancellable(lambda: release.wait(5), CancelToken(), timeout=0.05)
+    except TimeoutError as exc:
+        assert "0.05s" in str(exc)
+    else:
+        raise AssertionError("expected a timeout")
+    finally:
+        release.set()
+    assert run_cancellable(lambda: 3, None, timeout=1) == 3
@@ -0,0 +1,89 @@
+"""Token ledger: incremental per-message counts and per-model calibration."""
+
+from __future__ import annotations
+
+import pytest
+
+from oshell.agent.ledger import IMAGE_TOKENS, TokenLedger, estimate_message, estimate_tools
+from oshell.providers.base import Message, ToolCall
+
+
+def _msgs(n: int) -> list[Message]:
+    return [Message(role="user", content="x" * 400) for _ in range(n)]
+
+
+def test_estimate_counts_images_and_tool_arguments():
+    plain = estimate_message(Message(role="user", content="look"))
+    with_image = estimate_message(Message(role="user", content="look", images=["b64"]))
+    assert with_image - plain == IMAGE_TOKENS
+    call = ToolCall(name="write_file", arguments={"path": "a.py", "content": "y" * 400})
+    assert estimate_message(Message(role="assistant", tool_calls=[call])) > 100
+    assert estimate_tools(None) == 0
+    assert estimate_tools([{"function": {"name": "t", "description": "d" * 400}}]) > 100
+
+
+def test_only_new_messages_are_estimated(monkeypatch):
+    import oshell.agent.ledger as ledger_mod
+
+    seen: list[Message] = []
+    real = ledger_mod.estimate_message
+    monkeypatch.setattr(ledger_mod, "estimate_message", lambda m: seen.append(m) or real(m))
+    ledger, messages = TokenLedger(), _msgs(100)
+    ledger.sync(messages, set())
+    messages.append(Message(role="assistant", content="ok"))
+    ledger.sync(messages, set())
+    ledger.sync(messages, set())
+    assert len(seen) == 101  # each message once, however often we sync
+
+
+def test_exclude_pin_and_replacement_keep_total_right():
+    ledger, messages = TokenLedger(), _msgs(4)
+    ledger.sync(messages, set())
+    full = ledger.raw()
+    one = estimate_message(messages[2])
+    ledger.exclude(2)
+    assert ledger.raw() == full - one
+    ledger.include(2)
+    assert ledger.raw() == full
+    # Excluded via the set alone (e.g. a restored session) is picked up on sync.
+    ledger.sync(messages, {1})
+    assert ledger.raw() == full - one
+    # A replaced transcript (compaction) is recounted.
+    ledger.sync(messages[:1], set())
+    assert ledger.raw() == estimate_message(messages[0])
+
+
+def test_refresh_tracks_in_place_edits():
+    ledger, messages = TokenLedger(), _msgs(2)
+    ledger.sync(messages, set())
+    before = ledger.raw()
+    messages[0].content += "z" * 400
+    ledger.refresh(0)
+    assert ledger.raw() == before + 100
+
+
+def test_calibration_is_per_model_smoothed_and_bounded():
+    ledger = TokenLedger()
+    ledger.sync(_msgs(2), set())
+    ledger.calibrate("a", reported=300, estimated=200)
+    assert ledger.scale("a") == pytest.approx(1.5)
+    assert ledger.scale("b") == 1.0
+    ledger.calibrate("a", reported=200, estimated=200)
+    assert 1.0 < ledger.scale("a") < 1.5  # moves toward the new sample, not onto it
+    ledger.calibrate("a", reported=5000, estimated=200)  # garbage sample
+    assert ledger.scale("a") < 1.5
+    assert ledger.tokens("a") == round(ledger.raw() * ledger.scale("a"))
+
+
+def test_calibration_skips_counts_that_left_out_a_cached_prefix():
+    ledger = TokenLedger()
+    ledger.calibrate("m", reported=1000, estimated=1000)  # first request: all evaluated
+    # Later rounds: the prompt grew, but Ollama counts only what it didn't
+    # serve from the KV cache.
+    ledger.calibrate("m", reported=300, estimated=1100)
+    ledger.calibrate("m", reported=320, estimated=1200)
+    assert ledger.scale("m") == 1.0
+    ledger.calibrate("m", reported=1300, estimated=1250)  # a full count still moves it
+    assert ledger.scale("m") == pytest.approx(1.02)
+    ledger.calibrate("m", reported=150, estimated=500)  # compacted, system prompt cached
+    assert ledger.scale("m") == pytest.approx(1.02)
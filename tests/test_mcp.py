@@ -99,6 +99,22 @@ def test_timeout_raises_not_hangs(client, monkeypatch):
     assert client.call_tool("echo", {"n": 1}) == 'echo: {"n": 1}'
 
 
+def test_cancel_stops_waiting_and_the_client_recovers(client):
+    import threading
+    import time
+
+    from oshell.cancellation import Cancelled, CancelToken
+
+    client.list_tools()
+    token = CancelToken()
+    threading.Timer(0.2, token.cancel).start()
+    t0 = time.monotonic()
+    with pytest.raises(Cancelled):
+        client.call_tool("slow", {}, cancel=token)
+    assert time.monotonic() - t0 < 5
+    assert client.call_tool("echo", {"n": 2}) == 'echo: {"n": 2}'
+
+
 def test_missing_binary_is_graceful():
     c = MCPClient("ghost", "/definitely/not/here/ghost", ["server"])
     assert not c.available()
@@ -114,6 +130,23 @@ def test_dead_server_respawns(client):
     assert client.call_tool("echo", {}) == "echo: {}"
 
 
+def test_tool_list_is_asked_once_per_server_process(client, monkeypatch):
+    methods = []
+    request = client._request
+
+    def counting(method, *args, **kw):
+        methods.append(method)
+        return request(method, *args, **kw)
+
+    monkeypatch.setattr(client, "_request", counting)
+    assert client.list_tools() == client.list_tools()
+    assert methods.count("tools/list") == 1
+    client._proc.kill()
+    client._proc.wait()
+    assert [d["name"] for d in client.list_tools()] == ["echo", "boom", "slow"]
+    assert methods.count("tools/list") == 2  # a new process is asked again
+
+
 def test_mcp_tool_adapts_to_the_tool_contract(client):
     defs = client.list_tools()
     tool = MCPTool(client, defs[0])
@@ -143,6 +176,17 @@ def test_mcp_tools_from_config(fake_server):
     assert status == {"fake": True, "ghost": False}  # disabled servers not listed
 
 
+def test_mcp_cacheability_is_opt_in_per_tool(fake_server):
+    cmd, args = fake_server
+    server = MCPServerConfig(command=cmd, args=args, cache_tools=["echo"], cache_ttl=30)
+    tools = {t.name: t for t in mcp_tools(Config(mcp_servers={"fake": server}))}
+    assert tools["fake_echo"].cache.ttl == 30
+    assert tools["fake_boom"].cache is None  # may change something — always runs
+    off = server.model_copy(update={"cache_ttl": 0})
+    tools = {t.name: t for t in mcp_tools(Config(mcp_servers={"fake": off}))}
+    assert tools["fake_echo"].cache is None
+
+
 def test_default_config_ships_mechanic_and_drift():
     cfg = Config()
     assert set(cfg.mcp_servers) == {"mechanic", "drift"}
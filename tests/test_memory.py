@@ -92,9 +92,15 @@ def test_agent_uses_shared_memory(tmp_path):
     # one round records the memory via the tool
     list(agent.send("I use vim"))
     assert any("likes vim" == m["text"] for m in s.all())
-    # rebuilding the prompt now injects it
+    # rebuilding the prompt now injects it — as a late context note, leaving
+    # the system prompt (and the backend's cached prefix) untouched
+    system_before = agent.messages[0].content
     agent.rebuild_system_prompt()
-    assert "likes vim" in agent.messages[0].content
+    assert agent.messages[0].content == system_before
+    assert "likes vim" in agent.context_note()
+    # ...or straight into the system prompt in the legacy layout
+    legacy = Agent(_P(), reg, Config(stable_prompt_prefix=False), memory=s)
+    assert "likes vim" in legacy.messages[0].content
 
 
 def test_recall_returns_message(tmp_path):
@@ -0,0 +1,67 @@
+"""Output paging: oversized tool results become a first page + read_more."""
+
+from __future__ import annotations
+
+import pytest
+
+from oshell.agent import Agent, ToolFinished
+from oshell.config import Config
+from oshell.providers.base import ChatChunk, ToolCall
+from oshell.tools import ToolError, ToolRegistry
+from oshell.tools.base import Tool
+from oshell.tools.paging import OutputPager, ReadMoreTool, split_pages
+from tests.test_agent import ScriptedProvider
+
+
+def test_split_pages_prefers_line_breaks():
+    text = "".join(f"line {i:03d}\n" for i in range(100))  # 9 chars per line
+    pages = split_pages(text, 100)
+    assert "".join(pages) == text
+    assert all(len(p) <= 100 for p in pages)
+    assert all(p.endswith("\n") for p in pages)
+    assert split_pages("", 10) == [""]
+
+
+def test_pager_serves_pages_by_handle():
+    pager = OutputPager(max_outputs=1)
+    assert pager.page("t", "short", 100) == "short"  # fits: untouched, not stored
+    first = pager.page("t", "a" * 250, 100)
+    assert first.startswith("a" * 100)
+    assert 'read_more(handle="t-1", page=2)' in first
+    assert "page 3/3" in pager.get("t-1", 3) and "end of output" in pager.get("t-1", 3)
+    with pytest.raises(ToolError):
+        pager.get("t-1", 4)
+    pager.page("t", "b" * 250, 100)  # evicts t-1
+    with pytest.raises(ToolError):
+        pager.get("t-1", 2)
+    reg = ToolRegistry([ReadMoreTool(pager)])
+    out = reg.dispatch(ToolCall(name="read_more", arguments={"handle": "t-2", "page": "2"}))
+    assert out.startswith("b" * 100)
+
+
+class _Dump(Tool):
+    name = "dump"
+    description = "a lot of output"
+
+    def run(self, **_):
+        return "".join(f"row {i}\n" for i in range(20_000))  # ~170k chars
+
+
+def test_agent_pages_results_larger_than_the_budget():
+    script = [
+        [ChatChunk(tool_calls=[ToolCall(name="dump", arguments={})], done=True)],
+        [ChatChunk(content="ok", done=True)],
+    ]
+    pager = OutputPager()
+    reg = ToolRegistry([_Dump(), ReadMoreTool(pager)], pager=pager)
+    agent = Agent(ScriptedProvider(script), reg, Config(context_length=8192))
+    events = list(agent.send("dump it"))
+    shown = next(e.result for e in events if isinstance(e, ToolFinished))
+    assert len(shown) < 4000 * 4 and 'read_more(handle="dump-1", page=2)' in shown
+    assert agent.context_fill() < 0.85  # one result didn't swamp the window
+    # Paging off: cut at the same budget rather than let it all in.
+    agent = Agent(ScriptedProvider(script), ToolRegistry([_Dump()]), Config(context_length=8192))
+    events = list(agent.send("dump it"))
+    shown = next(e.result for e in events if isinstance(e, ToolFinished))
+    assert len(shown) < 4000 * 4 and "more chars not shown]" in shown
+    assert agent.context_fill() < 0.85
@@ -0,0 +1,179 @@
+"""Provider pool: least-loaded scheduling, model-aware routing, failover."""
+
+from __future__ import annotations
+
+import pytest
+import requests
+
+from oshell.config import ProviderConfig
+from oshell.providers import OllamaProvider, PoolProvider, get_provider
+from oshell.providers.base import ChatChunk, LLMProvider, Message, PullProgress
+
+
+class _Host(LLMProvider):
+    """A fake backend host; ``down`` makes every call fail to connect."""
+
+    name = "fake"
+
+    def __init__(self, label, models=("m",), down=False):
+        self.label = label
+        self.models = list(models)
+        self.down = down
+        self.calls = 0
+
+    def list_models(self):
+        if self.down:
+            raise requests.ConnectionError("refused")
+        return self.models
+
+    def chat(self, messages, **kwargs):
+        self.calls += 1
+        if self.down:
+            raise requests.ConnectionError("refused")
+        yield ChatChunk(content=self.label, done=True)
+
+
+class _ManagedHost(_Host):
+    """A host that pulls, deletes, loads and unloads (records each as it goes)."""
+
+    def __init__(self, label, models=("m",), down=False):
+        super().__init__(label, models, down)
+        self.loaded: dict[str, int] = {}
+        self.log: list[str] = []
+
+    def supports_model_management(self):
+        return True
+
+    def supports_residency(self):
+        return True
+
+    def pull_model(self, name):
+        if self.down:
+            raise requests.ConnectionError("refused")
+        yield PullProgress(status="success")
+        self.models.append(name)
+        self.log.append(f"pull {name}")
+
+    def delete_model(self, name):
+        self.models.remove(name)
+        self.log.append(f"delete {name}")
+
+    def running_models(self):
+        return [{"name": n, "size": s} for n, s in self.loaded.items()]
+
+    def load_model(self, name, num_ctx=None):
+        self.loaded[name] = 10 * len(self.label)
+        self.log.append(f"load {name} {num_ctx}")
+
+    def unload_model(self, name):
+        del self.loaded[name]
+        self.log.append(f"unload {name}")
+
+
+def _pool(*hosts) -> PoolProvider:
+    # No background checker in unit tests; health follows the calls made.
+    return PoolProvider([(h.label, h) for h in hosts], health_interval=0)
+
+
+def _ask(pool, model="m") -> str:
+    return "".join(c.content for c in pool.chat([Message(role="user")], model=model))
+
+
+def test_get_provider_builds_a_pool_per_host():
+    cfg = ProviderConfig(name="pool", hosts=["http://gpu1:11434", "http://gpu2:11434"])
+    pool = get_provider(cfg)
+    assert isinstance(pool, PoolProvider)
+    assert [m.host for m in pool.members] == cfg.hosts
+    assert all(isinstance(m.provider, OllamaProvider) for m in pool.members)
+    with pytest.raises(ValueError):
+        get_provider(ProviderConfig(name="pool", pool_backend="pool"))
+
+
+def test_routes_to_least_loaded_host():
+    a, b = _Host("a"), _Host("b")
+    pool = _pool(a, b)
+    busy = pool.chat([Message(role="user")], model="m")
+    assert next(busy).content == "a"  # the interactive turn, still streaming on a
+    assert _ask(pool) == "b"  # a delegate/compaction call goes to the idle host
+    busy.close()
+    assert pool.members[0].in_flight == 0
+
+
+def test_ties_break_on_time_to_first_token():
+    a, b = _Host("a"), _Host("b")
+    pool = _pool(a, b)
+    pool.members[0].ttft, pool.members[1].ttft = 2.0, 0.5
+    assert _ask(pool) == "b"
+
+
+def test_only_hosts_with_the_model_are_used():
+    a, b = _Host("a", models=["small"]), _Host("b", models=["big:31b"])
+    pool = _pool(a, b)
+    pool.check_health()
+    assert _ask(pool, model="big:31b") == "b"
+    assert _ask(pool, model="small") == "a"
+
+
+def test_fails_over_when_a_host_dies_mid_session():
+    a, b = _Host("a"), _Host("b")
+    pool = _pool(a, b)
+    pool.members[1].ttft = 1.0  # b is slower, so a is the host of choice...
+    assert _ask(pool) == "a"
+    a.down = True  # ...until it dies
+    assert _ask(pool) == "b"  # the call moved on instead of failing the turn
+    assert pool.members[0].healthy is False
+    assert _ask(pool) == "b"  # and later calls skip the dead host up front
+    assert a.calls == 2
+
+
+def test_all_hosts_down_raises_last_error():
+    pool = _pool(_Host("a", down=True), _Host("b", down=True))
+    with pytest.raises(requests.ConnectionError):
+        _ask(pool)
+    assert not pool.health()
+
+
+def test_list_models_unions_hosts_and_skips_dead_ones():
+    pool = _pool(
+        _Host("a", models=["x", "y"]), _Host("b", models=["y", "z"]), _Host("c", down=True)
+    )
+    assert pool.list_models() == ["x", "y", "z"]
+    assert [s["healthy"] for s in pool.stats()] == [True, True, False]
+
+
+def test_management_and_residency_fan_out_to_the_hosts():
+    a, b, c = _ManagedHost("a"), _ManagedHost("bb", models=["m", "x"]), _Host("c")
+    pool = _pool(a, b, c)
+    pool.list_models()
+    assert pool.supports_model_management() and pool.supports_residency()
+    steps = [s.status for s in pool.pull_model("new")]
+    assert steps == ["a: success", "bb: success"] and "new" in pool.list_models()
+    pool.delete_model("x")  # only bb has it
+    assert b.log[-1] == "delete x" and a.log == ["pull new"]
+    pool.load_model("m", 4096)
+    assert a.log[-1] == b.log[-1] == "load m 4096"
+    b.unload_model("m")
+    assert pool.running_models() == [{"name": "m", "size": 10, "hosts": ["a"]}]
+    pool.unload_model("m")
+    assert a.loaded == {} and b.log[-1] == "unload m"  # not asked twice
+    with pytest.raises(RuntimeError, match="no host"):
+        pool.load_model("nope")
+    assert not _pool(c).supports_residency()
+
+
+def test_unload_matches_an_untagged_name_and_needs_a_capable_host():
+    a = _ManagedHost("a", models=["llama3:latest"])
+    pool = _pool(a)
+    a.loaded["llama3:latest"] = 1
+    a.unload_model = lambda name: a.log.append(f"unload {name}")  # type: ignore[method-assign]
+    pool.unload_model("llama3")  # as the model is configured; the host reports :latest
+    assert a.log == ["unload llama3"]
+    with pytest.raises(NotImplementedError):
+        _pool(_Host("c")).unload_model("m")
+
+
+def test_pull_fails_only_when_every_host_fails():
+    a, down = _ManagedHost("a"), _ManagedHost("b", down=True)
+    assert [s.status for s in _pool(down, a).pull_model("n")] == ["a: success"]
+    with pytest.raises(requests.ConnectionError):
+        list(_pool(down).pull_model("n"))
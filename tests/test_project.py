@@ -87,9 +87,14 @@ def test_agent_injects_project_block(tmp_path, monkeypatch):
             yield ChatChunk(content="", done=True)
 
     agent = Agent(_P(), ToolRegistry([CurrentTimeTool()]), Config(), model="m")
-    assert "Repository: proj" in agent.messages[0].content
+    assert "Repository: proj" in agent.context_note()
+    legacy = Agent(
+        _P(), ToolRegistry([CurrentTimeTool()]), Config(stable_prompt_prefix=False), model="m"
+    )
+    assert "Repository: proj" in legacy.messages[0].content
     # And the flag turns it off.
     off = Agent(
         _P(), ToolRegistry([CurrentTimeTool()]), Config(project_context=False), model="m"
     )
     assert "Repository:" not in off.messages[0].content
+    assert off.context_note() == ""
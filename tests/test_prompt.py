@@ -0,0 +1,99 @@
+"""System prompt composition: sections fitted to a share of the context window."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from oshell.agent import Agent
+from oshell.agent.prompt import Section, compose, estimate
+from oshell.config import Config
+from oshell.providers.base import LLMProvider
+from oshell.tools import ToolRegistry
+from oshell.tools.base import Tool
+
+
+def _lines(header: str, n: int) -> str:
+    return header + "\n" + "\n".join(f"- item {i} with a few words of padding" for i in range(n))
+
+
+def _sections() -> list[Section]:
+    return [
+        Section("instructions", "Be helpful. " * 40, priority=0),
+        Section("tools", _lines("Tools:", 20), priority=1, trim="head"),
+        Section("guidance", "Prefer the terminal. " * 30, priority=3),
+        Section("memories", _lines("Facts:", 40), priority=2, trim="tail", volatile=True),
+        Section("brief", _lines("Project:", 80), priority=4, trim="head", volatile=True),
+    ]
+
+
+def test_unbounded_prompt_keeps_everything():
+    fit = compose(_sections())
+    assert all(s.state == "kept" for s in fit.sections)
+    assert fit.system.startswith("Be helpful.") and "Prefer the terminal." in fit.system
+    assert fit.note.startswith("Facts:") and "item 79" in fit.note
+    assert fit.text == f"{fit.system}\n\n{fit.note}"
+
+
+def test_small_context_gives_up_low_priority_sections_first():
+    fit = compose(_sections(), context=1024, share=0.25)
+    state = {s.name: s.state for s in fit.sections}
+    assert state["instructions"] == "kept" and state["tools"] == "trimmed"
+    assert state["guidance"] == "dropped" and state["brief"] == "dropped"
+    assert fit.tokens <= fit.budget == 256
+    assert "brief dropped" in fit.summary() and "of a 1,024-token context" in fit.summary()
+
+
+def test_trimming_keeps_the_header_and_the_chosen_end():
+    sections = _sections()
+    fit = compose(sections, context=8192, share=0.15)
+    state = {s.name: s.state for s in fit.sections}
+    assert state["memories"] == "kept" and state["brief"] == "trimmed"
+    brief = fit.note[fit.note.index("Project:") :]
+    assert "item 0 " in brief and "item 79" not in brief and "left out" in brief
+    tight = compose([sections[3]], context=2048, share=0.05)
+    assert tight.note.startswith("Facts:\n[...")
+    assert tight.note.endswith("item 39 with a few words of padding")
+    assert "item 0 " not in tight.note
+
+
+class _Tool(Tool):
+    def __init__(self, name: str):
+        self.name = name
+        self.description = f"{name} does one useful thing for the user."
+
+    def run(self, **_: Any) -> str:
+        return ""
+
+
+class _Memory:
+    def __init__(self, n: int):
+        self.items = [{"text": f"the user likes setting number {i}"} for i in range(n)]
+
+    def recent(self, n: int) -> list[dict[str, Any]]:
+        return self.items[-n:]
+
+
+class _Silent(LLMProvider):
+    name = "silent"
+
+    def list_models(self) -> list[str]:
+        return ["m"]
+
+    def chat(self, messages, **kw):
+        return iter(())
+
+
+def test_agent_fits_its_prompt_to_the_model_and_keeps_the_prefix_stable():
+    registry = ToolRegistry([_Tool("run_command"), _Tool("remember"), _Tool("screenshot")])
+    memory = _Memory(40)
+    agent = Agent(_Silent(), registry, Config(context_length=2048), memory=memory)
+    assert agent.prompt is not None and agent.prompt.context == 2048
+    assert agent.prompt.tokens <= agent.prompt.budget
+    assert "setting number 39" in agent.context_note()  # the newest facts survive
+    system = agent.messages[0].content
+    memory.items.append({"text": "the user likes " + "long facts " * 50})
+    agent.rebuild_system_prompt()
+    assert agent.messages[0].content == system  # only the note changed
+    roomy = Agent(_Silent(), registry, Config(context_length=32768), memory=memory)
+    assert all(s.state == "kept" for s in roomy.prompt.sections)
+    assert estimate(roomy.messages[0].content) > estimate(system)
@@ -8,7 +8,7 @@ import pytest
 
 from oshell.config import Config, ProviderConfig
 from oshell.providers import OllamaProvider, OpenAICompatProvider, get_provider
-from oshell.providers.base import Message
+from oshell.providers.base import Message, ToolCall, encode_chat_payload
 
 
 class _FakeResp:
@@ -17,6 +17,7 @@ class _FakeResp:
         self._lines = lines or []
         self.status_code = status_code
         self.text = text
+        self.closed = False
 
     def raise_for_status(self):
         pass
@@ -29,6 +30,22 @@ class _FakeResp:
     def iter_lines(self):
         yield from self._lines
 
+    def close(self):
+        self.closed = True
+
+
+def _patch_http(monkeypatch, verb, fake):
+    """Route the pooled transport's ``verb`` (get/post/delete) to ``fake``."""
+    monkeypatch.setattr(
+        f"oshell.providers.transport.HTTPTransport.{verb}",
+        lambda self, *a, **k: fake(*a, **k),
+    )
+
+
+def _body(kwargs) -> dict:
+    """The JSON a chat request sent (chat bodies are pre-encoded bytes)."""
+    return json.loads(kwargs["data"])
+
 
 def test_registry_selects_backend():
     assert isinstance(get_provider(Config()), OllamaProvider)
@@ -37,22 +54,65 @@ def test_registry_selects_backend():
         get_provider(ProviderConfig(name="nope"))
 
 
+def test_message_wire_json_is_memoized_until_fields_change():
+    m = Message(role="user", content="look", images=["aGk="])
+    first = m.wire_json()
+    assert m.wire_json() is first  # encoded once
+    assert not hasattr(m, "__dict__")  # __slots__: no per-instance dict
+    m.content = "look again"
+    assert json.loads(m.wire_json())["content"] == "look again"
+    m.images.append("aGk=")
+    assert len(json.loads(m.wire_json())["images"]) == 2
+
+
+def test_encode_chat_payload_matches_plain_json():
+    messages = [
+        Message(role="user", content="héllo"),
+        Message(role="assistant", tool_calls=[ToolCall(name="t", arguments={"a": [1]})]),
+    ]
+    fields = {"model": "m", "stream": True, "options": {"temperature": 0.2}}
+    body = json.loads(encode_chat_payload(messages, fields))
+    assert body == {**fields, "messages": [m.to_wire() for m in messages]}
+    assert json.loads(encode_chat_payload([], {})) == {"messages": []}
+
+
 def test_ollama_streaming_parse(monkeypatch):
     lines = [
         json.dumps({"message": {"content": "Hel"}, "done": False}).encode(),
         json.dumps({"message": {"content": "lo"}, "done": False}).encode(),
         json.dumps({"message": {"content": ""}, "done": True}).encode(),
     ]
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.post",
-        lambda *a, **k: _FakeResp(lines=lines),
-    )
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(lines=lines))
     prov = OllamaProvider()
     chunks = list(prov.chat([Message(role="user", content="hi")], model="m"))
     assert "".join(c.content for c in chunks) == "Hello"
     assert chunks[-1].done is True
 
 
+def test_ollama_final_chunk_carries_usage(monkeypatch):
+    done = {
+        "message": {"content": ""},
+        "done": True,
+        "prompt_eval_count": 400,
+        "prompt_eval_duration": 200_000_000,
+        "eval_count": 50,
+        "eval_duration": 1_000_000_000,
+        "load_duration": 3_000_000_000,
+    }
+    lines = [
+        json.dumps({"message": {"content": "Hi"}, "done": False}).encode(),
+        json.dumps(done).encode(),
+    ]
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(lines=lines))
+    chunks = list(OllamaProvider().chat([Message(role="user", content="hi")], model="m"))
+    assert chunks[0].usage is None
+    usage = chunks[-1].usage
+    assert (usage.prompt_tokens, usage.completion_tokens) == (400, 50)
+    assert usage.decode_rate == pytest.approx(50.0)
+    assert usage.prefill_rate == pytest.approx(2000.0)
+    assert usage.load_seconds == pytest.approx(3.0)
+
+
 def test_ollama_tool_calls_parse(monkeypatch):
     response = {
         "message": {
@@ -63,11 +123,8 @@ def test_ollama_tool_calls_parse(monkeypatch):
         },
         "done": True,
     }
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.post",
-        lambda *a, **k: _FakeResp(json_data=response),
-    )
-    prov = OllamaProvider()
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(json_data=response))
+    prov = OllamaProvider(stream_tools=False)
     tools = [{"type": "function", "function": {"name": "web_search"}}]
     chunks = list(prov.chat([Message(role="user", content="x")], model="m", tools=tools))
     assert len(chunks) == 1
@@ -84,15 +141,156 @@ def test_ollama_parses_stringified_arguments(monkeypatch):
         },
         "done": True,
     }
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.post",
-        lambda *a, **k: _FakeResp(json_data=response),
-    )
-    prov = OllamaProvider()
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(json_data=response))
+    prov = OllamaProvider(stream_tools=False)
     chunks = list(prov.chat([Message(role="user")], model="m", tools=[{}]))
     assert chunks[0].tool_calls[0].arguments == {"a": 1}
 
 
+# ── streaming tool calls ─────────────────────────────────────────────────────
+_SEARCH_CALL = {"function": {"name": "web_search", "arguments": {"query": "weather"}}}
+
+
+def test_ollama_streams_text_and_tool_calls(monkeypatch):
+    captured = {}
+    lines = [
+        json.dumps({"message": {"content": "Let me "}, "done": False}).encode(),
+        json.dumps({"message": {"content": "check."}, "done": False}).encode(),
+        json.dumps({"message": {"content": "", "tool_calls": [_SEARCH_CALL]}}).encode(),
+        json.dumps({"message": {"content": ""}, "done": True}).encode(),
+    ]
+
+    def fake_post(url, **k):
+        captured["stream"] = _body(k)["stream"]
+        return _FakeResp(lines=lines)
+
+    _patch_http(monkeypatch, "post", fake_post)
+    chunks = list(OllamaProvider().chat([Message(role="user")], model="m", tools=[{}]))
+    assert captured["stream"] is True  # tools no longer force a blocking response
+    assert [c.content for c in chunks[:2]] == ["Let me ", "check."]
+    assert all(not c.tool_calls for c in chunks[:-1])
+    assert chunks[-1].done and chunks[-1].tool_calls[0].arguments == {"query": "weather"}
+
+
+def test_ollama_stop_after_tool_call_closes_early(monkeypatch):
+    lines = [
+        json.dumps({"message": {"tool_calls": [_SEARCH_CALL]}, "done": False}).encode(),
+        json.dumps({"message": {"content": "trailing chatter"}, "done": False}).encode(),
+    ]
+    resp = _FakeResp(lines=lines)
+    _patch_http(monkeypatch, "post", lambda *a, **k: resp)
+    prov = OllamaProvider(stop_after_tool_call=True)
+    chunks = list(prov.chat([Message(role="user")], model="m", tools=[{}]))
+    assert len(chunks) == 1 and chunks[0].done
+    assert chunks[0].tool_calls[0].name == "web_search"
+    assert resp.closed
+
+
+def test_ollama_cancel_closes_the_stream_mid_reply(monkeypatch):
+    from oshell.cancellation import Cancelled, CancelToken
+
+    lines = [json.dumps({"message": {"content": w}, "done": False}).encode() for w in "abc"]
+    resp = _FakeResp(lines=lines)
+    _patch_http(monkeypatch, "post", lambda *a, **k: resp)
+    token = CancelToken()
+    stream = OllamaProvider().chat([Message(role="user")], model="m", cancel=token)
+    assert next(stream).content == "a"
+    token.cancel()
+    assert resp.closed  # closed from the cancelling thread: Ollama stops decoding
+    with pytest.raises(Cancelled):
+        next(stream)
+
+
+def _sse(*events) -> list[bytes]:
+    return [b"data: " + json.dumps(e).encode() for e in events] + [b"data: [DONE]"]
+
+
+def _delta(**delta) -> dict:
+    return {"choices": [{"delta": delta}]}
+
+
+def test_openai_assembles_streamed_tool_call_fragments(monkeypatch):
+    lines = _sse(
+        _delta(content="On it."),
+        _delta(tool_calls=[{"index": 0, "id": "c1", "function": {"name": "read_file"}}]),
+        _delta(tool_calls=[{"index": 1, "id": "c2", "function": {"name": "web_search"}}]),
+        _delta(tool_calls=[{"index": 0, "function": {"arguments": '{"pa'}}]),
+        _delta(tool_calls=[{"index": 1, "function": {"arguments": '{"query": "x"}'}}]),
+        _delta(tool_calls=[{"index": 0, "function": {"arguments": 'th": "a.txt"}'}}]),
+        {"choices": [{"delta": {}, "finish_reason": "tool_calls"}]},
+    )
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(lines=lines))
+    chunks = list(OpenAICompatProvider().chat([Message(role="user")], model="m", tools=[{}]))
+    assert chunks[0].content == "On it."
+    final = chunks[-1]
+    assert final.done
+    assert [(c.id, c.name, c.arguments) for c in final.tool_calls] == [
+        ("c1", "read_file", {"path": "a.txt"}),
+        ("c2", "web_search", {"query": "x"}),
+    ]
+
+
+def test_openai_stop_after_first_complete_call(monkeypatch):
+    lines = _sse(
+        _delta(tool_calls=[{"index": 0, "id": "c1", "function": {"name": "t", "arguments": "{"}}]),
+        _delta(tool_calls=[{"index": 0, "function": {"arguments": '"a": 1}'}}]),
+        _delta(content="never reached"),
+    )
+    resp = _FakeResp(lines=lines)
+    _patch_http(monkeypatch, "post", lambda *a, **k: resp)
+    prov = OpenAICompatProvider(stop_after_tool_call=True)
+    chunks = list(prov.chat([Message(role="user")], model="m", tools=[{}]))
+    assert "never reached" not in "".join(c.content for c in chunks)
+    assert chunks[-1].tool_calls[0].arguments == {"a": 1}
+    assert resp.closed
+
+
+def test_openai_stop_after_tool_call_waits_for_arguments_after_the_name(monkeypatch):
+    lines = _sse(
+        _delta(tool_calls=[{"index": 0, "id": "c1", "function": {"name": "t", "arguments": ""}}]),
+        _delta(tool_calls=[{"index": 0, "function": {"arguments": '{"path": '}}]),
+        _delta(tool_calls=[{"index": 0, "function": {"arguments": '"a.txt"}'}}]),
+        _delta(content="never reached"),
+    )
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(lines=lines))
+    prov = OpenAICompatProvider(stop_after_tool_call=True)
+    chunks = list(prov.chat([Message(role="user")], model="m", tools=[{}]))
+    assert chunks[-1].tool_calls[0].arguments == {"path": "a.txt"}
+    assert "never reached" not in "".join(c.content for c in chunks)
+
+
+def test_openai_stop_after_tool_call_keeps_content_from_the_completing_event(monkeypatch):
+    call = {"index": 0, "id": "c1", "function": {"name": "t", "arguments": '{"a": 1}'}}
+    lines = _sse(
+        _delta(content="Checking ", tool_calls=[call]),
+        _delta(content="never reached"),
+    )
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(lines=lines))
+    prov = OpenAICompatProvider(stop_after_tool_call=True)
+    chunks = list(prov.chat([Message(role="user")], model="m", tools=[{}]))
+    assert "".join(c.content for c in chunks) == "Checking "
+    assert chunks[-1].done and chunks[-1].tool_calls[0].arguments == {"a": 1}
+
+
+def test_openai_streams_usage_when_asked(monkeypatch):
+    sent = {}
+
+    def fake(*a, **k):
+        sent.update(_body(k))
+        lines = _sse(
+            _delta(content="ok"),
+            {"choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": 3}},
+        )
+        return _FakeResp(lines=lines)
+
+    _patch_http(monkeypatch, "post", fake)
+    chunks = list(OpenAICompatProvider().chat([Message(role="user")], model="m"))
+    assert sent["stream_options"] == {"include_usage": True}
+    usage = chunks[-1].usage
+    assert (usage.prompt_tokens, usage.completion_tokens) == (12, 3)
+    assert usage.decode_rate is None  # no timings from this backend
+
+
 # ── Live smoke test (skips when Ollama is not running) ──────────────────────
 def _ollama_up() -> bool:
     try:
@@ -117,9 +315,7 @@ def test_ollama_list_models_info_carries_badges(monkeypatch):
             {"name": "bare-model"},
         ]
     }
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.get", lambda *a, **k: _FakeResp(json_data=data)
-    )
+    _patch_http(monkeypatch, "get", lambda *a, **k: _FakeResp(json_data=data))
     infos = OllamaProvider().list_models_info()
     assert infos[0] == {"name": "gemma4:26b", "size": "26B", "quant": "Q8_0"}
     assert infos[1] == {"name": "bare-model"}  # missing details tolerated
@@ -145,9 +341,7 @@ def test_ollama_max_context_from_model_info(monkeypatch):
         "capabilities": ["completion", "tools"],
         "model_info": {"general.architecture": "gemma3", "gemma3.context_length": 131072},
     }
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.post", lambda *a, **k: _FakeResp(json_data=show)
-    )
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(json_data=show))
     prov = OllamaProvider()
     assert prov.max_context("gemma3:27b") == 131072
     # One /api/show serves both capabilities and max_context (cached).
@@ -155,9 +349,7 @@ def test_ollama_max_context_from_model_info(monkeypatch):
 
 
 def test_ollama_max_context_unknown(monkeypatch):
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.post", lambda *a, **k: _FakeResp(json_data={})
-    )
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(json_data={}))
     assert OllamaProvider().max_context("mystery") is None
 
 
@@ -170,9 +362,7 @@ def test_ollama_pull_streams_progress_and_drops_show_cache(monkeypatch):
         json.dumps({"status": "pulling abc123", "total": 100, "completed": 50}).encode(),
         json.dumps({"status": "success"}).encode(),
     ]
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.post", lambda *a, **k: _FakeResp(lines=lines)
-    )
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(lines=lines))
     prov = OllamaProvider()
     prov._show_cache["m"] = {"capabilities": ["stale"]}  # re-pull must invalidate
     steps = list(prov.pull_model("m"))
@@ -187,16 +377,15 @@ def test_ollama_pull_raises_on_midstream_error(monkeypatch):
         json.dumps({"status": "pulling manifest"}).encode(),
         json.dumps({"error": "pull model manifest: file does not exist"}).encode(),
     ]
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.post", lambda *a, **k: _FakeResp(lines=lines)
-    )
+    _patch_http(monkeypatch, "post", lambda *a, **k: _FakeResp(lines=lines))
     with pytest.raises(RuntimeError, match="file does not exist"):
         list(OllamaProvider().pull_model("nope"))
 
 
 def test_ollama_pull_raises_on_http_error(monkeypatch):
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.post",
+    _patch_http(
+        monkeypatch,
+        "post",
         lambda *a, **k: _FakeResp(status_code=500, json_data={"error": "registry unreachable"}),
     )
     with pytest.raises(RuntimeError, match="registry unreachable"):
@@ -211,7 +400,7 @@ def test_ollama_delete_and_cache_invalidation(monkeypatch):
         captured["json"] = json
         return _FakeResp(status_code=200)
 
-    monkeypatch.setattr("oshell.providers.ollama.requests.delete", fake_delete)
+    _patch_http(monkeypatch, "delete", fake_delete)
     prov = OllamaProvider()
     prov._show_cache["old:7b"] = {}
     prov.delete_model("old:7b")
@@ -221,8 +410,9 @@ def test_ollama_delete_and_cache_invalidation(monkeypatch):
 
 
 def test_ollama_delete_missing_model_raises(monkeypatch):
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.delete",
+    _patch_http(
+        monkeypatch,
+        "delete",
         lambda *a, **k: _FakeResp(status_code=404, json_data={"error": "model 'x' not found"}),
     )
     with pytest.raises(RuntimeError, match="not found"):
@@ -252,9 +442,7 @@ def test_model_management_gating():
 
 def test_ollama_disk_size_badge(monkeypatch):
     data = {"models": [{"name": "m", "size": 17_700_000_000}]}
-    monkeypatch.setattr(
-        "oshell.providers.ollama.requests.get", lambda *a, **k: _FakeResp(json_data=data)
-    )
+    _patch_http(monkeypatch, "get", lambda *a, **k: _FakeResp(json_data=data))
     infos = OllamaProvider().list_models_info()
     assert infos[0]["disk"] == "16.5 GB"
 
@@ -262,12 +450,12 @@ def test_ollama_disk_size_badge(monkeypatch):
 def test_ollama_chat_passes_num_ctx(monkeypatch):
     captured = {}
 
-    def fake_post(url, json=None, stream=False, timeout=None):
-        captured.update(json)
+    def fake_post(url, **k):
+        captured.update(_body(k))
         lines = [b'{"message": {"content": "ok"}, "done": true}']
         return _FakeResp(lines=lines)
 
-    monkeypatch.setattr("oshell.providers.ollama.requests.post", fake_post)
+    _patch_http(monkeypatch, "post", fake_post)
     prov = OllamaProvider()
     list(prov.chat([Message(role="user", content="hi")], model="m", num_ctx=32768))
     assert captured["options"]["num_ctx"] == 32768
@@ -275,3 +463,79 @@ def test_ollama_chat_passes_num_ctx(monkeypatch):
     captured.clear()
     list(prov.chat([Message(role="user", content="hi")], model="m"))
     assert "num_ctx" not in captured["options"]
+
+
+def test_ollama_chat_sends_keep_alive_when_configured(monkeypatch):
+    captured = {}
+
+    def fake_post(url, **k):
+        captured.update(_body(k))
+        return _FakeResp(lines=[b'{"message": {"content": "ok"}, "done": true}'])
+
+    _patch_http(monkeypatch, "post", fake_post)
+    list(OllamaProvider().chat([Message(role="user", content="hi")], model="m"))
+    assert "keep_alive" not in captured  # server default unless asked
+    prov = get_provider(ProviderConfig(keep_alive="30m"))
+    list(prov.chat([Message(role="user", content="hi")], model="m"))
+    assert captured["keep_alive"] == "30m"
+
+
+# ── persistent model metadata cache ──────────────────────────────────────────
+def _counting_backend(monkeypatch, tags, show):
+    counts = {"tags": 0, "show": 0}
+
+    def fake_get(url, **k):
+        counts["tags"] += 1
+        return _FakeResp(json_data={"models": tags})
+
+    def fake_post(url, json=None, **k):
+        counts["show"] += 1
+        return _FakeResp(json_data=show)
+
+    _patch_http(monkeypatch, "get", fake_get)
+    _patch_http(monkeypatch, "post", fake_post)
+    return counts
+
+
+def test_metadata_cache_survives_across_processes(monkeypatch, tmp_path):
+    tags = [{"name": "gemma3:27b", "digest": "abc123"}]
+    show = {"capabilities": ["tools", "vision"], "model_info": {"g.context_length": 131072}}
+    counts = _counting_backend(monkeypatch, tags, show)
+    cfg = ProviderConfig(cache_dir=str(tmp_path / "cache"))
+
+    first = get_provider(cfg)  # a cold start: one tags listing, one show
+    assert first.list_models() == ["gemma3:27b"]
+    assert first.capabilities("gemma3:27b") == {"tools", "vision"}
+    assert first.max_context("gemma3:27b") == 131072
+    assert counts == {"tags": 1, "show": 1}
+
+    second = get_provider(cfg)  # the next `oshell ask`: everything from disk
+    assert second.max_context("gemma3:27b") == 131072
+    assert second.list_models_info() == [{"name": "gemma3:27b"}]
+    assert counts == {"tags": 1, "show": 1}
+
+
+def test_metadata_cache_follows_digest_and_pull_invalidates(monkeypatch, tmp_path):
+    tags = [{"name": "m:7b", "digest": "old"}]
+    counts = _counting_backend(monkeypatch, tags, {"capabilities": ["tools"]})
+    cfg = ProviderConfig(cache_dir=str(tmp_path / "cache"))
+    prov = get_provider(cfg)
+    prov.capabilities("m:7b")
+    prov._forget("m:7b")  # what pull_model/delete_model do on success
+    tags[0]["digest"] = "new"  # re-pulled: new weights, new digest
+    fresh = get_provider(cfg)
+    fresh.capabilities("m:7b")
+    assert counts == {"tags": 2, "show": 2}  # listing refetched, new digest looked up
+
+
+def test_metadata_cache_ttl_expires_listing(monkeypatch, tmp_path):
+    counts = _counting_backend(monkeypatch, [{"name": "m", "digest": "d"}], {})
+    cfg = ProviderConfig(cache_dir=str(tmp_path / "cache"), metadata_ttl=300)
+    get_provider(cfg).list_models()
+    get_provider(cfg).list_models()
+    assert counts["tags"] == 1
+    monkeypatch.setattr("oshell.providers.metadata.time.time", lambda: 10**12)
+    get_provider(cfg).list_models()
+    assert counts["tags"] == 2
+    # And health is always a real round-trip, never the cached listing.
+    assert get_provider(cfg).health() and counts["tags"] == 3
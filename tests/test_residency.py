@@ -0,0 +1,161 @@
+"""Model residency: /api/ps polling, warm-up, LRU / memory-budget unloading."""
+
+from __future__ import annotations
+
+import threading
+
+from oshell.config import Config, ResidencyConfig
+from oshell.providers import OllamaProvider, OpenAICompatProvider
+from oshell.providers.base import ChatChunk, LLMProvider
+from oshell.providers.residency import ResidencyManager
+
+GB = 1024**3
+
+
+class _Backend(LLMProvider):
+    """A fake Ollama: tracks loaded models, counts /api/ps polls."""
+
+    name = "fake"
+
+    def __init__(self, loaded=None):
+        self.loaded: dict[str, int] = dict(loaded or {})  # name -> bytes
+        self.polls = 0
+        self.unloaded: list[str] = []
+        self.contexts: dict[str, int | None] = {}
+
+    def list_models(self):
+        return ["a", "b", "c"]
+
+    def chat(self, messages, **kwargs):
+        yield ChatChunk(content="ok", done=True)
+
+    def supports_residency(self):
+        return True
+
+    def running_models(self):
+        self.polls += 1
+        return [{"name": n, "size": s} for n, s in self.loaded.items()]
+
+    def load_model(self, name, num_ctx=None):
+        if name == "missing":
+            raise RuntimeError("model not found")
+        self.loaded[name] = 4 * GB
+        self.contexts[name] = num_ctx
+
+    def unload_model(self, name):
+        self.loaded.pop(name)
+        self.unloaded.append(name)
+
+
+def test_manager_only_for_backends_that_report_residency():
+    cfg = ResidencyConfig()
+    assert ResidencyManager.for_provider(OllamaProvider(), cfg) is not None
+    assert ResidencyManager.for_provider(OpenAICompatProvider(), cfg) is None
+    assert ResidencyManager.for_provider(OllamaProvider(), ResidencyConfig(enabled=False)) is None
+
+
+def test_resident_is_polled_at_most_every_interval():
+    backend = _Backend({"a:latest": GB})
+    mgr = ResidencyManager(backend, ResidencyConfig(poll_interval=60))
+    assert mgr.is_resident("a")  # bare name matches Ollama's ":latest"
+    assert mgr.resident() == {"a:latest"}
+    assert backend.polls == 1
+    mgr.refresh(force=True)
+    assert backend.polls == 2
+
+
+def test_failed_poll_keeps_last_known_state():
+    backend = _Backend({"a": GB})
+    mgr = ResidencyManager(backend, ResidencyConfig(poll_interval=0))
+    assert mgr.resident() == {"a"}
+    backend.running_models = lambda: (_ for _ in ()).throw(ConnectionError("down"))
+    assert mgr.resident() == {"a"}
+
+
+def test_warm_up_loads_missing_models_and_skips_failures():
+    backend = _Backend({"a": GB})
+    mgr = ResidencyManager(backend, ResidencyConfig(poll_interval=0))
+    mgr.warm_up_async(["a", "b", "missing", "b", ""]).join(timeout=5)
+    assert set(backend.loaded) == {"a", "b"}
+    assert mgr.prefer(["missing", "b", "a"]) == "b"
+
+
+def test_lru_policy_unloads_least_recently_used():
+    backend = _Backend({"a": GB, "b": GB, "c": GB})
+    mgr = ResidencyManager(backend, ResidencyConfig(policy="lru", max_models=2, poll_interval=0))
+    for name in ("b", "a", "c"):
+        mgr.touch(name, enforce=False)
+    assert mgr.enforce() == ["b"]
+    assert set(backend.loaded) == {"a", "c"}
+
+
+class _SlowPoll(_Backend):
+    """/api/ps blocks until released, holding the first unload pass open."""
+
+    def __init__(self, loaded):
+        super().__init__(loaded)
+        self.release = threading.Event()
+
+    def running_models(self):
+        self.release.wait(5)
+        return super().running_models()
+
+
+def test_touch_runs_one_unload_pass_at_a_time():
+    backend = _SlowPoll({"a": GB, "b": GB, "c": GB})
+    mgr = ResidencyManager(backend, ResidencyConfig(policy="lru", max_models=2, poll_interval=0))
+    for name in ("b", "a", "c", "c", "c"):  # every turn touches; the first pass is stuck
+        mgr.touch(name)
+    backend.release.set()
+    for t in threading.enumerate():
+        if t.name == "oshell-unload":
+            t.join(5)
+    assert backend.polls == 1 and backend.unloaded == ["b"]
+    mgr.touch("c")  # the pass finished: the next turn may start another
+    for t in threading.enumerate():
+        if t.name == "oshell-unload":
+            t.join(5)
+    assert backend.polls == 2
+
+
+def test_budget_policy_keeps_total_size_under_budget():
+    backend = _Backend({"big": 10 * GB, "mid": 6 * GB, "small": 2 * GB})
+    cfg = ResidencyConfig(policy="budget", memory_budget_gb=12, poll_interval=0)
+    mgr = ResidencyManager(backend, cfg)
+    for name in ("mid", "small", "big"):
+        mgr.touch(name, enforce=False)
+    # Evicts oldest first until under budget; the active model ("big") stays.
+    assert mgr.enforce() == ["mid"]
+    assert set(backend.loaded) == {"big", "small"}
+
+
+def test_compaction_prefers_a_resident_summarizer():
+    from oshell.agent import Agent
+    from oshell.tools import ToolRegistry
+
+    backend = _Backend({"main": GB})
+    cfg = Config()
+    cfg.routing.fast_model = "fast:4b"
+    mgr = ResidencyManager(backend, cfg.residency)
+    agent = Agent(backend, ToolRegistry([]), cfg, model="main", residency=mgr)
+    assert agent._summarizer() == "main"  # fast model is cold; don't load it
+    backend.loaded["fast:4b"] = GB
+    mgr.refresh(force=True)
+    assert agent._summarizer() == "fast:4b"
+
+
+def test_agent_warm_up_keeps_the_active_model_and_loads_at_its_context():
+    from oshell.agent import Agent
+    from oshell.tools import ToolRegistry
+
+    backend = _Backend()
+    cfg = Config(context_length=16384)
+    cfg.residency = ResidencyConfig(policy="lru", max_models=2, poll_interval=0)
+    cfg.routing.enabled = True
+    cfg.routing.fast_model, cfg.routing.deep_model = "fast", "deep"
+    mgr = ResidencyManager(backend, cfg.residency)
+    agent = Agent(backend, ToolRegistry([]), cfg, model="main", residency=mgr)
+    agent.warm_up()
+    mgr._warm_thread.join(timeout=5)
+    assert "main" in backend.loaded and backend.unloaded == ["fast"]
+    assert backend.contexts == {"main": 16384, "fast": 16384, "deep": 16384}
@@ -0,0 +1,165 @@
+"""Deterministic response cache: keying, replay, LRU bound, stats."""
+
+from __future__ import annotations
+
+import os
+
+from oshell.config import ProviderConfig, ResponseCacheConfig
+from oshell.providers import CachingProvider, get_provider
+from oshell.providers.base import ChatChunk, LLMProvider, Message, TokenUsage, ToolCall
+from oshell.providers.response_cache import ResponseCache
+
+
+class _Counting(LLMProvider):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def list_models(self):
+        return ["m"]
+
+    def chat(self, messages, **kwargs):
+        self.calls += 1
+        yield ChatChunk(content="Hel")
+        yield ChatChunk(
+            content="lo",
+            tool_calls=[ToolCall("t", {"a": 1}, id="c1")],
+            done=True,
+            usage=TokenUsage(prompt_tokens=12, completion_tokens=2, prompt_seconds=0.5),
+        )
+
+
+def _caching(tmp_path, max_bytes=10**6, **kw):
+    inner = _Counting()
+    return CachingProvider(inner, ResponseCache(tmp_path / "rc", max_bytes), **kw), inner
+
+
+def _ask(provider, text="hi", **kw):
+    kw.setdefault("temperature", 0.0)
+    return list(provider.chat([Message(role="user", content=text)], model="m", **kw))
+
+
+def test_repeat_call_replays_chunks_without_the_backend(tmp_path):
+    provider, inner = _caching(tmp_path)
+    first = _ask(provider)
+    again = _ask(provider)
+    assert inner.calls == 1
+    assert [(c.content, c.tool_calls, c.done) for c in again] == [
+        (c.content, c.tool_calls, c.done) for c in first
+    ]  # same chunks, same order, tool calls intact
+    stats = provider.cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+    assert stats.bytes_served > 0
+
+
+def test_a_hit_replays_token_counts_but_not_timings(tmp_path):
+    provider, _ = _caching(tmp_path)
+    _ask(provider)
+    usage = _ask(provider)[-1].usage
+    assert usage is not None
+    assert (usage.prompt_tokens, usage.completion_tokens) == (12, 2)
+    assert usage.prompt_seconds is None  # no prefill happened on a hit
+
+
+def test_key_covers_everything_that_shapes_the_reply(tmp_path):
+    provider, inner = _caching(tmp_path, max_temperature=0.5)
+    _ask(provider)
+    _ask(provider, text="other")
+    _ask(provider, tools=[{"type": "function", "function": {"name": "x"}}])
+    _ask(provider, num_ctx=4096)
+    _ask(provider, temperature=0.2)
+    assert inner.calls == 5
+
+
+def test_nondeterministic_calls_bypass_the_cache(tmp_path):
+    provider, inner = _caching(tmp_path)
+    _ask(provider, temperature=0.7)
+    _ask(provider, temperature=0.7)
+    assert inner.calls == 2
+    assert provider.cache.stats().entries == 0
+
+
+def test_abandoned_stream_is_not_stored(tmp_path):
+    provider, inner = _caching(tmp_path)
+    stream = provider.chat([Message(role="user", content="hi")], model="m", temperature=0.0)
+    next(stream)
+    stream.close()
+    _ask(provider)
+    assert inner.calls == 2  # the truncated first attempt was never cached
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    provider, _ = _caching(tmp_path, max_bytes=400)  # room for two ~150-byte entries
+    _ask(provider, text="a")
+    entry_a = next((tmp_path / "rc").glob("*.json"))
+    os.utime(entry_a, (1, 1))  # long ago
+    _ask(provider, text="b")
+    _ask(provider, text="c")
+    names = {p.name for p in (tmp_path / "rc").glob("*.json")} - {"stats.json"}
+    assert entry_a.name not in names  # oldest went first
+    assert provider.cache.stats().size_bytes <= 400
+
+
+def test_get_provider_wraps_only_when_enabled(tmp_path):
+    assert not isinstance(get_provider(ProviderConfig()), CachingProvider)
+    rc = ResponseCacheConfig(enabled=True, dir=str(tmp_path / "rc"))
+    wrapped = get_provider(ProviderConfig(response_cache=rc))
+    assert isinstance(wrapped, CachingProvider)
+    assert wrapped.name == "ollama"  # UI labels still show the real backend
+
+
+def test_stats_file_is_never_seen_half_written(tmp_path):
+    import json
+    import threading
+
+    # Two caches on one directory stand in for two oshell processes.
+    root = tmp_path / "cache"
+    caches = [ResponseCache(root, 1 << 20) for _ in range(2)]
+    stop = threading.Event()
+    torn: list[str] = []
+
+    def read() -> None:
+        while not stop.is_set():
+            try:
+                json.loads((root / "stats.json").read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                continue
+            except ValueError as exc:
+                torn.append(str(exc))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    writers = [
+        threading.Thread(target=lambda c=c: [c.get("absent") for _ in range(200)]) for c in caches
+    ]
+    for w in writers:
+        w.start()
+    for w in writers:
+        w.join()
+    stop.set()
+    reader.join()
+    assert not torn
+    assert caches[0].stats().misses == 400  # no update lost between the two
+    assert sorted(p.name for p in root.iterdir()) == ["stats.json", "stats.lock"]
+
+
+def _miss_many(root: str, n: int) -> None:
+    cache = ResponseCache(root, 1 << 20)
+    for _ in range(n):
+        cache.get("absent")
+
+
+def test_stats_counts_survive_parallel_processes(tmp_path):
+    import multiprocessing
+
+    # Separate processes share no thread lock: only the file lock keeps
+    # their read-modify-write cycles from dropping each other's counts.
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_miss_many, args=(str(tmp_path), 100)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+    assert [p.exitcode for p in procs] == [0, 0, 0]
+    assert ResponseCache(tmp_path, 1 << 20).stats().misses == 300
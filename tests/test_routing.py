@@ -33,3 +33,17 @@ def test_pick_model_stays_put_when_moot():
     # Empty slot: nothing configured for the bucket -> no switch.
     sparse = RoutingConfig(enabled=True, deep_model="deep:31b")
     assert pick_model("hi", False, sparse, "current") is None
+
+
+def test_pick_model_prefers_resident_for_quick_questions():
+    # Fast model cold, current model loaded: a quick question stays put...
+    assert pick_model("hi", False, CFG, "deep:31b", resident={"deep:31b"}) is None
+    # ...but only when it would otherwise mean a cold load.
+    both = {"deep:31b", "fast:4b"}
+    assert pick_model("hi", False, CFG, "deep:31b", resident=both)[0] == "fast:4b"
+    # Deep and vision turns need their model, loaded or not.
+    got = pick_model("refactor this step by step", False, CFG, "fast:4b", resident={"fast:4b"})
+    assert got[0] == "deep:31b"
+    # And it can be switched off.
+    eager = CFG.model_copy(update={"prefer_resident": False})
+    assert pick_model("hi", False, eager, "deep:31b", resident={"deep:31b"})[0] == "fast:4b"
@@ -0,0 +1,198 @@
+"""Per-turn tool selection: the lexical index, the selector, find_tools, the loop."""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from typing import Any
+
+from oshell.agent import Agent
+from oshell.config import Config
+from oshell.providers.base import ChatChunk, LLMProvider, Message, ToolCall
+from oshell.tools import ToolRegistry
+from oshell.tools.base import Tool
+from oshell.tools.selection import FindToolsTool, ToolIndex, ToolSelector, terms
+
+
+class _Named(Tool):
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+
+    def run(self, **_: Any) -> str:
+        return f"{self.name} ran"
+
+
+_TOOLS = [
+    ("read_file", "Read a text file from the workspace."),
+    ("run_command", "Run a shell command."),
+    ("jira_search", "Search Jira issues with JQL."),
+    ("jira_get_issue", "Fetch one Jira issue by key."),
+    ("confluence_search", "Search Confluence pages."),
+    ("browser_click", "Click at a point on the hidden browser page."),
+    ("browser_open", "Open a URL in the hidden browser."),
+    ("mechanic_baseline_for", "Runtime baseline of a metric on this machine."),
+    ("drift_changes", "What changed on this machine since a point in time."),
+    ("remember", "Store a fact about the user in long-term memory."),
+    ("create_document", "Create a Word, PDF or Markdown document."),
+    ("gui_type", "Type text into the focused desktop window."),
+]
+
+
+def _registry(min_tools: int = 8) -> ToolRegistry:
+    selector = ToolSelector(core=["read_file", "run_command"], top_k=2, min_tools=min_tools)
+    tools: list[Tool] = [_Named(n, d) for n, d in _TOOLS]
+    return ToolRegistry([*tools, FindToolsTool(selector)], selector=selector)
+
+
+def _names(specs: list[dict[str, Any]] | None) -> list[str]:
+    return [s["function"]["name"] for s in specs or []]
+
+
+def test_terms_split_names_and_stem_plurals():
+    assert terms("jira_get_issue") == ["jira", "issue"]
+    assert terms("Searching the files") == ["search", "file"]
+    assert terms("searches boxes class") == ["search", "box", "class"]
+
+
+def test_index_ranks_by_name_and_description():
+    reg = _registry()
+    index = ToolIndex(reg.specs())
+    top = [name for name, _ in index.search("look up jira issue ABC-12", 2)]
+    assert set(top) == {"jira_get_issue", "jira_search"}
+    assert index.search("zebra quantum") == []
+
+
+def test_selector_sends_core_matches_and_recent_tools_and_reports_savings():
+    reg = _registry()
+    specs = reg.specs()
+    chosen = _names(reg.selector.select(specs, "open example.com in the browser", ["remember"]))
+    assert chosen[:2] == ["read_file", "run_command"]  # registry order is kept
+    assert {"browser_open", "remember", "find_tools"} <= set(chosen)
+    assert "jira_search" not in chosen and "gui_type" not in chosen
+    last = reg.selector.last
+    assert last.available == len(specs) and last.advertised == chosen
+    assert 0 < last.tokens < last.tokens_all and last.saved == last.tokens_all - last.tokens
+    assert reg.selector.saved_total == last.saved
+
+
+def test_small_tool_sets_are_sent_whole_without_find_tools():
+    reg = _registry(min_tools=50)
+    chosen = _names(reg.selector.select(reg.specs(), "anything"))
+    assert chosen == [n for n, _ in _TOOLS]
+    assert reg.selector.last is None
+
+
+def test_find_tools_pulls_matches_into_later_rounds():
+    reg = _registry()
+    specs = reg.specs()
+    reg.selector.select(specs, "hello")
+    out = reg.dispatch(ToolCall(name="find_tools", arguments={"query": "machine baseline"}))
+    assert "mechanic_baseline_for" in out and "Runtime baseline" in out
+    assert "mechanic_baseline_for" in _names(reg.selector.select(specs, "hello"))
+    assert "no tools match" in reg.dispatch(
+        ToolCall(name="find_tools", arguments={"query": "zebra"})
+    )
+
+
+class _Recorder(LLMProvider):
+    """Calls find_tools, then the tool it found; records what each round offered."""
+
+    name = "recorder"
+
+    def __init__(self) -> None:
+        self.offered: list[list[str]] = []
+
+    def list_models(self) -> list[str]:
+        return ["m"]
+
+    def chat(self, messages: list[Message], tools=None, **kw: Any) -> Iterator[ChatChunk]:
+        self.offered.append(_names(tools))
+        step = len(self.offered)
+        if step == 1:
+            call = ToolCall(name="find_tools", arguments={"query": "confluence pages"})
+            yield ChatChunk(tool_calls=[call], done=True)
+        elif step == 2:
+            call = ToolCall(name="confluence_search", arguments={})
+            yield ChatChunk(tool_calls=[call], done=True)
+        else:
+            yield ChatChunk(content="done", done=True)
+
+
+def test_agent_offers_a_subset_and_grows_it_through_find_tools():
+    provider = _Recorder()
+    agent = Agent(provider, _registry(), Config())
+    prompt = agent.messages[0].content
+    assert "- read_file:" in prompt and "- jira_search:" not in prompt
+    assert "jira_search" in prompt and "find_tools" in prompt  # named, not described
+    list(agent.send("what's the weather like"))
+    first, second, third = provider.offered
+    assert "confluence_search" not in first and "find_tools" in first
+    assert "confluence_search" in second  # pulled in by find_tools
+    assert "confluence_search" in third and "find_tools" in third  # recently used
+    assert agent.tool_selection is not None and agent.tool_selection.saved > 0
+
+
+def test_prompt_and_selection_agree_on_whether_to_trim():
+    # 12 tools, 2 of them hidden by read-only mode: at min_tools=11 the turn
+    # offers 10, so every schema is sent and the prompt must describe them all.
+    tools: list[Tool] = [_Named(n, d) for n, d in _TOOLS]
+    for t in tools[-2:]:
+        t.sensitive = True
+    selector = ToolSelector(core=["read_file", "run_command"], top_k=2, min_tools=11)
+    reg = ToolRegistry([*tools, FindToolsTool(selector)], selector=selector)
+    provider = _Recorder()
+    agent = Agent(provider, reg, Config(approvals="read-only"))
+    assert "- jira_search:" in agent.messages[0].content
+    list(agent.send("what's the weather like"))
+    assert provider.offered[0] == [n for n, _ in _TOOLS[:-2]]
+    agent.config.approvals = "auto"
+    agent.rebuild_system_prompt()
+    assert "- jira_search:" not in agent.messages[0].content  # now 12 offered: trimmed
+
+
+class _Steps(LLMProvider):
+    """Plays one step per round (a tool to call, or None to answer); keeps each
+    round's ``tools`` exactly as it would be encoded."""
+
+    name = "steps"
+
+    def __init__(self, steps: list[ToolCall | None]) -> None:
+        self.steps = steps
+        self.payloads: list[bytes] = []
+
+    def list_models(self) -> list[str]:
+        return ["m"]
+
+    def chat(self, messages: list[Message], tools=None, **kw: Any) -> Iterator[ChatChunk]:
+        self.payloads.append(json.dumps(tools).encode())
+        step = self.steps[len(self.payloads) - 1]
+        yield ChatChunk(
+            content="" if step else "done", tool_calls=[step] if step else [], done=True
+        )
+
+
+def test_tools_payload_is_byte_stable_across_a_turns_rounds():
+    selector = ToolSelector(core=["read_file", "run_command"], top_k=2, recent=1, min_tools=8)
+    tools: list[Tool] = [_Named(n, d) for n, d in _TOOLS]
+    reg = ToolRegistry([*tools, FindToolsTool(selector)], selector=selector)
+    provider = _Steps(
+        [
+            ToolCall(name="browser_open", arguments={}),  # turn 1
+            None,
+            ToolCall(name="read_file", arguments={}),  # turn 2: browser_open leaves "recent"
+            ToolCall(name="find_tools", arguments={"query": "confluence pages"}),
+            ToolCall(name="confluence_search", arguments={}),
+            None,
+        ]
+    )
+    agent = Agent(provider, reg, Config())
+    list(agent.send("open the browser"))
+    list(agent.send("read my notes"))
+    first, second, third, last = provider.payloads[2:]
+    assert first == second  # the same bytes, though browser_open left "recent"
+    assert "browser_open" in _names(json.loads(first))
+    before, grown = _names(json.loads(second)), _names(json.loads(third))
+    assert grown[: len(before)] == before  # find_tools ran: its hits join at the end
+    assert "confluence_search" in grown[len(before) :]
+    assert last == third
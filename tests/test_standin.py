@@ -0,0 +1,68 @@
+"""The stand-in server, driven through the real Ollama and OpenAI providers."""
+
+from __future__ import annotations
+
+import pytest
+import requests
+
+from oshell import bench
+from oshell.providers import OllamaProvider, OpenAICompatProvider
+from oshell.providers.base import Message
+from oshell.standin import Behavior, StandInServer
+
+_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "read_file",
+            "description": "Read a file.",
+            "parameters": {
+                "type": "object",
+                "properties": {"path": {"type": "string"}},
+                "required": ["path"],
+            },
+        },
+    }
+]
+
+
+@pytest.fixture
+def standin():
+    with StandInServer(Behavior(ttft=0, tokens_per_s=0, reply_tokens=5, seed=7)) as server:
+        yield server
+
+
+def test_ollama_provider_streams_text_and_reads_metadata(standin):
+    provider = OllamaProvider(standin.url)
+    assert provider.list_models() == ["standin:latest"]
+    assert "tools" in provider.capabilities("standin:latest")
+    assert provider.max_context("standin:latest") == 8192
+    chunks = list(provider.chat([Message(role="user", content="hi")], model="standin:latest"))
+    assert "".join(c.content for c in chunks) == "the quick local model streams "
+    assert chunks[-1].done and chunks[-1].usage.completion_tokens == 5
+    assert provider.running_models()[0]["name"] == "standin:latest"
+
+
+def test_tool_calls_arrive_whole_over_ndjson_and_sse(standin):
+    standin.behavior.tool_rate = 1.0
+    ask = [Message(role="user", content="read it")]
+    for provider in (OllamaProvider(standin.url), OpenAICompatProvider(standin.url)):
+        [call] = list(provider.chat(ask, model="standin:latest", tools=_TOOLS))[-1].tool_calls
+        assert (call.name, call.arguments) == ("read_file", {"path": "stand-in"})
+    answered = [*ask, Message(role="tool", content="contents")]  # a tool result gets text
+    chunks = list(OpenAICompatProvider(standin.url).chat(answered, model="m", tools=_TOOLS))
+    assert not chunks[-1].tool_calls and "".join(c.content for c in chunks)
+    assert standin.stats.tool_calls == 2
+
+
+def test_injected_errors_and_the_e2e_report(standin):
+    standin.behavior.error_rate = 1.0
+    with pytest.raises(requests.HTTPError):
+        list(OllamaProvider(standin.url).chat([], model="standin:latest"))
+    standin.behavior.error_rate = 0.0
+    standin.behavior.tool_rate = 0.5
+    report = bench.e2e(standin.url, backend="openai", sessions=3, turns=2)
+    assert report["turns_failed"] == 0 and report["requests"] >= 6
+    assert report["tokens"] == 5 * 6  # one text reply per turn
+    assert 0 < report["ttft_ms"]["p50"] <= report["ttft_ms"]["p95"]
+    assert report["tokens_per_s"] > 0
@@ -153,6 +153,28 @@ def test_persistent_run_command_tool_keeps_cwd(tmp_path):
     assert "deep" in out and "[exit 0]" in out
 
 
+@posix_only
+def test_persistent_session_stops_a_command_on_cancel(tmp_path):
+    import threading
+    import time
+
+    from oshell.cancellation import Cancelled, CancelToken
+    from oshell.tools.shell_session import ShellSession
+
+    s = ShellSession(tmp_path)
+    try:
+        token = CancelToken()
+        threading.Timer(0.2, token.cancel).start()
+        t0 = time.monotonic()
+        with pytest.raises(Cancelled):
+            s.run("sleep 30", 60, cancel=token)
+        assert time.monotonic() - t0 < 5
+        out, code = s.run("echo back", 10)  # a fresh shell takes over
+        assert code == 0 and "back" in out
+    finally:
+        s.close()
+
+
 def test_session_kind_selected_by_platform(monkeypatch):
     import oshell.tools.shell_session as ss
 
@@ -205,3 +227,63 @@ def test_persistent_timeout_raises(tmp_path):
     reg = ToolRegistry([RunCommandTool(tmp_path, ShellConfig(persistent=True, timeout=0.5))])
     out = reg.dispatch(ToolCall(name="run_command", arguments={"command": "sleep 5"}))
     assert out.startswith("[error]") and "timed out" in out
+
+
+@pytest.mark.parametrize("persistent", [False, pytest.param(True, marks=posix_only)])
+def test_run_command_streams_output_as_progress(tmp_path, persistent):
+    reg = ToolRegistry([RunCommandTool(tmp_path, ShellConfig(persistent=persistent))])
+    seen: list[str] = []
+    cmd = _py("import sys;[print(f'step {i}', flush=True) for i in range(3)]")
+    out = reg.dispatch_full(
+        ToolCall(name="run_command", arguments={"command": cmd}), progress=seen.append
+    ).text
+    assert "".join(seen).split() == ["step", "0", "step", "1", "step", "2"]
+    assert "step 2" in out and "[exit 0]" in out
+
+
+def test_oneshot_keeps_the_tail_of_a_large_output(tmp_path):
+    tool = RunCommandTool(tmp_path)
+    out, code = tool._run_oneshot(_py("[print(i) for i in range(200000)]"), 30)
+    assert code == 0 and out.rstrip().endswith("199999")
+
+
+@posix_only
+def test_oneshot_cancel_kills_the_commands_children(tmp_path):
+    import os
+    import threading
+    import time
+
+    from oshell import cancellation
+    from oshell.cancellation import Cancelled, CancelToken
+
+    tool = RunCommandTool(tmp_path)
+    token = CancelToken()
+    threading.Timer(0.5, token.cancel).start()
+    with cancellation.use(token), pytest.raises(Cancelled):
+        tool._run_oneshot("sleep 30 & echo $! > child.pid; wait", 60)
+    pid = int((tmp_path / "child.pid").read_text())
+    stat = f"/proc/{pid}/stat"
+    for _ in range(50):  # the kill is asynchronous; a zombie counts as dead
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            break
+        if os.path.exists(stat) and open(stat).read().split(")")[-1].split()[0] == "Z":
+            break
+        time.sleep(0.1)
+    else:
+        os.kill(pid, 9)
+        raise AssertionError("the backgrounded child outlived the cancelled command")
+
+
+@posix_only
+def test_oneshot_deadline_holds_when_a_background_child_keeps_the_pipe(tmp_path):
+    import time
+
+    from oshell.tools.base import ToolError
+
+    tool = RunCommandTool(tmp_path)
+    start = time.monotonic()
+    with pytest.raises(ToolError, match="timed out"):
+        tool._run_oneshot("echo hi; sleep 8 &", 1)
+    assert time.monotonic() - start < 5
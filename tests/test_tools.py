@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
-from oshell.providers.base import ToolCall
-from oshell.tools import ToolRegistry
+from oshell.agent import Agent, ToolFinished
+from oshell.bench import Reply, ScriptedProvider
+from oshell.config import Config
+from oshell.providers.base import LLMProvider, ToolCall
+from oshell.tools import CachePolicy, RegistryBuilder, ToolError, ToolRegistry, ToolResultCache
 from oshell.tools.builtins import (
     CurrentTimeTool,
     ListDirTool,
@@ -80,3 +83,193 @@ def test_tool_exception_is_caught():
     reg = ToolRegistry([Boom()])
     out = reg.dispatch(ToolCall(name="boom", arguments={}))
     assert out.startswith("[error]") and "kaboom" in out
+
+
+# ── session result cache ─────────────────────────────────────────────────────
+class _Counting(CurrentTimeTool):
+    name = "counting"
+    cache = CachePolicy(ttl=60)
+
+    def __init__(self):
+        self.runs = 0
+
+    def run(self, q: str = "", **_):
+        self.runs += 1
+        if q == "bad":
+            raise ToolError("nope")
+        return f"{q}#{self.runs}"
+
+
+def _cached(*tools, **cache_kwargs):
+    return ToolRegistry(list(tools), cache=ToolResultCache(**cache_kwargs))
+
+
+def test_cache_reuses_results_keyed_by_arguments():
+    tool = _Counting()
+    reg = _cached(tool)
+    call = ToolCall(name="counting", arguments={"q": "a"})
+    assert reg.dispatch(call) == reg.dispatch(call) == "a#1"
+    assert reg.dispatch(ToolCall(name="counting", arguments={"q": "b"})) == "b#2"
+    assert reg.dispatch_full(call, fresh=True).text == "a#3"  # per-call bypass...
+    assert reg.dispatch(call) == "a#3"  # ...that refreshes the entry
+    counts = reg.cache.counts()["counting"]
+    assert (counts.hits, counts.misses) == (2, 2)
+
+
+def test_model_can_ask_for_a_fresh_result_through_the_agent():
+    tool = _Counting()
+    reg = _cached(tool, CurrentTimeTool())
+    fresh = {
+        s["function"]["name"]: "fresh" in s["function"]["parameters"]["properties"]
+        for s in reg.specs()
+    }
+    assert fresh == {"counting": True, "current_time": False}  # only cached tools offer it
+    asks = [{"q": "a"}, {"q": "a"}, {"q": "a", "fresh": True}, {"q": "a"}]
+    script = [
+        Reply("", [ToolCall(name="counting", arguments=a, id=f"c{i}")]) for i, a in enumerate(asks)
+    ]
+    agent = Agent(
+        ScriptedProvider([*script, Reply("Done.")]),
+        reg,
+        Config(project_context=False),
+        model="scripted",
+    )
+    results = [e.result for e in agent.send("go") if isinstance(e, ToolFinished)]
+    assert results == ["a#1", "a#1", "a#2", "a#2"]  # the flag never reaches the tool
+
+
+def test_cache_never_stores_errors_or_sensitive_tools():
+    tool = _Counting()
+    reg = _cached(tool)
+    bad = ToolCall(name="counting", arguments={"q": "bad"})
+    reg.dispatch(bad)
+    reg.dispatch(bad)
+    assert tool.runs == 2
+
+    class Sensitive(_Counting):
+        name = "sensitive"
+        sensitive = True
+
+    s = Sensitive()
+    reg = _cached(s)
+    reg.dispatch(ToolCall(name="sensitive", arguments={}))
+    reg.dispatch(ToolCall(name="sensitive", arguments={}))
+    assert s.runs == 2
+
+
+def test_cache_ttl_expires(monkeypatch):
+    import oshell.tools.cache as cache_mod
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+    tool = _Counting()
+    reg = _cached(tool)
+    call = ToolCall(name="counting", arguments={"q": "a"})
+    reg.dispatch(call)
+    now[0] += 59
+    assert reg.dispatch(call) == "a#1"
+    now[0] += 2
+    assert reg.dispatch(call) == "a#2"
+
+
+def test_read_file_cache_is_invalidated_by_edits(tmp_path):
+    target = tmp_path / "notes.txt"
+    target.write_text("v1")
+    reg = _cached(ReadFileTool(tmp_path), WriteFileTool(tmp_path))
+    read = ToolCall(name="read_file", arguments={"path": "notes.txt"})
+    assert reg.dispatch(read) == "v1"
+    assert reg.dispatch(read) == "v1"
+    target.write_text("version two")  # an edit from outside the registry
+    assert reg.dispatch(read) == "version two"
+    assert reg.cache.counts()["read_file"].hits == 1
+
+
+def test_cache_is_lru_bounded():
+    tool = _Counting()
+    reg = _cached(tool, max_entries=2)
+    for q in "abc":
+        reg.dispatch(ToolCall(name="counting", arguments={"q": q}))
+    assert len(reg.cache) == 2
+    reg.dispatch(ToolCall(name="counting", arguments={"q": "a"}))  # evicted -> runs again
+    assert tool.runs == 4
+
+
+def test_read_file_line_and_byte_ranges(tmp_path):
+    (tmp_path / "big.txt").write_text("".join(f"line {i}\n" for i in range(1, 101)))
+    reg = ToolRegistry([ReadFileTool(tmp_path)])
+
+    def read(**kw):
+        return reg.dispatch(ToolCall(name="read_file", arguments={"path": "big.txt", **kw}))
+
+    out = read(start_line=3, end_line=5)
+    assert out.startswith("line 3\nline 4\nline 5\n")
+    assert "lines 3-5; pass start_line=6" in out
+    assert read(start_line=99).rstrip() == "line 99\nline 100"  # to EOF: no footer
+    assert read(start_line=500).startswith("[error]")
+    out = read(offset=7, limit=7)
+    assert out.startswith("line 2\n") and "pass offset=14" in out
+
+
+def test_read_file_line_longer_than_cap_moves_to_byte_ranges(tmp_path):
+    from oshell.tools.builtins import _MAX_READ_BYTES
+
+    long = "x" * (_MAX_READ_BYTES + 10) + "\n"
+    (tmp_path / "min.txt").write_text(long + "short\n")
+    (tmp_path / "mid.txt").write_text("head\n" + long + "tail\n")
+    reg = ToolRegistry([ReadFileTool(tmp_path)])
+
+    def read(path, **kw):
+        return reg.dispatch(ToolCall(name="read_file", arguments={"path": path, **kw}))
+
+    out = read("min.txt", start_line=1)
+    assert out.startswith("x" * 100)
+    assert f"pass offset={_MAX_READ_BYTES} limit=" in out
+    assert "start_line=1" not in out
+    # The long line is line 2: not "fewer than 2 lines", and byte offsets
+    # count from the start of the file.
+    out = read("mid.txt", start_line=2)
+    assert not out.startswith("[error]")
+    assert f"pass offset={5 + _MAX_READ_BYTES} limit=" in out
+    assert read("mid.txt", start_line=3).startswith("tail")
+    assert read("mid.txt", start_line=4).startswith("[error]")
+
+
+class _Caps(LLMProvider):
+    name = "caps"
+
+    def __init__(self):
+        self.asked: list[str] = []
+
+    def list_models(self):
+        return ["text", "eyes"]
+
+    def chat(self, messages, **kw):
+        return iter(())
+
+    def capabilities(self, model):
+        self.asked.append(model)
+        return {"tools", "vision"} if model == "eyes" else {"tools"}
+
+
+def test_registry_builder_rebuilds_only_what_changed():
+    cfg = Config(mcp_servers={})
+    cfg.gui.enabled = True
+    provider = _Caps()
+    builder = RegistryBuilder(provider, cfg)
+    first = builder.build("text")
+    tools = {t.name: t for t in first.active()}
+    assert "screenshot" not in tools and "delegate_many" in tools
+
+    again = {t.name: t for t in builder.build("eyes").active()}  # a model switch
+    assert "screenshot" in again
+    assert again["run_command"] is tools["run_command"]  # same shell session
+    assert again["delegate"] is tools["delegate"]
+    builder.build("text")
+    builder.build("eyes")
+    assert provider.asked == ["text", "eyes"]  # capabilities looked up once per model
+
+    cfg.shell.timeout = 7  # a config change rebuilds just the group that reads it
+    changed = {t.name: t for t in builder.build("eyes").active()}
+    assert changed["run_command"] is not tools["run_command"]
+    assert changed["screenshot"] is again["screenshot"]
+    assert builder.build("text").selector is first.selector
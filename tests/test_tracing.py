@@ -0,0 +1,81 @@
+"""Tracing: spans around the turn, export as Chrome trace events, summaries."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from oshell import tracing
+from oshell.agent import Agent
+from oshell.cli import app
+from oshell.config import Config
+from oshell.providers.base import ChatChunk, TokenUsage, ToolCall
+from oshell.tools import ToolRegistry
+from oshell.tools.builtins import CurrentTimeTool
+from tests.test_agent import ScriptedProvider
+
+
+@pytest.fixture(autouse=True)
+def _no_leftover_tracer():
+    yield
+    tracing.stop()
+
+
+def test_span_is_a_shared_noop_when_tracing_is_off():
+    assert tracing.active() is None
+    with tracing.span("anything", size=1) as sp:
+        sp.set(more=2)
+    assert tracing.span("a") is tracing.span("b")
+
+
+def test_agent_turn_is_traced_end_to_end():
+    usage = TokenUsage(prompt_tokens=120, completion_tokens=8, prompt_seconds=0.1)
+    script = [
+        [ChatChunk(tool_calls=[ToolCall(name="current_time", arguments={})], done=True)],
+        [ChatChunk(content="It is now.", done=True, usage=usage)],
+    ]
+    agent = Agent(ScriptedProvider(script), ToolRegistry([CurrentTimeTool()]), Config())
+    tracer = tracing.start()
+    list(agent.send("time?"))
+    tracing.stop()
+    spans = [e for e in tracer.events() if e["ph"] == "X"]
+    names = [e["name"] for e in spans]
+    assert names.count("round") == 2 and names.count("provider.chat") == 2
+    assert {"turn", "tool:current_time"} <= set(names)
+    chat = [e for e in spans if e["name"] == "provider.chat"][-1]
+    assert chat["args"]["prompt_tokens"] == 120 and chat["args"]["model"] == agent.model
+    tool = next(e for e in spans if e["name"] == "tool:current_time")
+    assert tool["args"]["bytes"] > 0
+    turn = next(e for e in spans if e["name"] == "turn")
+    assert all(turn["ts"] <= e["ts"] <= turn["ts"] + turn["dur"] for e in spans)
+
+
+def _synthetic(path, fmt):
+    tracer = tracing.Tracer()
+    tracer.record("turn", "agent", 0, 100_000_000, {})  # 100 ms
+    tracer.record("provider.chat", "provider", 10_000_000, 70_000_000, {})  # 60 ms inside
+    tracer.record("tool:read_file", "tool", 75_000_000, 80_000_000, {})  # 5 ms inside
+    return tracer.write(path / f"t.{fmt}")
+
+
+@pytest.mark.parametrize("fmt", ["json", "jsonl"])
+def test_summarize_reports_self_time(tmp_path, fmt):
+    path = _synthetic(tmp_path, fmt)
+    if fmt == "json":
+        assert "traceEvents" in json.loads(path.read_text())
+    stats = {s.name: s for s in tracing.summarize([path, path])}  # two identical traces
+    assert stats["turn"].count == 2
+    assert stats["turn"].total_ms == pytest.approx(200)
+    assert stats["turn"].self_ms == pytest.approx(70)  # 2 × (100 - 60 - 5)
+    assert stats["provider.chat"].self_ms == pytest.approx(120)
+    assert next(iter(tracing.summarize([tmp_path]))).name == "provider.chat"  # biggest first
+
+
+def test_trace_summarize_command(tmp_path):
+    _synthetic(tmp_path, "json")
+    result = CliRunner().invoke(app, ["trace", "summarize", str(tmp_path), "--top", "2"])
+    assert result.exit_code == 0, result.output
+    assert "provider.chat" in result.output and "turn" in result.output
+    assert "tool:read_file" not in result.output  # cut by --top
@@ -0,0 +1,106 @@
+"""Pooled HTTP transport: one session per origin, retry config, timing stats."""
+
+from __future__ import annotations
+
+import pytest
+import requests
+
+from oshell.providers import OllamaProvider, OpenAICompatProvider
+from oshell.providers.transport import HTTPTransport, origin_of, transport_for, transport_stats
+
+
+class _Resp:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.closed = False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def close(self):
+        self.closed = True
+
+
+def test_origin_of_strips_path_and_normalises_case():
+    assert origin_of("HTTP://LocalHost:11434/api/chat?x=1") == "http://localhost:11434"
+
+
+def test_transport_shared_per_origin():
+    a = transport_for("http://pool-test:11434/api/chat")
+    b = transport_for("http://pool-test:11434/api/tags")
+    c = transport_for("http://pool-test:8080/v1")
+    assert a is b
+    assert a is not c
+
+
+def test_providers_on_same_host_share_a_pool():
+    one = OllamaProvider(host="http://shared-host:11434")
+    two = OllamaProvider(host="http://shared-host:11434/")
+    assert one._http is two._http
+    oa = OpenAICompatProvider(host="http://shared-host:11434/v1")
+    assert oa._http is one._http  # same origin, same keep-alive connections
+
+
+def test_adapter_pool_and_retry_config():
+    t = HTTPTransport("http://cfg-test", pool_size=3, retries=4, backoff=0.1)
+    adapter = t.session.get_adapter("http://cfg-test/api/chat")
+    assert adapter._pool_maxsize == 3
+    retry = adapter.max_retries
+    assert retry.connect == 4
+    assert retry.read == 0  # requests the server saw are never replayed
+    assert retry.backoff_factor == 0.1
+
+
+def test_stats_recorded_per_path(monkeypatch):
+    t = HTTPTransport("http://stats-test")
+    codes = iter([200, 200, 500])
+    monkeypatch.setattr(t.session, "request", lambda *a, **k: _Resp(next(codes)))
+    t.post("http://stats-test/api/chat")
+    t.post("http://stats-test/api/chat")
+    t.get("http://stats-test/api/tags")
+    stats = t.stats()
+    assert stats["/api/chat"].requests == 2
+    assert stats["/api/chat"].errors == 0
+    assert stats["/api/tags"].errors == 1  # HTTP 500 counts as an error
+    assert stats["/api/chat"].mean_seconds >= 0
+
+
+def test_connection_error_is_counted_and_reraised(monkeypatch):
+    t = HTTPTransport("http://down-test")
+
+    def boom(*a, **k):
+        raise requests.ConnectionError("refused")
+
+    monkeypatch.setattr(t.session, "request", boom)
+    with pytest.raises(requests.ConnectionError):
+        t.get("http://down-test/api/tags")
+    assert t.stats()["/api/tags"].errors == 1
+
+
+def test_transport_stats_sums_transports_sharing_an_origin(monkeypatch):
+    a = transport_for("http://merge-test:1/api/chat", pool_size=2)
+    b = transport_for("http://merge-test:1/api/chat", pool_size=5)
+    assert a is not b
+    for t in (a, b):
+        monkeypatch.setattr(t.session, "request", lambda *a, **k: _Resp(500))
+    a.post("http://merge-test:1/api/chat")
+    b.post("http://merge-test:1/api/chat")
+    b.post("http://merge-test:1/api/chat")
+    merged = transport_stats()["http://merge-test:1"]["/api/chat"]
+    assert merged.requests == 3 and merged.errors == 3
+
+
+@pytest.mark.parametrize(
+    "provider",
+    [
+        OllamaProvider(host="http://close-test:1"),
+        OpenAICompatProvider(host="http://close-test:2/v1"),
+    ],
+)
+def test_error_reply_is_closed(monkeypatch, provider):
+    resp = _Resp(503)
+    monkeypatch.setattr(provider._http.session, "request", lambda *a, **k: resp)
+    with pytest.raises(requests.HTTPError):
+        list(provider.chat([], model="m", stream=True))
+    assert resp.closed  # its connection goes back to the pool, not to GC
@@ -11,7 +11,13 @@ pytest.importorskip("textual")
 
 from oshell.agent import Agent  # noqa: E402
 from oshell.config import Config  # noqa: E402
-from oshell.providers.base import ChatChunk, LLMProvider, Message, ToolCall  # noqa: E402
+from oshell.providers.base import (  # noqa: E402
+    ChatChunk,
+    LLMProvider,
+    Message,
+    TokenUsage,
+    ToolCall,
+)
 from oshell.tools import ToolRegistry  # noqa: E402
 from oshell.tools.builtins import CurrentTimeTool  # noqa: E402
 from oshell.tui.app import ContextInspector, OllamaShellTUI, ToolsPanel  # noqa: E402
@@ -109,6 +115,36 @@ async def test_escape_opens_menu_then_closes():
         assert not isinstance(app.screen, MenuScreen)
 
 
+async def test_escape_stops_a_running_turn_instead_of_opening_the_menu():
+    from oshell.cancellation import Cancelled
+    from oshell.tui.menu import MenuScreen
+
+    class _Endless(_Scripted):
+        def chat(self, messages, cancel=None, **kwargs):
+            yield ChatChunk(content="half an ans")
+            cancel.wait(10)
+            raise Cancelled("closed")
+
+    app = OllamaShellTUI(
+        Agent(_Endless(), ToolRegistry([]), Config()), show_menu_on_start=False
+    )
+    async with app.run_test() as pilot:
+        app._send_prompt("go on", "go on")
+        for _ in range(60):
+            if app._stream:
+                break
+            await pilot.pause(0.05)
+        await pilot.press("escape")
+        for _ in range(60):
+            if not app._busy:
+                break
+            await pilot.pause(0.05)
+        assert not isinstance(app.screen, MenuScreen)
+        assert app.agent.messages[-1].content.startswith("half an ans")
+        assert app.agent.messages[-1].content.endswith("[interrupted by the user]")
+        assert app._last_reply == "half an ans"
+
+
 async def test_f2_still_opens_menu():
     # Hidden alternate binding for non-macOS keyboards.
     from oshell.tui.menu import MenuScreen
@@ -809,6 +845,22 @@ async def test_turn_stats_and_separator_rule():
         assert "─" in text  # the timestamped rule that opens the exchange
 
 
+def test_turn_stats_prefer_backend_rates():
+    import time as _time
+
+    app = _app()
+    usage = [
+        TokenUsage(900, 20, prompt_seconds=0.5, completion_seconds=0.5, load_seconds=2.0),
+        TokenUsage(100, 40, prompt_seconds=0.5, completion_seconds=1.0),
+    ]
+    t0 = _time.monotonic()
+    stats = app._turn_stats(t0, t0, 999, usage)
+    assert "40 tok/s" in stats and "prefill 1000 tok/s" in stats
+    assert "load 2.0s" in stats and "~" not in stats
+    # No usage reported -> the delta-count estimate.
+    assert "~" in app._turn_stats(t0 - 2, t0 - 1, 50)
+
+
 async def test_tool_heat_marks_used_tools():
     class _ToolThenText(LLMProvider):
         name = "tt"
@@ -844,6 +896,94 @@ async def test_tool_heat_marks_used_tools():
         assert "current_time ×1" in app.query_one(ToolsPanel).text  # heat in the panel
 
 
+async def test_tool_progress_streams_into_activity():
+    import time as _time
+
+    from textual.widgets import TabbedContent
+
+    from oshell.tools.base import Tool, report_progress
+
+    class _Build(Tool):
+        name = "build"
+        description = "build"
+
+        def run(self, **_):
+            report_progress("compiling [core]\nlinking\n")
+            _time.sleep(0.15)
+            return "built"
+
+    class _Calls(LLMProvider):
+        name = "c"
+
+        def __init__(self):
+            self.calls = 0
+
+        def list_models(self):
+            return ["m"]
+
+        def chat(self, messages, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                yield ChatChunk(tool_calls=[ToolCall(name="build", arguments={})], done=True)
+            else:
+                yield ChatChunk(content="Done.", done=True)
+
+    app = OllamaShellTUI(
+        Agent(_Calls(), ToolRegistry([_Build()]), Config(tool_progress_interval=0.02)),
+        show_menu_on_start=False,
+    )
+    async with app.run_test() as pilot:
+        app.query_one(TabbedContent).active = "tab-activity"
+        await pilot.pause()
+        inp = app.query_one("Input")
+        inp.focus()
+        inp.value = "build"
+        await pilot.pause()
+        await pilot.press("enter")
+        for _ in range(60):
+            await pilot.pause(0.05)
+            if not app._busy and "Done." in _convo_text(app):
+                break
+        activity = "\n".join("".join(seg.text for seg in ln) for ln in app._activity().lines)
+        assert "│ compiling [core]" in activity and "│ linking" in activity
+
+
+async def test_tools_panel_shows_cache_hits():
+    from oshell.tools import CachePolicy, ToolResultCache
+
+    class CachedTime(CurrentTimeTool):
+        cache = CachePolicy(ttl=60)
+
+    reg = ToolRegistry([CachedTime()], cache=ToolResultCache())
+    app = OllamaShellTUI(Agent(_Scripted(), reg, Config()), show_menu_on_start=False)
+    async with app.run_test():
+        for _ in range(3):
+            reg.dispatch(ToolCall(name="current_time", arguments={}))
+        panel = app.query_one(ToolsPanel)
+        panel.render_for(app.agent)
+        assert "current_time ↺2/3" in panel.text
+
+
+async def test_tools_panel_shows_tripped_breakers():
+    from oshell.config import ToolGuardConfig
+    from oshell.tools import ToolGuard
+
+    class Down(CurrentTimeTool):
+        local_only = False
+
+        def run(self, **_: Any) -> str:
+            raise RuntimeError("unreachable")
+
+    reg = ToolRegistry([Down()], guard=ToolGuard(ToolGuardConfig(failures=2)))
+    app = OllamaShellTUI(Agent(_Scripted(), reg, Config()), show_menu_on_start=False)
+    async with app.run_test():
+        for _ in range(2):
+            reg.dispatch(ToolCall(name="current_time", arguments={}))
+        panel = app.query_one(ToolsPanel)
+        panel.render_for(app.agent)
+        assert "current_time (open, 60s)" in panel.text
+
+
 async def test_context_gauge_shows_fill():
     app = _app()
     async with app.run_test():
@@ -4,8 +4,9 @@ from __future__ import annotations
 
 import pytest
 
+from oshell.config import ToolGuardConfig
 from oshell.providers.base import ToolCall
-from oshell.tools import ToolRegistry
+from oshell.tools import ToolGuard, ToolRegistry
 from oshell.tools.web import FetchUrlTool, extract_readable
 
 bs4 = pytest.importorskip("bs4")
@@ -91,3 +92,17 @@ def test_fetch_url_network_error_is_soft(monkeypatch):
     reg = ToolRegistry([FetchUrlTool()])
     out = reg.dispatch(ToolCall(name="fetch_url", arguments={"url": "https://example.com"}))
     assert out.startswith("[error]") and "could not fetch" in out
+
+
+def test_dead_links_do_not_trip_the_fetch_url_breaker(monkeypatch):
+    import requests
+
+    def _refused(*a, **k):
+        raise requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr("oshell.tools.web.requests.get", _refused)
+    reg = ToolRegistry([FetchUrlTool()], guard=ToolGuard(ToolGuardConfig(failures=2)))
+    for i in range(4):
+        url = f"https://dead-{i}.example"
+        assert "could not fetch" in reg.dispatch(ToolCall(name="fetch_url", arguments={"url": url}))
+    assert reg.guard.states() == {}  # one host being down says nothing about the next